@@ -0,0 +1,122 @@
+"""
+Paginação por cursor (keyset) das listagens.
+
+`offset` obriga o banco a percorrer e descartar todas as linhas das páginas
+anteriores: a página 1000 custa mil páginas. E a página "anda" quando entra
+registro novo no topo — quem está paginando vê a mesma linha duas vezes. O
+cursor guarda a chave da última linha entregue (`id`, ou `created_at` + `id`),
+e a próxima página começa por `WHERE chave < cursor`, que o índice resolve
+direto, a qualquer profundidade.
+
+O cursor é opaco para o cliente: JSON em base64 com a ordenação e a chave. Não
+é assinado porque não precisa ser — só vira parâmetro de um WHERE, e os filtros
+de permissão da rota continuam valendo sobre ele. Cursor adulterado ou de outra
+ordenação é 400, não 500.
+
+O próximo cursor vai no header `X-Next-Cursor`, e não no corpo: as listagens
+devolvem lista, e trocar a lista por um envelope quebraria todo cliente atual.
+Sem header = não há próxima página. `skip` continua aceito, para quem ainda
+pagina por offset.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence
+
+from fastapi import HTTPException, Query, Response, status
+
+CABECALHO_PROXIMO_CURSOR = "X-Next-Cursor"
+
+CURSOR = Query(
+    None,
+    description=(
+        "Cursor devolvido no header X-Next-Cursor da página anterior. "
+        "Não combinar com skip."
+    ),
+)
+
+
+def _para_json(valor: Any) -> Any:
+    if isinstance(valor, datetime):
+        return {"dt": valor.isoformat()}
+    return valor
+
+
+def _de_json(valor: Any, tipo: type) -> Any:
+    if valor is None:
+        return None
+    if tipo is datetime:
+        if not isinstance(valor, dict) or not isinstance(valor.get("dt"), str):
+            raise ValueError("data esperada")
+        return datetime.fromisoformat(valor["dt"])
+    # bool é subclasse de int; um `true` no lugar do id não é id.
+    if not isinstance(valor, tipo) or isinstance(valor, bool):
+        raise ValueError(f"{tipo.__name__} esperado")
+    return valor
+
+
+def codificar_cursor(ordem: str, chave: Sequence[Any]) -> str:
+    conteudo = json.dumps({"o": ordem, "k": [_para_json(v) for v in chave]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(conteudo.encode()).decode().rstrip("=")
+
+
+def ler_cursor(
+    cursor: Optional[str],
+    ordem: str,
+    tipos: Sequence[type],
+    skip: int = 0,
+    anulaveis: Sequence[int] = (),
+) -> Optional[List[Any]]:
+    """
+    Decodifica o cursor da requisição, ou devolve None se não veio.
+
+    `tipos` é o tipo de cada posição da chave; `anulaveis`, as posições que
+    podem ser NULL (ordenação por coluna opcional).
+    """
+    if cursor is None:
+        return None
+
+    if skip:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use cursor ou skip, não os dois",
+        )
+
+    try:
+        preenchido = cursor + "=" * (-len(cursor) % 4)
+        dados = json.loads(base64.urlsafe_b64decode(preenchido.encode()))
+        if not isinstance(dados, dict) or dados.get("o") != ordem:
+            raise ValueError("ordenação diferente")
+        chave = dados.get("k")
+        if not isinstance(chave, list) or len(chave) != len(tipos):
+            raise ValueError("chave com formato inesperado")
+        valores = []
+        for posicao, (valor, tipo) in enumerate(zip(chave, tipos)):
+            if valor is None and posicao not in anulaveis:
+                raise ValueError("chave nula")
+            valores.append(_de_json(valor, tipo))
+        return valores
+    except (ValueError, TypeError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido",
+        )
+
+
+def publicar_proximo_cursor(
+    response: Response,
+    linhas: Sequence[Any],
+    limit: int,
+    ordem: str,
+    chave: Callable[[Any], Sequence[Any]],
+) -> None:
+    """
+    Põe no header o cursor da próxima página, se houver.
+
+    Página incompleta é a última. Página completa pode ser a última também, e
+    aí o cliente faz uma requisição a mais que volta vazia, sem header — o
+    preço de não fazer `count(*)` a cada página.
+    """
+    if linhas and len(linhas) >= limit:
+        response.headers[CABECALHO_PROXIMO_CURSOR] = codificar_cursor(ordem, chave(linhas[-1]))
@@ -3,9 +3,11 @@ from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session, joinedload
+from app.core.cache_de_usuarios import UsuarioAutenticado, cache_de_usuarios
 from app.core.database import SessionLocal
 from app.core.security import decodificar_token
 from app.models.usuario import Usuario
+from app.services.carregador_de_nomes import CarregadorDeNomes
 
 # Nomes das roles como gravados na tabela `roles` (ver schema_chamados.sql).
 ROLE_ADMIN = "Administrador"
@@ -29,12 +31,27 @@ def get_db() -> Generator:
         db.close()
 
 
+def get_carregador_de_nomes(db: Session = Depends(get_db)) -> CarregadorDeNomes:
+    """
+    Carregador de nomes da requisição.
+
+    O FastAPI resolve uma dependência uma vez por requisição, então todos os
+    pontos de uma rota que pedem o carregador recebem a mesma instância — e
+    os nomes já lidos valem para o resto dela.
+    """
+    return CarregadorDeNomes(db)
+
+
 def get_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: Session = Depends(get_db)
-) -> Usuario:
+) -> UsuarioAutenticado:
     """
     Dependency que retorna o usuário autenticado a partir do token JWT
+
+    Devolve o `UsuarioAutenticado` do cache quando há, sem tocar no banco —
+    ver app/core/cache_de_usuarios.py para o que isso muda em "o banco é
+    autoritativo". Usuário inativo não é guardado: a recusa lê o banco sempre.
     """
     if credentials is None:
         raise HTTPException(
@@ -70,19 +87,24 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # joinedload da role: require_roles() lê current_user.role.nome em toda
-    # requisição protegida — sem isso seria uma query extra por request.
-    usuario = (
-        db.query(Usuario)
-        .options(joinedload(Usuario.role))
-        .filter(Usuario.id == user_id)
-        .first()
-    )
+    usuario, geracao = cache_de_usuarios.buscar(user_id)
     if usuario is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Usuário não encontrado"
+        # joinedload da role: require_roles() lê current_user.role.nome em toda
+        # requisição protegida — sem isso seria uma query extra por request.
+        registro = (
+            db.query(Usuario)
+            .options(joinedload(Usuario.role))
+            .filter(Usuario.id == user_id)
+            .first()
         )
+        if registro is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Usuário não encontrado"
+            )
+        usuario = UsuarioAutenticado.do_registro(registro)
+        if usuario.ativo:
+            cache_de_usuarios.guardar(usuario, geracao)
 
     if not usuario.ativo:
         raise HTTPException(
@@ -110,11 +132,12 @@ def require_roles(*nomes: str):
 
     A role vem do banco (current_user.role.nome), não da claim do JWT: a claim
     fica congelada até o token expirar, então rebaixar um administrador só
-    surtiria efeito na renovação. O banco é autoritativo na hora.
+    surtiria efeito na renovação. O banco é autoritativo na hora — a troca de
+    perfil pela API invalida o cache do usuário.
     """
     permitidos = {_normalizar_role(n) for n in nomes}
 
-    def _verificar(current_user: Usuario = Depends(get_current_user)) -> Usuario:
+    def _verificar(current_user: UsuarioAutenticado = Depends(get_current_user)) -> UsuarioAutenticado:
         atual = _normalizar_role(current_user.role.nome if current_user.role else None)
         if atual not in permitidos:
             raise HTTPException(
@@ -130,10 +153,10 @@ require_admin = require_roles(ROLE_ADMIN)
 require_staff = require_roles(ROLE_ADMIN, ROLE_TECNICO)
 
 
-def is_admin(usuario: Usuario) -> bool:
+def is_admin(usuario: UsuarioAutenticado) -> bool:
     return _normalizar_role(usuario.role.nome if usuario.role else None) == _normalizar_role(ROLE_ADMIN)
 
 
-def is_staff(usuario: Usuario) -> bool:
+def is_staff(usuario: UsuarioAutenticado) -> bool:
     atual = _normalizar_role(usuario.role.nome if usuario.role else None)
     return atual in {_normalizar_role(ROLE_ADMIN), _normalizar_role(ROLE_TECNICO)}
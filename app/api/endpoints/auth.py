@@ -4,10 +4,11 @@ from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from datetime import timedelta
 
-from app.api.deps import get_db, get_current_user, require_admin
-from app.core.rate_limit import JanelaDeslizante
+from app.api.deps import get_db, get_current_user, require_admin, UsuarioAutenticado
+from app.core.cache_de_usuarios import cache_de_usuarios
+from app.core.rate_limit import JanelaDeslizante, criar_armazenamento
+from app.core.rede import ip_do_cliente
 from app.models.usuario import Usuario
-from app.models.role import Role
 from app.schemas.auth import (
     LoginRequest,
     TokenResponse,
@@ -15,8 +16,14 @@ from app.schemas.auth import (
     AlterarSenhaRequest,
     UsuarioLogado
 )
-from app.core.security import verificar_senha, gerar_hash_senha, criar_token_acesso
+from app.core.security import (
+    criar_token_acesso,
+    gerar_hash_senha,
+    verificar_e_atualizar_senha,
+    verificar_senha,
+)
 from app.core.config import settings
+from app.services.cache_de_referencia import nome_da_role
 from app.services.evento_conta_service import (
     instantaneo,
     registrar_alteracoes,
@@ -31,37 +38,19 @@ logger = logging.getLogger(__name__)
 # aceitava tentativas ilimitadas. Os dois limitadores são complementares: o
 # por usuário resiste a ataque distribuído, em que o IP muda a cada tentativa;
 # o por IP contém a varredura de muitos usuários a partir de uma origem só.
+# Onde a contagem mora (processo ou banco) vem de LOGIN_LIMITE_ARMAZENAMENTO.
 _falhas_por_usuario = JanelaDeslizante(
     max_eventos=settings.LOGIN_MAX_FALHAS_POR_USUARIO,
     janela_segundos=settings.LOGIN_JANELA_SEGUNDOS,
+    armazenamento=criar_armazenamento(settings.LOGIN_LIMITE_ARMAZENAMENTO, "login_usuario"),
 )
 _falhas_por_ip = JanelaDeslizante(
     max_eventos=settings.LOGIN_MAX_FALHAS_POR_IP,
     janela_segundos=settings.LOGIN_JANELA_SEGUNDOS,
+    armazenamento=criar_armazenamento(settings.LOGIN_LIMITE_ARMAZENAMENTO, "login_ip"),
 )
 
 
-def _ip_do_cliente(request: Request) -> str:
-    """
-    IP real do cliente, considerando os proxies confiáveis à frente.
-
-    Lê X-Forwarded-For de trás para frente: o último elemento foi escrito pelo
-    proxy mais próximo da aplicação e não é falsificável, enquanto o primeiro
-    veio do cliente. Ver PROXY_HOPS_CONFIAVEIS em config.py.
-    """
-    hops = settings.PROXY_HOPS_CONFIAVEIS
-
-    if hops > 0:
-        encaminhado = request.headers.get("x-forwarded-for")
-        if encaminhado:
-            partes = [p.strip() for p in encaminhado.split(",") if p.strip()]
-            if partes:
-                indice = max(0, len(partes) - hops)
-                return partes[indice]
-
-    return request.client.host if request.client else "desconhecido"
-
-
 def _chave_usuario(nome: str) -> str:
     # O login é case-insensitive (Usuario.nome.ilike), então a contagem também
     # precisa ser, senão alternar a caixa multiplicaria as tentativas.
@@ -77,7 +66,7 @@ def login(request: Request, credentials: LoginRequest, db: Session = Depends(get
     um por usuário e outro por IP de origem. Ver config.py para os limites.
     """
     chave_usuario = _chave_usuario(credentials.nome)
-    ip = _ip_do_cliente(request)
+    ip = ip_do_cliente(request)
 
     # A verificação vem antes de qualquer consulta ao banco: além de proteger a
     # senha, evita que a tentativa bloqueada ainda custe I/O e um hash bcrypt.
@@ -125,21 +114,32 @@ def login(request: Request, credentials: LoginRequest, db: Session = Depends(get
         )
 
     # Verificar senha
-    if not usuario.senha_hash or not verificar_senha(credentials.senha, usuario.senha_hash):
+    confere, hash_novo = (
+        verificar_e_atualizar_senha(credentials.senha, usuario.senha_hash)
+        if usuario.senha_hash else (False, None)
+    )
+    if not confere:
         _registrar_falha()
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuário ou senha incorretos"
         )
 
+    # Hash com custo diferente de BCRYPT_ROUNDS: regravado agora, que a senha
+    # em texto está à mão. Não é troca de senha — a senha é a mesma —, então
+    # não entra na trilha de eventos da conta.
+    if hash_novo:
+        usuario.senha_hash = hash_novo
+        db.commit()
+        logger.info("hash de senha regravado com o custo atual: usuario_id=%s", usuario.id)
+
     # Credencial correta: zera as contagens para não punir quem só errou a
     # senha algumas vezes antes de acertar.
     _falhas_por_usuario.limpar(chave_usuario)
     _falhas_por_ip.limpar(ip)
 
-    # Buscar role do usuário
-    role = db.query(Role).filter(Role.id == usuario.role_id).first()
-    role_nome = role.nome if role else "Usuario"
+    # Nome da role: do cache de referência, sem consulta na maioria das vezes
+    role_nome = nome_da_role(db, usuario.role_id) or "Usuario"
 
     # Criar token JWT
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -160,7 +160,7 @@ def login(request: Request, credentials: LoginRequest, db: Session = Depends(get
 @router.post("/registro", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
 def registrar_usuario(
     usuario_data: UsuarioCreate,
-    admin: Usuario = Depends(require_admin),
+    admin: UsuarioAutenticado = Depends(require_admin),
     db: Session = Depends(get_db),
 ):
     """
@@ -203,9 +203,8 @@ def registrar_usuario(
     db.commit()
     db.refresh(novo_usuario)
 
-    # Buscar role do usuário
-    role = db.query(Role).filter(Role.id == novo_usuario.role_id).first()
-    role_nome = role.nome if role else "Usuario"
+    # Nome da role: do cache de referência, sem consulta na maioria das vezes
+    role_nome = nome_da_role(db, novo_usuario.role_id) or "Usuario"
 
     # Criar token JWT
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -224,7 +223,7 @@ def registrar_usuario(
 
 
 @router.get("/me", response_model=UsuarioLogado)
-def obter_usuario_logado(current_user: Usuario = Depends(get_current_user)):
+def obter_usuario_logado(current_user: UsuarioAutenticado = Depends(get_current_user)):
     """
     Retorna informações do usuário logado
     """
@@ -240,22 +239,26 @@ def obter_usuario_logado(current_user: Usuario = Depends(get_current_user)):
 @router.post("/alterar-senha")
 def alterar_senha(
     dados: AlterarSenhaRequest,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: UsuarioAutenticado = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Altera a senha do usuário logado
     """
+    # A linha, não o usuário da requisição: este não tem o hash da senha nem
+    # está preso à sessão (ver app/core/cache_de_usuarios.py).
+    usuario = db.get(Usuario, current_user.id)
+
     # Verificar senha atual
-    if not current_user.senha_hash or not verificar_senha(dados.senha_atual, current_user.senha_hash):
+    if not usuario.senha_hash or not verificar_senha(dados.senha_atual, usuario.senha_hash):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Senha atual incorreta"
         )
 
     # Atualizar senha
-    antes = instantaneo(current_user)
-    current_user.senha_hash = gerar_hash_senha(dados.senha_nova)
+    antes = instantaneo(usuario)
+    usuario.senha_hash = gerar_hash_senha(dados.senha_nova)
     # Ator e alvo são a mesma conta. O que classifica o evento em auditoria,
     # porém, é a `origem`, e NÃO `ator_id == usuario_id`: o botão de resetar
     # senha da aba de Usuários aparece também na linha do próprio
@@ -267,25 +270,25 @@ def alterar_senha(
     # administrador"). Só a rota separa as duas.
     registrar_alteracoes(
         db,
-        usuario=current_user,
+        usuario=usuario,
         antes=antes,
         ator=current_user,
         origem="POST /api/v1/auth/alterar-senha",
         senha_alterada=True,
     )
     db.commit()
+    cache_de_usuarios.invalidar(usuario.id)
 
     return {"message": "Senha alterada com sucesso"}
 
 
 @router.post("/refresh", response_model=TokenResponse)
-def refresh_token(current_user: Usuario = Depends(get_current_user), db: Session = Depends(get_db)):
+def refresh_token(current_user: UsuarioAutenticado = Depends(get_current_user), db: Session = Depends(get_db)):
     """
     Renova o token JWT do usuário logado
     """
-    # Buscar role do usuário
-    role = db.query(Role).filter(Role.id == current_user.role_id).first()
-    role_nome = role.nome if role else "Usuario"
+    # Nome da role: do cache de referência, sem consulta na maioria das vezes
+    role_nome = nome_da_role(db, current_user.role_id) or "Usuario"
 
     # Criar novo token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -2,11 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.api.deps import get_db, require_staff
+from app.api.deps import get_db, require_staff, UsuarioAutenticado
 from app.models.categoria import Categoria
 from app.models.chamado import Chamado
-from app.models.usuario import Usuario
 from app.schemas.categoria import CategoriaCreate, CategoriaUpdate, CategoriaResponse
+from app.services import cache_de_referencia
+from app.services.cache_de_referencia import CATEGORIAS, registrar_alteracao
 
 router = APIRouter()
 
@@ -20,13 +21,14 @@ def listar_categorias(
 ):
     """
     Lista todas as categorias
+
+    Sai do cache de referência: o formulário de chamado carrega a lista toda
+    vez que abre, e a tabela muda poucas vezes por ano.
     """
-    query = db.query(Categoria)
+    categorias = cache_de_referencia.categorias(db)
     if ativo is not None:
-        query = query.filter(Categoria.ativo == ativo)
-
-    categorias = query.offset(skip).limit(limit).all()
-    return categorias
+        categorias = [c for c in categorias if c.ativo == ativo]
+    return categorias[skip:skip + limit]
 
 
 @router.get("/{categoria_id}", response_model=CategoriaResponse)
@@ -34,16 +36,16 @@ def buscar_categoria(categoria_id: int, db: Session = Depends(get_db)):
     """
     Busca uma categoria específica por ID
     """
-    categoria = db.query(Categoria).filter(Categoria.id == categoria_id).first()
-    if not categoria:
-        raise HTTPException(status_code=404, detail="Categoria não encontrada")
-    return categoria
+    for categoria in cache_de_referencia.categorias(db):
+        if categoria.id == categoria_id:
+            return categoria
+    raise HTTPException(status_code=404, detail="Categoria não encontrada")
 
 
 @router.post("/", response_model=CategoriaResponse, status_code=status.HTTP_201_CREATED)
 def criar_categoria(
     categoria_data: CategoriaCreate,
-    _autor: Usuario = Depends(require_staff),
+    _autor: UsuarioAutenticado = Depends(require_staff),
     db: Session = Depends(get_db),
 ):
     """
@@ -51,6 +53,7 @@ def criar_categoria(
     """
     categoria = Categoria(**categoria_data.model_dump())
     db.add(categoria)
+    registrar_alteracao(db, CATEGORIAS)
     db.commit()
     db.refresh(categoria)
     return categoria
@@ -60,7 +63,7 @@ def criar_categoria(
 def atualizar_categoria(
     categoria_id: int,
     categoria_data: CategoriaUpdate,
-    _autor: Usuario = Depends(require_staff),
+    _autor: UsuarioAutenticado = Depends(require_staff),
     db: Session = Depends(get_db),
 ):
     """
@@ -74,6 +77,7 @@ def atualizar_categoria(
     for field, value in update_data.items():
         setattr(categoria, field, value)
 
+    registrar_alteracao(db, CATEGORIAS)
     db.commit()
     db.refresh(categoria)
     return categoria
@@ -82,7 +86,7 @@ def atualizar_categoria(
 @router.delete("/{categoria_id}", status_code=status.HTTP_204_NO_CONTENT)
 def deletar_categoria(
     categoria_id: int,
-    _autor: Usuario = Depends(require_staff),
+    _autor: UsuarioAutenticado = Depends(require_staff),
     db: Session = Depends(get_db),
 ):
     """
@@ -103,5 +107,6 @@ def deletar_categoria(
         )
 
     db.delete(categoria)
+    registrar_alteracao(db, CATEGORIAS)
     db.commit()
     return None
@@ -1,39 +1,69 @@
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, select
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Iterator, List, Literal, Optional
 from datetime import datetime
 
+from app.api.cursor import CURSOR, ler_cursor, publicar_proximo_cursor
 from app.api.deps import (
+    get_carregador_de_nomes,
     get_current_user,
     get_db,
     is_admin,
     is_staff,
     require_admin,
     require_staff,
+    UsuarioAutenticado,
 )
 from app.models.chamado import Chamado
 from app.models.usuario import Usuario
 from app.models.historico import HistoricoChamado
-from app.models.sla_config import SLAConfig
 from app.schemas.chamado import (
     ChamadoAvaliacao,
     ChamadoCreate,
     ChamadoResponse,
     ChamadoUpdate,
+    CelulaDoResumo,
+    ContagemPorTecnico,
+    OrdenacaoChamadosEnum,
+    ResumoChamadosResponse,
     StatusEnum,
 )
-from app.services.chamado_service import gerar_protocolo, registrar_historico, calcular_tempo_resolucao
-from app.services.sla_service import calcular_sla
-from app.services.webhook_service import enviar_webhook_tecnico
+from app.schemas.sla import SituacaoSLAEnum
+from app.services.cache_de_referencia import config_de_sla, configs_de_sla
+from app.services import busca_service, exportacao_service, resumo_service
+from app.services.agendador_de_prazos import agendador_de_prazos, prazos_do_chamado
+from app.services.carregador_de_nomes import CarregadorDeNomes
+from app.services.chamado_service import (
+    abrir_chamado,
+    calcular_tempo_resolucao,
+    carimbar,
+    historicos_gravados,
+    registrar_historico,
+)
+from app.services.sla_service import (
+    atualizar_prazos,
+    calcular_sla,
+    filtro_de_situacao,
+    reconstruir_snapshot,
+    sla_do_snapshot,
+)
+from app.services.webhook_service import enfileirar_webhook_tecnico
 from app.utils.timezone import agora_brasilia
 
 router = APIRouter()
 
 logger = logging.getLogger(__name__)
 
+# Chamados por lote na exportação: o que o cursor do servidor entrega por vez,
+# o que recebe SLA e nomes junto, e o que vira um pedaço da resposta. É também
+# o teto de chamados em memória durante a exportação inteira.
+LOTE_DA_EXPORTACAO = 500
+
 # Parâmetro `usuario_id` depreciado.
 #
 # Estes endpoints recebiam o autor da ação como query parameter, ou seja, o
@@ -49,7 +79,7 @@ USUARIO_ID_DEPRECIADO = Query(
 )
 
 
-def _avisar_usuario_id_depreciado(endpoint: str, usuario_id: Optional[int], atual: Usuario) -> None:
+def _avisar_usuario_id_depreciado(endpoint: str, usuario_id: Optional[int], atual: UsuarioAutenticado) -> None:
     # A condição é apenas `is not None`, de propósito.
     #
     # Antes havia também `usuario_id != atual.id`, e isso tornava o aviso
@@ -113,66 +143,134 @@ def _anexar_sla(chamados: List[Chamado], db: Session) -> List[Chamado]:
     """
     Calcula e anexa o bloco `sla` a cada chamado.
 
-    Duas queries no total (configs + históricos de todos os chamados de uma vez),
-    para não cair em N+1 na listagem.
-
-    Resiliente à ausência da tabela `sla_configs` (ex.: migração ainda não
-    rodou em produção): se a query falhar, trata como "sem configs" em vez de
-    derrubar o endpoint inteiro — o chamado é devolvido normalmente, só sem
-    bloco de SLA (ver `calcular_sla`: sem config, o chamado não tem SLA e o
-    campo vai `None`, nunca um falso "No prazo").
+    Chamado com snapshot (`sla_calculado_em` preenchido) só aplica o relógio
+    sobre as colunas gravadas — sem histórico. Os anteriores ao snapshot, até
+    passarem pelo recálculo, seguem pelo cálculo completo: uma query de
+    históricos só para eles, de uma vez, para não cair em N+1. Depois do
+    recálculo em lote (app/comandos/recalcular_sla.py) essa query some.
+
+    A leitura não grava o snapshot dos legados. GET que escreve no banco
+    transformaria toda listagem numa transação de escrita, concorrendo com a
+    edição do próprio chamado.
+
+    As configs vêm do cache de referência. Resiliente à ausência da tabela
+    `sla_configs` (ex.: migração ainda não rodou em produção): se a query
+    falhar, trata como "sem configs" em vez de derrubar o endpoint inteiro — o
+    chamado é devolvido normalmente, só sem bloco de SLA (ver `calcular_sla`:
+    sem config, o chamado não tem SLA e o campo vai `None`, nunca um falso
+    "No prazo").
     """
     if not chamados:
         return chamados
 
     try:
-        configs = {c.prioridade: c for c in db.query(SLAConfig).all()}
+        configs = configs_de_sla(db)
     except SQLAlchemyError:
         db.rollback()  # sem isso, a próxima query nesta sessão estoura PendingRollbackError
         configs = {}
 
-    ids = [c.id for c in chamados]
-    historicos_por_chamado: dict[int, list] = {i: [] for i in ids}
-    historicos = (
-        db.query(HistoricoChamado)
-        .filter(HistoricoChamado.chamado_id.in_(ids))
-        .all()
-    )
-    for h in historicos:
-        historicos_por_chamado[h.chamado_id].append(h)
+    legados = [c.id for c in chamados if c.sla_calculado_em is None and configs.get(c.prioridade)]
+    historicos_por_chamado: dict[int, list] = {i: [] for i in legados}
+    if legados:
+        historicos = (
+            db.query(HistoricoChamado)
+            .filter(HistoricoChamado.chamado_id.in_(legados))
+            .all()
+        )
+        for h in historicos:
+            historicos_por_chamado[h.chamado_id].append(h)
 
+    # Um "agora" só para a página inteira: dois chamados idênticos não podem
+    # sair com percentuais diferentes por terem sido calculados em instantes
+    # diferentes.
+    agora = agora_brasilia()
     for chamado in chamados:
         cfg = configs.get(chamado.prioridade)
-        chamado.sla = (
-            calcular_sla(
+        if cfg is None:
+            chamado.sla = None
+        elif chamado.sla_calculado_em is not None:
+            chamado.sla = sla_do_snapshot(chamado, cfg, agora)
+        else:
+            chamado.sla = calcular_sla(
                 chamado=chamado,
                 historicos=historicos_por_chamado.get(chamado.id, []),
                 config=cfg,
+                agora=agora,
             )
-            if cfg
-            else None
-        )
 
     return chamados
 
 
-@router.get("/", response_model=List[ChamadoResponse])
-def listar_chamados(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=500),
-    status: str = None,
-    solicitante_id: int = None,
-    tecnico_id: int = None,
-    incluir_cancelados: bool = False,
-    incluir_arquivados: bool = False,
-    db: Session = Depends(get_db)
-):
+def _anexar_nomes(chamados: List[Chamado], nomes: CarregadorDeNomes) -> List[Chamado]:
+    """Nomes de solicitante e técnico da página inteira, numa consulta só."""
+    nomes.anexar(
+        chamados,
+        solicitante_nome="solicitante_id",
+        tecnico_responsavel_nome="tecnico_responsavel_id",
+    )
+    return chamados
+
+
+def _concluir_escrita(db: Session, chamado: Chamado) -> ChamadoResponse:
     """
-    Lista todos os chamados com filtros opcionais.
-    Por padrão, exclui chamados cancelados e arquivados.
+    Fecha uma escrita de chamado: SLA da memória, resposta montada, um commit.
+
+    Antes cada escrita comitava a mudança, relia o chamado (`refresh`),
+    comitava de novo o histórico e, para responder, relia o chamado expirado
+    pelo commit, todas as configs de SLA e — em chamado legado — o histórico
+    inteiro. Agora a mudança e o histórico saem num flush só, o bloco `sla`
+    vem do snapshot que acabou de ser avançado em memória, e a resposta é
+    montada ANTES do commit, porque depois dele o ORM expira a instância e
+    qualquer leitura de atributo volta ao banco.
+
+    A config vem do cache de referência, sem consulta. Os nomes de
+    solicitante e técnico, e os comentários para o documento de busca quando
+    o texto mudou, são lidos antes do flush — a sessão não tem autoflush,
+    então a consulta não empurra a escrita para o meio dela. O documento é
+    gravado depois do flush, que é quando o chamado novo tem id. Os
+    contadores do painel também: o que mudou na chave vem do histórico dos
+    atributos, que o flush apaga, e a soma vai depois dele.
+
+    Os prazos de SLA vão para o agendador de avisos só depois do commit —
+    antes, a thread poderia reler o chamado e não ver a mudança —, mas são
+    lidos antes dele, pelo mesmo motivo da resposta.
+
+    Chamado legado (sem snapshot) ganha o snapshot aqui. A restrição de não
+    gravar em GET não se aplica: isto já é uma escrita, e é a última vez que
+    esse chamado precisa ler o histórico.
     """
-    query = db.query(Chamado)
+    config = config_de_sla(db, chamado.prioridade)
+    if config is not None and chamado.sla_calculado_em is None:
+        reconstruir_snapshot(
+            chamado, historicos_gravados(db, chamado), config, agora=agora_brasilia().replace(tzinfo=None)
+        )
 
+    _anexar_nomes([chamado], CarregadorDeNomes(db))
+    documento = busca_service.documento_se_mudou(db, chamado)
+    contadores = resumo_service.variacoes(chamado)
+    db.flush()
+    if documento is not None:
+        busca_service.gravar(db, chamado.id, documento)
+    resumo_service.aplicar(db, contadores)
+    chamado.sla = sla_do_snapshot(chamado, config, agora_brasilia()) if config is not None else None
+    resposta = ChamadoResponse.model_validate(chamado)
+    prazos = prazos_do_chamado(chamado)
+    db.commit()
+    agendador_de_prazos.agendar(prazos)
+    return resposta
+
+
+def _filtrar_chamados(
+    query,
+    *,
+    status: Optional[str],
+    solicitante_id: Optional[int],
+    tecnico_id: Optional[int],
+    incluir_cancelados: bool,
+    incluir_arquivados: bool,
+    sla_situacao: Optional[SituacaoSLAEnum],
+):
+    """Filtros comuns da listagem e da exportação (`Query` ou `select`)."""
     # Filtros padrão para excluir cancelados e arquivados
     if not incluir_cancelados:
         query = query.filter(Chamado.cancelado == False)
@@ -186,27 +284,279 @@ def listar_chamados(
     if tecnico_id:
         query = query.filter(Chamado.tecnico_responsavel_id == tecnico_id)
 
+    if sla_situacao:
+        # Naive-Brasília, como as colunas: comparar com aware faria o driver
+        # converter o instante e deslocar a fronteira em três horas.
+        agora = agora_brasilia().replace(tzinfo=None)
+        query = query.filter(filtro_de_situacao(sla_situacao.value, agora))
+
+    return query
+
+
+@router.get("/", response_model=List[ChamadoResponse])
+def listar_chamados(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    status: str = None,
+    solicitante_id: int = None,
+    tecnico_id: int = None,
+    incluir_cancelados: bool = False,
+    incluir_arquivados: bool = False,
+    sla_situacao: Optional[SituacaoSLAEnum] = Query(
+        None,
+        description="Só chamados nesta situação de SLA, calculada no banco agora.",
+    ),
+    ordenar: OrdenacaoChamadosEnum = Query(
+        OrdenacaoChamadosEnum.ID,
+        description="id (mais recente primeiro) | prazo_resolucao (mais urgente primeiro)",
+    ),
+    cursor: Optional[str] = CURSOR,
+    db: Session = Depends(get_db),
+    nomes: CarregadorDeNomes = Depends(get_carregador_de_nomes),
+):
+    """
+    Lista todos os chamados com filtros opcionais.
+    Por padrão, exclui chamados cancelados e arquivados.
+
+    `sla_situacao` e `ordenar=prazo_resolucao` são resolvidos no banco, pelas
+    colunas do snapshot de SLA (ver sla_service) — a fila de estourados não
+    depende de baixar a tabela. Chamado ainda sem snapshot não aparece no
+    filtro por situação e vai para o fim na ordenação por prazo, até passar por
+    app/comandos/recalcular_sla.py.
+
+    Para paginar fundo, use `cursor` (header X-Next-Cursor da página anterior)
+    em vez de `skip`: a chave é a da ordenação pedida, e o cursor de uma
+    ordenação não vale na outra.
+    """
+    query = _filtrar_chamados(
+        db.query(Chamado),
+        status=status,
+        solicitante_id=solicitante_id,
+        tecnico_id=tecnico_id,
+        incluir_cancelados=incluir_cancelados,
+        incluir_arquivados=incluir_arquivados,
+        sla_situacao=sla_situacao,
+    )
+
     # Ordem determinística: sem ela o Postgres não garante a mesma sequência
     # entre páginas, e o skip/limit repetiria ou puliria registros.
-    chamados = query.order_by(Chamado.id.desc()).offset(skip).limit(limit).all()
-    return _anexar_sla(chamados, db)
+    if ordenar == OrdenacaoChamadosEnum.PRAZO_RESOLUCAO:
+        chave = ler_cursor(cursor, ordenar.value, (datetime, int), skip, anulaveis=(0,))
+        if chave:
+            prazo, ultimo_id = chave
+            if prazo is None:
+                # Já no bloco dos sem prazo, que vem por último.
+                query = query.filter(Chamado.sla_prazo_resolucao.is_(None), Chamado.id > ultimo_id)
+            else:
+                query = query.filter(or_(
+                    Chamado.sla_prazo_resolucao > prazo,
+                    and_(Chamado.sla_prazo_resolucao == prazo, Chamado.id > ultimo_id),
+                    Chamado.sla_prazo_resolucao.is_(None),
+                ))
+        query = query.order_by(Chamado.sla_prazo_resolucao.asc().nulls_last(), Chamado.id.asc())
+        chave_da_linha = lambda c: (c.sla_prazo_resolucao, c.id)  # noqa: E731
+    else:
+        chave = ler_cursor(cursor, ordenar.value, (int,), skip)
+        if chave:
+            query = query.filter(Chamado.id < chave[0])
+        query = query.order_by(Chamado.id.desc())
+        chave_da_linha = lambda c: (c.id,)  # noqa: E731
+
+    chamados = query.offset(skip).limit(limit).all()
+    publicar_proximo_cursor(response, chamados, limit, ordenar.value, chave_da_linha)
+    return _anexar_nomes(_anexar_sla(chamados, db), nomes)
+
+
+def _lotes_exportados(db: Session, consulta, formato: str) -> Iterator[str]:
+    """
+    Corpo da exportação, um pedaço de texto por lote.
+
+    `yield_per` faz o ORM buscar LOTE_DA_EXPORTACAO linhas por vez e, no
+    Postgres, liga `stream_results`: o psycopg2 usa um cursor do lado do
+    servidor, e o resultado não é baixado inteiro antes da primeira linha.
+    Cada lote recebe SLA e nomes (com as consultas em lote de sempre), é
+    serializado e sai do identity map antes do próximo.
+
+    A sessão é fechada aqui, e não pela dependência: desde o FastAPI 0.106 o
+    `finally` do `get_db` roda quando o handler retorna — antes do corpo
+    começar a ser enviado. A partir daí quem usa a sessão é este gerador, e é
+    ele que a devolve ao pool, inclusive quando o cliente desiste no meio.
+    """
+    nomes = CarregadorDeNomes(db)
+    try:
+        if formato == exportacao_service.FORMATO_CSV:
+            # Sai antes da consulta: o primeiro byte não espera o banco.
+            yield exportacao_service.cabecalho_csv()
+            serializar = exportacao_service.lote_csv
+        else:
+            serializar = exportacao_service.lote_ndjson
+
+        resultado = db.execute(consulta.execution_options(yield_per=LOTE_DA_EXPORTACAO))
+        for lote in resultado.scalars().partitions():
+            _anexar_nomes(_anexar_sla(lote, db), nomes)
+            yield serializar(lote)
+            # Um a um, e não `expunge_all`: este troca o identity map, e o
+            # resultado em curso continua carregando no antigo.
+            for chamado in lote:
+                db.expunge(chamado)
+    finally:
+        db.close()
+
+
+@router.get("/exportar")
+def exportar_chamados(
+    formato: Literal["ndjson", "csv"] = Query(
+        exportacao_service.FORMATO_NDJSON,
+        description="ndjson (um chamado JSON por linha) | csv",
+    ),
+    status: str = None,
+    solicitante_id: int = None,
+    tecnico_id: int = None,
+    incluir_cancelados: bool = False,
+    incluir_arquivados: bool = False,
+    sla_situacao: Optional[SituacaoSLAEnum] = None,
+    _staff: UsuarioAutenticado = Depends(require_staff),
+    db: Session = Depends(get_db),
+):
+    """
+    Todos os chamados que atendem aos filtros, num corpo só, em streaming.
+    Restrito a administrador ou técnico.
+
+    Para os relatórios mensais, que paginavam `GET /chamados/` de 500 em 500 —
+    batendo no teto de `limit` e pagando o offset a cada página. Aqui não há
+    página nem teto: o corpo é gerado enquanto é lido, com memória constante,
+    na ordem de id. Filtros iguais aos da listagem.
+
+    Cada linha tem o formato de `ChamadoResponse`, com o bloco `sla` e os
+    nomes de solicitante e técnico. No CSV, o `sla` vira colunas `sla_*`.
+
+    Declarada antes de `/{chamado_id}`: depois dela, "exportar" seria lido
+    como id e a rota viraria 422.
+    """
+    consulta = _filtrar_chamados(
+        select(Chamado),
+        status=status,
+        solicitante_id=solicitante_id,
+        tecnico_id=tecnico_id,
+        incluir_cancelados=incluir_cancelados,
+        incluir_arquivados=incluir_arquivados,
+        sla_situacao=sla_situacao,
+    ).order_by(Chamado.id)
+
+    return StreamingResponse(
+        _lotes_exportados(db, consulta, formato),
+        media_type=exportacao_service.TIPOS_DE_CONTEUDO[formato],
+        headers={"Content-Disposition": f'attachment; filename="chamados.{formato}"'},
+    )
+
+
+@router.get("/busca", response_model=List[ChamadoResponse])
+def buscar_chamados_por_texto(
+    q: str = Query(..., min_length=2, max_length=200, description="Texto a procurar"),
+    limit: int = Query(50, ge=1, le=200),
+    incluir_cancelados: bool = False,
+    incluir_arquivados: bool = False,
+    _staff: UsuarioAutenticado = Depends(require_staff),
+    db: Session = Depends(get_db),
+    nomes: CarregadorDeNomes = Depends(get_carregador_de_nomes),
+):
+    """
+    Chamados cujo título, descrição, solução ou comentários casam com `q`, do
+    mais relevante para o menos. Restrito a administrador ou técnico.
+
+    Protocolo ou título começando por `q` vem primeiro; depois, a relevância
+    do texto. Sem acento e sem flexão: "manutencao" acha "manutenções". Ver
+    app/services/busca_service.py.
+
+    Sem cursor: a ordem é por relevância, que não é chave estável para
+    paginar. Quem não achou nos primeiros resultados refina o texto.
+    Declarada antes de `/{chamado_id}`, como a exportação.
+    """
+    consulta = _filtrar_chamados(
+        select(Chamado),
+        status=None,
+        solicitante_id=None,
+        tecnico_id=None,
+        incluir_cancelados=incluir_cancelados,
+        incluir_arquivados=incluir_arquivados,
+        sla_situacao=None,
+    )
+    consulta = busca_service.aplicar(db, consulta, q).limit(limit)
+    chamados = list(db.execute(consulta).scalars())
+    return _anexar_nomes(_anexar_sla(chamados, db), nomes)
+
+
+@router.get("/resumo", response_model=ResumoChamadosResponse)
+def resumo_dos_chamados(
+    incluir_cancelados: bool = False,
+    incluir_arquivados: bool = False,
+    db: Session = Depends(get_db),
+    nomes: CarregadorDeNomes = Depends(get_carregador_de_nomes),
+):
+    """
+    Totais do painel: chamados por status, por prioridade e por técnico.
+
+    Lidos de `resumo_chamados`, que as escritas de chamado mantêm na mesma
+    transação (ver app/services/resumo_service.py) — uma consulta numa tabela
+    de poucas linhas, em vez de baixar a listagem e contar. Os totais batem
+    com a listagem de mesmos filtros; cancelados e arquivados ficam fora por
+    padrão, como lá.
+
+    Declarada antes de `/{chamado_id}`, como a exportação.
+    """
+    linhas = resumo_service.ler(db, incluir_cancelados, incluir_arquivados)
+
+    por_status: dict = {}
+    por_prioridade: dict = {}
+    por_tecnico: dict = {}
+    celulas = []
+    for linha in linhas:
+        tecnico_id = resumo_service.tecnico_da_chave(linha.tecnico_responsavel_id)
+        por_status[linha.status] = por_status.get(linha.status, 0) + linha.total
+        por_prioridade[linha.prioridade] = por_prioridade.get(linha.prioridade, 0) + linha.total
+        por_tecnico[tecnico_id] = por_tecnico.get(tecnico_id, 0) + linha.total
+        celulas.append(CelulaDoResumo(
+            status=linha.status,
+            prioridade=linha.prioridade,
+            tecnico_responsavel_id=tecnico_id,
+            cancelado=linha.cancelado,
+            arquivado=linha.arquivado,
+            total=linha.total,
+        ))
+
+    nomes.pedir(por_tecnico)
+    return ResumoChamadosResponse(
+        total=sum(por_status.values()),
+        por_status=por_status,
+        por_prioridade=por_prioridade,
+        por_tecnico=[
+            ContagemPorTecnico(tecnico_responsavel_id=t, tecnico_responsavel_nome=nomes.nome(t), total=total)
+            for t, total in sorted(por_tecnico.items(), key=lambda item: -item[1])
+        ],
+        celulas=celulas,
+    )
 
 
 @router.get("/{chamado_id}", response_model=ChamadoResponse)
-def buscar_chamado(chamado_id: int, db: Session = Depends(get_db)):
+def buscar_chamado(
+    chamado_id: int,
+    db: Session = Depends(get_db),
+    nomes: CarregadorDeNomes = Depends(get_carregador_de_nomes),
+):
     """
     Busca um chamado específico por ID
     """
     chamado = db.query(Chamado).filter(Chamado.id == chamado_id).first()
     if not chamado:
         raise HTTPException(status_code=404, detail="Chamado não encontrado")
-    return _anexar_sla([chamado], db)[0]
+    return _anexar_nomes(_anexar_sla([chamado], db), nomes)[0]
 
 
 @router.post("/", response_model=ChamadoResponse, status_code=status.HTTP_201_CREATED)
 def criar_chamado(
     chamado_data: ChamadoCreate,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: UsuarioAutenticado = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
@@ -221,44 +571,27 @@ def criar_chamado(
     else:
         solicitante_id = current_user.id
 
-    # Gerar protocolo único
-    protocolo = gerar_protocolo(db)
-
-    # Criar chamado
-    chamado = Chamado(
-        protocolo=protocolo,
+    chamado = abrir_chamado(
+        db,
         solicitante_id=solicitante_id,
         categoria_id=chamado_data.categoria_id,
         titulo=chamado_data.titulo,
         descricao=chamado_data.descricao,
-        prioridade=chamado_data.prioridade,
-        status="Aberto"
-    )
-
-    db.add(chamado)
-    db.commit()
-    db.refresh(chamado)
-
-    # Registrar no histórico
-    registrar_historico(
-        db=db,
-        chamado_id=chamado.id,
-        usuario_id=solicitante_id,
-        acao="Abertura de chamado",
-        descricao=f"Chamado aberto com protocolo {protocolo}",
-        status_novo="Aberto"
+        prioridade=chamado_data.prioridade.value,
     )
 
-    # Enviar webhook para notificação (sem técnico = "Sem atribuição")
-    enviar_webhook_tecnico(
+    # Notificação ao n8n (sem técnico = "Sem atribuição"). Só entra na fila,
+    # na mesma transação do chamado: se o commit não sair, ela também não
+    # sai, e o POST fica com o despachante, fora da requisição.
+    enfileirar_webhook_tecnico(
         db=db,
-        protocolo=protocolo,
+        protocolo=chamado.protocolo,
         titulo=chamado.titulo,
         tecnico_id=None,
         acao="criado"
     )
 
-    return _anexar_sla([chamado], db)[0]
+    return _concluir_escrita(db, chamado)
 
 
 @router.put("/{chamado_id}", response_model=ChamadoResponse)
@@ -266,7 +599,7 @@ def atualizar_chamado(
     chamado_id: int,
     chamado_data: ChamadoUpdate,
     usuario_id: Optional[int] = USUARIO_ID_DEPRECIADO,
-    current_user: Usuario = Depends(require_staff),
+    current_user: UsuarioAutenticado = Depends(require_staff),
     db: Session = Depends(get_db),
 ):
     """
@@ -284,39 +617,48 @@ def atualizar_chamado(
     # Armazenar status anterior e técnico anterior para histórico e webhook
     status_anterior = chamado.status
     tecnico_anterior = chamado.tecnico_responsavel_id
+    prioridade_anterior = chamado.prioridade
 
-    # Atualizar campos
-    update_data = chamado_data.model_dump(exclude_unset=True)
+    # Atualizar campos. `mode="json"` grava o valor dos enums, não o membro: o
+    # chamado em memória é o que responde e o que `db.get` indexa, e tem de
+    # ser igual ao que a leitura do banco devolveria.
+    update_data = chamado_data.model_dump(exclude_unset=True, mode="json")
     for field, value in update_data.items():
         setattr(chamado, field, value)
 
+    # Os prazos gravados são da prioridade; mudou a prioridade, mudam os prazos.
+    # Chamado sem snapshot fica como está: o recálculo dele é pelo histórico.
+    if chamado_data.prioridade and chamado_data.prioridade.value != prioridade_anterior:
+        if chamado.sla_calculado_em is not None:
+            atualizar_prazos(chamado, config_de_sla(db, chamado_data.prioridade.value))
+
+    instante = carimbar(chamado)
+
     # Se mudou para "Resolvido" ou "Fechado", calcular tempo de resolução
     if chamado_data.status and chamado_data.status in ["Resolvido", "Fechado"]:
         if not chamado.data_resolucao:
-            chamado.data_resolucao = agora_brasilia()
+            chamado.data_resolucao = instante
             chamado.tempo_resolucao_minutos = calcular_tempo_resolucao(
                 chamado.data_abertura,
                 chamado.data_resolucao
             )
 
-    db.commit()
-    db.refresh(chamado)
-
     # Registrar no histórico se mudou o status
     if chamado_data.status and status_anterior != chamado_data.status:
         registrar_historico(
             db=db,
-            chamado_id=chamado.id,
+            chamado=chamado,
             usuario_id=current_user.id,
             acao="Alteração de status",
             descricao=f"Status alterado de {status_anterior} para {chamado_data.status.value}",
             status_anterior=status_anterior,
-            status_novo=chamado_data.status.value
+            status_novo=chamado_data.status.value,
+            instante=instante,
         )
 
-    # Enviar webhook se o técnico foi atribuído ou alterado
+    # Notificar se o técnico foi atribuído ou alterado (na fila, como na criação)
     if chamado_data.tecnico_responsavel_id is not None and tecnico_anterior != chamado_data.tecnico_responsavel_id:
-        enviar_webhook_tecnico(
+        enfileirar_webhook_tecnico(
             db=db,
             protocolo=chamado.protocolo,
             titulo=chamado.titulo,
@@ -324,7 +666,7 @@ def atualizar_chamado(
             acao="atribuido"
         )
 
-    return _anexar_sla([chamado], db)[0]
+    return _concluir_escrita(db, chamado)
 
 
 # Status em que o atendimento já terminou e faz sentido avaliar.
@@ -335,7 +677,7 @@ STATUS_AVALIAVEIS = (StatusEnum.RESOLVIDO.value, StatusEnum.FECHADO.value)
 def avaliar_chamado(
     chamado_id: int,
     avaliacao_data: ChamadoAvaliacao,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: UsuarioAutenticado = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
@@ -371,12 +713,11 @@ def avaliar_chamado(
 
     avaliacao_anterior = chamado.avaliacao
     chamado.avaliacao = avaliacao_data.avaliacao
-    db.commit()
-    db.refresh(chamado)
+    carimbar(chamado)
 
     registrar_historico(
         db=db,
-        chamado_id=chamado.id,
+        chamado=chamado,
         usuario_id=current_user.id,
         acao="Avaliação do atendimento",
         descricao=(
@@ -386,14 +727,14 @@ def avaliar_chamado(
         ),
     )
 
-    return _anexar_sla([chamado], db)[0]
+    return _concluir_escrita(db, chamado)
 
 
 @router.patch("/{chamado_id}/cancelar", response_model=ChamadoResponse)
 def cancelar_chamado(
     chamado_id: int,
     usuario_id: Optional[int] = USUARIO_ID_DEPRECIADO,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: UsuarioAutenticado = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
@@ -418,26 +759,25 @@ def cancelar_chamado(
         raise HTTPException(status_code=400, detail="Chamado já está cancelado")
 
     chamado.cancelado = True
-    db.commit()
-    db.refresh(chamado)
+    carimbar(chamado)
 
     # Registrar no histórico
     registrar_historico(
         db=db,
-        chamado_id=chamado.id,
+        chamado=chamado,
         usuario_id=current_user.id,
         acao="Cancelamento de chamado",
         descricao=f"Chamado #{chamado.protocolo} foi cancelado"
     )
 
-    return _anexar_sla([chamado], db)[0]
+    return _concluir_escrita(db, chamado)
 
 
 @router.patch("/{chamado_id}/arquivar", response_model=ChamadoResponse)
 def arquivar_chamado(
     chamado_id: int,
     usuario_id: Optional[int] = USUARIO_ID_DEPRECIADO,
-    current_user: Usuario = Depends(require_staff),
+    current_user: UsuarioAutenticado = Depends(require_staff),
     db: Session = Depends(get_db),
 ):
     """
@@ -454,26 +794,25 @@ def arquivar_chamado(
         raise HTTPException(status_code=400, detail="Chamado já está arquivado")
 
     chamado.arquivado = True
-    db.commit()
-    db.refresh(chamado)
+    carimbar(chamado)
 
     # Registrar no histórico
     registrar_historico(
         db=db,
-        chamado_id=chamado.id,
+        chamado=chamado,
         usuario_id=current_user.id,
         acao="Arquivamento de chamado",
         descricao=f"Chamado #{chamado.protocolo} foi arquivado"
     )
 
-    return _anexar_sla([chamado], db)[0]
+    return _concluir_escrita(db, chamado)
 
 
 @router.patch("/{chamado_id}/desarquivar", response_model=ChamadoResponse)
 def desarquivar_chamado(
     chamado_id: int,
     usuario_id: Optional[int] = USUARIO_ID_DEPRECIADO,
-    current_user: Usuario = Depends(require_staff),
+    current_user: UsuarioAutenticado = Depends(require_staff),
     db: Session = Depends(get_db),
 ):
     """
@@ -490,25 +829,24 @@ def desarquivar_chamado(
         raise HTTPException(status_code=400, detail="Chamado não está arquivado")
 
     chamado.arquivado = False
-    db.commit()
-    db.refresh(chamado)
+    carimbar(chamado)
 
     # Registrar no histórico
     registrar_historico(
         db=db,
-        chamado_id=chamado.id,
+        chamado=chamado,
         usuario_id=current_user.id,
         acao="Desarquivamento de chamado",
         descricao=f"Chamado #{chamado.protocolo} foi desarquivado"
     )
 
-    return _anexar_sla([chamado], db)[0]
+    return _concluir_escrita(db, chamado)
 
 
 @router.delete("/{chamado_id}", status_code=status.HTTP_204_NO_CONTENT)
 def deletar_chamado(
     chamado_id: int,
-    _admin: Usuario = Depends(require_admin),
+    _admin: UsuarioAutenticado = Depends(require_admin),
     db: Session = Depends(get_db),
 ):
     """
@@ -521,6 +859,8 @@ def deletar_chamado(
     if not chamado:
         raise HTTPException(status_code=404, detail="Chamado não encontrado")
 
+    busca_service.remover(db, chamado.id)
+    resumo_service.aplicar(db, resumo_service.variacoes_da_exclusao(chamado))
     db.delete(chamado)
     db.commit()
     return None
@@ -1,13 +1,22 @@
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from typing import List
-
-from app.api.deps import get_current_user, get_db, is_admin, is_staff
+from typing import List, Optional
+
+from app.api.cursor import CURSOR, ler_cursor, publicar_proximo_cursor
+from app.api.deps import (
+    get_carregador_de_nomes,
+    get_current_user,
+    get_db,
+    is_admin,
+    is_staff,
+    UsuarioAutenticado,
+)
 from app.models.comentario import ComentarioChamado
-from app.models.usuario import Usuario
 from app.schemas.comentario import ComentarioCreate, ComentarioUpdate, ComentarioResponse
+from app.services import busca_service
+from app.services.carregador_de_nomes import CarregadorDeNomes
 
 router = APIRouter()
 
@@ -17,16 +26,21 @@ logger = logging.getLogger(__name__)
 @router.get("/chamado/{chamado_id}", response_model=List[ComentarioResponse])
 def listar_comentarios_chamado(
     chamado_id: int,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1),
-    current_user: Usuario = Depends(get_current_user),
+    cursor: Optional[str] = CURSOR,
+    current_user: UsuarioAutenticado = Depends(get_current_user),
     db: Session = Depends(get_db),
+    nomes: CarregadorDeNomes = Depends(get_carregador_de_nomes),
 ):
     """
     Lista os comentários de um chamado.
 
     Comentários internos só aparecem para administrador e técnico — é para
     isso que serve a marcação is_interno.
+
+    Em ordem de criação (id), que também é a chave do cursor.
     """
     query = db.query(ComentarioChamado).filter(
         ComentarioChamado.chamado_id == chamado_id
@@ -35,14 +49,22 @@ def listar_comentarios_chamado(
     if not is_staff(current_user):
         query = query.filter(ComentarioChamado.is_interno.is_(False))
 
-    return query.offset(skip).limit(limit).all()
+    chave = ler_cursor(cursor, "id", (int,), skip)
+    if chave:
+        query = query.filter(ComentarioChamado.id > chave[0])
+
+    comentarios = query.order_by(ComentarioChamado.id).offset(skip).limit(limit).all()
+    publicar_proximo_cursor(response, comentarios, limit, "id", lambda c: (c.id,))
+    nomes.anexar(comentarios, usuario_nome="usuario_id")
+    return comentarios
 
 
 @router.get("/{comentario_id}", response_model=ComentarioResponse)
 def buscar_comentario(
     comentario_id: int,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: UsuarioAutenticado = Depends(get_current_user),
     db: Session = Depends(get_db),
+    nomes: CarregadorDeNomes = Depends(get_carregador_de_nomes),
 ):
     """
     Busca um comentário específico por ID.
@@ -58,13 +80,14 @@ def buscar_comentario(
         # interno naquele id.
         raise HTTPException(status_code=404, detail="Comentário não encontrado")
 
+    nomes.anexar([comentario], usuario_nome="usuario_id")
     return comentario
 
 
 @router.post("/", response_model=ComentarioResponse, status_code=status.HTTP_201_CREATED)
 def criar_comentario(
     comentario_data: ComentarioCreate,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: UsuarioAutenticado = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
@@ -95,8 +118,14 @@ def criar_comentario(
         usuario_id=current_user.id,
     )
     db.add(comentario)
+    # Flush antes de reindexar: sem autoflush, a leitura dos comentários não
+    # veria este.
+    db.flush()
+    busca_service.reindexar(db, comentario.chamado_id)
     db.commit()
     db.refresh(comentario)
+    # O autor é quem está autenticado, e o nome já está em current_user.
+    comentario.usuario_nome = current_user.nome
     return comentario
 
 
@@ -104,8 +133,9 @@ def criar_comentario(
 def atualizar_comentario(
     comentario_id: int,
     comentario_data: ComentarioUpdate,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: UsuarioAutenticado = Depends(get_current_user),
     db: Session = Depends(get_db),
+    nomes: CarregadorDeNomes = Depends(get_carregador_de_nomes),
 ):
     """
     Atualiza um comentário existente. Só o autor ou um administrador.
@@ -130,15 +160,19 @@ def atualizar_comentario(
     for field, value in update_data.items():
         setattr(comentario, field, value)
 
+    if "comentario" in update_data:
+        db.flush()
+        busca_service.reindexar(db, comentario.chamado_id)
     db.commit()
     db.refresh(comentario)
+    nomes.anexar([comentario], usuario_nome="usuario_id")
     return comentario
 
 
 @router.delete("/{comentario_id}", status_code=status.HTTP_204_NO_CONTENT)
 def deletar_comentario(
     comentario_id: int,
-    current_user: Usuario = Depends(get_current_user),
+    current_user: UsuarioAutenticado = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
@@ -155,5 +189,7 @@ def deletar_comentario(
         )
 
     db.delete(comentario)
+    db.flush()
+    busca_service.reindexar(db, comentario.chamado_id)
     db.commit()
     return None
@@ -27,6 +27,8 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 
 from app.api.deps import get_db
+from app.core.limite_de_requisicoes import baldes_por_ip, baldes_por_usuario
+from app.core.security import pool_de_senhas
 from app.models.usuario import Usuario
 from app.models.role import Role
 
@@ -56,6 +58,16 @@ def diagnostico_geral(db: Session = Depends(get_db)):
         diagnostico["database"]["conexao"] = "❌ ERRO na conexão (detalhe no log da aplicação)"
         diagnostico["status"] = "erro"
 
+    # Fila do bcrypt deste processo: `recusadas` crescendo é login recebendo
+    # 503 — hora de subir SENHA_PROCESSOS ou SENHA_MAX_PENDENTES.
+    diagnostico["auth"]["senhas"] = pool_de_senhas.estatisticas()
+
+    # Limite de requisições deste processo: `recusadas` é quantos 429 já saíram.
+    diagnostico["limite_de_requisicoes"] = {
+        "por_usuario": baldes_por_usuario.estatisticas(),
+        "por_ip": baldes_por_ip.estatisticas(),
+    }
+
     try:
         # 2. Verificar se coluna senha_hash existe
         result = db.execute(text("""
@@ -1,19 +1,23 @@
-from datetime import date
+from datetime import date, datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, is_admin, require_staff
-from app.models.usuario import Usuario
+from app.api.cursor import CURSOR, ler_cursor, publicar_proximo_cursor
+from app.api.deps import get_db, is_admin, require_staff, UsuarioAutenticado
 from app.schemas.evento import EventoResponse
 from app.services import trilha_service
 
 router = APIRouter()
 
+# Nome da ordenação dentro do cursor. A trilha tem uma ordem só.
+ORDEM_DA_TRILHA = "trilha"
+
 
 @router.get("/", response_model=List[EventoResponse])
 def listar_eventos(
+    response: Response,
     alvo: Optional[str] = Query(
         None,
         description="usuario | setor. Omitido, devolve os dois mesclados por data.",
@@ -34,10 +38,12 @@ def listar_eventos(
     # feita para nunca ser podada. Sem teto, `?skip=50000000` manda o banco
     # varrer tudo que existir e o processo montar dicionário de cada linha.
     # 10 mil é fundo de sobra para navegação de tela; auditoria que precise ir
-    # além disso pede filtro (`de`/`ate`/`ator_id`), não página 200.
+    # além disso pede filtro (`de`/`ate`/`ator_id`) ou o cursor, que não tem
+    # teto porque não tem esse custo.
     skip: int = Query(0, ge=0, le=10_000),
     limit: int = Query(100, ge=1, le=500),
-    autor: Usuario = Depends(require_staff),
+    cursor: Optional[str] = CURSOR,
+    autor: UsuarioAutenticado = Depends(require_staff),
     db: Session = Depends(get_db),
 ):
     """
@@ -64,6 +70,11 @@ def listar_eventos(
     Proteger lá e liberar aqui deixaria a restrição decorativa — a informação
     sairia pela porta ao lado, que é a forma exata do defeito que o passo 0
     fechou entre o `DELETE` e o `PUT`.
+
+    Para paginar fundo, use `cursor` (header X-Next-Cursor da página
+    anterior): a chave é `(created_at, id, alvo_tipo)`, cada tabela é lida só
+    a partir dela, e a página custa o mesmo em qualquer profundidade. O cursor
+    vale só com os mesmos filtros da página que o gerou.
     """
     if not is_admin(autor):
         if alvo is None:
@@ -77,11 +88,16 @@ def listar_eventos(
                 detail="Requer perfil: Administrador para ver eventos de conta",
             )
 
+    apos = ler_cursor(cursor, ORDEM_DA_TRILHA, (datetime, int, str), skip, anulaveis=(0,))
+
     try:
-        return trilha_service.consultar(
-            db, alvo=alvo, ator_id=ator_id, de=de, ate=ate, skip=skip, limit=limit
+        eventos = trilha_service.consultar(
+            db, alvo=alvo, ator_id=ator_id, de=de, ate=ate, skip=skip, limit=limit, apos=apos
         )
     except ValueError as erro:
         # Alvo fora do vocabulário é dado inválido do cliente, não defeito do
         # servidor. Sem isto o ValueError sobe como 500.
         raise HTTPException(status_code=400, detail=str(erro))
+
+    publicar_proximo_cursor(response, eventos, limit, ORDEM_DA_TRILHA, trilha_service.chave_do_cursor)
+    return eventos
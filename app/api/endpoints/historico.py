@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.api.deps import get_db
+from app.api.cursor import CURSOR, ler_cursor, publicar_proximo_cursor
+from app.api.deps import get_carregador_de_nomes, get_db
 from app.models.historico import HistoricoChamado
 from app.schemas.historico import HistoricoResponse
+from app.services.carregador_de_nomes import CarregadorDeNomes
 
 router = APIRouter()
 
@@ -12,25 +17,49 @@ router = APIRouter()
 @router.get("/chamado/{chamado_id}", response_model=List[HistoricoResponse])
 def listar_historico_chamado(
     chamado_id: int,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = CURSOR,
+    db: Session = Depends(get_db),
+    nomes: CarregadorDeNomes = Depends(get_carregador_de_nomes),
 ):
     """
-    Lista todo o histórico de um chamado
+    Lista todo o histórico de um chamado, do mais recente para o mais antigo.
+
+    `created_at` sozinho não é chave: duas transições no mesmo instante (a
+    abertura e a atribuição automática, por exemplo) empatam. O id desempata,
+    na ordenação e no cursor.
     """
-    historicos = db.query(HistoricoChamado).filter(
-        HistoricoChamado.chamado_id == chamado_id
-    ).order_by(HistoricoChamado.created_at.desc()).offset(skip).limit(limit).all()
+    query = db.query(HistoricoChamado).filter(HistoricoChamado.chamado_id == chamado_id)
+
+    chave = ler_cursor(cursor, "created_at", (datetime, int), skip)
+    if chave:
+        criado, ultimo_id = chave
+        query = query.filter(or_(
+            HistoricoChamado.created_at < criado,
+            and_(HistoricoChamado.created_at == criado, HistoricoChamado.id < ultimo_id),
+        ))
+
+    historicos = query.order_by(
+        HistoricoChamado.created_at.desc(), HistoricoChamado.id.desc()
+    ).offset(skip).limit(limit).all()
+    publicar_proximo_cursor(response, historicos, limit, "created_at", lambda h: (h.created_at, h.id))
+    nomes.anexar(historicos, usuario_nome="usuario_id")
     return historicos
 
 
 @router.get("/{historico_id}", response_model=HistoricoResponse)
-def buscar_historico(historico_id: int, db: Session = Depends(get_db)):
+def buscar_historico(
+    historico_id: int,
+    db: Session = Depends(get_db),
+    nomes: CarregadorDeNomes = Depends(get_carregador_de_nomes),
+):
     """
     Busca um registro de histórico específico
     """
     historico = db.query(HistoricoChamado).filter(HistoricoChamado.id == historico_id).first()
     if not historico:
         raise HTTPException(status_code=404, detail="Histórico não encontrado")
+    nomes.anexar([historico], usuario_nome="usuario_id")
     return historico
@@ -0,0 +1,33 @@
+"""
+Relatórios gerenciais. Restrito a administrador (o router inteiro, em
+main.py).
+
+Por enquanto um só: cumprimento de SLA do mês, por prioridade e por
+categoria. O cálculo e o cache estão em app/services/relatorio_sla_service.py.
+"""
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.schemas.relatorio import RelatorioSLAResponse
+from app.services.relatorio_sla_service import relatorio_do_mes
+
+router = APIRouter()
+
+
+@router.get("/sla", response_model=RelatorioSLAResponse)
+def relatorio_de_sla(
+    ano: int = Query(..., ge=2000, le=2100),
+    mes: int = Query(..., ge=1, le=12),
+    db: Session = Depends(get_db),
+):
+    """
+    Cumprimento de SLA dos chamados encerrados no mês: resposta no prazo,
+    resolução no prazo e média de minutos pausados, no geral, por prioridade
+    e por categoria.
+
+    Mês fechado é calculado uma vez e servido do cache daí em diante; o mês
+    corrente é recalculado a cada pedido, porque ainda muda.
+    """
+    return relatorio_do_mes(db, ano, mes)
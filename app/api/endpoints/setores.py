@@ -2,10 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.api.deps import get_db, require_staff
+from app.api.deps import get_db, require_staff, UsuarioAutenticado
 from app.models.setor import Setor
 from app.models.usuario import Usuario
 from app.schemas.setor import SetorCreate, SetorUpdate, SetorResponse
+from app.services import cache_de_referencia
+from app.services.cache_de_referencia import SETORES, registrar_alteracao
 from app.services.evento_setor_service import (
     instantaneo,
     registrar_alteracoes,
@@ -88,7 +90,7 @@ def _garantir_desativacao_segura(db: Session, setor: Setor) -> None:
         )
 
 
-def _desativar(db: Session, setor: Setor, autor: Usuario, origem: str) -> Setor:
+def _desativar(db: Session, setor: Setor, autor: UsuarioAutenticado, origem: str) -> Setor:
     """
     Corpo da desativação.
 
@@ -104,6 +106,7 @@ def _desativar(db: Session, setor: Setor, autor: Usuario, origem: str) -> Setor:
     # Desativar setor já inativo não muda nada e não gera evento; a resposta
     # continua sendo sucesso, porque o estado pedido é o estado final.
     registrar_alteracoes(db, setor=setor, antes=antes, ator=autor, origem=origem)
+    registrar_alteracao(db, SETORES)
     db.commit()
     db.refresh(setor)
     return setor
@@ -118,13 +121,14 @@ def listar_setores(
 ):
     """
     Lista todos os setores
+
+    Sai do cache de referência: o seletor de setor aparece em todo formulário
+    de usuário, e a tabela muda poucas vezes por ano.
     """
-    query = db.query(Setor)
+    setores = cache_de_referencia.setores(db)
     if ativo is not None:
-        query = query.filter(Setor.ativo == ativo)
-
-    setores = query.offset(skip).limit(limit).all()
-    return setores
+        setores = [s for s in setores if s.ativo == ativo]
+    return setores[skip:skip + limit]
 
 
 @router.get("/{setor_id}", response_model=SetorResponse)
@@ -132,13 +136,16 @@ def buscar_setor(setor_id: int, db: Session = Depends(get_db)):
     """
     Busca um setor específico por ID
     """
-    return _buscar(db, setor_id)
+    for setor in cache_de_referencia.setores(db):
+        if setor.id == setor_id:
+            return setor
+    raise HTTPException(status_code=404, detail="Setor não encontrado")
 
 
 @router.post("/", response_model=SetorResponse, status_code=status.HTTP_201_CREATED)
 def criar_setor(
     setor_data: SetorCreate,
-    autor: Usuario = Depends(require_staff),
+    autor: UsuarioAutenticado = Depends(require_staff),
     db: Session = Depends(get_db),
 ):
     """
@@ -151,6 +158,7 @@ def criar_setor(
     # evento não é um estado alcançável.
     db.flush()
     registrar_criacao(db, setor=setor, ator=autor, origem="POST /api/v1/setores/")
+    registrar_alteracao(db, SETORES)
     db.commit()
     db.refresh(setor)
     return setor
@@ -160,7 +168,7 @@ def criar_setor(
 def atualizar_setor(
     setor_id: int,
     setor_data: SetorUpdate,
-    autor: Usuario = Depends(require_staff),
+    autor: UsuarioAutenticado = Depends(require_staff),
     db: Session = Depends(get_db),
 ):
     """
@@ -195,6 +203,7 @@ def atualizar_setor(
         origem="PUT /api/v1/setores/{id}",
     )
 
+    registrar_alteracao(db, SETORES)
     db.commit()
     db.refresh(setor)
     return setor
@@ -203,7 +212,7 @@ def atualizar_setor(
 @router.patch("/{setor_id}/desativar", response_model=SetorResponse)
 def desativar_setor(
     setor_id: int,
-    autor: Usuario = Depends(require_staff),
+    autor: UsuarioAutenticado = Depends(require_staff),
     db: Session = Depends(get_db),
 ):
     """
@@ -224,7 +233,7 @@ def desativar_setor(
 @router.patch("/{setor_id}/reativar", response_model=SetorResponse)
 def reativar_setor(
     setor_id: int,
-    autor: Usuario = Depends(require_staff),
+    autor: UsuarioAutenticado = Depends(require_staff),
     db: Session = Depends(get_db),
 ):
     """
@@ -245,6 +254,7 @@ def reativar_setor(
         ator=autor,
         origem="PATCH /api/v1/setores/{id}/reativar",
     )
+    registrar_alteracao(db, SETORES)
     db.commit()
     db.refresh(setor)
     return setor
@@ -253,7 +263,7 @@ def reativar_setor(
 @router.delete("/{setor_id}", status_code=status.HTTP_204_NO_CONTENT)
 def deletar_setor(
     setor_id: int,
-    autor: Usuario = Depends(require_staff),
+    autor: UsuarioAutenticado = Depends(require_staff),
     db: Session = Depends(get_db),
 ):
     """
@@ -304,5 +314,6 @@ def deletar_setor(
         db, setor=setor, ator=autor, origem="DELETE /api/v1/setores/{id}"
     )
     db.delete(setor)
+    registrar_alteracao(db, SETORES)
     db.commit()
     return None
@@ -3,10 +3,13 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, require_staff
+from app.api.deps import get_db, require_staff, UsuarioAutenticado
 from app.models.sla_config import SLAConfig
-from app.models.usuario import Usuario
 from app.schemas.sla import SLAConfigResponse, SLAConfigUpdate
+from app.services import cache_de_referencia
+from app.services.agendador_de_prazos import agendador_de_prazos
+from app.services.cache_de_referencia import SLA_CONFIGS, registrar_alteracao
+from app.services.sla_service import recalcular_prazos_da_prioridade
 
 router = APIRouter()
 
@@ -14,24 +17,36 @@ router = APIRouter()
 @router.get("/", response_model=List[SLAConfigResponse])
 def listar_sla_configs(db: Session = Depends(get_db)):
     """Lista os prazos de SLA de todas as prioridades."""
-    return db.query(SLAConfig).order_by(SLAConfig.minutos_resolucao.desc()).all()
+    configs = cache_de_referencia.configs_de_sla(db).values()
+    return sorted(configs, key=lambda c: c.minutos_resolucao, reverse=True)
 
 
 @router.put("/{prioridade}", response_model=SLAConfigResponse)
 def atualizar_sla_config(
     prioridade: str,
     dados: SLAConfigUpdate,
-    _autor: Usuario = Depends(require_staff),
+    _autor: UsuarioAutenticado = Depends(require_staff),
     db: Session = Depends(get_db),
 ):
-    """Atualiza os prazos de uma prioridade. Restrito a administrador ou técnico."""
+    """
+    Atualiza os prazos de uma prioridade. Restrito a administrador ou técnico.
+
+    Os prazos gravados no snapshot de SLA dos chamados dessa prioridade são
+    regravados na mesma transação: a config e os prazos mudam juntos, ou não
+    mudam.
+    """
     config = db.query(SLAConfig).filter(SLAConfig.prioridade == prioridade).first()
     if not config:
         raise HTTPException(status_code=404, detail="Prioridade não encontrada")
 
     config.minutos_resposta = dados.minutos_resposta
     config.minutos_resolucao = dados.minutos_resolucao
+    recalcular_prazos_da_prioridade(db, config)
+    registrar_alteracao(db, SLA_CONFIGS)
 
     db.commit()
+    # Os prazos de todos os chamados abertos da prioridade mudaram: a fila de
+    # avisos é remontada do banco, uma vez, em vez de chamado a chamado.
+    agendador_de_prazos.reconstruir()
     db.refresh(config)
     return config
@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Optional
-from datetime import timedelta
+from sqlalchemy import func, select
+from typing import Iterator, List, Optional
+from datetime import date, timedelta
 
+import itertools
 import logging
 
-from app.api.deps import get_db, require_staff
+from app.api.deps import get_db, require_staff, UsuarioAutenticado
+from app.models.categoria import Categoria
 from app.models.tarefa_recorrente import TarefaRecorrente, TarefaRecorrenteExecucao
 from app.models.usuario import Usuario
 from app.schemas.tarefa_recorrente import (
@@ -15,55 +17,91 @@ from app.schemas.tarefa_recorrente import (
     TarefaRecorrenteResponse,
     ExecucaoResponse,
     RealizarTarefaRequest,
+    OcorrenciaDaAgenda,
 )
-from app.services.recorrencia_service import calcular_proxima_data
+from app.services.recorrencia_service import calcular_proxima_data, expandir_ocorrencias
 from app.utils.timezone import agora_brasilia
 
 router = APIRouter()
 
 logger = logging.getLogger(__name__)
 
+# Maior intervalo aceito pela agenda: um ano de calendário. A resposta cresce
+# com dias x tarefas diárias, e a tela não mostra mais que isso de uma vez.
+AGENDA_MAXIMO_DIAS = 366
+
 
 def _hoje():
     return agora_brasilia().date()
 
 
-def _montar_response(t: TarefaRecorrente, db: Session) -> dict:
-    """Monta o dict de resposta com os agregados (total/última execução) e nomes."""
+def _com_agregados(db: Session):
+    """
+    Tarefas já com total de execuções, última execução e nomes, numa consulta só.
+
+    Antes eram três consultas por tarefa (contagem, máximo e nome do
+    responsável), mais a categoria carregada sob demanda: a listagem padrão,
+    de 200 tarefas, fazia uns 600 round trips. Agora a página inteira é um
+    SELECT.
+
+    Os agregados são subconsultas correlacionadas, e não um GROUP BY de
+    `tarefas_recorrentes_execucoes` inteira num join: o banco só as avalia
+    para as linhas da página, pelo índice `idx_tr_execucoes_tarefa`, e o custo
+    não cresce com o histórico das tarefas que ficaram fora dela. LATERAL
+    faria o mesmo, mas o SQLite dos testes não tem.
+    """
     total = (
-        db.query(func.count(TarefaRecorrenteExecucao.id))
-        .filter(TarefaRecorrenteExecucao.tarefa_id == t.id)
-        .scalar()
-        or 0
+        select(func.count(TarefaRecorrenteExecucao.id))
+        .where(TarefaRecorrenteExecucao.tarefa_id == TarefaRecorrente.id)
+        .correlate(TarefaRecorrente)
+        .scalar_subquery()
     )
     ultima = (
-        db.query(func.max(TarefaRecorrenteExecucao.realizada_em))
-        .filter(TarefaRecorrenteExecucao.tarefa_id == t.id)
-        .scalar()
+        select(func.max(TarefaRecorrenteExecucao.realizada_em))
+        .where(TarefaRecorrenteExecucao.tarefa_id == TarefaRecorrente.id)
+        .correlate(TarefaRecorrente)
+        .scalar_subquery()
     )
-    categoria_nome = t.categoria.nome if t.categoria else None
-    responsavel_nome = (
-        db.query(Usuario.nome).filter(Usuario.id == t.responsavel_id).scalar()
-        if t.responsavel_id
-        else None
+    return (
+        db.query(
+            TarefaRecorrente,
+            total.label("total_execucoes"),
+            ultima.label("ultima_execucao"),
+            Categoria.nome.label("categoria_nome"),
+            Usuario.nome.label("responsavel_nome"),
+        )
+        .outerjoin(Categoria, Categoria.id == TarefaRecorrente.categoria_id)
+        .outerjoin(Usuario, Usuario.id == TarefaRecorrente.responsavel_id)
     )
+
+
+def _montar_response(linha) -> dict:
+    """Dict de resposta a partir de uma linha de `_com_agregados`."""
+    t = linha.TarefaRecorrente
     data = {c.name: getattr(t, c.name) for c in t.__table__.columns}
     data.update(
-        total_execucoes=total,
-        categoria_nome=categoria_nome,
-        responsavel_nome=responsavel_nome,
-        ultima_execucao=ultima,
+        total_execucoes=linha.total_execucoes or 0,
+        categoria_nome=linha.categoria_nome,
+        responsavel_nome=linha.responsavel_nome,
+        ultima_execucao=linha.ultima_execucao,
     )
     return data
 
 
+def _buscar_response(db: Session, tarefa_id: int) -> dict:
+    linha = _com_agregados(db).filter(TarefaRecorrente.id == tarefa_id).first()
+    if not linha:
+        raise HTTPException(status_code=404, detail="Tarefa recorrente não encontrada")
+    return _montar_response(linha)
+
+
 @router.get("/", response_model=List[TarefaRecorrenteResponse])
 def listar_tarefas(
     ativo: Optional[bool] = None,
     apenas_atrasadas: bool = False,
     skip: int = Query(0, ge=0),
     limit: int = Query(200, ge=1),
-    _staff: Usuario = Depends(require_staff),
+    _staff: UsuarioAutenticado = Depends(require_staff),
     db: Session = Depends(get_db),
 ):
     """
@@ -75,32 +113,111 @@ def listar_tarefas(
     autenticado enquanto só a interface restringia a página — e interface não é
     proteção, é conveniência.
     """
-    query = db.query(TarefaRecorrente)
+    query = _com_agregados(db)
     if ativo is not None:
         query = query.filter(TarefaRecorrente.ativo == ativo)
     if apenas_atrasadas:
         query = query.filter(TarefaRecorrente.proxima_data <= _hoje())
     query = query.order_by(TarefaRecorrente.proxima_data.asc())
-    tarefas = query.offset(skip).limit(limit).all()
-    return [_montar_response(t, db) for t in tarefas]
+    return [_montar_response(linha) for linha in query.offset(skip).limit(limit).all()]
+
+
+def _ocorrencias_da_tarefa(linha, de: date, ate: date, hoje: date) -> Iterator[tuple]:
+    """(data, tarefa_id, linha) de cada ocorrência da tarefa no intervalo, em ordem."""
+    t = linha.TarefaRecorrente
+    padrao = (t.tipo_recorrencia, t.intervalo, t.dia_semana, t.dia_mes)
+    if t.proxima_data >= hoje:
+        datas = expandir_ocorrencias(*padrao, t.proxima_data, de, ate)
+    else:
+        # Vencida: a data gravada e, depois dela, as que viriam se a tarefa
+        # fosse realizada hoje — `realizar` recalcula a partir do dia em que
+        # é feita, não da data prevista.
+        datas = itertools.chain(
+            [t.proxima_data] if de <= t.proxima_data <= ate else [],
+            expandir_ocorrencias(*padrao, calcular_proxima_data(*padrao, hoje), de, ate),
+        )
+    for data in datas:
+        yield data, t.id, linha
+
+
+@router.get("/agenda", response_model=List[OcorrenciaDaAgenda])
+def agenda_de_tarefas(
+    de: date = Query(..., description="Primeiro dia, inclusive."),
+    ate: date = Query(..., description="Último dia, inclusive."),
+    _staff: UsuarioAutenticado = Depends(require_staff),
+    db: Session = Depends(get_db),
+):
+    """
+    Datas previstas de todas as tarefas ativas entre `de` e `ate`, em ordem
+    de data. Restrito a administrador ou técnico, como o resto do módulo.
+
+    O calendário do frontend simulava as regras de recorrência por conta
+    própria, e divergia das do backend nos casos de borda (dia 31 em mês
+    curto, intervalo de semanas). Aqui as datas saem de `expandir_ocorrencias`,
+    a mesma regra de `calcular_proxima_data`.
+
+    Uma consulta só — tarefas ativas com `proxima_data` até `ate` —, as
+    ocorrências de todas num passo pelos geradores e uma ordenação no fim.
+    Intercalar os geradores com `heapq.merge` evitaria a ordenação, mas com
+    milhares de tarefas o heap em Python é mais de três vezes mais lento que o
+    sort (ver benchmarks/bench_agenda_recorrencia.py). Tarefa vencida aparece
+    na própria `proxima_data`, marcada `atrasada`, se ela estiver no
+    intervalo; as seguintes são projetadas a partir de hoje.
+
+    Tarefa com padrão inválido (semanal sem dia da semana, por exemplo) fica
+    fora da agenda, com aviso no log.
+    """
+    if ate < de:
+        raise HTTPException(status_code=400, detail="'ate' não pode ser anterior a 'de'")
+    if (ate - de).days >= AGENDA_MAXIMO_DIAS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Intervalo máximo da agenda é de {AGENDA_MAXIMO_DIAS} dias",
+        )
+
+    linhas = (
+        db.query(TarefaRecorrente, Usuario.nome.label("responsavel_nome"))
+        .outerjoin(Usuario, Usuario.id == TarefaRecorrente.responsavel_id)
+        .filter(TarefaRecorrente.ativo == True, TarefaRecorrente.proxima_data <= ate)
+        .all()
+    )
+
+    hoje = _hoje()
+    ocorrencias = []
+    for linha in linhas:
+        try:
+            ocorrencias.extend(_ocorrencias_da_tarefa(linha, de, ate, hoje))
+        except ValueError as e:
+            logger.warning("Tarefa recorrente %s fora da agenda: %s", linha.TarefaRecorrente.id, e)
+    ocorrencias.sort(key=lambda item: item[:2])
+
+    return [
+        OcorrenciaDaAgenda(
+            data=data,
+            tarefa_id=tarefa_id,
+            titulo=linha.TarefaRecorrente.titulo,
+            prioridade=linha.TarefaRecorrente.prioridade,
+            responsavel_id=linha.TarefaRecorrente.responsavel_id,
+            responsavel_nome=linha.responsavel_nome,
+            atrasada=data < hoje,
+        )
+        for data, tarefa_id, linha in ocorrencias
+    ]
 
 
 @router.get("/{tarefa_id}", response_model=TarefaRecorrenteResponse)
 def buscar_tarefa(
     tarefa_id: int,
-    _staff: Usuario = Depends(require_staff),
+    _staff: UsuarioAutenticado = Depends(require_staff),
     db: Session = Depends(get_db),
 ):
-    tarefa = db.query(TarefaRecorrente).filter(TarefaRecorrente.id == tarefa_id).first()
-    if not tarefa:
-        raise HTTPException(status_code=404, detail="Tarefa recorrente não encontrada")
-    return _montar_response(tarefa, db)
+    return _buscar_response(db, tarefa_id)
 
 
 @router.post("/", response_model=TarefaRecorrenteResponse, status_code=status.HTTP_201_CREATED)
 def criar_tarefa(
     dados: TarefaRecorrenteCreate,
-    _staff: Usuario = Depends(require_staff),
+    _staff: UsuarioAutenticado = Depends(require_staff),
     db: Session = Depends(get_db),
 ):
     payload = dados.model_dump()
@@ -117,15 +234,14 @@ def criar_tarefa(
     tarefa = TarefaRecorrente(**payload, proxima_data=proxima)
     db.add(tarefa)
     db.commit()
-    db.refresh(tarefa)
-    return _montar_response(tarefa, db)
+    return _buscar_response(db, tarefa.id)
 
 
 @router.put("/{tarefa_id}", response_model=TarefaRecorrenteResponse)
 def atualizar_tarefa(
     tarefa_id: int,
     dados: TarefaRecorrenteUpdate,
-    _staff: Usuario = Depends(require_staff),
+    _staff: UsuarioAutenticado = Depends(require_staff),
     db: Session = Depends(get_db),
 ):
     tarefa = db.query(TarefaRecorrente).filter(TarefaRecorrente.id == tarefa_id).first()
@@ -134,14 +250,13 @@ def atualizar_tarefa(
     for campo, valor in dados.model_dump(exclude_unset=True).items():
         setattr(tarefa, campo, valor)
     db.commit()
-    db.refresh(tarefa)
-    return _montar_response(tarefa, db)
+    return _buscar_response(db, tarefa_id)
 
 
 @router.delete("/{tarefa_id}", status_code=status.HTTP_204_NO_CONTENT)
 def deletar_tarefa(
     tarefa_id: int,
-    _staff: Usuario = Depends(require_staff),
+    _staff: UsuarioAutenticado = Depends(require_staff),
     db: Session = Depends(get_db),
 ):
     """Exclui a tarefa e, em cascata, todo o histórico de execuções.
@@ -160,7 +275,7 @@ def deletar_tarefa(
 @router.get("/{tarefa_id}/execucoes", response_model=List[ExecucaoResponse])
 def listar_execucoes(
     tarefa_id: int,
-    _staff: Usuario = Depends(require_staff),
+    _staff: UsuarioAutenticado = Depends(require_staff),
     db: Session = Depends(get_db),
 ):
     """
@@ -169,15 +284,18 @@ def listar_execucoes(
     Diz quem fez o quê e quando dentro da equipe — é o registro de trabalho dos
     técnicos, e não tem leitor legítimo fora dela.
     """
+    # O nome de quem realizou vem no mesmo SELECT, por join, e não pelo
+    # CarregadorDeNomes das outras rotas: aqui todas as linhas já saem de uma
+    # consulta só, e o carregador acrescentaria um segundo SELECT.
     execucoes = (
-        db.query(TarefaRecorrenteExecucao)
+        db.query(TarefaRecorrenteExecucao, Usuario.nome)
+        .outerjoin(Usuario, Usuario.id == TarefaRecorrenteExecucao.usuario_id)
         .filter(TarefaRecorrenteExecucao.tarefa_id == tarefa_id)
         .order_by(TarefaRecorrenteExecucao.realizada_em.desc())
         .all()
     )
     resultado = []
-    for e in execucoes:
-        nome = db.query(Usuario.nome).filter(Usuario.id == e.usuario_id).scalar()
+    for e, nome in execucoes:
         d = {c.name: getattr(e, c.name) for c in e.__table__.columns}
         d["usuario_nome"] = nome
         resultado.append(d)
@@ -188,7 +306,7 @@ def listar_execucoes(
 def realizar_tarefa(
     tarefa_id: int,
     dados: RealizarTarefaRequest,
-    current_user: Usuario = Depends(require_staff),
+    current_user: UsuarioAutenticado = Depends(require_staff),
     db: Session = Depends(get_db),
 ):
     """
@@ -237,5 +355,4 @@ def realizar_tarefa(
         _hoje(),
     )
     db.commit()
-    db.refresh(tarefa)
-    return _montar_response(tarefa, db)
+    return _buscar_response(db, tarefa_id)
@@ -1,15 +1,17 @@
 from datetime import date
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.api.deps import get_db, require_admin, ROLE_ADMIN, _normalizar_role
+from app.api.cursor import CURSOR, ler_cursor, publicar_proximo_cursor
+from app.api.deps import get_db, require_admin, ROLE_ADMIN, _normalizar_role, UsuarioAutenticado
 from app.models.role import Role
 from app.models.setor import Setor
 from app.models.usuario import Usuario
 from app.schemas.evento import EventoResponse
 from app.schemas.usuario import UsuarioCreate, UsuarioUpdate, UsuarioResponse
+from app.core.cache_de_usuarios import cache_de_usuarios
 from app.core.security import gerar_hash_senha
 from app.services import trilha_service
 from app.services.evento_conta_service import (
@@ -40,7 +42,7 @@ def _admins_ativos(db: Session, role_id: int) -> int:
     )
 
 
-def _garantir_desativacao_segura(db: Session, usuario: Usuario, admin: Usuario) -> None:
+def _garantir_desativacao_segura(db: Session, usuario: Usuario, admin: UsuarioAutenticado) -> None:
     """
     Recusa as duas desativações que deixariam o sistema sem quem administrar:
     a de si mesmo e a do último administrador ativo. Como criar e editar
@@ -129,15 +131,19 @@ def _garantir_rebaixamento_seguro(db: Session, usuario: Usuario, novo_role_id: i
 
 @router.get("/", response_model=List[UsuarioResponse])
 def listar_usuarios(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1),
     setor_id: int = None,
     role_id: int = None,
     ativo: bool = None,
+    cursor: Optional[str] = CURSOR,
     db: Session = Depends(get_db)
 ):
     """
     Lista todos os usuários com filtros opcionais
+
+    Em ordem de id, que também é a chave do cursor.
     """
     query = db.query(Usuario)
 
@@ -148,7 +154,12 @@ def listar_usuarios(
     if ativo is not None:
         query = query.filter(Usuario.ativo == ativo)
 
-    usuarios = query.offset(skip).limit(limit).all()
+    chave = ler_cursor(cursor, "id", (int,), skip)
+    if chave:
+        query = query.filter(Usuario.id > chave[0])
+
+    usuarios = query.order_by(Usuario.id).offset(skip).limit(limit).all()
+    publicar_proximo_cursor(response, usuarios, limit, "id", lambda u: (u.id,))
     return usuarios
 
 
@@ -171,7 +182,7 @@ def listar_eventos_do_usuario(
     # dos testes, `LIMIT -1` significa SEM LIMITE, então a suíte via 200 com a
     # trilha inteira e não tinha como acusar nada.
     limit: int = Query(100, ge=1, le=500),
-    _admin: Usuario = Depends(require_admin),
+    _admin: UsuarioAutenticado = Depends(require_admin),
     db: Session = Depends(get_db),
 ):
     """
@@ -198,7 +209,7 @@ def listar_eventos_do_usuario(
 @router.post("/", response_model=UsuarioResponse, status_code=status.HTTP_201_CREATED)
 def criar_usuario(
     usuario_data: UsuarioCreate,
-    admin: Usuario = Depends(require_admin),
+    admin: UsuarioAutenticado = Depends(require_admin),
     db: Session = Depends(get_db),
 ):
     """
@@ -239,7 +250,7 @@ def criar_usuario(
 def atualizar_usuario(
     usuario_id: int,
     usuario_data: UsuarioUpdate,
-    admin: Usuario = Depends(require_admin),
+    admin: UsuarioAutenticado = Depends(require_admin),
     db: Session = Depends(get_db),
 ):
     """
@@ -297,11 +308,15 @@ def atualizar_usuario(
     )
 
     db.commit()
+    # Depois do commit, em toda escrita de conta: perfil e `ativo` são o que a
+    # autorização lê, e sem isto o usuário rebaixado ou desativado continuaria
+    # passando pelo cache até o prazo vencer.
+    cache_de_usuarios.invalidar(usuario.id)
     db.refresh(usuario)
     return usuario
 
 
-def _desativar(db: Session, usuario: Usuario, admin: Usuario, origem: str) -> Usuario:
+def _desativar(db: Session, usuario: Usuario, admin: UsuarioAutenticado, origem: str) -> Usuario:
     """
     Corpo compartilhado pelo PATCH de desativar e pelo DELETE.
 
@@ -320,6 +335,7 @@ def _desativar(db: Session, usuario: Usuario, admin: Usuario, origem: str) -> Us
     # respondendo sucesso: o estado pedido é o estado final.
     registrar_alteracoes(db, usuario=usuario, antes=antes, ator=admin, origem=origem)
     db.commit()
+    cache_de_usuarios.invalidar(usuario.id)
     db.refresh(usuario)
     return usuario
 
@@ -327,7 +343,7 @@ def _desativar(db: Session, usuario: Usuario, admin: Usuario, origem: str) -> Us
 @router.patch("/{usuario_id}/desativar", response_model=UsuarioResponse)
 def desativar_usuario(
     usuario_id: int,
-    admin: Usuario = Depends(require_admin),
+    admin: UsuarioAutenticado = Depends(require_admin),
     db: Session = Depends(get_db),
 ):
     """
@@ -349,7 +365,7 @@ def desativar_usuario(
 @router.patch("/{usuario_id}/reativar", response_model=UsuarioResponse)
 def reativar_usuario(
     usuario_id: int,
-    admin: Usuario = Depends(require_admin),
+    admin: UsuarioAutenticado = Depends(require_admin),
     db: Session = Depends(get_db),
 ):
     """
@@ -372,6 +388,7 @@ def reativar_usuario(
         origem="PATCH /api/v1/usuarios/{id}/reativar",
     )
     db.commit()
+    cache_de_usuarios.invalidar(usuario.id)
     db.refresh(usuario)
     return usuario
 
@@ -379,7 +396,7 @@ def reativar_usuario(
 @router.delete("/{usuario_id}", status_code=status.HTTP_204_NO_CONTENT)
 def deletar_usuario(
     usuario_id: int,
-    admin: Usuario = Depends(require_admin),
+    admin: UsuarioAutenticado = Depends(require_admin),
     db: Session = Depends(get_db),
 ):
     """
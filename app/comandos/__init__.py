@@ -0,0 +1,7 @@
+"""
+Comandos de manutenção, rodados à mão dentro do container:
+
+    python -m app.comandos.<nome> --help
+
+Cada um usa a mesma configuração da API (DATABASE_URL do ambiente).
+"""
@@ -0,0 +1,84 @@
+"""
+Recalcula o snapshot de SLA gravado em `chamados` a partir do histórico.
+
+    python -m app.comandos.recalcular_sla            # só quem não tem snapshot
+    python -m app.comandos.recalcular_sla --todos    # todos os chamados
+
+Rodar uma vez depois da migration 2026-10-18-add-sla-snapshot.sql. Sem isso
+nada quebra: chamado sem snapshot continua tendo o SLA calculado pelo
+histórico a cada leitura, que é o custo que o snapshot existe para tirar. O
+comando só acelera a troca.
+
+`--todos` serve para depois de mexer na regra de SLA ou no calendário de
+feriados, quando os prazos gravados deixam de refletir a regra vigente.
+
+Idempotente e seguro com a API no ar: trabalha em lotes por id, um commit por
+lote, e recalcula cada chamado a partir do histórico inteiro — rodar de novo
+dá o mesmo resultado. Uma transição que aconteça durante o lote avança o
+snapshot normalmente na API; o pior caso é o lote regravar o mesmo valor.
+"""
+import argparse
+import logging
+
+from sqlalchemy.orm import Session
+
+from app.models.chamado import Chamado
+from app.models.historico import HistoricoChamado
+from app.models.sla_config import SLAConfig
+from app.services.sla_service import reconstruir_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+def recalcular(db: Session, todos: bool = False, lote: int = 500) -> int:
+    """Recalcula o snapshot em lotes e devolve quantos chamados foram gravados."""
+    configs = {c.prioridade: c for c in db.query(SLAConfig).all()}
+
+    total, ultimo_id = 0, 0
+    while True:
+        query = db.query(Chamado).filter(Chamado.id > ultimo_id)
+        if not todos:
+            query = query.filter(Chamado.sla_calculado_em.is_(None))
+        chamados = query.order_by(Chamado.id).limit(lote).all()
+        if not chamados:
+            return total
+
+        historicos_por_chamado = {c.id: [] for c in chamados}
+        for h in db.query(HistoricoChamado).filter(
+            HistoricoChamado.chamado_id.in_(list(historicos_por_chamado))
+        ):
+            historicos_por_chamado[h.chamado_id].append(h)
+
+        for chamado in chamados:
+            reconstruir_snapshot(
+                chamado,
+                historicos_por_chamado[chamado.id],
+                configs.get(chamado.prioridade),
+            )
+
+        db.commit()
+        total += len(chamados)
+        ultimo_id = chamados[-1].id
+        logger.info("snapshot de SLA recalculado até o chamado %s (%s no total)", ultimo_id, total)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--todos", action="store_true", help="recalcula também quem já tem snapshot")
+    parser.add_argument("--lote", type=int, default=500, help="chamados por commit (padrão: 500)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        total = recalcular(db, todos=args.todos, lote=args.lote)
+    finally:
+        db.close()
+    print(f"{total} chamado(s) recalculado(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Reconta os contadores do painel (`resumo_chamados`) a partir de `chamados`.
+
+    python -m app.comandos.reconciliar_resumo              # corrige e relata
+    python -m app.comandos.reconciliar_resumo --verificar  # só relata
+
+Os contadores são mantidos pelas escritas da API, então só se desviam quando
+`chamados` muda por fora dela: SQL direto, restauração de backup, script de
+correção. Rodar depois de qualquer uma dessas, e uma vez depois da migration
+2026-10-18-add-resumo-chamados.sql (que já semeia a tabela; a primeira rodada
+deve sair sem divergência).
+
+Cada divergência sai numa linha, com o total gravado e o contado. Com
+`--verificar` nada é gravado e o comando sai com código 1 se houver
+divergência — serve de alarme num cron. Seguro com a API no ar: ver
+`resumo_service.reconciliar`.
+"""
+import argparse
+import logging
+import sys
+
+from sqlalchemy.orm import Session
+
+from app.services import resumo_service
+
+logger = logging.getLogger(__name__)
+
+
+def reconciliar(db: Session, corrigir: bool = True) -> list:
+    """Reconta, comita se for para corrigir, e devolve as divergências."""
+    divergencias = resumo_service.reconciliar(db, corrigir=corrigir)
+    if corrigir:
+        db.commit()
+    else:
+        db.rollback()
+    for d in divergencias:
+        cancelado, arquivado, status, prioridade, tecnico_id = d.chave
+        logger.info(
+            "status=%r prioridade=%r tecnico=%s cancelado=%s arquivado=%s: gravado %s, contado %s",
+            status, prioridade, resumo_service.tecnico_da_chave(tecnico_id), cancelado, arquivado,
+            d.gravado, d.contado,
+        )
+    return divergencias
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--verificar", action="store_true", help="só relata, sem gravar")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        divergencias = reconciliar(db, corrigir=not args.verificar)
+    finally:
+        db.close()
+
+    verbo = "encontrada(s)" if args.verificar else "corrigida(s)"
+    print(f"{len(divergencias)} divergência(s) {verbo}")
+    if args.verificar and divergencias:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Cache dos tokens JWT já verificados, até o `exp` de cada um.
+
+`get_current_user` chama `decodificar_token` em toda requisição protegida, e
+cada chamada refazia o HMAC, o base64 e o parse das claims pelo python-jose —
+para um token que é o mesmo durante as 8 horas de ACCESS_TOKEN_EXPIRE_MINUTES.
+Com o cache, a verificação completa acontece uma vez por token e processo; as
+seguintes são um SHA-256 e uma consulta a dicionário.
+
+O que continua valendo:
+
+- só entra token que passou pela verificação: assinatura trocada, token
+  expirado ou malformado não é guardado e cai na verificação toda vez;
+- a entrada vale até o `exp` do próprio token, nem um segundo a mais. Token
+  sem `exp` não é guardado;
+- a chave é o SHA-256 do token, não o token: o cache não guarda credencial
+  que sirva para alguma coisa se a memória do processo vazar, e o tamanho da
+  chave não depende do tamanho do token.
+
+Não há invalidação por usuário, e não precisa: o payload só diz QUEM é o
+portador. Desativação e troca de perfil continuam decididas depois, na leitura
+do usuário (ver `cache_de_usuarios.py`). Trocar SECRET_KEY exige reiniciar o
+container, o que esvazia o cache junto.
+
+Mesmo recorte dos outros caches: em memória e por processo.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.core.config import settings
+
+
+class CacheDeTokens:
+    """
+    LRU de payloads verificados, com prazo no `exp` de cada token.
+    Thread-safe, pelo mesmo motivo do `CacheDeUsuarios`.
+
+    `max_entradas` = 0 desliga o cache: `guardar` não guarda nada, e toda
+    requisição verifica o token por inteiro, como antes.
+    """
+
+    def __init__(self, max_entradas: int):
+        if max_entradas < 0:
+            raise ValueError("max_entradas deve ser >= 0")
+        self.max_entradas = max_entradas
+        self._entradas: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _chave(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def buscar(self, token: str, agora: Optional[float] = None) -> Optional[dict]:
+        """Cópia do payload guardado, se o token ainda não expirou; senão None."""
+        agora = time.time() if agora is None else agora
+        chave = self._chave(token)
+
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                return None
+
+            expira_em, payload = entrada
+            if agora >= expira_em:
+                del self._entradas[chave]
+                return None
+
+            self._entradas.move_to_end(chave)
+            # Cópia: quem recebe pode mexer no dicionário sem alterar o que
+            # as próximas requisições com o mesmo token vão ler.
+            return dict(payload)
+
+    def guardar(self, token: str, payload: dict, agora: Optional[float] = None) -> None:
+        """Guarda o payload de um token JÁ VERIFICADO, até o `exp` dele."""
+        if self.max_entradas <= 0:
+            return
+        expira_em = payload.get("exp")
+        if isinstance(expira_em, bool) or not isinstance(expira_em, (int, float)):
+            return
+        agora = time.time() if agora is None else agora
+        if agora >= expira_em:
+            return
+
+        chave = self._chave(token)
+        with self._lock:
+            self._entradas[chave] = (float(expira_em), dict(payload))
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def reset(self) -> None:
+        """Descarta todo o estado. Existe para os testes."""
+        with self._lock:
+            self._entradas.clear()
+
+
+cache_de_tokens = CacheDeTokens(max_entradas=settings.CACHE_TOKEN_MAX_ENTRADAS)
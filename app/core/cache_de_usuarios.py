@@ -0,0 +1,136 @@
+"""
+Cache do usuário autenticado, por id, com prazo de validade.
+
+`get_current_user` roda em toda requisição protegida, e a consulta do usuário
+com a role era a mais executada da aplicação — o mesmo token, a mesma linha,
+centenas de vezes por minuto. O cache guarda só o que a autorização lê (id,
+nome, setor, perfil, ativo), nunca o hash da senha.
+
+"O banco é autoritativo" continua valendo, com um limite de atraso:
+
+- desativar, trocar o perfil ou a senha por esta API invalida a entrada na
+  hora (ver as rotas de `usuarios.py` e `auth.py`);
+- o que muda por fora da API (SQL direto no banco) vale em até
+  CACHE_USUARIO_TTL_SEGUNDOS. Com 0, não há cache e toda requisição lê o banco,
+  como antes.
+
+Mesmo recorte do limitador de login (`rate_limit.py`): **em memória e por
+processo**. Com um worker, a invalidação é exata; com N workers, a de um não
+chega aos outros, e o atraso nos demais é o prazo de validade.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from app.core.config import settings
+
+# Teto de usuários guardados. O sistema tem dezenas de contas; o teto existe
+# para que o cache não cresça sem limite, não porque se espere chegar nele.
+MAX_ENTRADAS = 10_000
+
+
+@dataclass(frozen=True)
+class PerfilAutenticado:
+    id: int
+    nome: str
+
+
+@dataclass(frozen=True)
+class UsuarioAutenticado:
+    """
+    O usuário da requisição, como `get_current_user` o entrega às rotas.
+
+    Não é o model: não está preso a sessão nenhuma e não tem o hash da senha.
+    Rota que precisa alterar a própria conta busca a linha pelo id (ver
+    `alterar_senha`). Os nomes dos campos são os do model, para que
+    `current_user.role.nome`, `current_user.setor_id` etc. continuem iguais.
+    """
+
+    id: int
+    nome: str
+    setor_id: Optional[int]
+    role_id: int
+    ativo: bool
+    role: Optional[PerfilAutenticado]
+
+    @classmethod
+    def do_registro(cls, usuario) -> "UsuarioAutenticado":
+        role = usuario.role
+        return cls(
+            id=usuario.id,
+            nome=usuario.nome,
+            setor_id=usuario.setor_id,
+            role_id=usuario.role_id,
+            ativo=bool(usuario.ativo),
+            role=PerfilAutenticado(id=role.id, nome=role.nome) if role else None,
+        )
+
+
+class CacheDeUsuarios:
+    """
+    LRU com prazo de validade. Thread-safe: as rotas `def` rodam no threadpool
+    do FastAPI, com concorrência real sobre esta estrutura.
+
+    A leitura devolve, junto com a entrada, a geração do cache; a escrita só
+    guarda se nenhuma invalidação aconteceu no meio. Sem isso, uma requisição
+    que leu a linha antiga do banco, antes do commit de uma desativação,
+    gravaria a conta ainda ativa DEPOIS da invalidação — e ela valeria pelo
+    prazo inteiro.
+    """
+
+    def __init__(self, ttl_segundos: float, max_entradas: int = MAX_ENTRADAS):
+        if ttl_segundos < 0:
+            raise ValueError("ttl_segundos deve ser >= 0")
+        self.ttl_segundos = ttl_segundos
+        self.max_entradas = max_entradas
+        self._entradas: "OrderedDict[int, Tuple[float, UsuarioAutenticado]]" = OrderedDict()
+        self._geracao = 0
+        self._lock = threading.Lock()
+
+    def buscar(self, usuario_id: int, agora: Optional[float] = None) -> Tuple[Optional[UsuarioAutenticado], int]:
+        """A entrada ainda válida (ou None) e a geração a repassar para `guardar`."""
+        agora = time.monotonic() if agora is None else agora
+
+        with self._lock:
+            entrada = self._entradas.get(usuario_id)
+            if entrada is None:
+                return None, self._geracao
+
+            expira_em, usuario = entrada
+            if agora >= expira_em:
+                del self._entradas[usuario_id]
+                return None, self._geracao
+
+            self._entradas.move_to_end(usuario_id)
+            return usuario, self._geracao
+
+    def guardar(self, usuario: UsuarioAutenticado, geracao: int, agora: Optional[float] = None) -> None:
+        if self.ttl_segundos <= 0:
+            return
+        agora = time.monotonic() if agora is None else agora
+
+        with self._lock:
+            if geracao != self._geracao:
+                return
+            self._entradas[usuario.id] = (agora + self.ttl_segundos, usuario)
+            self._entradas.move_to_end(usuario.id)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self, usuario_id: int) -> None:
+        """Descarta a entrada. Chamar DEPOIS do commit da mudança."""
+        with self._lock:
+            self._entradas.pop(usuario_id, None)
+            self._geracao += 1
+
+    def reset(self) -> None:
+        """Descarta todo o estado. Existe para os testes."""
+        with self._lock:
+            self._entradas.clear()
+            self._geracao += 1
+
+
+cache_de_usuarios = CacheDeUsuarios(ttl_segundos=settings.CACHE_USUARIO_TTL_SEGUNDOS)
@@ -20,6 +20,28 @@ class Settings(BaseSettings):
     # usuário no meio do expediente.
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 480
 
+    # Cache do usuário autenticado (ver app/core/cache_de_usuarios.py).
+    # Desativação, troca de perfil e de senha pela API valem na hora; este é o
+    # atraso máximo do que muda por fora dela (SQL direto, outro worker).
+    # 0 desliga o cache.
+    CACHE_USUARIO_TTL_SEGUNDOS: float = 30
+
+    # Cache dos tokens JWT já verificados (ver app/core/cache_de_tokens.py).
+    # Quantos tokens cada processo guarda; cada um vale até o próprio `exp`.
+    # 0 desliga o cache e toda requisição verifica a assinatura de novo.
+    CACHE_TOKEN_MAX_ENTRADAS: int = 10_000
+
+    # Biblioteca que verifica o JWT (ver app/core/security.py): "jose", a de
+    # sempre, ou "pyjwt", que exige o pacote PyJWT instalado na imagem. Os
+    # tokens são os mesmos nas duas; trocar não desconecta ninguém.
+    JWT_BACKEND: str = "jose"
+
+    # Cache das tabelas de referência (ver app/services/cache_de_referencia.py).
+    # De quanto em quanto tempo um processo confere se outro mudou prazos de
+    # SLA, categorias ou setores. O que muda pelo próprio processo vale na
+    # hora. 0 = confere a cada acesso (uma consulta pequena, não a tabela).
+    CACHE_REFERENCIA_VERIFICACAO_SEGUNDOS: float = 5
+
     # Rate limiting do login
     # Contam apenas tentativas FALHAS; um login bem-sucedido zera as duas
     # contagens. O limite por usuário é o que resiste a ataque distribuído,
@@ -34,6 +56,39 @@ class Settings(BaseSettings):
     LOGIN_MAX_FALHAS_POR_IP: int = 50
     LOGIN_JANELA_SEGUNDOS: int = 900  # 15 minutos
 
+    # Onde o limitador de login guarda as tentativas (ver app/core/rate_limit.py).
+    # "memoria": por processo, o de sempre — com N workers o limite vira N
+    # vezes o configurado. "banco": tabela marcas_de_tentativa, uma contagem
+    # só para todos os processos; exige a migration 2026-10-18-add-marcas-de-
+    # tentativa.sql. Obrigatório "banco" antes de subir com --workers.
+    # "aproximado": por processo, como "memoria", com memória fixa por chave
+    # e contagem aproximada — pode deixar passar perto do dobro do limite.
+    LOGIN_LIMITE_ARMAZENAMENTO: str = "memoria"
+
+    # Limite de requisições em toda a /api/v1 (ver app/core/limite_de_requisicoes.py).
+    # Balde de fichas por usuário do token e por IP: a capacidade é a rajada,
+    # a reposição por segundo é o ritmo sustentado. Ler um chamado custa 1
+    # ficha; a listagem de chamados, 5; a exportação, 30. Estourou, 429 com
+    # Retry-After. O do IP é folgado pelo mesmo motivo do login: escritório
+    # atrás de NAT divide o balde. 0 na capacidade desliga aquele limite.
+    LIMITE_API_FICHAS_POR_USUARIO: int = 300
+    LIMITE_API_FICHAS_POR_SEGUNDO_USUARIO: float = 5
+    LIMITE_API_FICHAS_POR_IP: int = 1200
+    LIMITE_API_FICHAS_POR_SEGUNDO_IP: float = 20
+
+    # Custo do bcrypt (log2 das iterações). Subir 1 dobra o tempo de cada
+    # login. Hash gravado com outro custo é regravado no próximo login da
+    # pessoa, sem migration (ver app/core/security.py).
+    BCRYPT_ROUNDS: int = 12
+
+    # Processos dedicados ao bcrypt e teto de operações de senha em curso
+    # (rodando ou esperando processo), por processo da API. Acima do teto o
+    # login responde 503 na hora, em vez de prender uma thread do servidor
+    # esperando. Ver app/core/pool_de_senhas.py. SENHA_PROCESSOS = 0 roda o
+    # bcrypt na thread da requisição, ainda sob o teto.
+    SENHA_PROCESSOS: int = 2
+    SENHA_MAX_PENDENTES: int = 8
+
     # Quantos proxies confiáveis existem na frente da aplicação.
     #
     # Cada proxy acrescenta o IP que enxergou ao fim de X-Forwarded-For, então
@@ -62,6 +117,36 @@ class Settings(BaseSettings):
     WEBHOOK_TECNICO_TOKEN: str = ""
     WEBHOOK_TECNICO_HEADER: str = "X-Webhook-Token"
 
+    # Entrega em segundo plano (ver app/services/webhook_service.py).
+    # Intervalo entre as passadas do despachante pela fila, e quantas vezes
+    # uma notificação é tentada antes de ficar como 'morto' em
+    # webhooks_pendentes. A espera entre tentativas dobra a cada falha, de
+    # 30 s até uma hora: com 8, o n8n tem cerca de uma hora para voltar.
+    WEBHOOK_INTERVALO_SEGUNDOS: float = 2
+    WEBHOOK_MAX_TENTATIVAS: int = 8
+
+    # Calendário de expediente do SLA (feriados e janelas por dia da semana).
+    # Caminho de um JSON no formato de calendario.example.json. Vazio = seg-sex,
+    # 08-12 e 13-17, sem feriados — o comportamento de sempre. O arquivo é lido
+    # e compilado uma vez, na subida: mudou o arquivo, reinicie o container.
+    #
+    # Os prazos dos chamados já abertos estão gravados nas colunas `sla_*` e
+    # não mudam sozinhos com o calendário: só na próxima escrita de cada um.
+    # Depois de trocar o arquivo e reiniciar, rode
+    # `python -m app.comandos.recalcular_sla --todos` para regravá-los, e
+    # reinicie de novo para os avisos de prazo pegarem os prazos regravados.
+    # Feriado novo do ano corrente entra sem susto; mudar janelas
+    # retroativamente, não.
+    CALENDARIO_ARQUIVO: str = ""
+
+    # Abertura automática de chamados das tarefas recorrentes vencidas (ver
+    # app/services/abertura_de_rotinas.py). O id do usuário que aparece como
+    # solicitante desses chamados — uma conta de serviço, de preferência.
+    # 0 = desligado: sem ele a thread nem sobe, e as rotinas continuam só na
+    # tela, como antes. O intervalo é entre as passadas pela tabela de tarefas.
+    RECORRENCIA_SOLICITANTE_ID: int = 0
+    RECORRENCIA_INTERVALO_SEGUNDOS: float = 300
+
     # CORS
     ALLOWED_ORIGINS: str = "http://localhost:5173"
 
@@ -1,6 +1,7 @@
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
 
 # Create database engine
@@ -25,3 +26,16 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def insert_do_dialeto(db: Session, modelo):
+    """
+    `insert()` do dialeto da sessão, com `on_conflict_do_update`.
+
+    O upsert não existe no `insert` genérico do SQLAlchemy. Produção é
+    Postgres; os testes rodam em SQLite, que tem a mesma sintaxe
+    (`ON CONFLICT ... DO UPDATE ... RETURNING`, desde a 3.35).
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(modelo)
+    return postgresql.insert(modelo)
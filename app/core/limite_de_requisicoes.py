@@ -0,0 +1,244 @@
+"""
+Limite de requisições por usuário e por IP em toda a `/api/v1`, por balde de
+fichas.
+
+Até aqui só o login tinha limite. Uma aba do frontend presa num laço de
+`GET /chamados/?limit=500` ocupava conexões do pool do banco (10 + 20 de
+folga) sem parar, e quem pagava era todo mundo. Agora cada requisição gasta
+fichas de dois baldes — o do usuário do token e o do IP de origem — e, sem
+fichas num deles, a resposta é 429 com Retry-After, antes de chegar à rota e
+ao banco.
+
+Balde de fichas, e não janela: cada balde enche até `capacidade` e repõe
+`por_segundo` fichas continuamente. A capacidade é a rajada permitida (abrir
+a tela dispara várias chamadas de uma vez); a reposição é o ritmo sustentado.
+O estado por chave é um par de floats, e conferir é aritmética — sem fila de
+marcas para podar.
+
+O custo varia por rota (`CUSTOS_EXATOS`, `CUSTOS_POR_PREFIXO`): listagem,
+busca, exportação e relatório custam mais que ler um chamado, na proporção
+do que pesam no banco. Rota fora das tabelas custa 1.
+
+O usuário vem do token, pelo mesmo `decodificar_token` das rotas — com o
+cache de tokens verificados, é um SHA-256 e uma consulta a dicionário.
+Requisição sem token válido conta só no balde do IP, que é conferido
+primeiro: uma enxurrada de tokens falsos para no IP sem custar verificação
+de assinatura. Requisição recusada pelo balde do usuário devolve as fichas
+do IP: quem paga o excesso de um usuário é ele, não o IP que ele divide.
+
+Middleware ASGI puro, sem `BaseHTTPMiddleware`: não embrulha o corpo da
+resposta, e o caminho de quem está dentro do limite é uma comparação de
+prefixo, dois dicionários e duas travas por fatia. Fica DENTRO do CORS (ver
+`main.py`), para que o 429 chegue ao frontend com os headers de CORS e o
+JavaScript consiga ler o Retry-After.
+
+Mesmo recorte do limitador de login em memória: por processo. Com N workers,
+cada um tem os seus baldes e o limite efetivo é N vezes o configurado.
+"""
+
+import math
+import threading
+import time
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from starlette.requests import HTTPConnection
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.rate_limit import FATIAS, MAX_CHAVES
+from app.core.rede import ip_do_cliente
+from app.core.security import decodificar_token
+
+PREFIXO = "/api/v1"
+
+# Saúde: chamado a cada 60 s pela faixa de status do frontend e por monitor
+# externo, de IP fixo. Limitá-lo faria a API parecer fora do ar justamente
+# para quem está olhando se ela está fora do ar.
+ISENTAS = frozenset({"/api/v1/health"})
+
+# Custo por (método, caminho sem a barra final).
+CUSTOS_EXATOS: Dict[Tuple[str, str], int] = {
+    ("GET", "/api/v1/chamados"): 5,
+    ("GET", "/api/v1/chamados/busca"): 5,
+    ("GET", "/api/v1/chamados/exportar"): 30,
+    ("GET", "/api/v1/usuarios"): 3,
+    ("GET", "/api/v1/eventos"): 5,
+    ("GET", "/api/v1/tarefas-recorrentes"): 3,
+    ("GET", "/api/v1/tarefas-recorrentes/agenda"): 5,
+    ("GET", "/api/v1/diagnostico"): 10,
+}
+
+# Para as rotas com id no caminho; o primeiro prefixo que casar vale.
+CUSTOS_POR_PREFIXO: Tuple[Tuple[str, str, int], ...] = (
+    ("GET", "/api/v1/relatorios/", 20),
+    ("GET", "/api/v1/comentarios/chamado/", 2),
+    ("GET", "/api/v1/historico/chamado/", 2),
+)
+
+
+def custo_da_rota(metodo: str, caminho: str) -> int:
+    caminho = caminho.rstrip("/")
+    custo = CUSTOS_EXATOS.get((metodo, caminho))
+    if custo is not None:
+        return custo
+    for metodo_da_regra, prefixo, custo in CUSTOS_POR_PREFIXO:
+        if metodo == metodo_da_regra and caminho.startswith(prefixo):
+            return custo
+    return 1
+
+
+class _Fatia:
+    __slots__ = ("lock", "baldes")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # chave -> (fichas, instante da última conta). A ordem do dicionário
+        # é a do último uso: o primeiro é o que sai quando a fatia enche.
+        self.baldes: Dict[Hashable, Tuple[float, float]] = {}
+
+
+class BaldesDeFichas:
+    """
+    Um balde de fichas por chave, com teto de chaves e travas por fatia (como
+    os `ContadoresAproximados` do limitador de login).
+
+    `capacidade` = 0 desliga: `consumir` libera tudo sem guardar nada. Chave
+    despejada por falta de espaço volta com o balde cheio — o teto protege a
+    memória, não o limite, e só é atingido com milhares de clientes ativos.
+    """
+
+    relogio = staticmethod(time.monotonic)
+
+    def __init__(self, capacidade: int, por_segundo: float, max_chaves: int = MAX_CHAVES, fatias: int = FATIAS):
+        if capacidade < 0:
+            raise ValueError("capacidade deve ser >= 0")
+        if capacidade and por_segundo <= 0:
+            raise ValueError("por_segundo deve ser > 0")
+        self.capacidade = capacidade
+        self.por_segundo = por_segundo
+        self._por_fatia = max(1, math.ceil(max_chaves / fatias))
+        self._fatias: List[_Fatia] = [_Fatia() for _ in range(fatias)]
+        self._lock = threading.Lock()
+        self._recusadas = 0
+
+    def consumir(self, chave: Hashable, custo: int = 1, agora: Optional[float] = None) -> float:
+        """
+        Tira `custo` fichas do balde da chave. Zero se havia fichas; senão,
+        nada é tirado e a volta é quantos segundos faltam para haver.
+        """
+        if not self.capacidade:
+            return 0.0
+        agora = self.relogio() if agora is None else agora
+        # Custo acima da capacidade nunca seria atendido: vale o balde cheio.
+        custo = min(custo, self.capacidade)
+        fatia = self._fatias[hash(chave) % len(self._fatias)]
+
+        with fatia.lock:
+            anterior = fatia.baldes.pop(chave, None)
+            if anterior is None:
+                fichas = self.capacidade
+            else:
+                fichas = min(self.capacidade, anterior[0] + (agora - anterior[1]) * self.por_segundo)
+
+            if fichas >= custo:
+                fichas -= custo
+                espera = 0.0
+            else:
+                espera = (custo - fichas) / self.por_segundo
+
+            fatia.baldes[chave] = (fichas, agora)
+            if len(fatia.baldes) > self._por_fatia:
+                del fatia.baldes[next(iter(fatia.baldes))]
+
+        if espera:
+            with self._lock:
+                self._recusadas += 1
+        return espera
+
+    def devolver(self, chave: Hashable, custo: int = 1) -> None:
+        """
+        Põe de volta `custo` fichas tiradas por um `consumir` que deu zero,
+        quando a requisição acabou recusada por outro balde. Sem passar da
+        capacidade; chave despejada nesse meio-tempo já voltaria cheia.
+        """
+        if not self.capacidade:
+            return
+        custo = min(custo, self.capacidade)
+        fatia = self._fatias[hash(chave) % len(self._fatias)]
+        with fatia.lock:
+            anterior = fatia.baldes.get(chave)
+            if anterior is not None:
+                fatia.baldes[chave] = (min(self.capacidade, anterior[0] + custo), anterior[1])
+
+    def estatisticas(self) -> dict:
+        chaves = 0
+        for fatia in self._fatias:
+            with fatia.lock:
+                chaves += len(fatia.baldes)
+        with self._lock:
+            return {"capacidade": self.capacidade, "chaves": chaves, "recusadas": self._recusadas}
+
+    def reset(self) -> None:
+        """Descarta todo o estado. Existe para os testes."""
+        for fatia in self._fatias:
+            with fatia.lock:
+                fatia.baldes.clear()
+        with self._lock:
+            self._recusadas = 0
+
+
+baldes_por_usuario = BaldesDeFichas(settings.LIMITE_API_FICHAS_POR_USUARIO, settings.LIMITE_API_FICHAS_POR_SEGUNDO_USUARIO)
+baldes_por_ip = BaldesDeFichas(settings.LIMITE_API_FICHAS_POR_IP, settings.LIMITE_API_FICHAS_POR_SEGUNDO_IP)
+
+
+def _usuario_do_token(autorizacao: Optional[str]) -> Optional[str]:
+    if not autorizacao:
+        return None
+    esquema, _, token = autorizacao.partition(" ")
+    if esquema.lower() != "bearer" or not token:
+        return None
+    payload = decodificar_token(token.strip())
+    return payload.get("sub") if payload else None
+
+
+class LimiteDeRequisicoes:
+    """Middleware ASGI: confere os baldes e devolve 429 antes da rota."""
+
+    def __init__(self, app: ASGIApp, por_usuario: BaldesDeFichas, por_ip: BaldesDeFichas):
+        self.app = app
+        self.por_usuario = por_usuario
+        self.por_ip = por_ip
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        caminho = scope.get("path", "")
+        if scope["type"] != "http" or not caminho.startswith(PREFIXO) or caminho.rstrip("/") in ISENTAS:
+            await self.app(scope, receive, send)
+            return
+
+        conexao = HTTPConnection(scope)
+        custo = custo_da_rota(scope["method"], caminho)
+
+        ip = ip_do_cliente(conexao)
+        espera = self.por_ip.consumir(ip, custo)
+        if not espera and self.por_usuario.capacidade:
+            usuario = _usuario_do_token(conexao.headers.get("authorization"))
+            if usuario is not None:
+                espera = self.por_usuario.consumir(usuario, custo)
+                if espera:
+                    # Recusada pelo balde do usuário, a requisição não conta
+                    # no do IP. Senão um usuário no limite, repetindo em laço
+                    # atrás do NAT do escritório, esvaziaria o balde do IP
+                    # no ritmo do laço e levaria os colegas junto.
+                    self.por_ip.devolver(ip, custo)
+
+        if espera:
+            resposta = JSONResponse(
+                status_code=429,
+                content={"detail": "Muitas requisições. Tente novamente em instantes."},
+                headers={"Retry-After": str(max(1, math.ceil(espera)))},
+            )
+            await resposta(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
@@ -0,0 +1,117 @@
+"""
+Pool de processos para o bcrypt, com limite próprio de operações simultâneas.
+
+Cada hash ou verificação de senha custa centenas de milissegundos de CPU. As
+rotas que os fazem (login, alterar senha, cadastro) são síncronas, e rodavam
+o bcrypt na thread do pool do AnyIO — o mesmo pool de threads que atende
+TODAS as outras rotas síncronas. Numa rajada de login às 8h, as threads
+ficavam presas em bcrypt e a listagem de chamados esperava na fila atrás.
+
+Aqui o cálculo vai para processos separados (`ProcessPoolExecutor`), fora do
+GIL e do processo que atende HTTP, e o número de operações de senha em curso
+— rodando ou esperando processo livre — tem teto próprio
+(SENHA_MAX_PENDENTES). Acima dele a operação é recusada na hora com
+`FilaDeSenhasCheia`, que vira 503 com Retry-After (ver `main.py`): a thread
+da requisição volta para o pool em vez de esperar, e no máximo esse número
+de threads do AnyIO fica esperando senha ao mesmo tempo.
+
+Os processos são criados com `spawn`, não `fork`: a API tem threads próprias
+(despachante de webhooks, agendador de avisos), e `fork` de processo com
+threads copia travas possivelmente presas. O custo é um import da aplicação
+por processo, uma vez, no primeiro uso.
+
+SENHA_PROCESSOS = 0 roda o bcrypt na própria thread, ainda sob o teto — para
+ambiente em que criar processo não é possível.
+"""
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class FilaDeSenhasCheia(Exception):
+    """Há SENHA_MAX_PENDENTES operações de senha em curso; esta foi recusada."""
+
+
+class PoolDeSenhas:
+    """
+    Executa funções de senha num pool de processos, com teto de pendentes.
+
+    `estatisticas()` é a métrica de fila: quantas operações estão em curso
+    agora e quantas foram recusadas desde a subida. Aparece em
+    GET /api/v1/diagnostico.
+    """
+
+    def __init__(self, processos: int, max_pendentes: int):
+        self.processos = processos
+        self.max_pendentes = max_pendentes
+        self._vagas = threading.BoundedSemaphore(max_pendentes)
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pendentes = 0
+        self._recusadas = 0
+
+    def executar(self, funcao: Callable[..., T], *args) -> T:
+        """
+        `funcao(*args)` num processo do pool; devolve o resultado.
+
+        `funcao` precisa ser de nível de módulo (vai para o outro processo por
+        pickle). Levanta `FilaDeSenhasCheia` sem esperar se o teto foi atingido.
+        """
+        if not self._vagas.acquire(blocking=False):
+            with self._lock:
+                self._recusadas += 1
+            logger.warning("Operação de senha recusada: %s em curso", self.max_pendentes)
+            raise FilaDeSenhasCheia()
+        with self._lock:
+            self._pendentes += 1
+        try:
+            if self.processos <= 0:
+                return funcao(*args)
+            try:
+                return self._obter_executor().submit(funcao, *args).result()
+            except BrokenProcessPool:
+                # Um processo morreu (OOM killer, por exemplo) e o pool não
+                # aceita mais tarefas. Um pool novo, e a operação uma vez mais.
+                logger.exception("Pool de senhas quebrado; recriando")
+                self._descartar_executor()
+                return self._obter_executor().submit(funcao, *args).result()
+        finally:
+            with self._lock:
+                self._pendentes -= 1
+            self._vagas.release()
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "processos": self.processos,
+                "max_pendentes": self.max_pendentes,
+                "pendentes": self._pendentes,
+                "recusadas": self._recusadas,
+            }
+
+    def encerrar(self) -> None:
+        """Encerra os processos. O próximo uso cria outros."""
+        self._descartar_executor(esperar=True)
+
+    def _obter_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processos,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _descartar_executor(self, esperar: bool = False) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=esperar)
@@ -1,18 +1,42 @@
 """
 Limitador de tentativas por janela deslizante.
 
-Usado para conter força bruta no login. Guarda estado **em memória e por
-processo**: não sobrevive a restart do container e não é compartilhado entre
-workers. Com o `CMD` atual do Dockerfile (uvicorn sem `--workers`) há um único
-processo, então a contagem é exata. Se um dia forem N workers, cada um passa a
-ter sua própria contagem e o limite efetivo vira N vezes o configurado — nesse
-caso troque o armazenamento por Redis.
+Usado para conter força bruta no login. A lógica da janela fica em
+`JanelaDeslizante`; onde as marcas de tempo moram é um armazenamento à parte,
+escolhido por LOGIN_LIMITE_ARMAZENAMENTO:
+
+- "memoria" (padrão): **em memória e por processo**. Não sobrevive a restart
+  do container e não é compartilhado entre workers. Com o `CMD` atual do
+  Dockerfile (uvicorn sem `--workers`) há um único processo, então a
+  contagem é exata. Com N workers, cada um tem a sua, e o limite efetivo
+  vira N vezes o configurado.
+- "banco": uma linha por tentativa em `marcas_de_tentativa` (UNLOGGED no
+  Postgres). Todos os processos contam juntos, e a contagem sobrevive ao
+  restart da API. A verificação é um SELECT só, fora de transação; registrar
+  uma falha é um DELETE das marcas vencidas e um INSERT, numa transação.
+  É o que permite subir o uvicorn com mais de um worker.
+- "aproximado": em memória e por processo, como "memoria", mas com dois
+  contadores por chave em vez de uma marca por tentativa (ver
+  `ContadoresAproximados`). Memória fixa por chave e travas por fatia, ao
+  custo de uma contagem aproximada.
+
+Um armazenamento é qualquer objeto com `relogio()`, `espera`, `registrar`,
+`limpar` e `reset`, com o contrato de `MarcasEmMemoria`.
 """
 
+import hashlib
+import math
 import threading
 import time
+from array import array
 from collections import OrderedDict, deque
-from typing import Deque, Hashable, Optional
+from typing import Callable, Deque, Dict, Hashable, List, Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.engine import Engine
+
+from app.core.database import engine
+from app.models.marca_de_tentativa import MarcaDeTentativa
 
 # Teto de chaves distintas mantidas simultaneamente. Sem isso, um ataque que
 # varia o usuário a cada tentativa faria o próprio limitador consumir memória
@@ -20,23 +44,18 @@ from typing import Deque, Hashable, Optional
 MAX_CHAVES = 10_000
 
 
-class JanelaDeslizante:
+class MarcasEmMemoria:
     """
-    Conta eventos por chave dentro de uma janela de tempo que anda junto com o
-    relógio. Diferente de um contador que zera de tempos em tempos, aqui não
-    existe a virada em que o atacante recupera todo o orçamento de uma vez.
+    Marcas de tempo num deque por chave, neste processo.
+
+    Marca com `janela_segundos` ou mais de idade já saiu da janela, e é
+    descartada na primeira vez que a chave é lida ou gravada depois disso.
     """
 
-    def __init__(self, max_eventos: int, janela_segundos: int, max_chaves: int = MAX_CHAVES):
-        if max_eventos < 1:
-            raise ValueError("max_eventos deve ser >= 1")
-        if janela_segundos < 1:
-            raise ValueError("janela_segundos deve ser >= 1")
+    relogio = staticmethod(time.monotonic)
 
-        self.max_eventos = max_eventos
-        self.janela_segundos = janela_segundos
+    def __init__(self, max_chaves: int = MAX_CHAVES):
         self.max_chaves = max_chaves
-
         # OrderedDict para poder descartar a chave usada há mais tempo quando
         # o teto é atingido.
         self._eventos: "OrderedDict[Hashable, Deque[float]]" = OrderedDict()
@@ -44,45 +63,38 @@ class JanelaDeslizante:
         # threadpool, então há concorrência real sobre esta estrutura.
         self._lock = threading.Lock()
 
-    def _expirar(self, marcas: Deque[float], agora: float) -> None:
-        limite = agora - self.janela_segundos
-        while marcas and marcas[0] <= limite:
+    @staticmethod
+    def _expirar(marcas: Deque[float], desde: float) -> None:
+        while marcas and marcas[0] <= desde:
             marcas.popleft()
 
-    def segundos_ate_liberar(self, chave: Hashable, agora: Optional[float] = None) -> int:
+    def espera(self, chave: Hashable, agora: float, janela_segundos: float, max_eventos: int) -> Optional[float]:
         """
-        Zero se a chave ainda pode tentar. Caso contrário, quantos segundos
-        faltam para a tentativa mais antiga sair da janela.
+        None se a chave tem menos de `max_eventos` marcas na janela. Senão,
+        quantos segundos faltam para a mais antiga sair dela.
         """
-        agora = time.monotonic() if agora is None else agora
-
         with self._lock:
             marcas = self._eventos.get(chave)
             if marcas is None:
-                return 0
+                return None
 
-            self._expirar(marcas, agora)
+            self._expirar(marcas, agora - janela_segundos)
             if not marcas:
                 del self._eventos[chave]
-                return 0
-
-            if len(marcas) < self.max_eventos:
-                return 0
-
-            restante = self.janela_segundos - (agora - marcas[0])
-            return max(1, int(restante) + 1)
+                return None
 
-    def registrar(self, chave: Hashable, agora: Optional[float] = None) -> None:
-        """Contabiliza uma tentativa falha."""
-        agora = time.monotonic() if agora is None else agora
+            if len(marcas) < max_eventos:
+                return None
+            return janela_segundos - (agora - marcas[0])
 
+    def registrar(self, chave: Hashable, agora: float, janela_segundos: float) -> None:
         with self._lock:
             marcas = self._eventos.get(chave)
             if marcas is None:
                 marcas = deque()
                 self._eventos[chave] = marcas
 
-            self._expirar(marcas, agora)
+            self._expirar(marcas, agora - janela_segundos)
             marcas.append(agora)
             self._eventos.move_to_end(chave)
 
@@ -90,11 +102,281 @@ class JanelaDeslizante:
                 self._eventos.popitem(last=False)
 
     def limpar(self, chave: Hashable) -> None:
-        """Zera a contagem da chave. Chamado quando o login dá certo."""
         with self._lock:
             self._eventos.pop(chave, None)
 
     def reset(self) -> None:
-        """Descarta todo o estado. Existe para os testes."""
         with self._lock:
             self._eventos.clear()
+
+
+# Fatias do modo aproximado: cada uma com a sua trava e 1/FATIAS das chaves.
+FATIAS = 16
+
+# Teto dos contadores (array "I", 32 bits sem sinal). Inalcançável com os
+# limites de login; existe para que o array não estoure.
+_MAX_CONTADOR = 2**32 - 1
+
+
+class _Fatia:
+    """
+    Uma fatia das chaves do modo aproximado: dicionário chave -> vaga, e três
+    arrays paralelos com o estado de cada vaga. Vagas pré-alocadas: a memória
+    da fatia não cresce depois de criada, só o dicionário até a capacidade.
+    """
+
+    __slots__ = ("lock", "vagas", "livres", "balde", "atual", "anterior")
+
+    def __init__(self, capacidade: int):
+        self.lock = threading.Lock()
+        self.vagas: Dict[Hashable, int] = {}
+        self.livres: List[int] = list(range(capacidade - 1, -1, -1))
+        # Número do balde atual da vaga (instante // janela), e as contagens
+        # dele e do anterior.
+        self.balde = array("q", bytes(8 * capacidade))
+        self.atual = array("I", bytes(4 * capacidade))
+        self.anterior = array("I", bytes(4 * capacidade))
+
+    def rolar(self, vaga: int, balde: int) -> None:
+        """Traz a vaga para o balde `balde`, descartando o que saiu da janela."""
+        guardado = self.balde[vaga]
+        if guardado == balde:
+            return
+        self.anterior[vaga] = self.atual[vaga] if guardado == balde - 1 else 0
+        self.atual[vaga] = 0
+        self.balde[vaga] = balde
+
+
+class ContadoresAproximados:
+    """
+    Janela deslizante aproximada por dois baldes fixos por chave.
+
+    O tempo é cortado em baldes do tamanho da janela. Cada chave guarda só a
+    contagem do balde atual e a do anterior, e a contagem na janela é
+    estimada supondo o balde anterior uniforme: a fração dele que ainda cai
+    na janela, mais o balde atual inteiro —
+
+        estimativa = anterior * (1 - decorrido_no_balde / janela) + atual
+
+    São 16 bytes por chave em arrays, contra um deque e um float por
+    tentativa no modo exato: numa rajada de credential stuffing com milhares
+    de nomes, a memória não depende do número de tentativas. As chaves são
+    repartidas em FATIAS por hash, cada fatia com a sua trava e 1/FATIAS do
+    teto; duas verificações só disputam a trava se caem na mesma fatia. (O
+    GIL continua valendo: o ganho é não esperar a trava de quem está no
+    meio de um despejo, não rodar em paralelo.)
+
+    O custo é a exatidão. A estimativa erra quando as tentativas do balde
+    anterior não foram uniformes; no pior caso — tentativas concentradas no
+    fim de um balde —, cabem perto do dobro de `max_eventos` numa janela
+    exata. Para login, com limite de 10 em 15 minutos, é aceitável no
+    processo; quem precisa do limite exato usa "memoria" ou "banco".
+
+    Cheia a fatia, sai a chave que registrou falha há mais tempo, como no
+    modo exato.
+    """
+
+    relogio = staticmethod(time.monotonic)
+
+    def __init__(self, max_chaves: int = MAX_CHAVES, fatias: int = FATIAS):
+        capacidade = max(1, math.ceil(max_chaves / fatias))
+        self._fatias = [_Fatia(capacidade) for _ in range(fatias)]
+
+    def _fatia(self, chave: Hashable) -> _Fatia:
+        return self._fatias[hash(chave) % len(self._fatias)]
+
+    def espera(self, chave: Hashable, agora: float, janela_segundos: float, max_eventos: int) -> Optional[float]:
+        fatia = self._fatia(chave)
+        balde = int(agora // janela_segundos)
+        inicio = balde * janela_segundos
+
+        with fatia.lock:
+            vaga = fatia.vagas.get(chave)
+            if vaga is None:
+                return None
+            fatia.rolar(vaga, balde)
+            atual, anterior = fatia.atual[vaga], fatia.anterior[vaga]
+
+        fracao = (agora - inicio) / janela_segundos
+        if anterior * (1 - fracao) + atual < max_eventos:
+            return None
+
+        if atual >= max_eventos:
+            # O balde atual sozinho já passa do limite: libera quando ele,
+            # já como anterior, tiver perdido peso suficiente no próximo.
+            libera_em = inicio + janela_segundos * (2 - max_eventos / atual)
+        else:
+            libera_em = inicio + janela_segundos * (1 - (max_eventos - atual) / anterior)
+        return libera_em - agora
+
+    def registrar(self, chave: Hashable, agora: float, janela_segundos: float) -> None:
+        fatia = self._fatia(chave)
+        balde = int(agora // janela_segundos)
+
+        with fatia.lock:
+            vaga = fatia.vagas.pop(chave, None)
+            if vaga is None:
+                if not fatia.livres:
+                    despejada = next(iter(fatia.vagas))
+                    fatia.livres.append(fatia.vagas.pop(despejada))
+                vaga = fatia.livres.pop()
+                fatia.vagas[chave] = vaga
+                fatia.balde[vaga] = balde
+                fatia.atual[vaga] = 1
+                fatia.anterior[vaga] = 0
+                return
+
+            # Reinserir leva a chave para o fim da ordem do dicionário: o
+            # primeiro é sempre o que registrou falha há mais tempo.
+            fatia.vagas[chave] = vaga
+            fatia.rolar(vaga, balde)
+            if fatia.atual[vaga] < _MAX_CONTADOR:
+                fatia.atual[vaga] += 1
+
+    def limpar(self, chave: Hashable) -> None:
+        fatia = self._fatia(chave)
+        with fatia.lock:
+            vaga = fatia.vagas.pop(chave, None)
+            if vaga is not None:
+                fatia.livres.append(vaga)
+
+    def reset(self) -> None:
+        for fatia in self._fatias:
+            with fatia.lock:
+                fatia.livres.extend(fatia.vagas.values())
+                fatia.vagas.clear()
+
+
+class MarcasNoBanco:
+    """
+    Marcas de tempo em `marcas_de_tentativa`, compartilhadas por todos os
+    processos que usam o mesmo banco.
+
+    Usa o `Engine` direto, e não a sessão da requisição: a contagem não pode
+    entrar nem sair junto com o commit ou o rollback da rota. O relógio é o
+    de parede, o único que vale igual em todos os processos; a diferença de
+    relógio entre máquinas é de milissegundos, contra uma janela de minutos.
+
+    Sem teto de chaves: o que limita a tabela é a janela. Cada falha
+    registrada apaga as marcas vencidas do escopo inteiro, então a tabela tem
+    no máximo as tentativas dos últimos LOGIN_JANELA_SEGUNDOS.
+    """
+
+    relogio = staticmethod(time.time)
+
+    def __init__(self, engine: Engine, escopo: str):
+        self.engine = engine
+        self.escopo = escopo
+
+    @staticmethod
+    def _chave(chave: Hashable) -> str:
+        return hashlib.sha256(str(chave).encode()).hexdigest()
+
+    def espera(self, chave: Hashable, agora: float, janela_segundos: float, max_eventos: int) -> Optional[float]:
+        consulta = select(func.count(), func.min(MarcaDeTentativa.instante)).where(
+            MarcaDeTentativa.escopo == self.escopo,
+            MarcaDeTentativa.chave == self._chave(chave),
+            MarcaDeTentativa.instante > agora - janela_segundos,
+        )
+        # AUTOCOMMIT: uma leitura só, sem BEGIN e ROLLBACK em volta — uma ida
+        # ao banco por verificação.
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conexao:
+            quantidade, mais_antiga = conexao.execute(consulta).one()
+        if quantidade < max_eventos:
+            return None
+        return janela_segundos - (agora - mais_antiga)
+
+    def registrar(self, chave: Hashable, agora: float, janela_segundos: float) -> None:
+        with self.engine.begin() as conexao:
+            conexao.execute(delete(MarcaDeTentativa).where(
+                MarcaDeTentativa.escopo == self.escopo,
+                MarcaDeTentativa.instante <= agora - janela_segundos,
+            ))
+            conexao.execute(insert(MarcaDeTentativa).values(
+                escopo=self.escopo, chave=self._chave(chave), instante=agora,
+            ))
+
+    def limpar(self, chave: Hashable) -> None:
+        with self.engine.begin() as conexao:
+            conexao.execute(delete(MarcaDeTentativa).where(
+                MarcaDeTentativa.escopo == self.escopo,
+                MarcaDeTentativa.chave == self._chave(chave),
+            ))
+
+    def reset(self) -> None:
+        with self.engine.begin() as conexao:
+            conexao.execute(delete(MarcaDeTentativa).where(MarcaDeTentativa.escopo == self.escopo))
+
+
+# Armazenamentos pelo nome usado em LOGIN_LIMITE_ARMAZENAMENTO. Cada fábrica
+# recebe o escopo do limitador, para que dois limitadores no mesmo banco não
+# somem as contagens um do outro.
+ARMAZENAMENTOS: Dict[str, Callable[[str], object]] = {
+    "memoria": lambda escopo: MarcasEmMemoria(),
+    "aproximado": lambda escopo: ContadoresAproximados(),
+    "banco": lambda escopo: MarcasNoBanco(engine, escopo),
+}
+
+
+def criar_armazenamento(nome: str, escopo: str):
+    fabrica = ARMAZENAMENTOS.get(nome.strip().casefold())
+    if fabrica is None:
+        raise ValueError(
+            f"LOGIN_LIMITE_ARMAZENAMENTO desconhecido: {nome!r} (opções: {', '.join(sorted(ARMAZENAMENTOS))})"
+        )
+    return fabrica(escopo)
+
+
+class JanelaDeslizante:
+    """
+    Conta eventos por chave dentro de uma janela de tempo que anda junto com o
+    relógio. Diferente de um contador que zera de tempos em tempos, aqui não
+    existe a virada em que o atacante recupera todo o orçamento de uma vez.
+
+    Sem `armazenamento`, as marcas ficam em memória, com teto de `max_chaves`
+    chaves; com um, `max_chaves` não se aplica (é do armazenamento). O `agora`
+    dos métodos é no relógio do armazenamento (monotônico em memória, de
+    parede no banco).
+    """
+
+    def __init__(
+        self,
+        max_eventos: int,
+        janela_segundos: int,
+        max_chaves: int = MAX_CHAVES,
+        armazenamento=None,
+    ):
+        if max_eventos < 1:
+            raise ValueError("max_eventos deve ser >= 1")
+        if janela_segundos < 1:
+            raise ValueError("janela_segundos deve ser >= 1")
+
+        self.max_eventos = max_eventos
+        self.janela_segundos = janela_segundos
+        self._armazenamento = armazenamento if armazenamento is not None else MarcasEmMemoria(max_chaves)
+
+    def segundos_ate_liberar(self, chave: Hashable, agora: Optional[float] = None) -> int:
+        """
+        Zero se a chave ainda pode tentar. Caso contrário, quantos segundos
+        faltam para a tentativa mais antiga sair da janela (no modo
+        aproximado, para a estimativa voltar a ficar abaixo do limite).
+        """
+        agora = self._armazenamento.relogio() if agora is None else agora
+
+        restante = self._armazenamento.espera(chave, agora, self.janela_segundos, self.max_eventos)
+        if restante is None:
+            return 0
+        return max(1, int(restante) + 1)
+
+    def registrar(self, chave: Hashable, agora: Optional[float] = None) -> None:
+        """Contabiliza uma tentativa falha."""
+        agora = self._armazenamento.relogio() if agora is None else agora
+        self._armazenamento.registrar(chave, agora, self.janela_segundos)
+
+    def limpar(self, chave: Hashable) -> None:
+        """Zera a contagem da chave. Chamado quando o login dá certo."""
+        self._armazenamento.limpar(chave)
+
+    def reset(self) -> None:
+        """Descarta todo o estado. Existe para os testes."""
+        self._armazenamento.reset()
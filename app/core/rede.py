@@ -0,0 +1,34 @@
+"""
+Quem está do outro lado da conexão: o IP real do cliente, atrás dos proxies.
+
+Usado pelos dois limitadores que contam por IP — o de tentativas de login
+(`app/api/endpoints/auth.py`) e o de requisições da API
+(`app/core/limite_de_requisicoes.py`). Recebe qualquer `HTTPConnection` do
+Starlette: o `Request` de uma rota, ou a conexão que o middleware monta sobre
+o `scope` cru, antes de haver rota.
+"""
+
+from starlette.requests import HTTPConnection
+
+from app.core.config import settings
+
+
+def ip_do_cliente(conexao: HTTPConnection) -> str:
+    """
+    IP real do cliente, considerando os proxies confiáveis à frente.
+
+    Lê X-Forwarded-For de trás para frente: o último elemento foi escrito pelo
+    proxy mais próximo da aplicação e não é falsificável, enquanto o primeiro
+    veio do cliente. Ver PROXY_HOPS_CONFIAVEIS em config.py.
+    """
+    hops = settings.PROXY_HOPS_CONFIAVEIS
+
+    if hops > 0:
+        encaminhado = conexao.headers.get("x-forwarded-for")
+        if encaminhado:
+            partes = [p.strip() for p in encaminhado.split(",") if p.strip()]
+            if partes:
+                indice = max(0, len(partes) - hops)
+                return partes[indice]
+
+    return conexao.client.host if conexao.client else "desconhecido"
@@ -1,11 +1,46 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Dict, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from app.core.cache_de_tokens import cache_de_tokens
 from app.core.config import settings
+from app.core.pool_de_senhas import PoolDeSenhas
 
-# Contexto para hash de senhas com bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Contexto para hash de senhas com bcrypt.
+#
+# O custo vem de BCRYPT_ROUNDS. Hash gravado com outro custo — mais baixo ou
+# mais alto — passa a contar como obsoleto (`deprecated="auto"`), e o login
+# o regrava com o custo atual: mudar o custo não exige migration nem troca
+# de senha, só que cada pessoa entre uma vez.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+)
+
+# O bcrypt roda fora das threads que atendem HTTP (ver app/core/pool_de_senhas.py).
+pool_de_senhas = PoolDeSenhas(settings.SENHA_PROCESSOS, settings.SENHA_MAX_PENDENTES)
+
+
+def _truncar(senha: str) -> str:
+    # Truncar para 72 bytes (limite do bcrypt)
+    senha_bytes = senha.encode('utf-8')[:72]
+    return senha_bytes.decode('utf-8', errors='ignore')
+
+
+# As três abaixo rodam no processo do pool: precisam ser de nível de módulo,
+# e recebem a senha já truncada.
+
+def _verificar(senha: str, senha_hash: str) -> bool:
+    return pwd_context.verify(senha, senha_hash)
+
+
+def _verificar_e_atualizar(senha: str, senha_hash: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(senha, senha_hash)
+
+
+def _gerar_hash(senha: str) -> str:
+    return pwd_context.hash(senha)
 
 
 def verificar_senha(senha_plana: str, senha_hash: str) -> bool:
@@ -13,10 +48,18 @@ def verificar_senha(senha_plana: str, senha_hash: str) -> bool:
     Verifica se a senha plana corresponde ao hash
     Trunca para 72 bytes (limite do bcrypt)
     """
-    # Truncar para 72 bytes (limite do bcrypt)
-    senha_bytes = senha_plana.encode('utf-8')[:72]
-    senha_truncada = senha_bytes.decode('utf-8', errors='ignore')
-    return pwd_context.verify(senha_truncada, senha_hash)
+    return pool_de_senhas.executar(_verificar, _truncar(senha_plana), senha_hash)
+
+
+def verificar_e_atualizar_senha(senha_plana: str, senha_hash: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifica a senha e, se ela confere e o hash está obsoleto (custo
+    diferente de BCRYPT_ROUNDS), devolve também o hash novo para gravar.
+
+    (True, None): confere, hash em dia. (True, hash): confere, regravar.
+    (False, None): não confere.
+    """
+    return pool_de_senhas.executar(_verificar_e_atualizar, _truncar(senha_plana), senha_hash)
 
 
 def gerar_hash_senha(senha: str) -> str:
@@ -24,10 +67,7 @@ def gerar_hash_senha(senha: str) -> str:
     Gera hash bcrypt da senha
     Trunca para 72 bytes (limite do bcrypt)
     """
-    # Truncar para 72 bytes (limite do bcrypt)
-    senha_bytes = senha.encode('utf-8')[:72]
-    senha_truncada = senha_bytes.decode('utf-8', errors='ignore')
-    return pwd_context.hash(senha_truncada)
+    return pool_de_senhas.executar(_gerar_hash, _truncar(senha))
 
 
 def criar_token_acesso(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -47,12 +87,65 @@ def criar_token_acesso(data: dict, expires_delta: Optional[timedelta] = None) ->
     return encoded_jwt
 
 
+# Bibliotecas que sabem verificar o token, pelo nome usado em JWT_BACKEND.
+#
+# Cada entrada é uma fábrica que devolve `verificar(token) -> payload | None`;
+# a fábrica roda uma vez, na importação, e é ela que importa a biblioteca —
+# assim o PyJWT só precisa estar instalado se for o escolhido, e a falta dele
+# derruba a subida, não a primeira requisição. O token é emitido sempre pelo
+# python-jose (`criar_token_acesso`); HS256 é o mesmo nas duas.
+
+def _backend_jose() -> Callable[[str], Optional[dict]]:
+    def verificar(token: str) -> Optional[dict]:
+        try:
+            return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
+            return None
+
+    return verificar
+
+
+def _backend_pyjwt() -> Callable[[str], Optional[dict]]:
+    import jwt as pyjwt  # PyJWT — não confundir com o `jwt` do python-jose
+
+    def verificar(token: str) -> Optional[dict]:
+        try:
+            return pyjwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except pyjwt.PyJWTError:
+            return None
+
+    return verificar
+
+
+BACKENDS_JWT: Dict[str, Callable[[], Callable[[str], Optional[dict]]]] = {
+    "jose": _backend_jose,
+    "pyjwt": _backend_pyjwt,
+}
+
+
+def _escolher_backend(nome: str) -> Callable[[str], Optional[dict]]:
+    fabrica = BACKENDS_JWT.get(nome.strip().casefold())
+    if fabrica is None:
+        raise ValueError(f"JWT_BACKEND desconhecido: {nome!r} (opções: {', '.join(sorted(BACKENDS_JWT))})")
+    return fabrica()
+
+
+_verificar_token = _escolher_backend(settings.JWT_BACKEND)
+
+
 def decodificar_token(token: str) -> Optional[dict]:
     """
     Decodifica e valida um token JWT
+
+    Token já verificado vem do cache até o próprio `exp`, sem refazer a
+    assinatura (ver app/core/cache_de_tokens.py). Só o que passa pela
+    verificação é guardado.
     """
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    payload = cache_de_tokens.buscar(token)
+    if payload is not None:
         return payload
-    except JWTError:
-        return None
+
+    payload = _verificar_token(token)
+    if payload is not None:
+        cache_de_tokens.guardar(token, payload)
+    return payload
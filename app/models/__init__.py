@@ -9,6 +9,13 @@ from app.models.evento_conta import EventoDeConta
 from app.models.evento_setor import EventoDeSetor
 from app.models.anexo import Anexo
 from app.models.sla_config import SLAConfig
+from app.models.protocolo_contador import ProtocoloContador
+from app.models.webhook_pendente import WebhookPendente
+from app.models.versao_de_referencia import VersaoDeReferencia
+from app.models.documento_de_busca import DocumentoDeBusca
+from app.models.resumo_de_chamados import ResumoDeChamados
+from app.models.aviso_de_sla import AvisoDeSLA
+from app.models.marca_de_tentativa import MarcaDeTentativa
 from app.models.tarefa_recorrente import TarefaRecorrente, TarefaRecorrenteExecucao
 
 __all__ = [
@@ -23,6 +30,13 @@ __all__ = [
     "EventoDeSetor",
     "Anexo",
     "SLAConfig",
+    "ProtocoloContador",
+    "WebhookPendente",
+    "VersaoDeReferencia",
+    "DocumentoDeBusca",
+    "ResumoDeChamados",
+    "AvisoDeSLA",
+    "MarcaDeTentativa",
     "TarefaRecorrente",
     "TarefaRecorrenteExecucao"
 ]
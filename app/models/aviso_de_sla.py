@@ -0,0 +1,22 @@
+from sqlalchemy import Column, ForeignKey, Integer, String, TIMESTAMP
+
+from app.core.database import Base
+from app.utils.timezone import agora_brasilia
+
+
+class AvisoDeSLA(Base):
+    """
+    Aviso de prazo de SLA já enviado (ver app/services/agendador_de_prazos.py).
+
+    Uma linha por chamado e tipo de aviso. É o que impede o mesmo aviso de
+    sair duas vezes: de dois processos da API com o mesmo prazo na fila, ou
+    do mesmo processo depois de reiniciar. O aviso e a notificação na fila de
+    webhooks entram na mesma transação.
+    """
+    __tablename__ = "avisos_de_sla"
+
+    chamado_id = Column(Integer, ForeignKey("chamados.id", ondelete="CASCADE"), primary_key=True)
+    tipo = Column(String(20), primary_key=True)  # resposta | atencao | estouro
+    # O prazo que venceu, naive-Brasília como as colunas de `chamados`.
+    prazo = Column(TIMESTAMP, nullable=False)
+    created_at = Column(TIMESTAMP, default=agora_brasilia)
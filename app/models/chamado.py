@@ -40,6 +40,24 @@ class Chamado(Base):
     cancelado = Column(Boolean, default=False, nullable=False)
     arquivado = Column(Boolean, default=False, nullable=False)
 
+    # Snapshot do SLA (ver sla_service: "Snapshot persistido").
+    # Atualizado a cada transição de status e quando a config da prioridade
+    # muda; a listagem deriva situação e percentual daqui, sem ler o histórico.
+    # `sla_calculado_em` NULL = chamado anterior ao snapshot, ainda não
+    # recalculado (app/comandos/recalcular_sla.py).
+    sla_calculado_em = Column(TIMESTAMP, nullable=True)
+    sla_prazo_resposta = Column(TIMESTAMP, nullable=True)
+    sla_prazo_resolucao = Column(TIMESTAMP, nullable=True)
+    sla_minutos_pausados = Column(Integer, nullable=True)
+    # Início da pausa em "Aguardando", ou fim do relógio em Resolvido/Fechado.
+    # NULL = relógio correndo.
+    sla_relogio_parado_em = Column(TIMESTAMP, nullable=True)
+    sla_respondido_em = Column(TIMESTAMP, nullable=True)
+    # Instantes em que o relógio corrente cruza "Atenção" e "Estourado": a
+    # situação vira comparação de data no SQL (filtro `sla_situacao`).
+    sla_atencao_em = Column(TIMESTAMP, nullable=True)
+    sla_estouro_em = Column(TIMESTAMP, nullable=True)
+
     created_at = Column(TIMESTAMP, default=agora_brasilia)
     updated_at = Column(TIMESTAMP, default=agora_brasilia, onupdate=agora_brasilia)
 
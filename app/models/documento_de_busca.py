@@ -0,0 +1,43 @@
+from sqlalchemy import DDL, Column, ForeignKey, Integer, Text, TIMESTAMP, event
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+from app.core.database import Base
+from app.utils.timezone import agora_brasilia
+
+
+class DocumentoDeBusca(Base):
+    """
+    Documento de busca textual de cada chamado (ver app/services/busca_service.py).
+
+    No Postgres, `vetor` é o tsvector de título, descrição, solução e
+    comentários, com pesos. É mantido pela aplicação a cada escrita que mexe
+    nesses textos, e não por trigger, porque junta duas tabelas.
+
+    No SQLite (testes e desenvolvimento) o índice é a tabela virtual FTS5
+    `chamados_busca_fts`, criada junto com esta; aqui `vetor` é TEXT e fica
+    vazio.
+    """
+    __tablename__ = "chamados_busca"
+
+    chamado_id = Column(Integer, ForeignKey("chamados.id", ondelete="CASCADE"), primary_key=True)
+    vetor = Column(Text().with_variant(TSVECTOR(), "postgresql"))
+    atualizado_em = Column(TIMESTAMP, default=agora_brasilia)
+
+
+# rowid = id do chamado. `remove_diacritics 2` faz o papel do unaccent:
+# "manutencao" encontra "manutenção". Não há stemmer de português no FTS5; a
+# busca compensa com prefixo em cada termo (ver busca_service).
+event.listen(
+    DocumentoDeBusca.__table__,
+    "after_create",
+    DDL(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS chamados_busca_fts USING fts5("
+        "titulo, descricao, solucao, comentarios, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    ).execute_if(dialect="sqlite"),
+)
+event.listen(
+    DocumentoDeBusca.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS chamados_busca_fts").execute_if(dialect="sqlite"),
+)
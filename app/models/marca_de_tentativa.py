@@ -0,0 +1,27 @@
+from sqlalchemy import BigInteger, Column, Float, Integer, String
+
+from app.core.database import Base
+
+
+class MarcaDeTentativa(Base):
+    """
+    Uma tentativa contada pelo limitador de login, quando o armazenamento é o
+    banco (ver `MarcasNoBanco` em app/core/rate_limit.py).
+
+    Uma linha por tentativa falha, apagada quando sai da janela. Com a tabela,
+    todos os processos da API leem e gravam a mesma contagem; no Postgres ela
+    é UNLOGGED — perder as marcas numa queda do banco só devolve o orçamento
+    de tentativas, e não vale o custo do WAL a cada login errado.
+    """
+    __tablename__ = "marcas_de_tentativa"
+
+    # BIGSERIAL no Postgres; no SQLite dos testes só INTEGER é autoincremento.
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    # Qual limitador contou (ex.: "login_usuario", "login_ip").
+    escopo = Column(String(40), nullable=False)
+    # SHA-256 da chave, em hexadecimal: nome de usuário e IP não ficam em
+    # texto claro, e o tamanho não depende do que o cliente mandou.
+    chave = Column(String(64), nullable=False)
+    # Segundos desde a época (time.time()): o relógio tem de ser o mesmo em
+    # todos os processos, e o monotônico não é.
+    instante = Column(Float, nullable=False)
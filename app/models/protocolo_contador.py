@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer
+
+from app.core.database import Base
+
+
+class ProtocoloContador(Base):
+    """Último número de protocolo entregue em cada ano (ver gerar_protocolo)."""
+    __tablename__ = "protocolo_contadores"
+
+    ano = Column(Integer, primary_key=True, autoincrement=False)
+    ultimo = Column(Integer, nullable=False)
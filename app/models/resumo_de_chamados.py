@@ -0,0 +1,27 @@
+from sqlalchemy import Boolean, Column, Integer, String
+
+from app.core.database import Base
+
+
+class ResumoDeChamados(Base):
+    """
+    Quantos chamados há em cada combinação de situação (ver
+    app/services/resumo_service.py).
+
+    Mantido pelas rotas de escrita de chamado, na mesma transação da mudança:
+    sai 1 da combinação de antes, entra 1 na de depois. Reconstruível do zero
+    por `python -m app.comandos.reconciliar_resumo`.
+
+    A chave começa por `cancelado` e `arquivado` porque é por eles que o
+    painel filtra. Chave primária não aceita NULL: chamado sem técnico conta
+    em `tecnico_responsavel_id = 0`, e status ou prioridade nulos (só em
+    registro legado) em `''`.
+    """
+    __tablename__ = "resumo_chamados"
+
+    cancelado = Column(Boolean, primary_key=True)
+    arquivado = Column(Boolean, primary_key=True)
+    status = Column(String(50), primary_key=True)
+    prioridade = Column(String(20), primary_key=True)
+    tecnico_responsavel_id = Column(Integer, primary_key=True, autoincrement=False)
+    total = Column(Integer, nullable=False, default=0)
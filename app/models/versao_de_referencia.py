@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String
+
+from app.core.database import Base
+
+
+class VersaoDeReferencia(Base):
+    """
+    Versão de cada tabela de referência (ver app/services/cache_de_referencia.py).
+
+    Sobe a cada escrita na tabela, na mesma transação. É o que um processo da
+    API lê para saber se o cache dele ficou velho, sem reler a tabela inteira.
+    """
+    __tablename__ = "versoes_de_referencia"
+
+    tabela = Column(String(40), primary_key=True)
+    versao = Column(Integer, nullable=False)
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, Text, TIMESTAMP
+from app.core.database import Base
+from app.utils.timezone import agora_brasilia
+
+
+class WebhookPendente(Base):
+    """
+    Saída de webhooks (outbox): a notificação a entregar, gravada na mesma
+    transação que o chamado que a originou.
+
+    A rota só grava a linha; quem faz o POST é o despachante em segundo plano
+    (`app/services/webhook_service.py`). Chamado desfeito por rollback leva a
+    notificação junto, e n8n lento ou fora do ar não segura a requisição nem a
+    conexão do pool.
+
+    Entregue, a linha é apagada. Fica o que ainda vai ser tentado (`pendente`)
+    e o que esgotou as tentativas (`morto`), para inspeção e reenvio manual.
+    """
+
+    __tablename__ = "webhooks_pendentes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Corpo do POST, em JSON, montado na hora do evento: o nome do técnico é o
+    # daquele momento, não o da hora da entrega.
+    payload = Column(Text, nullable=False)
+    situacao = Column(String(10), nullable=False, default="pendente")  # pendente | morto
+    tentativas = Column(Integer, nullable=False, default=0)
+    # Naive-Brasília, como as demais. Também serve de reserva: o despachante
+    # empurra a data para frente antes de tentar, e outro processo não pega a
+    # mesma linha enquanto isso.
+    proxima_tentativa_em = Column(TIMESTAMP, nullable=False)
+    ultimo_erro = Column(String(255))
+    created_at = Column(TIMESTAMP, default=agora_brasilia)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict, Field, StringConstraints
-from typing import Annotated, Optional
+from typing import Annotated, Dict, List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -47,6 +47,14 @@ class StatusEnum(str, Enum):
     FECHADO = "Fechado"
 
 
+class OrdenacaoChamadosEnum(str, Enum):
+    # Mais recente primeiro — a ordem de sempre da listagem.
+    ID = "id"
+    # Prazo de resolução mais próximo (ou mais vencido) primeiro; chamado sem
+    # SLA vai para o fim.
+    PRAZO_RESOLUCAO = "prazo_resolucao"
+
+
 class ChamadoBase(BaseModel):
     """
     Campos comuns de entrada e de saída.
@@ -121,9 +129,13 @@ class ChamadoResponse(ChamadoBase):
     id: int
     protocolo: str
     solicitante_id: int
+    # Nomes de solicitante e técnico, resolvidos em lote para a página inteira
+    # (ver CarregadorDeNomes). Opcionais: quem só lê os ids não muda nada.
+    solicitante_nome: Optional[str] = None
     status: StatusEnum
     urgencia: Optional[UrgenciaEnum] = None
     tecnico_responsavel_id: Optional[int] = None
+    tecnico_responsavel_nome: Optional[str] = None
     solucao: Optional[str] = None
     tempo_resolucao_minutos: Optional[int] = None
     observacoes: Optional[str] = None
@@ -138,3 +150,31 @@ class ChamadoResponse(ChamadoBase):
     sla: Optional[SLAInfo] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ContagemPorTecnico(BaseModel):
+    tecnico_responsavel_id: Optional[int] = None  # None = sem técnico atribuído
+    tecnico_responsavel_nome: Optional[str] = None
+    total: int
+
+
+class CelulaDoResumo(BaseModel):
+    """Uma combinação de status, prioridade e técnico, para o painel cruzar filtros."""
+    status: str
+    prioridade: str
+    tecnico_responsavel_id: Optional[int] = None
+    cancelado: bool
+    arquivado: bool
+    total: int
+
+
+class ResumoChamadosResponse(BaseModel):
+    """
+    Corpo de GET /chamados/resumo. `por_status`, `por_prioridade` e
+    `por_tecnico` são somas de `celulas`, prontas para os cartões do painel.
+    """
+    total: int
+    por_status: Dict[str, int]
+    por_prioridade: Dict[str, int]
+    por_tecnico: List[ContagemPorTecnico]
+    celulas: List[CelulaDoResumo]
@@ -24,6 +24,9 @@ class ComentarioResponse(ComentarioBase):
     id: int
     chamado_id: int
     usuario_id: int
+    # Nome do autor, resolvido em lote (ver CarregadorDeNomes). None se a
+    # conta não existir mais.
+    usuario_nome: Optional[str] = None
     created_at: datetime
     updated_at: datetime
 
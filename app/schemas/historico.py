@@ -14,6 +14,8 @@ class HistoricoResponse(HistoricoBase):
     id: int
     chamado_id: int
     usuario_id: int
+    # Nome de quem fez a ação, resolvido em lote (ver CarregadorDeNomes).
+    usuario_nome: Optional[str] = None
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
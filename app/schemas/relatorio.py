@@ -0,0 +1,44 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+
+class IndicadoresSLA(BaseModel):
+    """
+    Cumprimento de SLA de um grupo de chamados encerrados.
+
+    Os percentuais são None quando o grupo não tem chamado — 0% diria que
+    todos estouraram, e não houve nenhum.
+    """
+    chamados: int = 0
+    resposta_cumprida_percentual: Optional[float] = None
+    resolucao_cumprida_percentual: Optional[float] = None
+    media_minutos_pausados: Optional[float] = None
+
+
+class IndicadoresPorPrioridade(IndicadoresSLA):
+    prioridade: str
+
+
+class IndicadoresPorCategoria(IndicadoresSLA):
+    categoria_id: Optional[int] = None
+    categoria_nome: Optional[str] = None
+
+
+class RelatorioSLAResponse(BaseModel):
+    """
+    Corpo de GET /relatorios/sla: chamados encerrados no mês, com SLA.
+
+    `sem_sla` conta os encerrados no mês cuja prioridade não tem prazo
+    configurado — ficam fora dos percentuais, mas aparecem, para o relatório
+    não esconder chamado. `mes_fechado` diz se o mês já acabou; só mês
+    fechado sai do cache.
+    """
+    ano: int
+    mes: int
+    mes_fechado: bool
+    gerado_em: datetime
+    geral: IndicadoresSLA
+    por_prioridade: List[IndicadoresPorPrioridade]
+    por_categoria: List[IndicadoresPorCategoria]
+    sem_sla: int = 0
@@ -1,4 +1,5 @@
 from datetime import datetime
+from enum import Enum
 from typing import Optional
 
 from pydantic import BaseModel, ConfigDict, Field
@@ -17,6 +18,12 @@ class SLAConfigUpdate(BaseModel):
     minutos_resolucao: int = Field(gt=0)
 
 
+class SituacaoSLAEnum(str, Enum):
+    NO_PRAZO = "No prazo"
+    ATENCAO = "Atenção"
+    ESTOURADO = "Estourado"
+
+
 class SLAInfo(BaseModel):
     """Bloco de SLA calculado e embutido em cada chamado."""
     prazo_resposta: Optional[datetime] = None
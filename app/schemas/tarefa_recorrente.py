@@ -74,3 +74,20 @@ class RealizarTarefaRequest(BaseModel):
     # para o frontend atual não quebrar entre os dois deploys. Remover depois.
     usuario_id: Optional[int] = None
     observacao: Optional[str] = None
+
+
+class OcorrenciaDaAgenda(BaseModel):
+    """
+    Uma data prevista de uma tarefa recorrente, em GET /tarefas-recorrentes/agenda.
+
+    Só a primeira ocorrência de cada tarefa é a `proxima_data` gravada; as
+    outras são projeção do padrão e mudam se a tarefa for realizada com
+    atraso (a próxima data é recalculada a partir do dia em que foi feita).
+    """
+    data: date
+    tarefa_id: int
+    titulo: str
+    prioridade: Prioridade
+    responsavel_id: Optional[int] = None
+    responsavel_nome: Optional[str] = None
+    atrasada: bool = False
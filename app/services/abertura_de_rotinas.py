@@ -0,0 +1,222 @@
+"""
+Abertura automática de chamados para as tarefas recorrentes que venceram.
+
+Até aqui `proxima_data` era só informação: a tela de rotinas mostrava o que
+estava vencido e alguém da equipe precisava lembrar de olhar. Agora uma
+thread da API (`AbridorDeRotinas`) passa de tempos em tempos pelas tarefas
+ativas com `proxima_data` até hoje — pelo índice `idx_tr_proxima_data` — e,
+para cada uma, abre um chamado com o título, a prioridade e a categoria da
+tarefa, atribuído ao responsável dela, e avança `proxima_data` com
+`calcular_proxima_data` a partir de hoje, como `realizar` faz.
+
+Tarefa atrasada de várias ocorrências (a thread ficou parada, a tarefa foi
+reativada) gera UM chamado, não um por ocorrência perdida: o chamado é o
+lembrete de que a rotina está pendente, e dez lembretes iguais não ajudam.
+
+Idempotência: o chamado e o avanço de `proxima_data` entram na mesma
+transação. Se o processo cair no meio do lote, nada do lote fica gravado e a
+passada seguinte refaz tudo; se o commit saiu, a tarefa não está mais
+vencida e não é lida de novo.
+
+Vários processos da API rodam a thread ao mesmo tempo. No Postgres, o lote é
+lido com `FOR UPDATE SKIP LOCKED`: cada processo pega tarefas diferentes em
+vez de esperar o outro, e a trava dura até o commit que avança a data — nenhum
+outro processo vê a tarefa vencida e destravada antes disso. No SQLite dos
+testes não há trava de linha; lá só existe um processo.
+
+Os chamados passam pelo mesmo fechamento das escritas da API
+(`_concluir_escrita`): documento de busca, contadores do painel, notificação
+ao n8n e prazos de SLA para o agendador de avisos — em lote, com um flush e
+um commit por lote.
+
+Liga com RECORRENCIA_SOLICITANTE_ID, o usuário que aparece como solicitante
+dos chamados abertos assim (ver `main.py`).
+"""
+
+import logging
+import threading
+from datetime import date
+from typing import Callable, Dict, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.chamado import Chamado
+from app.models.tarefa_recorrente import TarefaRecorrente
+from app.services import busca_service, resumo_service
+from app.services.agendador_de_prazos import agendador_de_prazos, prazos_do_chamado
+from app.services.chamado_service import abrir_chamado
+from app.services.recorrencia_service import calcular_proxima_data
+from app.services.webhook_service import enfileirar_webhook_tecnico
+from app.utils.timezone import agora_brasilia
+
+logger = logging.getLogger(__name__)
+
+# Tarefas por transação. No Postgres, a trava do contador de protocolo do
+# ano fica presa até o commit do lote, e a abertura de chamado pela API
+# espera por ela: lote pequeno mantém essa espera em milissegundos.
+LOTE = 100
+
+
+def _hoje() -> date:
+    return agora_brasilia().date()
+
+
+def _descricao(tarefa: TarefaRecorrente) -> str:
+    partes = [
+        f"Chamado aberto automaticamente pela rotina \"{tarefa.titulo}\", "
+        f"prevista para {tarefa.proxima_data:%d/%m/%Y}."
+    ]
+    if tarefa.descricao:
+        partes.append(tarefa.descricao)
+    if tarefa.instrucoes:
+        partes.append(f"Instruções:\n{tarefa.instrucoes}")
+    return "\n\n".join(partes)
+
+
+def _vencidas(db: Session, hoje: date, lote: int, puladas: Set[int]) -> List[TarefaRecorrente]:
+    consulta = db.query(TarefaRecorrente).filter(
+        TarefaRecorrente.ativo == True,
+        TarefaRecorrente.proxima_data <= hoje,
+    )
+    if puladas:
+        consulta = consulta.filter(TarefaRecorrente.id.notin_(puladas))
+    consulta = consulta.order_by(TarefaRecorrente.proxima_data, TarefaRecorrente.id).limit(lote)
+    if db.get_bind().dialect.name == "postgresql":
+        consulta = consulta.with_for_update(skip_locked=True)
+    return consulta.all()
+
+
+def abrir_lote(
+    db: Session,
+    solicitante_id: int,
+    hoje: Optional[date] = None,
+    lote: int = LOTE,
+    puladas: Optional[Set[int]] = None,
+) -> Optional[List[str]]:
+    """
+    Abre os chamados de um lote de tarefas vencidas. Comita.
+
+    Devolve os protocolos abertos, ou None quando não há mais tarefa vencida
+    para este processo. Tarefa com padrão inválido (semanal sem dia da
+    semana, por exemplo) é registrada no log e entra em `puladas`, para a
+    passada não voltar a ela; fica vencida até alguém corrigir o cadastro.
+    """
+    hoje = hoje or _hoje()
+    puladas = set() if puladas is None else puladas
+    tarefas = _vencidas(db, hoje, lote, puladas)
+    if not tarefas:
+        db.rollback()
+        return None
+
+    chamados: List[Chamado] = []
+    for tarefa in tarefas:
+        try:
+            proxima = calcular_proxima_data(
+                tarefa.tipo_recorrencia, tarefa.intervalo, tarefa.dia_semana, tarefa.dia_mes, hoje
+            )
+        except ValueError as e:
+            logger.error("Tarefa recorrente %s não abriu chamado: %s", tarefa.id, e)
+            puladas.add(tarefa.id)
+            continue
+
+        chamado = abrir_chamado(
+            db,
+            solicitante_id=solicitante_id,
+            categoria_id=tarefa.categoria_id,
+            titulo=tarefa.titulo,
+            descricao=_descricao(tarefa),
+            prioridade=tarefa.prioridade,
+        )
+        chamado.tecnico_responsavel_id = tarefa.responsavel_id
+        enfileirar_webhook_tecnico(
+            db=db,
+            protocolo=chamado.protocolo,
+            titulo=chamado.titulo,
+            tecnico_id=tarefa.responsavel_id,
+            acao="criado",
+        )
+        tarefa.proxima_data = proxima
+        chamados.append(chamado)
+
+    # O mesmo que `_concluir_escrita`, para o lote inteiro: o que depende do
+    # estado pendente antes do flush, o que depende do id depois.
+    documentos = [busca_service.documento_se_mudou(db, chamado) for chamado in chamados]
+    contadores: Dict[tuple, int] = {}
+    for chamado in chamados:
+        for chave, delta in resumo_service.variacoes(chamado).items():
+            contadores[chave] = contadores.get(chave, 0) + delta
+    db.flush()
+    for chamado, documento in zip(chamados, documentos):
+        busca_service.gravar(db, chamado.id, documento)
+    resumo_service.aplicar(db, contadores)
+    prazos = [prazo for chamado in chamados for prazo in prazos_do_chamado(chamado)]
+    protocolos = [chamado.protocolo for chamado in chamados]
+    db.commit()
+    agendador_de_prazos.agendar(prazos)
+    return protocolos
+
+
+def abrir_vencidas(
+    fabrica_de_sessao: Callable[[], Session],
+    solicitante_id: int,
+    hoje: Optional[date] = None,
+    lote: int = LOTE,
+) -> List[str]:
+    """Abre os chamados de todas as tarefas vencidas, lote a lote. Devolve os protocolos."""
+    hoje = hoje or _hoje()
+    puladas: Set[int] = set()
+    abertos: List[str] = []
+    while True:
+        with fabrica_de_sessao() as db:
+            protocolos = abrir_lote(db, solicitante_id, hoje, lote, puladas)
+        if protocolos is None:
+            break
+        abertos.extend(protocolos)
+    if abertos:
+        logger.info("%s chamado(s) de rotina aberto(s): %s", len(abertos), ", ".join(abertos))
+    return abertos
+
+
+class AbridorDeRotinas:
+    """
+    Thread que abre os chamados das tarefas vencidas de tempos em tempos.
+
+    As datas das tarefas são dias, não instantes: uma passada a cada poucos
+    minutos basta, e cada passada é uma consulta pelo índice que volta vazia
+    quase sempre. Sobe e desce com a aplicação (ver `main.py`).
+    """
+
+    def __init__(
+        self,
+        fabrica_de_sessao: Callable[[], Session],
+        solicitante_id: int,
+        intervalo_segundos: Optional[float] = None,
+    ):
+        self._fabrica_de_sessao = fabrica_de_sessao
+        self.solicitante_id = solicitante_id
+        self.intervalo_segundos = (
+            settings.RECORRENCIA_INTERVALO_SEGUNDOS if intervalo_segundos is None else intervalo_segundos
+        )
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def iniciar(self) -> None:
+        self._thread = threading.Thread(target=self._executar, name="abridor-de-rotinas", daemon=True)
+        self._thread.start()
+
+    def parar(self, timeout: Optional[float] = None) -> None:
+        """Termina o lote em curso e para. O que ficou vencido sai no próximo start."""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _executar(self) -> None:
+        while not self._parar.is_set():
+            try:
+                abrir_vencidas(self._fabrica_de_sessao, self.solicitante_id)
+            except Exception:
+                # O lote que falhou foi desfeito inteiro; a próxima passada o
+                # pega de novo.
+                logger.exception("Falha ao abrir chamados de tarefas recorrentes")
+            self._parar.wait(self.intervalo_segundos)
@@ -0,0 +1,319 @@
+"""
+Avisos de prazo de SLA no momento em que vencem, sem esperar alguém abrir a
+lista.
+
+Três avisos por chamado, cada um no instante já gravado no snapshot de SLA
+(ver sla_service — todos saem de `somar_minutos_uteis`):
+
+- **resposta**: `sla_prazo_resposta` passou e o chamado ainda está "Aberto";
+- **atenção**: o relógio de resolução chegou a 80% (`sla_atencao_em`);
+- **estouro**: o relógio passou do prazo de resolução (`sla_estouro_em`).
+
+O `AgendadorDePrazos` é uma thread do processo da API, como o despachante de
+webhooks, com um heap mínimo dos próximos instantes. Ela dorme até o
+primeiro, confere o chamado no banco e, se o prazo continua vencido, grava o
+aviso e a notificação na fila de webhooks (`enfileirar_webhook_tecnico`), na
+mesma transação. A entrega ao n8n é a do despachante.
+
+Nada aqui varre `chamados` de tempos em tempos. O heap é montado uma vez, na
+subida, por uma consulta aos chamados com relógio correndo — o índice
+parcial `idx_chamados_sla_estouro` já filtra isso —; daí em diante quem o
+alimenta são as escritas: `_concluir_escrita` chama `agendar` depois do
+commit, e a troca de prazo de uma prioridade chama `reconstruir`.
+
+Prazo que mudou depois de entrar no heap (pausa, resolução, troca de
+prioridade) não é removido: quando ele sai do heap, o chamado é relido pela
+chave e o aviso só vai se o prazo VIGENTE já venceu. Quem mudou o prazo já
+agendou o novo. Mudança feita por outro processo da API é agendada no heap
+dele; por SQL direto ou pelo `recalcular_sla`, só na próxima subida.
+
+`avisos_de_sla` guarda um aviso por chamado e tipo. Com vários processos, o
+mesmo prazo está em mais de um heap, e é a chave dessa tabela que decide
+quem envia; na reabertura de um chamado os avisos não se repetem. Aviso que
+venceu com a API fora do ar sai na subida seguinte — exceto "atenção" de
+chamado que já estourou, que não diz mais nada.
+"""
+
+import heapq
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.core.database import insert_do_dialeto
+from app.models.aviso_de_sla import AvisoDeSLA
+from app.models.chamado import Chamado
+from app.services.sla_service import STATUS_FINAIS
+from app.services.webhook_service import enfileirar_webhook_tecnico
+from app.utils.timezone import agora_brasilia
+
+logger = logging.getLogger(__name__)
+
+RESPOSTA = "resposta"
+ATENCAO = "atencao"
+ESTOURO = "estouro"
+
+# `acao` no corpo do webhook, por tipo de aviso.
+ACOES = {
+    RESPOSTA: "sla_resposta_vencida",
+    ATENCAO: "sla_atencao",
+    ESTOURO: "sla_estourado",
+}
+
+# Teto de uma espera. O heap não muda sozinho, mas o relógio da máquina pode
+# ser ajustado; acordar de vez em quando para conferir o topo custa nada e
+# não toca no banco.
+ESPERA_MAXIMA_SEGUNDOS = 300
+
+# Depois de uma falha (banco fora do ar), o prazo volta para o heap com este
+# atraso, em vez de se perder ou de travar a thread num laço.
+ESPERA_APOS_FALHA_SEGUNDOS = 30
+
+
+@dataclass(frozen=True, order=True)
+class Prazo:
+    instante: datetime
+    chamado_id: int
+    tipo: str
+
+
+def prazos_do_chamado(chamado) -> List[Prazo]:
+    """
+    Os avisos ainda possíveis de um chamado, pelo snapshot de SLA.
+
+    Aceita o model ou uma linha com as mesmas colunas. Relógio parado (pausa
+    ou resolução), chamado cancelado ou sem snapshot: nenhum.
+    """
+    if chamado.cancelado or chamado.status in STATUS_FINAIS or chamado.sla_relogio_parado_em is not None:
+        return []
+    prazos = []
+    if chamado.sla_prazo_resposta is not None and chamado.sla_respondido_em is None:
+        prazos.append(Prazo(chamado.sla_prazo_resposta, chamado.id, RESPOSTA))
+    if chamado.sla_atencao_em is not None:
+        prazos.append(Prazo(chamado.sla_atencao_em, chamado.id, ATENCAO))
+    if chamado.sla_estouro_em is not None:
+        prazos.append(Prazo(chamado.sla_estouro_em, chamado.id, ESTOURO))
+    return prazos
+
+
+def carregar_prazos_abertos(db: Session) -> List[Prazo]:
+    """
+    Os prazos de todos os chamados com relógio correndo, menos os já avisados.
+
+    Duas consultas, as duas restritas aos chamados abertos pela mesma condição
+    do índice parcial de `sla_estouro_em`.
+    """
+    abertos = (
+        Chamado.sla_relogio_parado_em.is_(None),
+        Chamado.cancelado == False,
+        Chamado.sla_estouro_em.isnot(None),
+    )
+    linhas = db.query(
+        Chamado.id,
+        Chamado.status,
+        Chamado.cancelado,
+        Chamado.sla_relogio_parado_em,
+        Chamado.sla_prazo_resposta,
+        Chamado.sla_respondido_em,
+        Chamado.sla_atencao_em,
+        Chamado.sla_estouro_em,
+    ).filter(*abertos).all()
+    avisados = set(
+        db.query(AvisoDeSLA.chamado_id, AvisoDeSLA.tipo)
+        .join(Chamado, Chamado.id == AvisoDeSLA.chamado_id)
+        .filter(*abertos)
+        .all()
+    )
+    return [
+        prazo
+        for linha in linhas
+        for prazo in prazos_do_chamado(linha)
+        if (prazo.chamado_id, prazo.tipo) not in avisados
+    ]
+
+
+def disparar(db: Session, prazo: Prazo, agora: Optional[datetime] = None) -> bool:
+    """
+    Envia o aviso se o prazo vigente do chamado já venceu. Comita.
+
+    Devolve True se o aviso foi gravado agora; False se o chamado mudou, se
+    já foi avisado (por este ou outro processo) ou se não existe mais.
+    """
+    agora = agora or agora_brasilia().replace(tzinfo=None)
+    chamado = db.get(Chamado, prazo.chamado_id)
+    if chamado is None:
+        return False
+
+    vigentes = {p.tipo: p for p in prazos_do_chamado(chamado)}
+    vigente = vigentes.get(prazo.tipo)
+    if vigente is None or vigente.instante > agora:
+        return False
+    if prazo.tipo == ATENCAO and ESTOURO in vigentes and vigentes[ESTOURO].instante <= agora:
+        return False
+
+    gravado = db.execute(
+        insert_do_dialeto(db, AvisoDeSLA)
+        .values(
+            chamado_id=chamado.id,
+            tipo=prazo.tipo,
+            prazo=vigente.instante,
+            created_at=agora,
+        )
+        .on_conflict_do_nothing()
+    ).rowcount
+    if not gravado:
+        db.rollback()
+        return False
+
+    enfileirar_webhook_tecnico(
+        db=db,
+        protocolo=chamado.protocolo,
+        titulo=chamado.titulo,
+        tecnico_id=chamado.tecnico_responsavel_id,
+        acao=ACOES[prazo.tipo],
+        prazo=vigente.instante,
+    )
+    db.commit()
+    logger.info("Aviso de SLA %s enviado para o chamado %s", prazo.tipo, chamado.protocolo)
+    return True
+
+
+class AgendadorDePrazos:
+    """
+    Heap mínimo de prazos e a thread que dorme até o primeiro.
+
+    Parado (o padrão, e o caso dos testes e de ambiente sem webhook), `agendar`
+    e `reconstruir` não fazem nada: as rotas podem chamá-los sempre. Sobe com
+    a aplicação quando há WEBHOOK_TECNICO_URL (ver `main.py`).
+
+    `_agendados` evita o mesmo prazo duas vezes no heap — toda escrita de
+    chamado agenda, e a maioria não muda prazo nenhum.
+
+    A remontagem lê o banco fora da trava, e as rotas continuam agendando
+    enquanto isso. O que entra nesse meio-tempo vai também para
+    `_durante_a_remontagem` e é somado ao heap novo: a leitura pode ter visto
+    o prazo anterior do chamado, e trocar o heap sem isso perderia o novo.
+    """
+
+    def __init__(self, espera_maxima_segundos: float = ESPERA_MAXIMA_SEGUNDOS):
+        self.espera_maxima_segundos = espera_maxima_segundos
+        self._fabrica_de_sessao: Optional[Callable[[], Session]] = None
+        self._heap: List[Prazo] = []
+        self._agendados: Set[Prazo] = set()
+        self._durante_a_remontagem: Optional[List[Prazo]] = None
+        self._condicao = threading.Condition()
+        self._parar = False
+        self._reconstruir = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ativo(self) -> bool:
+        return self._thread is not None
+
+    def iniciar(self, fabrica_de_sessao: Callable[[], Session]) -> None:
+        self._fabrica_de_sessao = fabrica_de_sessao
+        with self._condicao:
+            self._parar = False
+            self._reconstruir = True
+        self._thread = threading.Thread(target=self._executar, name="agendador-de-prazos", daemon=True)
+        self._thread.start()
+
+    def parar(self, timeout: Optional[float] = None) -> None:
+        with self._condicao:
+            self._parar = True
+            self._condicao.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+        with self._condicao:
+            self._heap.clear()
+            self._agendados.clear()
+
+    def agendar(self, prazos: Iterable[Prazo]) -> None:
+        """Põe prazos no heap. Chamar depois do commit que os gravou."""
+        if not self.ativo:
+            return
+        with self._condicao:
+            novos = [p for p in prazos if p not in self._agendados]
+            for prazo in novos:
+                heapq.heappush(self._heap, prazo)
+                self._agendados.add(prazo)
+            if self._durante_a_remontagem is not None:
+                self._durante_a_remontagem.extend(novos)
+            if novos:
+                # Pode ter entrado um prazo antes do que a thread espera.
+                self._condicao.notify()
+
+    def reconstruir(self) -> None:
+        """Remonta o heap a partir do banco, na thread. Para mudança de prazo em massa."""
+        if not self.ativo:
+            return
+        with self._condicao:
+            self._reconstruir = True
+            self._condicao.notify()
+
+    def _remontar(self) -> None:
+        with self._condicao:
+            self._durante_a_remontagem = []
+        try:
+            with self._fabrica_de_sessao() as db:
+                prazos = carregar_prazos_abertos(db)
+            with self._condicao:
+                self._agendados = set(prazos) | set(self._durante_a_remontagem)
+                self._heap = list(self._agendados)
+                heapq.heapify(self._heap)
+                total = len(self._heap)
+        finally:
+            with self._condicao:
+                self._durante_a_remontagem = None
+        logger.info("Agendador de prazos de SLA com %s prazo(s) na fila", total)
+
+    def _proximo_vencido(self) -> Optional[Prazo]:
+        """Dorme até o topo do heap vencer e o devolve; None para reconstruir ou parar."""
+        with self._condicao:
+            while not self._parar and not self._reconstruir:
+                agora = agora_brasilia().replace(tzinfo=None)
+                if self._heap and self._heap[0].instante <= agora:
+                    prazo = heapq.heappop(self._heap)
+                    self._agendados.discard(prazo)
+                    return prazo
+                espera = self.espera_maxima_segundos
+                if self._heap:
+                    espera = min(espera, (self._heap[0].instante - agora).total_seconds())
+                self._condicao.wait(espera)
+            return None
+
+    def _executar(self) -> None:
+        while True:
+            with self._condicao:
+                if self._parar:
+                    return
+                reconstruir, self._reconstruir = self._reconstruir, False
+            if reconstruir:
+                try:
+                    self._remontar()
+                except Exception:
+                    logger.exception("Falha ao montar a fila de prazos de SLA")
+                    with self._condicao:
+                        self._reconstruir = True
+                        self._condicao.wait(ESPERA_APOS_FALHA_SEGUNDOS)
+                    continue
+
+            prazo = self._proximo_vencido()
+            if prazo is None:
+                continue
+            try:
+                with self._fabrica_de_sessao() as db:
+                    disparar(db, prazo)
+            except Exception:
+                # A thread não pode morrer por isso; o prazo volta um pouco
+                # adiante, e `avisos_de_sla` garante que não sai em dobro.
+                logger.exception("Falha ao enviar aviso de SLA do chamado %s", prazo.chamado_id)
+                adiado = agora_brasilia().replace(tzinfo=None) + timedelta(seconds=ESPERA_APOS_FALHA_SEGUNDOS)
+                self.agendar([Prazo(adiado, prazo.chamado_id, prazo.tipo)])
+
+
+agendador_de_prazos = AgendadorDePrazos()
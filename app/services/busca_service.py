@@ -0,0 +1,235 @@
+"""
+Busca textual de chamados: título, descrição, solução e comentários.
+
+Os filtros da listagem são todos de igualdade (status, solicitante, técnico),
+e "impressora do 3º andar" não é nenhum deles. A busca tem duas partes:
+
+- **texto**: no Postgres, o tsvector de `chamados_busca` com a configuração
+  `pt_sem_acento` (português com unaccent, ver a migration), consultado por
+  `websearch_to_tsquery` e ordenado por `ts_rank_cd`. Título pesa mais que
+  descrição e solução, que pesam mais que comentários;
+- **prefixo**: protocolo ou título começando pelo texto digitado, pelos
+  índices de trigramas. É o que acha "CHAM-2026-04" sem depender de como o
+  dicionário quebra o protocolo em palavras. Acerto por prefixo vem primeiro.
+
+No SQLite o índice de texto é a tabela FTS5 `chamados_busca_fts`, com o
+`bm25` no lugar do `ts_rank_cd`. Não há stemmer de português ali; cada termo
+vira busca por prefixo ("impressora" acha "impressoras"), o que basta para a
+suíte exercitar a ordenação sem um Postgres.
+
+O documento é mantido a cada escrita, só do chamado afetado: `_concluir_escrita`
+regrava quando título, descrição ou solução mudam, e as rotas de comentário
+quando um comentário entra, muda ou sai. Comentários internos entram no
+documento — a busca é restrita a administrador e técnico, que já os veem.
+"""
+
+import re
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from sqlalchemy import Float, Integer, case, func, inspect, literal_column, or_, select, text, union
+from sqlalchemy.orm import Session, aliased
+
+from app.core.database import insert_do_dialeto
+from app.models.chamado import Chamado
+from app.models.comentario import ComentarioChamado
+from app.models.documento_de_busca import DocumentoDeBusca
+from app.utils.timezone import agora_brasilia
+
+# Configuração de busca textual criada pela migration. Constante SQL, não
+# parâmetro: o `regconfig` precisa ser conhecido no planejamento para o índice
+# GIN ser usado.
+CONFIGURACAO = literal_column("'pt_sem_acento'::regconfig")
+
+# Pesos do bm25 no SQLite, na ordem das colunas da FTS5. Espelham as classes
+# A, B, B e C do tsvector.
+PESOS_FTS5 = "10.0, 4.0, 4.0, 1.0"
+
+# Colunas do chamado que entram no documento. Mudança em qualquer outra
+# (status, técnico, prioridade) não regrava nada.
+CAMPOS_DO_DOCUMENTO = ("titulo", "descricao", "solucao")
+
+
+@dataclass(frozen=True)
+class Documento:
+    titulo: str
+    descricao: str
+    solucao: str
+    comentarios: str
+
+
+def _postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _comentarios(db: Session, chamado_id: int) -> str:
+    textos = (
+        db.query(ComentarioChamado.comentario)
+        .filter(ComentarioChamado.chamado_id == chamado_id)
+        .order_by(ComentarioChamado.id)
+        .all()
+    )
+    return "\n".join(t for (t,) in textos)
+
+
+def _documento(chamado: Chamado, comentarios: str) -> Documento:
+    return Documento(
+        titulo=chamado.titulo or "",
+        descricao=chamado.descricao or "",
+        solucao=chamado.solucao or "",
+        comentarios=comentarios,
+    )
+
+
+def documento_se_mudou(db: Session, chamado: Chamado) -> Optional[Documento]:
+    """
+    Documento novo do chamado, ou None se a escrita não mexeu no texto.
+
+    Chamar ANTES do flush: o que diz se o texto mudou é o histórico dos
+    atributos, que o flush apaga. A leitura dos comentários também acontece
+    aqui, antes de qualquer escrita da transação — a sessão não tem autoflush.
+    """
+    estado = inspect(chamado)
+    if estado.pending or estado.transient:
+        return _documento(chamado, "")
+    if not any(estado.attrs[campo].history.has_changes() for campo in CAMPOS_DO_DOCUMENTO):
+        return None
+    return _documento(chamado, _comentarios(db, chamado.id))
+
+
+def gravar(db: Session, chamado_id: int, documento: Documento) -> None:
+    """Grava o documento do chamado, substituindo o anterior. Não comita."""
+    if not _postgres(db):
+        db.execute(text("DELETE FROM chamados_busca_fts WHERE rowid = :id"), {"id": chamado_id})
+        db.execute(
+            text(
+                "INSERT INTO chamados_busca_fts (rowid, titulo, descricao, solucao, comentarios) "
+                "VALUES (:id, :titulo, :descricao, :solucao, :comentarios)"
+            ),
+            {"id": chamado_id, **asdict(documento)},
+        )
+        return
+
+    def _parte(texto: str, peso: str):
+        return func.setweight(func.to_tsvector(CONFIGURACAO, texto), peso)
+
+    vetor = (
+        _parte(documento.titulo, "A")
+        .op("||")(_parte(documento.descricao, "B"))
+        .op("||")(_parte(documento.solucao, "B"))
+        .op("||")(_parte(documento.comentarios, "C"))
+    )
+    comando = insert_do_dialeto(db, DocumentoDeBusca).values(
+        chamado_id=chamado_id,
+        vetor=vetor,
+        atualizado_em=agora_brasilia().replace(tzinfo=None),
+    )
+    db.execute(comando.on_conflict_do_update(
+        index_elements=[DocumentoDeBusca.chamado_id],
+        set_={"vetor": comando.excluded.vetor, "atualizado_em": comando.excluded.atualizado_em},
+    ))
+
+
+def reindexar(db: Session, chamado_id: int) -> None:
+    """
+    Regrava o documento lendo o chamado e os comentários do banco.
+
+    Para as rotas de comentário: chamar depois de um flush da mudança, para
+    que a leitura a enxergue, e antes do commit.
+    """
+    chamado = db.get(Chamado, chamado_id)
+    if chamado is not None:
+        gravar(db, chamado_id, _documento(chamado, _comentarios(db, chamado_id)))
+
+
+def remover(db: Session, chamado_id: int) -> None:
+    """
+    Tira o chamado do índice. No Postgres o `ON DELETE CASCADE` já faz isso;
+    a tabela FTS5 do SQLite não tem chave estrangeira.
+    """
+    if not _postgres(db):
+        db.execute(text("DELETE FROM chamados_busca_fts WHERE rowid = :id"), {"id": chamado_id})
+
+
+def _termos(busca: str) -> list:
+    return re.findall(r"\w+", busca)
+
+
+def _prefixo(busca: str, chamado=Chamado):
+    """Protocolo ou título começando pelo texto, sem curinga vindo do cliente."""
+    escapado = busca.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    padrao = escapado + "%"
+    return or_(
+        chamado.protocolo.ilike(padrao, escape="\\"),
+        chamado.titulo.ilike(padrao, escape="\\"),
+    )
+
+
+def _candidatos_no_postgres(busca: str, termos):
+    """
+    Ids dos chamados que casam, como a união de dois conjuntos que se acham
+    cada um pelo seu índice: o GIN do tsvector (`idx_chamados_busca_vetor`) e
+    os de trigramas de protocolo e título.
+
+    Não é um `vetor @@ q OR protocolo ILIKE ...` sobre o LEFT JOIN: um OR com
+    um lado em cada tabela não cabe em índice nenhum, e o planejador junta
+    todos os chamados a todos os documentos para filtrar depois. Aqui cada
+    metade é uma consulta de uma tabela só, e o UNION chega à consulta de fora
+    já pequeno, para o semi-join pela chave primária.
+
+    As duas tabelas entram por alias para não serem correlacionadas com as da
+    consulta de fora, que também as tem no FROM.
+    """
+    documento = aliased(DocumentoDeBusca)
+    chamado = aliased(Chamado)
+    return union(
+        select(documento.chamado_id).where(documento.vetor.op("@@")(termos)),
+        select(chamado.id).where(_prefixo(busca, chamado)),
+    )
+
+
+def aplicar(db: Session, consulta, busca: str):
+    """
+    Restringe `consulta` (um `select(Chamado)` já filtrado) aos chamados que
+    casam com `busca`, do mais relevante para o menos.
+
+    Devolve a consulta sem LIMIT; quem chama pagina.
+    """
+    prefixo = _prefixo(busca)
+    acertou_prefixo = case((prefixo, 0), else_=1)
+
+    if _postgres(db):
+        termos = func.websearch_to_tsquery(CONFIGURACAO, busca)
+        # O filtro é pelos ids; a junção com o documento fica só para o rank.
+        return (
+            consulta.where(Chamado.id.in_(_candidatos_no_postgres(busca, termos)))
+            .outerjoin(DocumentoDeBusca, DocumentoDeBusca.chamado_id == Chamado.id)
+            .order_by(
+                acertou_prefixo,
+                func.coalesce(func.ts_rank_cd(DocumentoDeBusca.vetor, termos), 0).desc(),
+                Chamado.id.desc(),
+            )
+        )
+
+    termos = _termos(busca)
+    if not termos:
+        return consulta.where(prefixo).order_by(Chamado.id.desc())
+
+    # Cada termo entre aspas (a sintaxe do FTS5 não passa do cliente) e com
+    # prefixo; termos separados por espaço são AND.
+    expressao = " ".join('"{}"*'.format(t) for t in termos)
+    fts = (
+        text(
+            f"SELECT rowid AS chamado_id, bm25(chamados_busca_fts, {PESOS_FTS5}) AS pontos "
+            "FROM chamados_busca_fts WHERE chamados_busca_fts MATCH :expressao"
+        )
+        .bindparams(expressao=expressao)
+        .columns(chamado_id=Integer, pontos=Float)
+        .subquery("fts")
+    )
+    return (
+        consulta.outerjoin(fts, fts.c.chamado_id == Chamado.id)
+        .where(or_(fts.c.chamado_id.isnot(None), prefixo))
+        # bm25 é negativo e menor é melhor; sem acerto de texto fica em 0.
+        .order_by(acertou_prefixo, func.coalesce(fts.c.pontos, 0.0), Chamado.id.desc())
+    )
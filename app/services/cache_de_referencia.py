@@ -0,0 +1,171 @@
+"""
+Cache das tabelas de referência: prazos de SLA, categorias, setores e perfis.
+
+São tabelas que mudam poucas vezes por ano e eram lidas a toda hora: as
+configs de SLA em toda listagem e leitura de chamado, a role no login e na
+renovação do token, categorias e setores a cada formulário aberto. Agora cada
+processo guarda uma cópia e só relê a tabela quando ela muda.
+
+Como um processo sabe que mudou: `versoes_de_referencia` tem um número por
+tabela, que toda escrita nela sobe na mesma transação (`registrar_alteracao`).
+O processo lê esses números — uma consulta pequena, todas as tabelas de uma
+vez — no máximo a cada CACHE_REFERENCIA_VERIFICACAO_SEGUNDOS, e relê só a
+tabela cuja versão andou. Entre uma verificação e outra, nenhuma consulta.
+
+- Escrita feita por este processo vale na hora: o commit força a verificação
+  seguinte.
+- Escrita feita por outro worker vale em até CACHE_REFERENCIA_VERIFICACAO_SEGUNDOS.
+- Escrita por SQL direto só vale depois de subir a versão à mão (ver a
+  migration) ou reiniciar o container. `roles` não tem rota de escrita, então
+  é sempre esse o caso para ela.
+
+A versão é lida ANTES da tabela. Se uma escrita comitar entre as duas
+leituras, a cópia nova fica marcada com a versão velha e é relida na próxima
+verificação — o erro possível é reler à toa, nunca guardar dado velho como
+novo.
+
+O que sai daqui não está preso a sessão nenhuma e é compartilhado entre as
+requisições: leia, não altere. Rota que escreve nessas tabelas continua
+buscando a linha pela sessão.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import insert_do_dialeto
+from app.models.categoria import Categoria
+from app.models.role import Role
+from app.models.setor import Setor
+from app.models.sla_config import SLAConfig
+from app.models.versao_de_referencia import VersaoDeReferencia
+from app.schemas.categoria import CategoriaResponse
+from app.schemas.setor import SetorResponse
+
+SLA_CONFIGS = "sla_configs"
+CATEGORIAS = "categorias"
+SETORES = "setores"
+ROLES = "roles"
+
+
+class CacheDeReferencia:
+    """Cópias das tabelas, cada uma com a versão que tinha quando foi lida."""
+
+    def __init__(self, intervalo_segundos: float):
+        self.intervalo_segundos = intervalo_segundos
+        self._copias: Dict[str, Tuple[int, Any]] = {}
+        self._versoes: Dict[str, int] = {}
+        self._verificado_em: Optional[float] = None
+        # As rotas `def` rodam no threadpool do FastAPI. Duas requisições que
+        # encontram a mesma tabela velha podem relê-la as duas; o lock só
+        # protege os dicionários, não serializa a leitura do banco.
+        self._lock = threading.Lock()
+
+    def obter(self, db: Session, tabela: str, carregar: Callable[[Session], Any]) -> Any:
+        agora = time.monotonic()
+        with self._lock:
+            verificar = (
+                self._verificado_em is None
+                or agora - self._verificado_em >= self.intervalo_segundos
+            )
+        if verificar:
+            versoes = dict(db.query(VersaoDeReferencia.tabela, VersaoDeReferencia.versao).all())
+            with self._lock:
+                self._versoes = versoes
+                self._verificado_em = agora
+
+        with self._lock:
+            versao = self._versoes.get(tabela, 0)
+            copia = self._copias.get(tabela)
+            if copia is not None and copia[0] == versao:
+                return copia[1]
+
+        valor = carregar(db)
+        with self._lock:
+            self._copias[tabela] = (versao, valor)
+        return valor
+
+    def verificar_na_proxima(self) -> None:
+        """Força a leitura das versões no próximo acesso."""
+        with self._lock:
+            self._verificado_em = None
+
+    def reset(self) -> None:
+        """Descarta todo o estado. Existe para os testes."""
+        with self._lock:
+            self._copias.clear()
+            self._versoes.clear()
+            self._verificado_em = None
+
+
+cache_de_referencia = CacheDeReferencia(intervalo_segundos=settings.CACHE_REFERENCIA_VERIFICACAO_SEGUNDOS)
+
+
+def registrar_alteracao(db: Session, tabela: str) -> None:
+    """
+    Sobe a versão da tabela na transação da sessão. Não faz commit.
+
+    Chamar em toda escrita numa tabela de referência, antes do commit: a
+    versão e o dado mudam juntos. Depois do commit, a próxima leitura deste
+    processo já verifica as versões; os outros, no intervalo de verificação.
+    """
+    incremento = insert_do_dialeto(db, VersaoDeReferencia).values(tabela=tabela, versao=1)
+    incremento = incremento.on_conflict_do_update(
+        index_elements=[VersaoDeReferencia.tabela],
+        set_={"versao": VersaoDeReferencia.versao + 1},
+    )
+    db.execute(incremento)
+    event.listen(db, "after_commit", lambda _sessao: cache_de_referencia.verificar_na_proxima(), once=True)
+
+
+# ---------------------------------------------------------------------------
+# Leituras
+# ---------------------------------------------------------------------------
+
+def _carregar_configs_de_sla(db: Session) -> Dict[str, SLAConfig]:
+    # Cópias avulsas, fora da sessão: a instância da sessão expira no commit
+    # e voltaria ao banco na primeira leitura de atributo.
+    return {
+        c.prioridade: SLAConfig(
+            prioridade=c.prioridade,
+            minutos_resposta=c.minutos_resposta,
+            minutos_resolucao=c.minutos_resolucao,
+        )
+        for c in db.query(SLAConfig).all()
+    }
+
+
+def configs_de_sla(db: Session) -> Dict[str, SLAConfig]:
+    """Prazos de SLA por prioridade."""
+    return cache_de_referencia.obter(db, SLA_CONFIGS, _carregar_configs_de_sla)
+
+
+def config_de_sla(db: Session, prioridade: str) -> Optional[SLAConfig]:
+    return configs_de_sla(db).get(prioridade)
+
+
+def categorias(db: Session) -> List[CategoriaResponse]:
+    """Todas as categorias, por id."""
+    return cache_de_referencia.obter(
+        db,
+        CATEGORIAS,
+        lambda s: [CategoriaResponse.model_validate(c) for c in s.query(Categoria).order_by(Categoria.id)],
+    )
+
+
+def setores(db: Session) -> List[SetorResponse]:
+    """Todos os setores, por id."""
+    return cache_de_referencia.obter(
+        db,
+        SETORES,
+        lambda s: [SetorResponse.model_validate(c) for c in s.query(Setor).order_by(Setor.id)],
+    )
+
+
+def nome_da_role(db: Session, role_id: Optional[int]) -> Optional[str]:
+    nomes = cache_de_referencia.obter(db, ROLES, lambda s: {r.id: r.nome for r in s.query(Role)})
+    return nomes.get(role_id)
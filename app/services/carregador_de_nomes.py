@@ -0,0 +1,84 @@
+"""
+Nomes de usuário em lote, para as respostas que mostram "quem".
+
+Comentários, histórico, execuções de tarefa e chamados guardam o autor (ou o
+solicitante, o técnico) só pelo id. Resolver o nome linha a linha é o N+1
+clássico — `listar_execucoes` fazia um `scalar()` por execução — e devolver
+só o id empurra o mesmo N+1 para o frontend, uma chamada por pessoa.
+
+O `CarregadorDeNomes` junta os ids de uma página inteira e resolve todos num
+`IN (...)`. Os nomes ficam guardados na instância, que vive uma requisição
+(ver `get_carregador_de_nomes` em deps.py): o técnico que aparece em vinte
+linhas é lido uma vez, e um segundo pedido na mesma requisição não vai ao
+banco. Não é cache entre requisições — nome trocado vale na resposta seguinte.
+"""
+
+from typing import Dict, Iterable, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.models.usuario import Usuario
+
+# Ids por `IN`. O SQLite antigo limita uma consulta a 999 parâmetros; a maior
+# página da API (500 chamados, dois ids cada) cabe em poucos lotes.
+TAMANHO_DO_LOTE = 500
+
+
+class CarregadorDeNomes:
+    """
+    id de usuário → nome, com os ids acumulados e resolvidos de uma vez.
+
+    Uso típico: `pedir` com todos os ids da página, depois `nome` para cada
+    linha. `nome` de um id não pedido também funciona, só que custa a sua
+    própria consulta. Id inexistente resolve para None, e não é consultado de
+    novo.
+    """
+
+    def __init__(self, db: Session):
+        self._db = db
+        self._nomes: Dict[int, Optional[str]] = {}
+        self._pendentes: Set[int] = set()
+
+    def pedir(self, ids: Iterable[Optional[int]]) -> None:
+        """Anota ids para a próxima consulta. None e ids já resolvidos são ignorados."""
+        for usuario_id in ids:
+            if usuario_id is not None and usuario_id not in self._nomes:
+                self._pendentes.add(usuario_id)
+
+    def nome(self, usuario_id: Optional[int]) -> Optional[str]:
+        if usuario_id is None:
+            return None
+        if usuario_id not in self._nomes:
+            self._pendentes.add(usuario_id)
+            self._carregar()
+        return self._nomes[usuario_id]
+
+    def anexar(self, objetos: Iterable, **campos: str) -> None:
+        """
+        Preenche atributos de nome a partir dos de id, numa consulta só.
+
+        `campos` mapeia o atributo de destino para o de origem, por exemplo
+        `anexar(chamados, solicitante_nome="solicitante_id")`. O atributo é
+        gravado no próprio objeto, como `_anexar_sla` faz com `sla`, e o schema
+        de resposta o lê por `from_attributes`.
+        """
+        objetos = list(objetos)
+        for origem in campos.values():
+            self.pedir(getattr(o, origem) for o in objetos)
+        self._carregar()
+        for o in objetos:
+            for destino, origem in campos.items():
+                setattr(o, destino, self.nome(getattr(o, origem)))
+
+    def _carregar(self) -> None:
+        if not self._pendentes:
+            return
+        pendentes = sorted(self._pendentes)
+        self._pendentes.clear()
+        for inicio in range(0, len(pendentes), TAMANHO_DO_LOTE):
+            lote = pendentes[inicio:inicio + TAMANHO_DO_LOTE]
+            encontrados = dict(
+                self._db.query(Usuario.id, Usuario.nome).filter(Usuario.id.in_(lote)).all()
+            )
+            for usuario_id in lote:
+                self._nomes[usuario_id] = encontrados.get(usuario_id)
@@ -1,55 +1,181 @@
 from datetime import datetime
+from typing import List, Optional
 from sqlalchemy.orm import Session
+from app.core.database import insert_do_dialeto
 from app.models.chamado import Chamado
 from app.models.historico import HistoricoChamado
-from app.utils.timezone import para_brasilia
+from app.models.protocolo_contador import ProtocoloContador
+from app.services.cache_de_referencia import config_de_sla
+from app.services.sla_service import STATUS_INICIAL, avancar_snapshot, reconstruir_snapshot
+from app.utils.timezone import agora_brasilia, para_brasilia
 
 
 def gerar_protocolo(db: Session) -> str:
     """
     Gera um protocolo único para o chamado no formato: CHAM-YYYY-NNNN
-    """
-    ano_atual = datetime.now().year
 
-    # Busca o último chamado do ano
-    ultimo_chamado = db.query(Chamado).filter(
-        Chamado.protocolo.like(f'CHAM-{ano_atual}-%')
-    ).order_by(Chamado.id.desc()).first()
+    O número sai de um contador por ano (`protocolo_contadores`), incrementado
+    por um único upsert com RETURNING. Antes era "o maior protocolo do ano + 1",
+    lido de `chamados`: duas aberturas simultâneas liam o mesmo maior, e a
+    segunda caía na UNIQUE de `protocolo` com 500.
 
-    if ultimo_chamado:
-        # Extrai o número sequencial do protocolo
-        numero = int(ultimo_chamado.protocolo.split('-')[-1]) + 1
-    else:
-        numero = 1
+    O upsert trava a linha do ano até o fim da transação de quem chamou, então
+    a abertura concorrente espera o commit da anterior em vez de repetir o
+    número — e, se a abertura for desfeita, o incremento é desfeito junto, sem
+    buraco na sequência. Por isso chame dentro da mesma transação que grava o
+    chamado, e comite logo.
+
+    O ano é o de Brasília, o mesmo de `data_abertura`: com o relógio do
+    container em UTC, o chamado aberto às 22h de 31/12 sairia com o ano
+    seguinte.
+    """
+    ano_atual = agora_brasilia().year
+
+    incremento = insert_do_dialeto(db, ProtocoloContador).values(ano=ano_atual, ultimo=1)
+    incremento = incremento.on_conflict_do_update(
+        index_elements=[ProtocoloContador.ano],
+        set_={"ultimo": ProtocoloContador.ultimo + 1},
+    ).returning(ProtocoloContador.ultimo)
+    numero = db.execute(incremento).scalar_one()
 
     return f"CHAM-{ano_atual}-{numero:04d}"
 
 
+def abrir_chamado(
+    db: Session,
+    solicitante_id: int,
+    titulo: str,
+    descricao: str,
+    prioridade: str,
+    categoria_id: Optional[int] = None,
+) -> Chamado:
+    """
+    Abre um chamado: protocolo, linha, histórico de abertura e snapshot de SLA.
+
+    Não comita nem dá flush — quem chama fecha a transação, e tudo entra junto
+    ou nada entra. O histórico aponta para o chamado pelo relacionamento, não
+    pelo id, então não é preciso um flush só para o chamado ganhar id.
+
+    A abertura, o histórico e o início do relógio de SLA usam o mesmo instante.
+    """
+    instante = agora_brasilia().replace(tzinfo=None)
+    protocolo = gerar_protocolo(db)
+    chamado = Chamado(
+        protocolo=protocolo,
+        solicitante_id=solicitante_id,
+        categoria_id=categoria_id,
+        titulo=titulo,
+        descricao=descricao,
+        prioridade=prioridade,
+        status=STATUS_INICIAL,
+        cancelado=False,
+        arquivado=False,
+    )
+    carimbar(chamado, instante, abertura=True)
+    db.add(chamado)
+
+    registrar_historico(
+        db=db,
+        chamado=chamado,
+        usuario_id=solicitante_id,
+        acao="Abertura de chamado",
+        descricao=f"Chamado aberto com protocolo {protocolo}",
+        status_novo=STATUS_INICIAL,
+        instante=instante,
+    )
+    return chamado
+
+
+def carimbar(chamado: Chamado, instante: Optional[datetime] = None, abertura: bool = False) -> datetime:
+    """
+    Grava o instante da escrita nas colunas de data do chamado.
+
+    Os defaults das colunas (`agora_brasilia`) são aware; o banco devolve
+    naive. Com a resposta montada da memória, sem reler a linha depois do
+    commit, o aware apareceria no JSON com um `-03:00` que a leitura não tem.
+    O carimbo explícito, naive como o de `registrar_historico`, deixa a
+    resposta da escrita igual à da leitura seguinte.
+
+    Só vale se a mudança chegar ao banco num único UPDATE: num segundo UPDATE
+    da mesma transação as colunas não mudam de novo, e o `onupdate` as
+    sobrescreve com o aware. Daí nenhum flush no meio do caminho de escrita.
+    """
+    instante = instante or agora_brasilia().replace(tzinfo=None)
+    chamado.data_atualizacao = instante
+    chamado.updated_at = instante
+    if abertura:
+        chamado.data_abertura = instante
+        chamado.created_at = instante
+    return instante
+
+
 def registrar_historico(
     db: Session,
-    chamado_id: int,
+    chamado: Chamado,
     usuario_id: int,
     acao: str,
     descricao: str = None,
     status_anterior: str = None,
-    status_novo: str = None
+    status_novo: str = None,
+    instante: Optional[datetime] = None,
 ):
     """
-    Registra uma ação no histórico do chamado
+    Registra uma ação no histórico do chamado.
+
+    Transição de status (`status_novo` preenchido) também avança o snapshot de
+    SLA gravado no chamado — é o único ponto por onde o status muda, e é o que
+    permite à listagem não ler o histórico. O `created_at` é fixado aqui, e não
+    deixado para o default da coluna, porque o snapshot precisa do MESMO
+    instante que fica no histórico.
+
+    Naive, como o banco devolve: o snapshot compara este instante com
+    `created_at` lidos do banco, e aware contra naive levanta TypeError.
+
+    Não comita: o histórico entra na mesma transação que a mudança que ele
+    registra. Antes havia um commit para a mudança e outro para o histórico, e
+    uma queda entre os dois deixava o chamado alterado sem o registro.
     """
+    instante = instante or agora_brasilia().replace(tzinfo=None)
     historico = HistoricoChamado(
-        chamado_id=chamado_id,
+        chamado=chamado,
         usuario_id=usuario_id,
         acao=acao,
         descricao=descricao,
         status_anterior=status_anterior,
-        status_novo=status_novo
+        status_novo=status_novo,
+        created_at=instante,
     )
     db.add(historico)
-    db.commit()
+
+    if status_novo is not None:
+        _atualizar_snapshot_de_sla(db, chamado, historico, instante)
+
     return historico
 
 
+def _atualizar_snapshot_de_sla(db: Session, chamado: Chamado, historico: HistoricoChamado, instante: datetime) -> None:
+    config = config_de_sla(db, chamado.prioridade)
+    anterior, novo = historico.status_anterior, historico.status_novo
+
+    if chamado.sla_calculado_em is None and anterior is not None:
+        # Chamado anterior ao snapshot: não há de onde avançar. Remonta a
+        # partir do histórico, já com a transição atual, uma vez só — dali em
+        # diante ele segue pelo caminho incremental. A transição atual ainda
+        # não foi ao banco; entra pela memória.
+        reconstruir_snapshot(chamado, historicos_gravados(db, chamado) + [historico], config, agora=instante)
+    else:
+        avancar_snapshot(chamado, config, anterior, novo, instante)
+
+
+def historicos_gravados(db: Session, chamado: Chamado) -> List[HistoricoChamado]:
+    """
+    O histórico do chamado que já está no banco, sem dar flush no que está
+    pendente (ver `carimbar`).
+    """
+    with db.no_autoflush:
+        return db.query(HistoricoChamado).filter(HistoricoChamado.chamado_id == chamado.id).all()
+
+
 def calcular_tempo_resolucao(data_abertura: datetime, data_resolucao: datetime) -> int:
     """
     Calcula o tempo de resolução em minutos.
@@ -0,0 +1,69 @@
+"""
+Serialização da exportação de chamados: NDJSON e CSV, lote a lote.
+
+A rota (`GET /chamados/exportar`) lê os chamados em lotes por cursor do lado
+do servidor e entrega cada lote, já com SLA e nomes, a uma das funções daqui,
+que devolve o pedaço de texto correspondente. Nada aqui guarda estado entre
+lotes além do cabeçalho do CSV: a memória da exportação é a de um lote, com
+mil chamados ou com um milhão.
+
+O formato de cada linha é o de `ChamadoResponse` — o mesmo JSON que a
+listagem devolve, uma linha por chamado. No CSV o bloco `sla` vira colunas
+`sla_*`, porque planilha não tem objeto aninhado.
+"""
+
+import csv
+import io
+import json
+from typing import Iterable, List
+
+from app.schemas.chamado import ChamadoResponse
+from app.schemas.sla import SLAInfo
+
+FORMATO_NDJSON = "ndjson"
+FORMATO_CSV = "csv"
+
+TIPOS_DE_CONTEUDO = {
+    FORMATO_NDJSON: "application/x-ndjson",
+    FORMATO_CSV: "text/csv; charset=utf-8",
+}
+
+# Colunas do CSV, na ordem do schema. `sla` sai achatado no fim.
+COLUNAS_DO_CHAMADO = [campo for campo in ChamadoResponse.model_fields if campo != "sla"]
+COLUNAS_DO_SLA = [f"sla_{campo}" for campo in SLAInfo.model_fields]
+COLUNAS_CSV = COLUNAS_DO_CHAMADO + COLUNAS_DO_SLA
+
+
+def _como_dict(chamado) -> dict:
+    return ChamadoResponse.model_validate(chamado).model_dump(mode="json")
+
+
+def lote_ndjson(chamados: Iterable) -> str:
+    """Um objeto JSON por linha, cada uma terminada em `\\n`."""
+    return "".join(json.dumps(_como_dict(c), ensure_ascii=False) + "\n" for c in chamados)
+
+
+def cabecalho_csv() -> str:
+    """
+    Primeira linha do CSV, com BOM: sem ele o Excel abre o arquivo como
+    Latin-1 e "Média" vira "MÃ©dia".
+    """
+    return "\ufeff" + _linhas_csv([COLUNAS_CSV])
+
+
+def lote_csv(chamados: Iterable) -> str:
+    linhas = []
+    for c in chamados:
+        dados = _como_dict(c)
+        sla = dados.pop("sla") or {}
+        linha = [dados.get(coluna) for coluna in COLUNAS_DO_CHAMADO]
+        linha += [sla.get(coluna[len("sla_"):]) for coluna in COLUNAS_DO_SLA]
+        linhas.append(linha)
+    return _linhas_csv(linhas)
+
+
+def _linhas_csv(linhas: List[list]) -> str:
+    saida = io.StringIO()
+    # `\r\n` é o terminador do RFC 4180, e o padrão do módulo csv.
+    csv.writer(saida).writerows(linhas)
+    return saida.getvalue()
@@ -1,18 +1,48 @@
 """
 Motor de horas úteis do SLA.
 
-Expediente: seg-sex, 08:00-12:00 e 13:00-17:00 (480 minutos úteis por dia).
-Feriados não são considerados nesta versão.
+Expediente padrão: seg-sex, 08:00-12:00 e 13:00-17:00 (480 minutos úteis por
+dia), sem feriados. Feriados e janelas por dia da semana são configuráveis por
+arquivo (CALENDARIO_ARQUIVO; formato em `carregar_calendario`).
 
 Todas as funções normalizam datetimes para naive-Brasília antes de calcular:
 o banco guarda TIMESTAMP sem timezone (naive), mas agora_brasilia() devolve
 aware — misturar os dois levanta TypeError.
+
+O calendário é compilado UMA vez, na subida, num vetor de minutos úteis
+acumulados por dia (`Calendario._acumulado`): a posição i guarda quantos
+minutos úteis existem do primeiro dia coberto até o dia i, exclusive. Com
+isso:
+
+- contar = as duas pontas medidas janela a janela + uma subtração no vetor
+  para os dias inteiros do meio;
+- somar = a ponta inicial + um `bisect` no vetor para achar o dia em que o
+  orçamento acaba + a ponta final.
+
+O custo não depende do tamanho do intervalo nem da quantidade de feriados —
+feriado é só um dia que soma zero no vetor. Como o vetor é indexado por dia
+(uma posição por dia corrido), achar a posição de uma data é uma subtração de
+ordinais, sem busca; o `bisect` só é necessário no caminho inverso, de minutos
+para data.
+
+As pontas continuam sendo medidas por janela, com truncamento para minuto
+inteiro em cada uma. Medir o intervalo de uma vez só daria outro número quando
+os instantes têm segundos (o que é o caso normal, vindo de agora_brasilia()),
+e o prazo de chamados antigos mudaria sem ninguém ter mexido na regra.
 """
+import json
+from array import array
+from bisect import bisect_left, bisect_right
 from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence, Tuple
 
+from app.core.config import settings
 from app.utils.timezone import BRASILIA_TZ
 
-# Janelas do expediente (início, fim)
+Janela = Tuple[time, time]
+
+# Janelas do expediente padrão (início, fim)
 JANELAS = [
     (time(8, 0), time(12, 0)),
     (time(13, 0), time(17, 0)),
@@ -20,8 +50,18 @@ JANELAS = [
 
 MINUTOS_POR_DIA_UTIL = 480
 
-# Trava de segurança: impede loop infinito se alguém pedir um prazo absurdo.
-_MAX_ITERACOES = 10_000
+# Seg-sex com as janelas acima; sábado e domingo sem expediente.
+EXPEDIENTE_PADRAO: Dict[int, Sequence[Janela]] = {dia: JANELAS for dia in range(5)}
+
+# Faixa coberta pelo vetor compilado. Um dia custa 8 bytes: o século inteiro
+# ocupa menos de 300 KB e compila em dezenas de milissegundos. Instante fora da
+# faixa é erro, e não "sem expediente" — um prazo calculado contra um
+# calendário vazio pareceria válido.
+PRIMEIRO_DIA = date(2000, 1, 1)
+ULTIMO_DIA = date(2100, 12, 31)
+
+# Chaves do arquivo de calendário, na ordem de date.weekday().
+DIAS_DA_SEMANA = ("seg", "ter", "qua", "qui", "sex", "sab", "dom")
 
 
 def _para_naive_brasilia(dt: datetime) -> datetime:
@@ -31,91 +71,281 @@ def _para_naive_brasilia(dt: datetime) -> datetime:
     return dt
 
 
-def _e_dia_util(d: date) -> bool:
-    return d.weekday() < 5  # 0=segunda ... 4=sexta
-
-
-def _minutos_uteis_no_dia(dia: date, inicio: datetime, fim: datetime) -> int:
-    """Minutos úteis do dia `dia` que caem dentro do intervalo [inicio, fim]."""
-    if not _e_dia_util(dia):
-        return 0
-
-    total = 0
-    for janela_inicio, janela_fim in JANELAS:
-        abertura = datetime.combine(dia, janela_inicio)
-        fechamento = datetime.combine(dia, janela_fim)
-
-        ini = max(abertura, inicio)
-        f = min(fechamento, fim)
-        if f > ini:
-            total += int((f - ini).total_seconds() // 60)
-
-    return total
-
-
-def contar_minutos_uteis(inicio: datetime, fim: datetime) -> int:
-    """Quantos minutos úteis existem entre `inicio` e `fim`."""
-    inicio = _para_naive_brasilia(inicio)
-    fim = _para_naive_brasilia(fim)
-
-    if fim <= inicio:
-        return 0
-
-    total = 0
-    dia = inicio.date()
-    while dia <= fim.date():
-        total += _minutos_uteis_no_dia(dia, inicio, fim)
-        dia += timedelta(days=1)
-
-    return total
-
-
-def _proximo_instante_util(dt: datetime) -> datetime:
-    """Se `dt` cai fora do expediente, avança para a próxima abertura."""
-    while True:
-        if not _e_dia_util(dt.date()):
-            dt = datetime.combine(dt.date() + timedelta(days=1), JANELAS[0][0])
-            continue
-
-        for janela_inicio, janela_fim in JANELAS:
-            abertura = datetime.combine(dt.date(), janela_inicio)
-            fechamento = datetime.combine(dt.date(), janela_fim)
+def _minutos_da_janela(janela: Janela) -> int:
+    inicio, fim = janela
+    return (fim.hour * 60 + fim.minute) - (inicio.hour * 60 + inicio.minute)
+
+
+def _validar_janelas(dia_semana: int, janelas: Sequence[Janela]) -> Tuple[Janela, ...]:
+    """Ordena as janelas do dia e recusa janela vazia ou sobreposta."""
+    ordenadas = tuple(sorted(janelas))
+    anterior_fim = None
+    for inicio, fim in ordenadas:
+        if inicio.second or inicio.microsecond or fim.second or fim.microsecond:
+            raise ValueError(
+                f"janela {inicio}-{fim} ({DIAS_DA_SEMANA[dia_semana]}) precisa cair em minuto cheio"
+            )
+        if fim <= inicio:
+            raise ValueError(f"janela {inicio}-{fim} ({DIAS_DA_SEMANA[dia_semana]}) termina antes de começar")
+        if anterior_fim is not None and inicio < anterior_fim:
+            raise ValueError(f"janelas sobrepostas em {DIAS_DA_SEMANA[dia_semana]}: {ordenadas}")
+        anterior_fim = fim
+    return ordenadas
+
+
+class Calendario:
+    """
+    Expediente compilado: janelas por dia da semana, feriados e o vetor de
+    minutos úteis acumulados por dia.
+
+    Imutável depois de construído — é compartilhado por todas as requisições
+    sem lock. Para trocar o calendário, construa outro e passe para
+    `definir_calendario`.
+    """
+
+    def __init__(
+        self,
+        janelas_por_dia_semana: Dict[int, Sequence[Janela]],
+        feriados: Iterable[date] = (),
+        feriados_anuais: Iterable[Tuple[int, int]] = (),
+        primeiro_dia: date = PRIMEIRO_DIA,
+        ultimo_dia: date = ULTIMO_DIA,
+    ):
+        self._janelas = tuple(
+            _validar_janelas(d, janelas_por_dia_semana.get(d, ())) for d in range(7)
+        )
+        self.feriados = frozenset(feriados)
+        self.feriados_anuais = frozenset(feriados_anuais)
+        self.primeiro_dia = primeiro_dia
+        self.ultimo_dia = ultimo_dia
+
+        self._ordinal_inicial = primeiro_dia.toordinal()
+        self._dias = ultimo_dia.toordinal() - self._ordinal_inicial + 1
+        if self._dias <= 0:
+            raise ValueError("último dia do calendário anterior ao primeiro")
+
+        minutos_da_semana = [sum(_minutos_da_janela(j) for j in js) for js in self._janelas]
+        acumulado = array("q", bytes(8 * (self._dias + 1)))
+        total = 0
+        dia = primeiro_dia
+        um_dia = timedelta(days=1)
+        for i in range(self._dias):
+            if not self._e_feriado(dia):
+                total += minutos_da_semana[dia.weekday()]
+            acumulado[i + 1] = total
+            dia += um_dia
+        self._acumulado = acumulado
+
+    def _e_feriado(self, dia: date) -> bool:
+        return dia in self.feriados or (dia.month, dia.day) in self.feriados_anuais
+
+    def _indice(self, dia: date) -> int:
+        i = dia.toordinal() - self._ordinal_inicial
+        if not 0 <= i < self._dias:
+            raise ValueError(
+                f"{dia} fora do calendário compilado ({self.primeiro_dia} a {self.ultimo_dia})"
+            )
+        return i
+
+    def _dia(self, indice: int) -> date:
+        return date.fromordinal(self._ordinal_inicial + indice)
+
+    def _janelas_do_indice(self, indice: int, dia: date) -> Tuple[Janela, ...]:
+        # Dia que soma zero no vetor é feriado ou dia sem expediente: nos dois
+        # casos não há janela, e o vetor responde sem consultar os conjuntos.
+        if self._acumulado[indice + 1] == self._acumulado[indice]:
+            return ()
+        return self._janelas[dia.weekday()]
+
+    def janelas_do_dia(self, dia: date) -> Tuple[Janela, ...]:
+        """Janelas de expediente de `dia` — vazio em feriado e dia sem expediente."""
+        return self._janelas_do_indice(self._indice(dia), dia)
+
+    def minutos_uteis_do_dia(self, dia: date) -> int:
+        i = self._indice(dia)
+        return self._acumulado[i + 1] - self._acumulado[i]
+
+    def _minutos_no_dia(self, indice: int, dia: date, inicio: datetime, fim: datetime) -> int:
+        """Minutos úteis do dia `dia` que caem dentro do intervalo [inicio, fim]."""
+        total = 0
+        for janela_inicio, janela_fim in self._janelas_do_indice(indice, dia):
+            ini = max(datetime.combine(dia, janela_inicio), inicio)
+            f = min(datetime.combine(dia, janela_fim), fim)
+            if f > ini:
+                total += int((f - ini).total_seconds() // 60)
+        return total
+
+    def contar(self, inicio: datetime, fim: datetime) -> int:
+        """Quantos minutos úteis existem entre `inicio` e `fim`."""
+        inicio = _para_naive_brasilia(inicio)
+        fim = _para_naive_brasilia(fim)
+
+        if fim <= inicio:
+            return 0
+
+        primeiro, ultimo = inicio.date(), fim.date()
+        i, j = self._indice(primeiro), self._indice(ultimo)
+        if i == j:
+            return self._minutos_no_dia(i, primeiro, inicio, fim)
+
+        return (
+            self._minutos_no_dia(i, primeiro, inicio, fim)
+            + self._acumulado[j] - self._acumulado[i + 1]
+            + self._minutos_no_dia(j, ultimo, inicio, fim)
+        )
+
+    def _abertura_do_proximo_dia_util(self, indice: int) -> datetime:
+        """Primeira abertura num dia útil estritamente depois do dia `indice`."""
+        # O primeiro dia útil depois de `indice` é a última posição do vetor
+        # que ainda vale o mesmo que a posição `indice + 1`: os dias sem
+        # expediente no caminho não mudam o acumulado.
+        proximo = bisect_right(self._acumulado, self._acumulado[indice + 1]) - 1
+        if proximo >= self._dias:
+            raise ValueError(f"sem dia útil até {self.ultimo_dia} no calendário compilado")
+        dia = self._dia(proximo)
+        return datetime.combine(dia, self._janelas[dia.weekday()][0][0])
+
+    def _proximo_instante_util(self, dt: datetime) -> datetime:
+        """Se `dt` cai fora do expediente, avança para a próxima abertura."""
+        dia = dt.date()
+        i = self._indice(dia)
+        for janela_inicio, janela_fim in self._janelas_do_indice(i, dia):
+            abertura = datetime.combine(dia, janela_inicio)
             if dt < abertura:
                 return abertura
-            if dt < fechamento:
+            if dt < datetime.combine(dia, janela_fim):
                 return dt
+        # Passou do fim do expediente (ou o dia não tem): próxima abertura.
+        return self._abertura_do_proximo_dia_util(i)
+
+    def _consumir_no_dia(self, indice: int, atual: datetime, minutos: int) -> Tuple[Optional[datetime], int]:
+        """
+        Gasta `minutos` nas janelas do dia de `atual`, a partir de `atual`.
+
+        Devolve o instante em que o orçamento acaba, ou `None` e o que sobrou
+        quando o dia não basta. O orçamento que termina exatamente no
+        fechamento de uma janela para ali, em vez de saltar para a abertura
+        seguinte.
+        """
+        dia = atual.date()
+        for janela_inicio, janela_fim in self._janelas_do_indice(indice, dia):
+            fechamento = datetime.combine(dia, janela_fim)
+            if atual >= fechamento:
+                continue
+
+            ini = max(atual, datetime.combine(dia, janela_inicio))
+            disponivel = int((fechamento - ini).total_seconds() // 60)
+            if minutos <= disponivel:
+                return ini + timedelta(minutes=minutos), 0
+            minutos -= disponivel
+
+        return None, minutos
+
+    def somar(self, inicio: datetime, minutos: int) -> datetime:
+        """Soma `minutos` úteis a `inicio` e devolve o prazo final (naive-Brasília)."""
+        atual = self._proximo_instante_util(_para_naive_brasilia(inicio))
+
+        if minutos <= 0:
+            return atual
+
+        # O primeiro dia é o único que pode começar no meio de uma janela.
+        i = self._indice(atual.date())
+        prazo, restante = self._consumir_no_dia(i, atual, minutos)
+        if prazo is not None:
+            return prazo
+
+        # Daqui em diante todo dia útil é inteiro. O dia em que o orçamento
+        # acaba é o primeiro cujo acumulado, somado o próprio dia, alcança o
+        # alvo. `bisect_left` para no dia que fecha o alvo EXATAMENTE, o que
+        # faz um múltiplo exato do dia cair no fechamento, e não na abertura
+        # do dia seguinte.
+        alvo = self._acumulado[i + 1] + restante
+        fim = bisect_left(self._acumulado, alvo)
+        if fim > self._dias:
+            raise ValueError(f"prazo além de {self.ultimo_dia} no calendário compilado")
+        j = fim - 1
+        dia = self._dia(j)
+        abertura = datetime.combine(dia, self._janelas[dia.weekday()][0][0])
+        prazo, _ = self._consumir_no_dia(j, abertura, alvo - self._acumulado[j])
+        return prazo
+
+
+def _ler_hora(texto: str) -> time:
+    horas, minutos = texto.split(":")
+    return time(int(horas), int(minutos))
+
+
+def carregar_calendario(caminho: Optional[str]) -> Calendario:
+    """
+    Monta o calendário a partir de um arquivo JSON, ou o padrão sem arquivo.
+
+    Formato (todas as chaves opcionais; ver calendario.example.json):
+
+        {
+          "janelas": {"seg": [["08:00", "12:00"], ["13:00", "17:00"]], ...},
+          "feriados": ["2026-11-20", ...],
+          "feriados_anuais": ["01-01", "12-25", ...]
+        }
+
+    Sem "janelas", vale o expediente padrão; com "janelas", dia da semana
+    ausente é dia sem expediente. "feriados_anuais" repete todo ano (MM-DD);
+    feriados móveis (Carnaval, Sexta-feira Santa) vão em "feriados", com ano.
+
+    Arquivo inválido derruba a subida com a mensagem do problema: um SLA
+    calculado contra um calendário meio lido é pior que a API fora do ar.
+    """
+    if not caminho:
+        return Calendario(EXPEDIENTE_PADRAO)
+
+    with Path(caminho).open(encoding="utf-8") as arquivo:
+        dados = json.load(arquivo)
+
+    desconhecidas = set(dados) - {"janelas", "feriados", "feriados_anuais"}
+    if desconhecidas:
+        raise ValueError(f"{caminho}: chaves desconhecidas {sorted(desconhecidas)}")
+
+    if "janelas" in dados:
+        dias_invalidos = set(dados["janelas"]) - set(DIAS_DA_SEMANA)
+        if dias_invalidos:
+            raise ValueError(
+                f"{caminho}: dias inválidos {sorted(dias_invalidos)}; use {', '.join(DIAS_DA_SEMANA)}"
+            )
+        janelas = {
+            DIAS_DA_SEMANA.index(nome): [(_ler_hora(a), _ler_hora(b)) for a, b in faixas]
+            for nome, faixas in dados["janelas"].items()
+        }
+    else:
+        janelas = EXPEDIENTE_PADRAO
+
+    feriados = [date.fromisoformat(d) for d in dados.get("feriados", [])]
+    feriados_anuais = []
+    for d in dados.get("feriados_anuais", []):
+        mes, dia = (int(parte) for parte in d.split("-"))
+        date(2000, mes, dia)  # valida (2000 é bissexto: aceita 02-29)
+        feriados_anuais.append((mes, dia))
+
+    return Calendario(janelas, feriados, feriados_anuais)
+
+
+_calendario = carregar_calendario(settings.CALENDARIO_ARQUIVO)
+
+
+def calendario_ativo() -> Calendario:
+    return _calendario
 
-        # Passou do fim do expediente: vai para a abertura do próximo dia.
-        dt = datetime.combine(dt.date() + timedelta(days=1), JANELAS[0][0])
+
+def definir_calendario(calendario: Calendario) -> Calendario:
+    """Troca o calendário em uso e devolve o anterior (para os testes restaurarem)."""
+    global _calendario
+    anterior, _calendario = _calendario, calendario
+    return anterior
 
 
-def _fim_da_janela(dt: datetime) -> datetime:
-    """Fim da janela de expediente que contém `dt` (assume dt já é útil)."""
-    for janela_inicio, janela_fim in JANELAS:
-        abertura = datetime.combine(dt.date(), janela_inicio)
-        fechamento = datetime.combine(dt.date(), janela_fim)
-        if abertura <= dt < fechamento:
-            return fechamento
-    raise ValueError(f"{dt} não está dentro do expediente")
+def contar_minutos_uteis(inicio: datetime, fim: datetime) -> int:
+    """Quantos minutos úteis existem entre `inicio` e `fim`, no calendário ativo."""
+    return _calendario.contar(inicio, fim)
 
 
 def somar_minutos_uteis(inicio: datetime, minutos: int) -> datetime:
-    """Soma `minutos` úteis a `inicio` e devolve o prazo final (naive-Brasília)."""
-    atual = _proximo_instante_util(_para_naive_brasilia(inicio))
-
-    if minutos <= 0:
-        return atual
-
-    restante = minutos
-    for _ in range(_MAX_ITERACOES):
-        atual = _proximo_instante_util(atual)
-        fim_janela = _fim_da_janela(atual)
-        disponivel = int((fim_janela - atual).total_seconds() // 60)
-
-        if restante <= disponivel:
-            return atual + timedelta(minutes=restante)
-
-        restante -= disponivel
-        atual = fim_janela
-
-    raise RuntimeError(f"somar_minutos_uteis não convergiu para {minutos} minutos")
+    """Soma `minutos` úteis a `inicio` no calendário ativo (prazo em naive-Brasília)."""
+    return _calendario.somar(inicio, minutos)
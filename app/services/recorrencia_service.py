@@ -8,7 +8,7 @@ a tarefa tenha sido feita atrasada.
 
 import calendar
 from datetime import date, timedelta
-from typing import Optional
+from typing import Iterator, Optional
 
 
 def _clamp_dia_mes(ano: int, mes: int, dia: int) -> date:
@@ -69,3 +69,54 @@ def calcular_proxima_data(
         return _clamp_dia_mes(ano, mes, dia_mes)
 
     raise ValueError(f"tipo_recorrencia inválido: {tipo}")
+
+
+def expandir_ocorrencias(
+    tipo: str,
+    intervalo: int,
+    dia_semana: Optional[int],
+    dia_mes: Optional[int],
+    primeira: date,
+    de: date,
+    ate: date,
+) -> Iterator[date]:
+    """Ocorrências do padrão entre `de` e `ate` (inclusive), em ordem.
+
+    `primeira` é a próxima data da tarefa; as seguintes são as que
+    `calcular_proxima_data` daria em cadeia, cada uma a partir da anterior.
+    Só o primeiro passo usa a função, porque `primeira` pode ter sido
+    informada fora do padrão (outro dia da semana, por exemplo); dali em
+    diante as datas já caem no padrão e o passo é aritmético — dias somados,
+    ou meses contados com o clamp do dia —, e o começo do intervalo é
+    alcançado com um salto em vez de ocorrência por ocorrência.
+
+    Gerador: o padrão é validado (ValueError) no primeiro `next`, antes de
+    qualquer data sair.
+    """
+    n = max(1, intervalo or 1)
+    seguinte = calcular_proxima_data(tipo, n, dia_semana, dia_mes, primeira)
+    if ate < de or ate < primeira:
+        return
+    if primeira >= de:
+        yield primeira
+
+    if tipo != "mensal":
+        passo = n if tipo == "diaria" else 7 * n
+        if seguinte < de:
+            seguinte += timedelta(days=-(-(de - seguinte).days // passo) * passo)
+        while seguinte <= ate:
+            yield seguinte
+            seguinte += timedelta(days=passo)
+        return
+
+    # Meses contados desde o ano 0, para somar sem virar o ano à mão.
+    meses = seguinte.year * 12 + seguinte.month - 1
+    if seguinte < de:
+        meses += max(0, (de.year * 12 + de.month - 1 - meses) // n) * n
+    while True:
+        ocorrencia = _clamp_dia_mes(meses // 12, meses % 12 + 1, dia_mes)
+        if ocorrencia > ate:
+            return
+        if ocorrencia >= de:
+            yield ocorrencia
+        meses += n
@@ -0,0 +1,232 @@
+"""
+Relatório mensal de cumprimento de SLA, por prioridade e por categoria.
+
+Antes, o relatório era montado do lado de fora: a planilha pedia os chamados
+do mês pela API e o bloco `sla` de cada um saía de `calcular_sla`, chamado a
+chamado. Aqui o mesmo cálculo roda dentro da API, de uma vez, e o resultado
+é um punhado de números.
+
+O que entra no mês: os chamados ENCERRADOS nele — `data_resolucao` dentro do
+mês, status Resolvido ou Fechado, não cancelados. Contar pelos abertos no mês
+deixaria o relatório de um mês já fechado mudando enquanto os chamados dele
+terminam; pelos encerrados, o resultado de um mês fechado é definitivo, e é
+isso que permite guardá-lo.
+
+O SLA de cada chamado é o de `calcular_sla` sobre o histórico inteiro, e não
+o snapshot: o relatório é a referência, e precisa valer também para chamado
+anterior ao snapshot. Os chamados são lidos em lotes por id, cada lote com o
+histórico de todos num `IN (...)`, e somados em acumuladores por grupo — a
+memória é a de um lote, não a do mês. Cada lote sai da sessão depois de
+somado.
+
+Mês fechado fica no cache do processo (`cache_de_relatorios`), pela chave
+(ano, mês, prazos de SLA vigentes): mudar um prazo muda a chave, e o
+relatório seguinte é recalculado com a regra nova. O que fica guardado são
+os números, por `categoria_id`; o nome da categoria não é do mês, e é posto
+a cada requisição a partir de `categorias` — renomear uma categoria aparece
+no relatório seguinte, mesmo de mês fechado. Mês corrente é sempre
+recalculado. O caso que escapa é chamado reaberto e encerrado de novo depois
+do fim do mês — `data_resolucao` guarda a primeira resolução e o chamado
+continua no mês antigo, com o SLA da última. Reiniciar o processo limpa o
+cache.
+"""
+
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.chamado import Chamado
+from app.models.historico import HistoricoChamado
+from app.schemas.relatorio import (
+    IndicadoresPorCategoria,
+    IndicadoresPorPrioridade,
+    IndicadoresSLA,
+    RelatorioSLAResponse,
+)
+from app.services.cache_de_referencia import categorias, configs_de_sla
+from app.services.sla_service import STATUS_FINAIS, calcular_sla
+from app.utils.timezone import agora_brasilia
+
+# Chamados por lote: os que ficam na sessão, com o histórico, ao mesmo tempo.
+LOTE = 500
+
+
+@dataclass
+class Acumulador:
+    """Somas de um grupo de chamados; os percentuais saem só no fim."""
+    chamados: int = 0
+    resposta_cumprida: int = 0
+    resolucao_cumprida: int = 0
+    minutos_pausados: int = 0
+
+    def somar(self, bloco: dict) -> None:
+        self.chamados += 1
+        self.resposta_cumprida += bloco["resposta_cumprida"]
+        self.resolucao_cumprida += bloco["situacao"] != "Estourado"
+        self.minutos_pausados += bloco["minutos_pausados"]
+
+    def indicadores(self) -> dict:
+        if not self.chamados:
+            return {"chamados": 0}
+        return {
+            "chamados": self.chamados,
+            "resposta_cumprida_percentual": round(self.resposta_cumprida / self.chamados * 100, 1),
+            "resolucao_cumprida_percentual": round(self.resolucao_cumprida / self.chamados * 100, 1),
+            "media_minutos_pausados": round(self.minutos_pausados / self.chamados, 1),
+        }
+
+
+def intervalo_do_mes(ano: int, mes: int) -> Tuple[datetime, datetime]:
+    """[primeiro instante do mês, primeiro do seguinte), naive-Brasília como as colunas."""
+    inicio = datetime(ano, mes, 1)
+    fim = datetime(ano + 1, 1, 1) if mes == 12 else datetime(ano, mes + 1, 1)
+    return inicio, fim
+
+
+def mes_fechado(ano: int, mes: int, agora: Optional[datetime] = None) -> bool:
+    agora = (agora or agora_brasilia()).replace(tzinfo=None)
+    return intervalo_do_mes(ano, mes)[1] <= agora
+
+
+def _lotes(db: Session, inicio: datetime, fim: datetime, lote: int) -> Iterator[List[Tuple[Chamado, list]]]:
+    """Chamados encerrados no intervalo, com o histórico, um lote por vez."""
+    ultimo_id = 0
+    while True:
+        chamados = (
+            db.query(Chamado)
+            .filter(
+                Chamado.id > ultimo_id,
+                Chamado.data_resolucao >= inicio,
+                Chamado.data_resolucao < fim,
+                Chamado.status.in_(STATUS_FINAIS),
+                Chamado.cancelado == False,
+            )
+            .order_by(Chamado.id)
+            .limit(lote)
+            .all()
+        )
+        if not chamados:
+            return
+
+        historicos = {c.id: [] for c in chamados}
+        for h in db.query(HistoricoChamado).filter(HistoricoChamado.chamado_id.in_(list(historicos))):
+            historicos[h.chamado_id].append(h)
+
+        yield [(c, historicos[c.id]) for c in chamados]
+
+        ultimo_id = chamados[-1].id
+        for c in chamados:
+            for h in historicos[c.id]:
+                db.expunge(h)
+            db.expunge(c)
+
+
+def _agregar(db: Session, ano: int, mes: int, lote: int) -> RelatorioSLAResponse:
+    """Os números do mês, lidos do banco agora, sem os nomes de categoria."""
+    configs = configs_de_sla(db)
+    inicio, fim = intervalo_do_mes(ano, mes)
+    agora = agora_brasilia()
+
+    geral = Acumulador()
+    por_prioridade: Dict[str, Acumulador] = {}
+    por_categoria: Dict[Optional[int], Acumulador] = {}
+    sem_sla = 0
+
+    for pares in _lotes(db, inicio, fim, lote):
+        for chamado, historicos in pares:
+            bloco = calcular_sla(chamado, historicos, configs.get(chamado.prioridade), agora)
+            if bloco is None:
+                sem_sla += 1
+                continue
+            geral.somar(bloco)
+            por_prioridade.setdefault(chamado.prioridade, Acumulador()).somar(bloco)
+            por_categoria.setdefault(chamado.categoria_id, Acumulador()).somar(bloco)
+
+    return RelatorioSLAResponse(
+        ano=ano,
+        mes=mes,
+        mes_fechado=mes_fechado(ano, mes, agora),
+        gerado_em=agora.replace(tzinfo=None),
+        geral=IndicadoresSLA(**geral.indicadores()),
+        por_prioridade=[
+            IndicadoresPorPrioridade(prioridade=prioridade, **acumulador.indicadores())
+            for prioridade, acumulador in sorted(por_prioridade.items())
+        ],
+        por_categoria=[
+            IndicadoresPorCategoria(categoria_id=categoria_id, **acumulador.indicadores())
+            for categoria_id, acumulador in sorted(por_categoria.items(), key=lambda item: item[0] or 0)
+        ],
+        sem_sla=sem_sla,
+    )
+
+
+def _com_nomes(db: Session, agregado: RelatorioSLAResponse) -> RelatorioSLAResponse:
+    """
+    Cópia do relatório com os nomes de categoria vigentes. Não mexe no
+    original, que pode estar no cache.
+    """
+    nomes = {c.id: c.nome for c in categorias(db)}
+    return agregado.model_copy(update={
+        "por_categoria": [
+            grupo.model_copy(update={"categoria_nome": nomes.get(grupo.categoria_id)})
+            for grupo in agregado.por_categoria
+        ],
+    })
+
+
+def calcular(db: Session, ano: int, mes: int, lote: int = LOTE) -> RelatorioSLAResponse:
+    """O relatório do mês, lido do banco agora. Sem cache; ver `relatorio_do_mes`."""
+    return _com_nomes(db, _agregar(db, ano, mes, lote))
+
+
+class CacheDeRelatorios:
+    """
+    Números de meses fechados, por (ano, mês, prazos), sem os nomes de
+    categoria. Thread-safe, como os outros caches de processo.
+
+    Sem teto nem prazo de validade: é uma entrada por mês consultado, e o
+    conteúdo não envelhece. Duas requisições simultâneas pelo mesmo mês
+    calculam as duas; a segunda só regrava o mesmo valor.
+    """
+
+    def __init__(self):
+        self._relatorios: Dict[tuple, RelatorioSLAResponse] = {}
+        self._lock = threading.Lock()
+
+    def buscar(self, chave: tuple) -> Optional[RelatorioSLAResponse]:
+        with self._lock:
+            return self._relatorios.get(chave)
+
+    def guardar(self, chave: tuple, relatorio: RelatorioSLAResponse) -> None:
+        with self._lock:
+            self._relatorios[chave] = relatorio
+
+    def reset(self) -> None:
+        """Descarta tudo. Existe para os testes."""
+        with self._lock:
+            self._relatorios.clear()
+
+
+cache_de_relatorios = CacheDeRelatorios()
+
+
+def _assinatura_dos_prazos(db: Session) -> tuple:
+    return tuple(sorted(
+        (c.prioridade, c.minutos_resposta, c.minutos_resolucao) for c in configs_de_sla(db).values()
+    ))
+
+
+def relatorio_do_mes(db: Session, ano: int, mes: int) -> RelatorioSLAResponse:
+    """O relatório do mês, do cache quando o mês já fechou."""
+    if not mes_fechado(ano, mes):
+        return calcular(db, ano, mes)
+
+    chave = (ano, mes, _assinatura_dos_prazos(db))
+    agregado = cache_de_relatorios.buscar(chave)
+    if agregado is None:
+        agregado = _agregar(db, ano, mes, LOTE)
+        cache_de_relatorios.guardar(chave, agregado)
+    return _com_nomes(db, agregado)
@@ -0,0 +1,188 @@
+"""
+Contadores do painel: chamados por status, prioridade e técnico.
+
+O painel do frontend contava baixando listas — `GET /chamados/` de 500 em
+500, somando no navegador. Aqui os totais ficam prontos em `resumo_chamados`,
+uma linha por combinação de (cancelado, arquivado, status, prioridade,
+técnico), e a leitura do painel é uma consulta numa tabela de poucas dezenas
+de linhas, com qualquer volume de chamados.
+
+Quem mantém os totais são as rotas de escrita de chamado, na mesma transação
+da mudança: `variacoes` diz, pelo histórico dos atributos, de que combinação
+o chamado saiu e em qual entrou, e `aplicar` soma -1 e +1 com um upsert por
+linha. Mudança que não mexe na chave (título, solução, avaliação) não escreve
+nada. Se a escrita for desfeita, a soma é desfeita junto.
+
+O upsert trava a linha do contador até o commit. Duas aberturas simultâneas
+esperam uma pela outra na linha de "Aberto, Média, sem técnico" — o mesmo que
+já acontece na linha do ano em `protocolo_contadores`, então não é espera
+nova. As linhas são tocadas sempre na mesma ordem (a da chave), para duas
+escritas cruzadas não se travarem mutuamente.
+
+Chamado alterado por SQL direto, fora da API, não passa por aqui. Para isso
+existe `reconciliar` (`python -m app.comandos.reconciliar_resumo`), que conta
+de novo a partir de `chamados` e diz onde os totais tinham se desviado.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, inspect, text
+from sqlalchemy.orm import Session
+
+from app.core.database import insert_do_dialeto
+from app.models.chamado import Chamado
+from app.models.resumo_de_chamados import ResumoDeChamados
+
+# Chave primária não aceita NULL; estes são os valores gravados no lugar.
+SEM_TECNICO = 0
+SEM_VALOR = ""
+
+# Atributos do chamado que formam a chave, na ordem das colunas.
+CAMPOS_DA_CHAVE = ("cancelado", "arquivado", "status", "prioridade", "tecnico_responsavel_id")
+
+Chave = Tuple[bool, bool, str, str, int]
+
+
+@dataclass(frozen=True)
+class Divergencia:
+    """Uma combinação em que o total gravado não batia com a contagem."""
+    chave: Chave
+    gravado: int
+    contado: int
+
+
+def _chave(cancelado, arquivado, status, prioridade, tecnico_id) -> Chave:
+    return (
+        bool(cancelado),
+        bool(arquivado),
+        status if status is not None else SEM_VALOR,
+        prioridade if prioridade is not None else SEM_VALOR,
+        tecnico_id if tecnico_id is not None else SEM_TECNICO,
+    )
+
+
+def _chave_do_chamado(chamado: Chamado) -> Chave:
+    return _chave(*(getattr(chamado, campo) for campo in CAMPOS_DA_CHAVE))
+
+
+def variacoes(chamado: Chamado) -> Dict[Chave, int]:
+    """
+    O que a escrita em andamento muda nos contadores: {chave: +1 ou -1}.
+
+    Chamar ANTES do flush, como `busca_service.documento_se_mudou`: o valor
+    de antes vem do histórico dos atributos, que o flush apaga. Chamado novo
+    entra com +1; chamado cuja chave não mudou devolve vazio.
+    """
+    estado = inspect(chamado)
+    nova = _chave_do_chamado(chamado)
+    if estado.pending or estado.transient:
+        return {nova: 1}
+
+    valores_anteriores = []
+    for campo in CAMPOS_DA_CHAVE:
+        historico = estado.attrs[campo].history
+        if historico.deleted:
+            valores_anteriores.append(historico.deleted[0])
+        else:
+            valores_anteriores.append(getattr(chamado, campo))
+    anterior = _chave(*valores_anteriores)
+
+    if anterior == nova:
+        return {}
+    return {anterior: -1, nova: 1}
+
+
+def variacoes_da_exclusao(chamado: Chamado) -> Dict[Chave, int]:
+    """A saída de um chamado excluído em definitivo."""
+    return {_chave_do_chamado(chamado): -1}
+
+
+def aplicar(db: Session, deltas: Dict[Chave, int]) -> None:
+    """
+    Soma as variações nos contadores, um upsert por linha. Não comita.
+
+    Combinação que ainda não tem linha nasce com a própria variação. Um -1
+    numa linha inexistente só acontece com os totais já desviados (chamado
+    gravado por fora da API); a linha fica negativa até a reconciliação, em
+    vez de a escrita do usuário falhar por isso.
+    """
+    for chave in sorted(deltas):
+        delta = deltas[chave]
+        if delta == 0:
+            continue
+        comando = insert_do_dialeto(db, ResumoDeChamados).values(
+            **dict(zip(CAMPOS_DA_CHAVE, chave)), total=delta
+        )
+        db.execute(comando.on_conflict_do_update(
+            index_elements=list(ResumoDeChamados.__table__.primary_key.columns),
+            set_={"total": ResumoDeChamados.total + delta},
+        ))
+
+
+def ler(db: Session, incluir_cancelados: bool = False, incluir_arquivados: bool = False) -> List[ResumoDeChamados]:
+    """As linhas com total, filtradas como a listagem filtra por padrão."""
+    consulta = db.query(ResumoDeChamados).filter(ResumoDeChamados.total != 0)
+    if not incluir_cancelados:
+        consulta = consulta.filter(ResumoDeChamados.cancelado == False)
+    if not incluir_arquivados:
+        consulta = consulta.filter(ResumoDeChamados.arquivado == False)
+    return consulta.all()
+
+
+def _contagem_real(db: Session) -> Dict[Chave, int]:
+    colunas = [
+        Chamado.cancelado,
+        Chamado.arquivado,
+        func.coalesce(Chamado.status, SEM_VALOR),
+        func.coalesce(Chamado.prioridade, SEM_VALOR),
+        func.coalesce(Chamado.tecnico_responsavel_id, SEM_TECNICO),
+    ]
+    linhas = db.query(*colunas, func.count()).group_by(*colunas).all()
+    return {_chave(*linha[:-1]): linha[-1] for linha in linhas}
+
+
+def reconciliar(db: Session, corrigir: bool = True) -> List[Divergencia]:
+    """
+    Conta de novo a partir de `chamados` e devolve onde os totais divergiam.
+
+    Com `corrigir`, regrava as linhas divergentes com a contagem. Não comita:
+    quem chama fecha a transação.
+
+    No Postgres a tabela de resumo é travada antes da contagem. Escrita que já
+    somou o seu delta termina antes (o LOCK espera o commit dela) e entra na
+    contagem; escrita que chega depois espera o LOCK e soma sobre a contagem
+    nova. Sem isso, um delta poderia ser contado duas vezes ou nenhuma. A
+    trava dura o tempo de um GROUP BY em `chamados`; a API só espera nas
+    escritas de chamado, as leituras seguem.
+    """
+    if corrigir and db.get_bind().dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE resumo_chamados IN EXCLUSIVE MODE"))
+
+    gravado = {
+        _chave(*(getattr(linha, campo) for campo in CAMPOS_DA_CHAVE)): linha.total
+        for linha in db.query(ResumoDeChamados).all()
+    }
+    contado = _contagem_real(db)
+
+    divergencias = [
+        Divergencia(chave=chave, gravado=gravado.get(chave, 0), contado=contado.get(chave, 0))
+        for chave in sorted(set(gravado) | set(contado))
+        if gravado.get(chave, 0) != contado.get(chave, 0)
+    ]
+
+    if corrigir:
+        for divergencia in divergencias:
+            comando = insert_do_dialeto(db, ResumoDeChamados).values(
+                **dict(zip(CAMPOS_DA_CHAVE, divergencia.chave)), total=divergencia.contado
+            )
+            db.execute(comando.on_conflict_do_update(
+                index_elements=list(ResumoDeChamados.__table__.primary_key.columns),
+                set_={"total": comando.excluded.total},
+            ))
+    return divergencias
+
+
+def tecnico_da_chave(tecnico_id: int) -> Optional[int]:
+    """O id de técnico gravado na chave, com o `SEM_TECNICO` de volta a None."""
+    return None if tecnico_id == SEM_TECNICO else tecnico_id
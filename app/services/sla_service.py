@@ -8,10 +8,15 @@ Regras de SLA.
 - Sem config para a prioridade, sem `data_abertura`, ou chamado cancelado: o
   chamado não tem SLA aplicável e `calcular_sla` devolve `None` (em vez de
   fingir "No prazo" para algo que não está sendo medido).
+- A listagem lê o snapshot gravado no chamado (`sla_do_snapshot`); o cálculo
+  a partir do histórico (`calcular_sla`) fica para chamado sem snapshot.
 """
 from datetime import datetime
 from typing import List, Optional
 
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
 from app.models.chamado import Chamado
 from app.models.historico import HistoricoChamado
 from app.models.sla_config import SLAConfig
@@ -133,6 +138,29 @@ def calcular_sla(
         abertura, config.minutos_resolucao + minutos_pausados
     )
 
+    # --- Relógio de resposta --------------------------------------------------
+    fim_resposta = _fim_da_resposta(historicos) or fim_resolucao
+    prazo_resposta = somar_minutos_uteis(abertura, config.minutos_resposta)
+
+    return _montar_bloco(
+        config,
+        consumido_resolucao=consumido_resolucao,
+        minutos_pausados=minutos_pausados,
+        prazo_resolucao=prazo_resolucao,
+        consumido_resposta=contar_minutos_uteis(abertura, fim_resposta),
+        prazo_resposta=prazo_resposta,
+    )
+
+
+def _montar_bloco(
+    config: SLAConfig,
+    consumido_resolucao: int,
+    minutos_pausados: int,
+    prazo_resolucao: datetime,
+    consumido_resposta: int,
+    prazo_resposta: datetime,
+) -> dict:
+    """Percentual e situação a partir dos minutos consumidos — comum aos dois caminhos."""
     percentual = round(consumido_resolucao / config.minutos_resolucao * 100)
 
     if consumido_resolucao > config.minutos_resolucao:
@@ -142,11 +170,6 @@ def calcular_sla(
     else:
         situacao = "No prazo"
 
-    # --- Relógio de resposta --------------------------------------------------
-    fim_resposta = _fim_da_resposta(historicos) or fim_resolucao
-    consumido_resposta = contar_minutos_uteis(abertura, fim_resposta)
-    prazo_resposta = somar_minutos_uteis(abertura, config.minutos_resposta)
-
     return {
         "prazo_resposta": prazo_resposta,
         "prazo_resolucao": prazo_resolucao,
@@ -157,3 +180,276 @@ def calcular_sla(
         "situacao": situacao,
         "resposta_cumprida": consumido_resposta <= config.minutos_resposta,
     }
+
+
+# ---------------------------------------------------------------------------
+# Snapshot persistido em `chamados`
+# ---------------------------------------------------------------------------
+#
+# `calcular_sla` refaz tudo a partir do histórico, e a listagem pagava isso por
+# chamado a cada requisição: até 500 chamados, todos os históricos deles. Só
+# que quase nada do resultado depende de "agora" — os prazos e o tempo pausado
+# mudam apenas quando o status muda ou quando a config da prioridade muda.
+# Essa parte estável fica gravada no chamado, e a leitura só aplica o relógio:
+#
+#     sla_prazo_resposta      somar(abertura, minutos_resposta)
+#     sla_prazo_resolucao     somar(abertura, minutos_resolucao + pausas FECHADAS)
+#     sla_minutos_pausados    soma das pausas já encerradas
+#     sla_relogio_parado_em   início da pausa aberta ("Aguardando") ou fim do
+#                             relógio (Resolvido/Fechado); NULL = correndo
+#     sla_respondido_em       primeira saída de "Aberto"
+#     sla_atencao_em          quando o relógio chega a PERCENTUAL_ATENCAO
+#     sla_estouro_em          quando o relógio passa do prazo de resolução
+#
+# A regra é a mesma de `calcular_sla`, transição a transição — inclusive o
+# truncamento por período de pausa —, e tests/test_sla_snapshot.py compara os
+# dois caminhos. Chamado sem snapshot (`sla_calculado_em` NULL, anterior a
+# esta versão) continua passando por `calcular_sla` até ser recalculado.
+
+STATUS_INICIAL = "Aberto"
+
+
+def limiar_de_atencao(minutos_resolucao: int) -> int:
+    """
+    Menor consumo, em minutos, que `_montar_bloco` já classifica como
+    "Atenção". Calculado com a MESMA expressão de lá (inclusive o `round`
+    bancário do Python), em vez de `ceil(0,8 × prazo)`: as duas contas
+    discordam em prazos que não são múltiplos de 5, e o filtro por situação
+    devolveria chamados que a própria resposta diz estarem "No prazo".
+    """
+    def atingiu(m: int) -> bool:
+        return round(m / minutos_resolucao * 100) >= PERCENTUAL_ATENCAO
+
+    m = max((minutos_resolucao * (PERCENTUAL_ATENCAO * 10 - 5)) // 1000, 0)
+    while m > 0 and atingiu(m - 1):
+        m -= 1
+    while not atingiu(m):
+        m += 1
+    return m
+
+
+def atualizar_prazos(chamado: Chamado, config: Optional[SLAConfig]) -> None:
+    """Recalcula os prazos gravados do chamado com a config vigente."""
+    if config is None or chamado.data_abertura is None:
+        chamado.sla_prazo_resposta = None
+        chamado.sla_prazo_resolucao = None
+        chamado.sla_atencao_em = None
+        chamado.sla_estouro_em = None
+        return
+
+    abertura = chamado.data_abertura
+    pausados = chamado.sla_minutos_pausados or 0
+    chamado.sla_prazo_resposta = somar_minutos_uteis(abertura, config.minutos_resposta)
+    chamado.sla_prazo_resolucao = somar_minutos_uteis(abertura, config.minutos_resolucao + pausados)
+
+    if config.minutos_resolucao <= 0:
+        chamado.sla_atencao_em = None
+        chamado.sla_estouro_em = None
+        return
+
+    # O relógio cruza cada limiar no primeiro instante em que o consumido o
+    # alcança — é exatamente o que `somar_minutos_uteis` devolve. "Estourado"
+    # é consumido > prazo, daí o + 1.
+    chamado.sla_atencao_em = somar_minutos_uteis(
+        abertura, limiar_de_atencao(config.minutos_resolucao) + pausados
+    )
+    chamado.sla_estouro_em = somar_minutos_uteis(abertura, config.minutos_resolucao + 1 + pausados)
+
+
+def avancar_snapshot(
+    chamado: Chamado,
+    config: Optional[SLAConfig],
+    anterior: Optional[str],
+    novo: str,
+    instante: datetime,
+) -> None:
+    """
+    Aplica uma transição de status ao snapshot do chamado.
+
+    `anterior` None é a abertura: zera o snapshot. `instante` tem de ser o
+    `created_at` do histórico da transição — é ele que `calcular_sla` usa, e
+    qualquer diferença entre os dois viraria minuto de divergência.
+    """
+    if anterior is None:
+        chamado.sla_minutos_pausados = 0
+        chamado.sla_relogio_parado_em = None
+        chamado.sla_respondido_em = None
+    else:
+        parado_em = chamado.sla_relogio_parado_em
+        # Sair de "Aguardando" fecha a pausa. Aguardando -> Aguardando não é
+        # transição: a pausa continua sendo a mesma, contada de uma vez só.
+        if anterior == STATUS_PAUSA and novo != STATUS_PAUSA:
+            if parado_em is not None:
+                chamado.sla_minutos_pausados = (chamado.sla_minutos_pausados or 0) + contar_minutos_uteis(
+                    parado_em, instante
+                )
+            chamado.sla_relogio_parado_em = None
+        # Reabertura: o relógio volta a correr, e o tempo em que o chamado
+        # ficou resolvido conta (é o que `calcular_sla` faz).
+        elif anterior in STATUS_FINAIS and novo not in STATUS_FINAIS:
+            chamado.sla_relogio_parado_em = None
+
+        if anterior == STATUS_INICIAL and novo != STATUS_INICIAL and chamado.sla_respondido_em is None:
+            chamado.sla_respondido_em = instante
+
+    if novo == STATUS_PAUSA and anterior != STATUS_PAUSA:
+        chamado.sla_relogio_parado_em = instante
+    elif novo in STATUS_FINAIS:
+        # Vale a ÚLTIMA resolução, como em `_fim_da_resolucao`.
+        chamado.sla_relogio_parado_em = instante
+
+    atualizar_prazos(chamado, config)
+    chamado.sla_calculado_em = instante
+
+
+def reconstruir_snapshot(
+    chamado: Chamado,
+    historicos: List[HistoricoChamado],
+    config: Optional[SLAConfig],
+    agora: Optional[datetime] = None,
+) -> None:
+    """
+    Monta o snapshot do zero, repassando o histórico transição a transição.
+
+    Para chamado anterior ao snapshot: usado pelo recálculo em lote e pela
+    primeira transição de status que um chamado desses recebe.
+    """
+    chamado.sla_minutos_pausados = 0
+    chamado.sla_relogio_parado_em = None
+    chamado.sla_respondido_em = None
+
+    # Todo chamado nasce "Aberto"; começar daqui faz um histórico legado sem a
+    # linha de abertura ainda registrar a resposta na primeira transição.
+    ultimo = STATUS_INICIAL
+    for h in sorted((h for h in historicos if h.status_novo), key=lambda h: h.created_at):
+        avancar_snapshot(chamado, config, ultimo, h.status_novo, h.created_at)
+        ultimo = h.status_novo
+
+    # Legado resolvido sem a transição no histórico: o mesmo fallback de
+    # `_fim_da_resolucao`, só que congelado aqui, em vez de acompanhar o
+    # `data_atualizacao` a cada escrita.
+    if chamado.status in STATUS_FINAIS and chamado.sla_relogio_parado_em is None:
+        chamado.sla_relogio_parado_em = _fim_da_resolucao(chamado, [])
+
+    atualizar_prazos(chamado, config)
+    chamado.sla_calculado_em = agora or agora_brasilia()
+
+
+def sla_do_snapshot(
+    chamado: Chamado,
+    config: Optional[SLAConfig],
+    agora: Optional[datetime] = None,
+) -> Optional[dict]:
+    """
+    O mesmo bloco de `calcular_sla`, lido do snapshot: só o relógio é
+    aplicado aqui, sem histórico. Mesmos casos de `None`.
+    """
+    if config is None or chamado.data_abertura is None:
+        return None
+
+    if chamado.cancelado:
+        return None
+
+    if config.minutos_resolucao <= 0:
+        return None
+
+    agora = agora or agora_brasilia()
+    abertura = chamado.data_abertura
+    parado_em = chamado.sla_relogio_parado_em
+    minutos_pausados = chamado.sla_minutos_pausados or 0
+    prazo_resolucao = chamado.sla_prazo_resolucao
+
+    if chamado.status in STATUS_FINAIS:
+        fim_resolucao = parado_em or agora
+    else:
+        fim_resolucao = agora
+        if chamado.status == STATUS_PAUSA and parado_em is not None:
+            # Pausa em curso: ela cresce com o relógio, e o prazo junto.
+            minutos_pausados += contar_minutos_uteis(parado_em, agora)
+            prazo_resolucao = None
+
+    if prazo_resolucao is None:
+        prazo_resolucao = somar_minutos_uteis(abertura, config.minutos_resolucao + minutos_pausados)
+    prazo_resposta = chamado.sla_prazo_resposta or somar_minutos_uteis(abertura, config.minutos_resposta)
+
+    return _montar_bloco(
+        config,
+        consumido_resolucao=max(contar_minutos_uteis(abertura, fim_resolucao) - minutos_pausados, 0),
+        minutos_pausados=minutos_pausados,
+        prazo_resolucao=prazo_resolucao,
+        consumido_resposta=contar_minutos_uteis(abertura, chamado.sla_respondido_em or fim_resolucao),
+        prazo_resposta=prazo_resposta,
+    )
+
+
+def filtro_de_situacao(situacao: str, agora: datetime):
+    """
+    Condição SQL equivalente à `situacao` que `sla_do_snapshot` calcularia em
+    `agora` (naive-Brasília), para filtrar a listagem no banco.
+
+    O relógio efetivo é `COALESCE(sla_relogio_parado_em, agora)`: parado na
+    resolução ou no início da pausa, corrente nos demais. Escrito como OR de
+    dois ramos, e não com o COALESCE, porque o COALESCE esconde as colunas do
+    índice: cada ramo casa com um índice parcial de schema_chamados.sql (o de
+    relógio correndo, por `sla_estouro_em`/`sla_atencao_em`; o de relógio
+    parado, pela comparação entre as duas colunas).
+
+    Chamado sem snapshot, sem config ou cancelado não tem situação e não entra
+    em nenhum dos três filtros — as colunas são NULL e a comparação é falsa.
+
+    Limite conhecido: com pausa em curso, `calcular_sla` trunca a pausa e o
+    intervalo total separadamente, e o consumido oscila um minuto enquanto a
+    janela em que a pausa começou não fecha. Na fronteira exata de uma
+    situação, o filtro pode discordar da resposta por esse minuto.
+    """
+    parado = Chamado.sla_relogio_parado_em
+    correndo = parado.is_(None)
+    parou = parado.isnot(None)
+
+    if situacao == "Estourado":
+        condicao = or_(
+            and_(correndo, Chamado.sla_estouro_em <= agora),
+            and_(parou, parado >= Chamado.sla_estouro_em),
+        )
+    elif situacao == "Atenção":
+        condicao = or_(
+            and_(correndo, Chamado.sla_atencao_em <= agora, Chamado.sla_estouro_em > agora),
+            and_(parou, parado >= Chamado.sla_atencao_em, parado < Chamado.sla_estouro_em),
+        )
+    elif situacao == "No prazo":
+        condicao = or_(
+            and_(correndo, Chamado.sla_atencao_em > agora),
+            and_(parou, parado < Chamado.sla_atencao_em),
+        )
+    else:
+        raise ValueError(f"situação de SLA desconhecida: {situacao!r}")
+
+    return and_(Chamado.cancelado == False, condicao)
+
+
+def recalcular_prazos_da_prioridade(db: Session, config: SLAConfig, lote: int = 500) -> int:
+    """
+    Regrava os prazos de todos os chamados da prioridade depois de a config
+    mudar. Percorre em lotes por id para não carregar a tabela inteira de uma
+    vez; não faz commit — o chamador decide a transação.
+    """
+    total, ultimo_id = 0, 0
+    while True:
+        chamados = (
+            db.query(Chamado)
+            .filter(
+                Chamado.prioridade == config.prioridade,
+                Chamado.sla_calculado_em.isnot(None),
+                Chamado.id > ultimo_id,
+            )
+            .order_by(Chamado.id)
+            .limit(lote)
+            .all()
+        )
+        if not chamados:
+            return total
+        for chamado in chamados:
+            atualizar_prazos(chamado, config)
+        db.flush()
+        total += len(chamados)
+        ultimo_id = chamados[-1].id
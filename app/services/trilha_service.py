@@ -13,10 +13,12 @@ Nenhuma função daqui escreve. As gravações ficam em `evento_conta_service` e
 vocabulário de `acao`.
 """
 
+import heapq
 from datetime import date, datetime, time, timedelta
-from typing import Optional
+from itertools import islice
+from typing import Optional, Sequence
 
-from sqlalchemy import nulls_last
+from sqlalchemy import and_, nulls_last, or_
 from sqlalchemy.orm import Session, aliased
 
 from app.models.evento_conta import EventoDeConta
@@ -116,8 +118,45 @@ def _ordem(item: dict):
 
     `created_at` pode ser nulo em linha inserida por SQL direto; ela vai para o
     fim em vez de derrubar a comparação.
+
+    Empate de `created_at` e de id entre as duas tabelas (evento de conta 7 e
+    evento de setor 7 no mesmo instante) cai em `alvo_tipo`. É o que faz a
+    tripla ser chave da trilha inteira, e portanto servir de cursor.
     """
-    return (item["created_at"] is not None, item["created_at"] or datetime.min, item["id"])
+    return (
+        item["created_at"] is not None,
+        item["created_at"] or datetime.min,
+        item["id"],
+        item["alvo_tipo"],
+    )
+
+
+def chave_do_cursor(item: dict) -> tuple:
+    """A tripla `(created_at, id, alvo_tipo)` da linha, como vai no cursor."""
+    return (item["created_at"], item["id"], item["alvo_tipo"])
+
+
+def _depois_do_cursor(coluna_data, coluna_id, alvo_tipo: str, apos: Sequence):
+    """
+    Condição de "vem depois de `apos`" na ordem de `_ordem`, para uma tabela.
+
+    Dentro de uma tabela `alvo_tipo` é constante, então o último desempate
+    vira só a escolha entre `<` e `<=` no id: a linha de mesmo instante e
+    mesmo id da OUTRA tabela vem depois do cursor se o tipo dela for menor.
+
+    Com `created_at` nulo no cursor, a página anterior já terminou nas
+    linhas sem data, que são as últimas; as seguintes são só as nulas
+    restantes.
+    """
+    criado, ultimo_id, ultimo_alvo = apos
+    mesmo_instante = coluna_id <= ultimo_id if alvo_tipo < ultimo_alvo else coluna_id < ultimo_id
+    if criado is None:
+        return and_(coluna_data.is_(None), mesmo_instante)
+    return or_(
+        coluna_data < criado,
+        and_(coluna_data == criado, mesmo_instante),
+        coluna_data.is_(None),
+    )
 
 
 def eventos_de_conta(
@@ -128,8 +167,14 @@ def eventos_de_conta(
     de: Optional[date] = None,
     ate: Optional[date] = None,
     limite: int = 100,
+    apos: Optional[Sequence] = None,
 ) -> list:
-    """Eventos de cadastro de usuário, do mais recente para o mais antigo."""
+    """
+    Eventos de cadastro de usuário, do mais recente para o mais antigo.
+
+    `apos` é a chave de cursor (ver `chave_do_cursor`): só entram as linhas
+    que vêm depois dela.
+    """
     Alvo = aliased(Usuario)
     Ator = aliased(Usuario)
 
@@ -147,6 +192,10 @@ def eventos_de_conta(
     if ator_id is not None:
         consulta = consulta.filter(EventoDeConta.ator_id == ator_id)
     consulta = _aplicar_periodo(consulta, EventoDeConta.created_at, de, ate)
+    if apos is not None:
+        consulta = consulta.filter(
+            _depois_do_cursor(EventoDeConta.created_at, EventoDeConta.id, ALVO_USUARIO, apos)
+        )
 
     linhas = (
         consulta.order_by(
@@ -174,8 +223,9 @@ def eventos_de_setor(
     de: Optional[date] = None,
     ate: Optional[date] = None,
     limite: int = 100,
+    apos: Optional[Sequence] = None,
 ) -> list:
-    """Eventos de cadastro de setor, do mais recente para o mais antigo."""
+    """Eventos de cadastro de setor, do mais recente para o mais antigo. `apos` como no de contas."""
     Ator = aliased(Usuario)
 
     consulta = db.query(EventoDeSetor, Ator.nome).outerjoin(
@@ -187,6 +237,10 @@ def eventos_de_setor(
     if ator_id is not None:
         consulta = consulta.filter(EventoDeSetor.ator_id == ator_id)
     consulta = _aplicar_periodo(consulta, EventoDeSetor.created_at, de, ate)
+    if apos is not None:
+        consulta = consulta.filter(
+            _depois_do_cursor(EventoDeSetor.created_at, EventoDeSetor.id, ALVO_SETOR, apos)
+        )
 
     linhas = (
         # Mesmo nulls_last do irmão de contas, pelo mesmo motivo.
@@ -208,6 +262,7 @@ def consultar(
     ate: Optional[date] = None,
     skip: int = 0,
     limit: int = 100,
+    apos: Optional[Sequence] = None,
 ) -> list:
     """
     Trilha completa, das duas tabelas, ordenada da mais recente para a mais
@@ -217,22 +272,30 @@ def consultar(
     colunas compatíveis — que é exatamente o que elas não são, e por um motivo
     que vale mais do que a conveniência da consulta.
 
-    Cada tabela entrega `skip + limit` linhas e a mescla corta o pedaço pedido.
-    Isso é suficiente e não aproxima: as `skip + limit` primeiras linhas da
-    união só podem sair das `skip + limit` primeiras de cada lado, então o
-    corte enxerga tudo que poderia entrar nele.
+    Com cursor (`apos`), cada tabela é lida só a partir da chave e entrega no
+    máximo `limit` linhas, em qualquer profundidade: a página 500 custa o
+    mesmo que a primeira. Por `skip`, cada tabela ainda entrega `skip + limit`
+    linhas — suficiente e exato, porque as `skip + limit` primeiras da união
+    só podem sair das `skip + limit` primeiras de cada lado, mas o custo cresce
+    com a página.
+
+    As duas listas já vêm ordenadas do banco, então a mescla é o `heapq.merge`,
+    preguiçoso: consome as duas pela frente e para na última linha da página,
+    sem ordenar a união inteira.
     """
     if alvo is not None and alvo not in ALVOS:
         raise ValueError(f"alvo deve ser um de {ALVOS}")
+    if apos is not None and apos[2] not in ALVOS:
+        raise ValueError(f"alvo do cursor deve ser um de {ALVOS}")
 
     # Teto do que cada lado precisa entregar para a mescla ser exata.
     profundidade = skip + limit
 
-    juntos = []
+    fontes = []
     if alvo in (None, ALVO_USUARIO):
-        juntos += eventos_de_conta(db, ator_id=ator_id, de=de, ate=ate, limite=profundidade)
+        fontes.append(eventos_de_conta(db, ator_id=ator_id, de=de, ate=ate, limite=profundidade, apos=apos))
     if alvo in (None, ALVO_SETOR):
-        juntos += eventos_de_setor(db, ator_id=ator_id, de=de, ate=ate, limite=profundidade)
+        fontes.append(eventos_de_setor(db, ator_id=ator_id, de=de, ate=ate, limite=profundidade, apos=apos))
 
-    juntos.sort(key=_ordem, reverse=True)
-    return juntos[skip : skip + limit]
+    mesclados = heapq.merge(*fontes, key=_ordem, reverse=True)
+    return list(islice(mesclados, skip, skip + limit))
@@ -1,38 +1,106 @@
+"""
+Notificação de técnico para o n8n, por saída transacional (outbox).
+
+A rota não faz o POST. Ela grava a notificação em `webhooks_pendentes` com
+`enfileirar_webhook_tecnico`, na mesma transação do chamado, e responde. Quem
+entrega é o `DespachanteDeWebhooks`, uma thread do próprio processo da API que
+lê a fila, faz o POST e apaga o que foi entregue.
+
+Antes, o POST acontecia dentro da requisição: com o n8n lento, abrir um
+chamado esperava até WEBHOOK_TIMEOUT_SEGUNDOS segurando uma conexão do pool;
+com o n8n fora do ar, a notificação se perdia. Agora a latência da rota não
+depende da do n8n, e falha de entrega vira nova tentativa, com espera
+crescente, até WEBHOOK_MAX_TENTATIVAS — depois disso a linha fica como
+`morto`, para inspeção e reenvio manual (ver a migration).
+
+A entrega é "pelo menos uma vez": se o processo cair entre o POST e a remoção
+da linha, a notificação sai de novo depois que a reserva expirar. Para o que
+ela anuncia (chamado criado, técnico atribuído), repetir é melhor que perder.
+"""
+
+import json
 import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Optional
 
 import requests
-from typing import Optional
 from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.models.usuario import Usuario
+from app.models.webhook_pendente import WebhookPendente
+from app.utils.timezone import agora_brasilia
 
 logger = logging.getLogger(__name__)
 
+# Espera antes da segunda tentativa; dobra a cada falha, até o teto. Com o
+# padrão de WEBHOOK_MAX_TENTATIVAS, o n8n tem cerca de uma hora para voltar
+# antes de a notificação ir para `morto`.
+ESPERA_INICIAL_SEGUNDOS = 30
+ESPERA_MAXIMA_SEGUNDOS = 3600
 
-def enviar_webhook_tecnico(
+# Linhas reservadas por passada. Pequeno de propósito: a reserva vale até o
+# fim das entregas do lote, e um lote grande com o n8n lento seguraria linhas
+# que outro processo poderia estar entregando.
+TAMANHO_DO_LOTE = 20
+
+
+def montar_payload(
     db: Session,
     protocolo: str,
     titulo: str,
     tecnico_id: Optional[int] = None,
-    acao: str = "criado"
-):
+    acao: str = "criado",
+    prazo: Optional[datetime] = None,
+) -> dict:
     """
-    Envia webhook para n8n com informações do técnico atribuído
-
-    A URL vem de WEBHOOK_TECNICO_URL. Se estiver vazia, o envio é ignorado —
-    é o padrão, para que desenvolvimento e testes não disparem notificação no
-    fluxo de produção por descuido.
-
-    Quando WEBHOOK_TECNICO_TOKEN está definida, o valor vai no header de
-    autenticação esperado pelo nó Webhook do n8n (Header Auth). Sem ela, o
-    header não é enviado — ver a nota em `config.py` sobre a ordem de subida.
+    Corpo do webhook com informações do técnico atribuído.
 
     Args:
         db: Sessão do banco de dados
         protocolo: Protocolo do chamado
         titulo: Título do chamado
         tecnico_id: ID do técnico responsável (None = Sem atribuição)
-        acao: Tipo de ação ("criado" ou "atribuido")
+        acao: Tipo de ação ("criado", "atribuido" ou um aviso de SLA:
+            "sla_resposta_vencida", "sla_atencao", "sla_estourado")
+        prazo: Nos avisos de SLA, o prazo que venceu. Só entra no corpo
+            quando informado: os fluxos de criação e atribuição não mudam.
+    """
+    # Buscar nome do técnico
+    nome_tecnico = "Sem atribuição"
+    if tecnico_id:
+        tecnico = db.query(Usuario).filter(Usuario.id == tecnico_id).first()
+        if tecnico:
+            nome_tecnico = tecnico.nome
+
+    payload = {
+        "protocolo": protocolo,
+        "titulo": titulo,
+        "tecnico": nome_tecnico,
+        "acao": acao
+    }
+    if prazo is not None:
+        payload["prazo"] = prazo.isoformat()
+    return payload
+
+
+def enfileirar_webhook_tecnico(
+    db: Session,
+    protocolo: str,
+    titulo: str,
+    tecnico_id: Optional[int] = None,
+    acao: str = "criado",
+    prazo: Optional[datetime] = None,
+) -> None:
+    """
+    Agenda a notificação ao n8n na transação da sessão. Não faz commit.
+
+    Chamar ANTES do commit da escrita do chamado: os dois entram juntos ou não
+    entram, e a notificação nunca anuncia um chamado que um rollback desfez.
+
+    A URL vem de WEBHOOK_TECNICO_URL. Se estiver vazia, nada é gravado — é o
+    padrão, para que desenvolvimento e testes não disparem notificação no
+    fluxo de produção por descuido, nem acumulem uma fila que ninguém drena.
     """
     if not settings.WEBHOOK_TECNICO_URL:
         logger.debug(
@@ -41,22 +109,30 @@ def enviar_webhook_tecnico(
         )
         return
 
-    try:
-        # Buscar nome do técnico
-        nome_tecnico = "Sem atribuição"
-        if tecnico_id:
-            tecnico = db.query(Usuario).filter(Usuario.id == tecnico_id).first()
-            if tecnico:
-                nome_tecnico = tecnico.nome
-
-        # Preparar payload
-        payload = {
-            "protocolo": protocolo,
-            "titulo": titulo,
-            "tecnico": nome_tecnico,
-            "acao": acao
-        }
+    payload = montar_payload(db, protocolo, titulo, tecnico_id=tecnico_id, acao=acao, prazo=prazo)
+    db.add(WebhookPendente(
+        payload=json.dumps(payload, ensure_ascii=False),
+        situacao="pendente",
+        tentativas=0,
+        proxima_tentativa_em=agora_brasilia().replace(tzinfo=None),
+    ))
+
+
+def entregar_webhook(payload: dict, http) -> Optional[str]:
+    """
+    Faz o POST de uma notificação. Devolve None se o n8n aceitou, ou o motivo
+    da falha, que vai para `ultimo_erro`. Nunca propaga exceção.
+
+    Quando WEBHOOK_TECNICO_TOKEN está definida, o valor vai no header de
+    autenticação esperado pelo nó Webhook do n8n (Header Auth). Sem ela, o
+    header não é enviado — ver a nota em `config.py` sobre a ordem de subida.
 
+    Args:
+        payload: Corpo montado por `montar_payload`
+        http: Quem faz o POST — a `requests.Session` do despachante
+    """
+    protocolo = payload.get("protocolo")
+    try:
         # Header de autenticação, quando configurado. Montado aqui e não em
         # nível de módulo para que uma troca do segredo valha na reinicialização
         # do container, sem depender da ordem de import.
@@ -64,8 +140,7 @@ def enviar_webhook_tecnico(
         if settings.WEBHOOK_TECNICO_TOKEN:
             headers[settings.WEBHOOK_TECNICO_HEADER] = settings.WEBHOOK_TECNICO_TOKEN
 
-        # Enviar webhook
-        response = requests.post(
+        response = http.post(
             settings.WEBHOOK_TECNICO_URL,
             json=payload,
             timeout=settings.WEBHOOK_TIMEOUT_SEGUNDOS,
@@ -74,9 +149,10 @@ def enviar_webhook_tecnico(
 
         # Log do resultado. Nem a URL nem o token são registrados: os dois
         # valem como credencial do fluxo no n8n.
-        if response.status_code == 200:
+        if 200 <= response.status_code < 300:
             logger.info("Webhook enviado com sucesso para o chamado %s", protocolo)
-        elif response.status_code in (401, 403):
+            return None
+        if response.status_code in (401, 403):
             # Caso típico de configuração torta: o n8n já exige Header Auth e o
             # backend ainda não tem o segredo (ou tem o segredo errado). Vale
             # uma mensagem própria porque o sintoma — chamado criado, técnico
@@ -93,9 +169,132 @@ def enviar_webhook_tecnico(
                 response.status_code,
                 protocolo,
             )
+        return f"status {response.status_code}"
 
     except requests.exceptions.Timeout:
         logger.warning("Timeout ao enviar webhook para o chamado %s", protocolo)
+        return "timeout"
     except Exception as e:
-        # Não quebrar a aplicação se o webhook falhar
-        logger.error("Erro ao enviar webhook para o chamado %s: %s", protocolo, e)
+        # Só o tipo vai para o banco: a mensagem de erro de conexão do
+        # requests traz a URL, que é credencial.
+        logger.error("Erro ao enviar webhook para o chamado %s: %s", protocolo, type(e).__name__)
+        return type(e).__name__
+
+
+def espera_ate_a_proxima(tentativas: int) -> timedelta:
+    """Espera depois da n-ésima falha: 30 s, 1 min, 2 min... até uma hora."""
+    segundos = ESPERA_INICIAL_SEGUNDOS * 2 ** (tentativas - 1)
+    return timedelta(seconds=min(segundos, ESPERA_MAXIMA_SEGUNDOS))
+
+
+def despachar_pendentes(fabrica_de_sessao: Callable[[], Session], http, lote: int = TAMANHO_DO_LOTE) -> int:
+    """
+    Uma passada pela fila: entrega o que venceu e devolve quantas linhas tentou.
+
+    Três etapas, e a do meio sem conexão do banco. Segurar a conexão enquanto
+    o n8n demora seria só mudar o gargalo de lugar — da requisição para o pool.
+
+    1. Reserva: lê as linhas vencidas e empurra `proxima_tentativa_em` para
+       depois do fim das entregas. No Postgres, `SKIP LOCKED` faz dois
+       processos da API pegarem lotes diferentes em vez de esperarem um pelo
+       outro; a reserva gravada cobre o intervalo entre o commit e o fim do
+       POST, em que a trava já foi solta.
+    2. Entrega, uma a uma.
+    3. Baixa: entregue é apagada; falha ganha nova data, ou vai para `morto`.
+    """
+    with fabrica_de_sessao() as db:
+        agora = agora_brasilia().replace(tzinfo=None)
+        consulta = (
+            db.query(WebhookPendente)
+            .filter(
+                WebhookPendente.situacao == "pendente",
+                WebhookPendente.proxima_tentativa_em <= agora,
+            )
+            .order_by(WebhookPendente.proxima_tentativa_em, WebhookPendente.id)
+            .limit(lote)
+        )
+        if db.get_bind().dialect.name == "postgresql":
+            consulta = consulta.with_for_update(skip_locked=True)
+        linhas = consulta.all()
+        if not linhas:
+            return 0
+
+        reserva = agora + timedelta(seconds=settings.WEBHOOK_TIMEOUT_SEGUNDOS * len(linhas) + 60)
+        reservadas = []
+        for linha in linhas:
+            linha.proxima_tentativa_em = reserva
+            reservadas.append((linha.id, linha.tentativas, json.loads(linha.payload)))
+        db.commit()
+
+    resultados = [(id_, tentativas, entregar_webhook(payload, http)) for id_, tentativas, payload in reservadas]
+
+    with fabrica_de_sessao() as db:
+        agora = agora_brasilia().replace(tzinfo=None)
+        for id_, tentativas, erro in resultados:
+            if erro is None:
+                db.query(WebhookPendente).filter(WebhookPendente.id == id_).delete()
+                continue
+
+            linha = db.get(WebhookPendente, id_)
+            if linha is None:
+                continue
+            linha.tentativas = tentativas + 1
+            linha.ultimo_erro = erro[:255]
+            if linha.tentativas >= settings.WEBHOOK_MAX_TENTATIVAS:
+                linha.situacao = "morto"
+                logger.error(
+                    "Webhook %s desistido depois de %s tentativas (%s)",
+                    id_, linha.tentativas, erro,
+                )
+            else:
+                linha.proxima_tentativa_em = agora + espera_ate_a_proxima(linha.tentativas)
+        db.commit()
+
+    return len(resultados)
+
+
+class DespachanteDeWebhooks:
+    """
+    Thread que drena `webhooks_pendentes` de tempos em tempos.
+
+    Uma `requests.Session` só, reaproveitada entre entregas: o n8n fica do
+    outro lado de um TLS, e abrir conexão nova a cada POST é pagar o handshake
+    toda vez. A sessão é usada apenas por esta thread.
+
+    Sobe e desce com a aplicação (ver `main.py`), e só quando há URL
+    configurada. Com vários processos da API, cada um tem a sua; a reserva
+    em `despachar_pendentes` impede que dois entreguem a mesma linha.
+    """
+
+    def __init__(self, fabrica_de_sessao: Callable[[], Session], intervalo_segundos: Optional[float] = None):
+        self._fabrica_de_sessao = fabrica_de_sessao
+        self.intervalo_segundos = (
+            settings.WEBHOOK_INTERVALO_SEGUNDOS if intervalo_segundos is None else intervalo_segundos
+        )
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._http = requests.Session()
+
+    def iniciar(self) -> None:
+        self._thread = threading.Thread(target=self._executar, name="despachante-webhooks", daemon=True)
+        self._thread.start()
+
+    def parar(self, timeout: Optional[float] = None) -> None:
+        """Termina a passada em curso e para. O que ficou na fila sai no próximo start."""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._http.close()
+
+    def _executar(self) -> None:
+        while not self._parar.is_set():
+            try:
+                tentadas = despachar_pendentes(self._fabrica_de_sessao, self._http)
+            except Exception:
+                # Banco fora do ar, por exemplo. A thread não pode morrer por
+                # isso: a fila continua lá e a próxima passada tenta de novo.
+                logger.exception("Falha ao despachar webhooks pendentes")
+                tentadas = 0
+            # Lote cheio: provavelmente há mais vencidas, e não há por que esperar.
+            if tentadas < TAMANHO_DO_LOTE:
+                self._parar.wait(self.intervalo_segundos)
@@ -1,15 +1,62 @@
-from fastapi import Depends, FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.limite_de_requisicoes import LimiteDeRequisicoes, baldes_por_ip, baldes_por_usuario
+from app.api.cursor import CABECALHO_PROXIMO_CURSOR
 from app.api.deps import get_current_user, require_admin
-from app.api.endpoints import auth, chamados, usuarios, comentarios, setores, categorias, historico, diagnostico, eventos, health, sla_configs, tarefas_recorrentes
+from app.core.pool_de_senhas import FilaDeSenhasCheia
+from app.core.security import pool_de_senhas
+from app.services.abertura_de_rotinas import AbridorDeRotinas
+from app.services.agendador_de_prazos import agendador_de_prazos
+from app.services.webhook_service import DespachanteDeWebhooks
+from app.api.endpoints import auth, chamados, usuarios, comentarios, setores, categorias, historico, diagnostico, eventos, health, relatorios, sla_configs, tarefas_recorrentes
 
 # Docs só em desenvolvimento. openapi_url precisa cair junto: sem isso,
 # /openapi.json continuaria servindo o mapa completo da API e o bloqueio
 # do /docs seria decorativo.
 _docs_habilitados = settings.is_development
 
+
+@asynccontextmanager
+async def ciclo_de_vida(app: FastAPI):
+    """
+    Sobe o despachante de webhooks e o agendador de avisos de SLA junto com a
+    aplicação, e os para na saída.
+
+    Sem WEBHOOK_TECNICO_URL nada é enfileirado, e não há o que despachar nem
+    por onde avisar — as threads nem sobem.
+
+    A abertura automática dos chamados de rotina depende só de
+    RECORRENCIA_SOLICITANTE_ID; sem webhook, os chamados abrem sem notificar.
+
+    Os processos do bcrypt nascem no primeiro uso de senha e são encerrados
+    na saída.
+    """
+    despachante = None
+    if settings.WEBHOOK_TECNICO_URL:
+        despachante = DespachanteDeWebhooks(SessionLocal)
+        despachante.iniciar()
+        agendador_de_prazos.iniciar(SessionLocal)
+    abridor = None
+    if settings.RECORRENCIA_SOLICITANTE_ID:
+        abridor = AbridorDeRotinas(SessionLocal, settings.RECORRENCIA_SOLICITANTE_ID)
+        abridor.iniciar()
+    try:
+        yield
+    finally:
+        pool_de_senhas.encerrar()
+        if abridor is not None:
+            abridor.parar(timeout=30)
+        if despachante is not None:
+            agendador_de_prazos.parar(timeout=5)
+            despachante.parar(timeout=settings.WEBHOOK_TIMEOUT_SEGUNDOS + 5)
+
+
 # Criar aplicação FastAPI
 app = FastAPI(
     title=settings.API_TITLE,
@@ -18,8 +65,15 @@ app = FastAPI(
     docs_url="/docs" if _docs_habilitados else None,
     redoc_url="/redoc" if _docs_habilitados else None,
     openapi_url="/openapi.json" if _docs_habilitados else None,
+    lifespan=ciclo_de_vida,
 )
 
+# Limite de requisições por usuário e por IP (ver app/core/limite_de_requisicoes.py).
+# Registrado ANTES do CORS, o que o põe por dentro dele: o último middleware
+# adicionado é o mais externo. Assim o 429 sai com os headers de CORS e o
+# frontend consegue ler o Retry-After.
+app.add_middleware(LimiteDeRequisicoes, por_usuario=baldes_por_usuario, por_ip=baldes_por_ip)
+
 # Configurar CORS
 app.add_middleware(
     CORSMiddleware,
@@ -27,9 +81,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Sem isso o navegador esconde o header do JavaScript do frontend, e a
+    # paginação por cursor só funcionaria fora do browser.
+    expose_headers=[CABECALHO_PROXIMO_CURSOR],
 )
 
 
+@app.exception_handler(FilaDeSenhasCheia)
+def _senhas_ocupadas(request: Request, exc: FilaDeSenhasCheia):
+    """
+    Teto de operações de bcrypt em curso atingido (ver app/core/pool_de_senhas.py).
+
+    503 e não 429: não é a pessoa que passou do limite, é o servidor que
+    está ocupado — e a tentativa não conta como falha de login.
+    """
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Servidor ocupado. Tente novamente em instantes."},
+        headers={"Retry-After": "1"},
+    )
+
+
 # Health check endpoint
 @app.get("/")
 def read_root():
@@ -116,6 +188,15 @@ app.include_router(
     dependencies=[Depends(require_admin)],
 )
 
+# Relatórios gerenciais (SLA do mês). Calculam sobre o histórico inteiro,
+# então ficam com o administrador, como o diagnóstico.
+app.include_router(
+    relatorios.router,
+    prefix="/api/v1/relatorios",
+    tags=["Relatórios"],
+    dependencies=[Depends(require_admin)],
+)
+
 # Saúde da API. Único router de /api/v1 sem autenticação: a faixa de status do
 # frontend aparece antes do login, e monitor externo não tem credencial. O que
 # ele devolve é um contrato fechado de três campos — ver a docstring do módulo.
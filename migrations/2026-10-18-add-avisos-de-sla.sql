@@ -0,0 +1,54 @@
+-- ============================================
+-- MIGRATION: avisos de prazo de SLA (avisos_de_sla)
+-- ============================================
+--
+-- Aplicar ANTES de subir a imagem: com WEBHOOK_TECNICO_URL configurada, o
+-- agendador de avisos grava nesta tabela assim que um prazo vence.
+--
+-- --------------------------------------------
+-- O QUE É
+-- --------------------------------------------
+--
+-- A API passa a avisar o n8n quando um prazo de SLA vence, sem esperar
+-- alguém abrir a fila: resposta vencida com o chamado ainda "Aberto", 80% do
+-- prazo de resolução (atenção) e prazo de resolução estourado. Os instantes
+-- são os do snapshot de SLA, já gravados em `chamados`.
+--
+-- Cada processo da API mantém os próximos prazos em memória e dorme até o
+-- primeiro; esta tabela guarda os avisos já enviados, um por chamado e
+-- tipo. Com mais de um processo, é a chave primária que decide quem envia.
+--
+-- Não há backfill. Na primeira subida, os prazos que JÁ venceram em
+-- chamados abertos são avisados de uma vez — exceto "atenção" de chamado
+-- que já estourou. Se isso for ruído demais, marque-os como avisados antes
+-- de subir a imagem:
+--
+--   INSERT INTO avisos_de_sla (chamado_id, tipo, prazo)
+--   SELECT id, 'estouro', sla_estouro_em FROM chamados
+--    WHERE sla_relogio_parado_em IS NULL AND cancelado = FALSE
+--      AND sla_estouro_em <= NOW()
+--   ON CONFLICT DO NOTHING;
+--
+-- (o mesmo para 'atencao' com sla_atencao_em e para 'resposta' com
+-- sla_prazo_resposta e sla_respondido_em IS NULL).
+--
+-- --------------------------------------------
+-- NO N8N
+-- --------------------------------------------
+--
+-- O webhook é o mesmo de sempre, com três valores novos em `acao` —
+-- "sla_resposta_vencida", "sla_atencao" e "sla_estourado" — e o campo
+-- `prazo` (ISO 8601, horário de Brasília) com o instante que venceu. Fluxo
+-- que só conhece "criado" e "atribuido" precisa de um ramo para eles, ou ao
+-- menos ignorá-los.
+
+CREATE TABLE IF NOT EXISTS avisos_de_sla (
+    chamado_id INTEGER REFERENCES chamados(id) ON DELETE CASCADE,
+    tipo       VARCHAR(20),
+    prazo      TIMESTAMP NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (chamado_id, tipo)
+);
+
+COMMENT ON TABLE avisos_de_sla IS 'Avisos de prazo de SLA (resposta, atenção, estouro) já enviados ao n8n, um por chamado e tipo';
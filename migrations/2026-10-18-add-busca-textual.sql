@@ -0,0 +1,73 @@
+-- ============================================
+-- MIGRATION: busca textual de chamados
+-- ============================================
+--
+-- Aplicar ANTES de subir a imagem: a API grava em `chamados_busca` a cada
+-- escrita de chamado ou de comentário. Sem a tabela, abrir chamado cai.
+--
+-- Precisa de permissão para criar extensão (unaccent e pg_trgm vêm com o
+-- contrib do Postgres, presente na imagem oficial). Sem ela, peça ao DBA as
+-- duas linhas de CREATE EXTENSION e rode o resto normalmente.
+--
+-- --------------------------------------------
+-- O QUE É
+-- --------------------------------------------
+--
+-- `GET /chamados/busca?q=...` procura em título, descrição, solução e
+-- comentários. O texto fica num tsvector por chamado, com a configuração
+-- `pt_sem_acento` (português, sem acento e sem flexão); protocolo e título
+-- ganham índices de trigramas para a busca por prefixo ("CHAM-2026-04").
+--
+-- A API mantém o documento do chamado que ela altera. O preenchimento dos
+-- chamados que já existem é o INSERT do fim deste arquivo, que pode levar
+-- alguns segundos numa base grande — a tabela não fica travada, mas rode
+-- fora do horário de pico.
+--
+-- --------------------------------------------
+-- MUDANÇA POR SQL DIRETO
+-- --------------------------------------------
+--
+-- Texto alterado fora da API não chega ao índice. Para refazer o documento
+-- de um chamado, rode o INSERT do fim com `WHERE c.id = <id>` e troque o
+-- `DO NOTHING` por `DO UPDATE SET vetor = EXCLUDED.vetor`.
+
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'pt_sem_acento') THEN
+        CREATE TEXT SEARCH CONFIGURATION pt_sem_acento (COPY = portuguese);
+        ALTER TEXT SEARCH CONFIGURATION pt_sem_acento
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+    END IF;
+END
+$$;
+
+CREATE TABLE IF NOT EXISTS chamados_busca (
+    chamado_id    INTEGER PRIMARY KEY REFERENCES chamados(id) ON DELETE CASCADE,
+    vetor         TSVECTOR,
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_chamados_busca_vetor ON chamados_busca USING gin (vetor);
+CREATE INDEX IF NOT EXISTS idx_chamados_protocolo_trgm ON chamados USING gin (protocolo gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_chamados_titulo_trgm ON chamados USING gin (titulo gin_trgm_ops);
+
+COMMENT ON TABLE chamados_busca IS 'Documento de busca textual (tsvector) de cada chamado, com comentários';
+
+-- Chamados que já existem. Mesmos pesos que a API usa.
+INSERT INTO chamados_busca (chamado_id, vetor, atualizado_em)
+SELECT
+    c.id,
+    setweight(to_tsvector('pt_sem_acento', coalesce(c.titulo, '')), 'A')
+    || setweight(to_tsvector('pt_sem_acento', coalesce(c.descricao, '')), 'B')
+    || setweight(to_tsvector('pt_sem_acento', coalesce(c.solucao, '')), 'B')
+    || setweight(to_tsvector('pt_sem_acento', coalesce((
+        SELECT string_agg(cc.comentario, E'\n' ORDER BY cc.id)
+        FROM comentarios_chamados cc
+        WHERE cc.chamado_id = c.id
+    ), '')), 'C'),
+    CURRENT_TIMESTAMP
+FROM chamados c
+ON CONFLICT (chamado_id) DO NOTHING;
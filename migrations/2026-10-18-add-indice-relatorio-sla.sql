@@ -0,0 +1,16 @@
+-- ============================================
+-- MIGRATION: índice do relatório mensal de SLA
+-- ============================================
+--
+-- Recomendada, não obrigatória: a imagem funciona sem ela.
+--
+-- `GET /relatorios/sla?ano=&mes=` lê os chamados encerrados no mês, por
+-- `data_resolucao`. Sem o índice, cada mês ainda não calculado pelo processo
+-- varre `chamados` inteira; com ele, lê só o mês. Mês fechado é calculado uma
+-- vez por processo e fica em memória, então o custo aparece no primeiro
+-- pedido de cada mês depois de cada deploy.
+--
+-- Numa base grande, prefira CREATE INDEX CONCURRENTLY (fora de transação)
+-- para não travar escrita em `chamados` durante a criação.
+
+CREATE INDEX IF NOT EXISTS idx_chamados_data_resolucao ON chamados(data_resolucao);
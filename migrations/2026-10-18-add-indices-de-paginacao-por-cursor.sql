@@ -0,0 +1,32 @@
+-- ============================================
+-- MIGRATION: índices da paginação por cursor
+-- ============================================
+--
+-- Só índices; nada de coluna nova. A imagem sobe com ou sem esta migration —
+-- sem ela a paginação por cursor funciona, só não fica plana.
+--
+-- --------------------------------------------
+-- O QUE É
+-- --------------------------------------------
+--
+-- As listagens de chamados, comentários e histórico aceitam `cursor` (devolvido
+-- no header X-Next-Cursor) além de `skip`. Com `skip`, a página N obriga o
+-- banco a ler e descartar as N-1 anteriores; com o cursor, a página começa por
+-- `WHERE chave < último visto`, e o custo da página 1000 é o da página 1 — desde
+-- que exista índice na chave.
+--
+-- chamados: a chave é o id (PK) ou (sla_prazo_resolucao, id), que já tem
+--   idx_chamados_sla_prazo_resolucao. Nada a criar.
+-- historico_chamados: (created_at, id) dentro do chamado.
+-- comentarios_chamados: id dentro do chamado.
+--
+-- Os índices antigos só por chamado_id ficam: são prefixo dos novos e podem
+-- ser removidos depois, com calma, se o plano confirmar que não são mais usados.
+--
+-- Em tabela grande, prefira rodar cada CREATE INDEX com CONCURRENTLY, fora de
+-- transação (no DBeaver, em modo auto-commit).
+
+CREATE INDEX IF NOT EXISTS idx_historico_chamado_cursor
+    ON historico_chamados(chamado_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_comentarios_chamado_cursor
+    ON comentarios_chamados(chamado_id, id);
@@ -0,0 +1,55 @@
+-- ============================================
+-- MIGRATION: tentativas de login compartilhadas (marcas_de_tentativa)
+-- ============================================
+--
+-- Só é exigida com LOGIN_LIMITE_ARMAZENAMENTO=banco. Com o padrão (memoria)
+-- a tabela fica vazia e nada a lê. Aplicar ANTES de trocar a variável: com
+-- "banco" e sem a tabela, todo login cai com 500.
+--
+-- --------------------------------------------
+-- O QUE É
+-- --------------------------------------------
+--
+-- O limitador de força bruta do login (10 falhas por usuário, 50 por IP, em
+-- 15 minutos) contava em memória, por processo. Com N workers do uvicorn,
+-- cada um contava por si e o limite efetivo virava N vezes o configurado; e
+-- todo restart zerava a contagem. Por isso a API roda com um processo só.
+--
+-- Com "banco", cada falha vira uma linha aqui e todos os processos contam
+-- juntos. A verificação antes de cada login é um SELECT pelo índice; cada
+-- falha apaga as marcas que já saíram da janela e grava a nova.
+--
+-- UNLOGGED porque o conteúdo é descartável: se o Postgres cair sem desligar
+-- direito, a tabela volta vazia e quem estava bloqueado ganha o orçamento de
+-- volta. Em troca, senha errada não gera WAL nem vai para as réplicas.
+--
+-- --------------------------------------------
+-- SUBIR COM MAIS DE UM WORKER
+-- --------------------------------------------
+--
+-- 1. Aplicar esta migration.
+-- 2. LOGIN_LIMITE_ARMAZENAMENTO=banco no Easypanel, reiniciar o container.
+-- 3. Só então acrescentar --workers ao comando do uvicorn.
+--
+-- --------------------------------------------
+-- OPERAÇÃO
+-- --------------------------------------------
+--
+-- A chave é o SHA-256 do nome em minúsculas (ou do IP), não o texto. Para
+-- desbloquear alguém antes de a janela passar:
+--
+--   DELETE FROM marcas_de_tentativa
+--    WHERE escopo = 'login_usuario'
+--      AND chave = encode(sha256(convert_to('fulano.silva', 'UTF8')), 'hex');
+
+CREATE UNLOGGED TABLE IF NOT EXISTS marcas_de_tentativa (
+    id       BIGSERIAL PRIMARY KEY,
+    escopo   VARCHAR(40) NOT NULL,
+    chave    VARCHAR(64) NOT NULL,
+    instante DOUBLE PRECISION NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_marcas_de_tentativa_chave ON marcas_de_tentativa(escopo, chave, instante);
+CREATE INDEX IF NOT EXISTS idx_marcas_de_tentativa_instante ON marcas_de_tentativa(escopo, instante);
+
+COMMENT ON TABLE marcas_de_tentativa IS 'Tentativas de login falhas na janela do limitador, compartilhadas entre os processos da API';
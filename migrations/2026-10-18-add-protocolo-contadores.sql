@@ -0,0 +1,51 @@
+-- ============================================
+-- MIGRATION: contador de protocolo por ano
+-- ============================================
+--
+-- Aplicar ANTES de subir a imagem: `gerar_protocolo` passa a depender da
+-- tabela, e sem ela a abertura de chamado cai.
+--
+-- --------------------------------------------
+-- O QUE É
+-- --------------------------------------------
+--
+-- O número do protocolo (CHAM-2026-0042) era "o último do ano + 1", lido de
+-- `chamados` com `LIKE 'CHAM-2026-%'`. Duas aberturas ao mesmo tempo liam o
+-- mesmo último, geravam o mesmo número, e a segunda caía na UNIQUE de
+-- `protocolo` — 500 para quem estava abrindo o chamado.
+--
+-- Agora cada ano tem uma linha com o último número entregue, e a API incrementa
+-- com um só comando:
+--
+--   INSERT INTO protocolo_contadores (ano, ultimo) VALUES (2026, 1)
+--   ON CONFLICT (ano) DO UPDATE SET ultimo = protocolo_contadores.ultimo + 1
+--   RETURNING ultimo;
+--
+-- A linha fica travada até o commit da abertura; a concorrente espera, em vez
+-- de repetir o número. Virada de ano: a primeira abertura cria a linha nova.
+--
+-- --------------------------------------------
+-- CARGA INICIAL
+-- --------------------------------------------
+--
+-- O INSERT abaixo semeia o contador com o MAIOR número já usado em cada ano.
+-- É idempotente (GREATEST): rodar de novo nunca volta o contador.
+--
+-- Chamado aberto pela imagem ANTIGA entre esta migration e a troca de imagem
+-- não atualiza o contador. Para fechar essa janela, rode o INSERT de novo
+-- logo depois que a imagem nova subir.
+
+CREATE TABLE IF NOT EXISTS protocolo_contadores (
+    ano    INTEGER PRIMARY KEY,
+    ultimo INTEGER NOT NULL
+);
+
+INSERT INTO protocolo_contadores (ano, ultimo)
+SELECT split_part(protocolo, '-', 2)::int, max(split_part(protocolo, '-', 3)::int)
+FROM chamados
+WHERE protocolo ~ '^CHAM-[0-9]{4}-[0-9]+$'
+GROUP BY 1
+ON CONFLICT (ano) DO UPDATE
+    SET ultimo = GREATEST(protocolo_contadores.ultimo, EXCLUDED.ultimo);
+
+COMMENT ON TABLE protocolo_contadores IS 'Último número de protocolo entregue em cada ano';
@@ -0,0 +1,58 @@
+-- ============================================
+-- MIGRATION: contadores do painel (resumo_chamados)
+-- ============================================
+--
+-- Aplicar ANTES de subir a imagem: toda escrita de chamado soma na tabela
+-- nova. Sem ela, abrir, editar, cancelar e arquivar chamado caem.
+--
+-- --------------------------------------------
+-- O QUE É
+-- --------------------------------------------
+--
+-- `GET /chamados/resumo` devolve os totais do painel (por status, prioridade
+-- e técnico) lendo esta tabela, em vez de o frontend baixar a listagem e
+-- contar. Uma linha por combinação de cancelado, arquivado, status,
+-- prioridade e técnico; a API soma -1 na combinação de antes e +1 na de
+-- depois a cada escrita, na mesma transação.
+--
+-- Chave primária não aceita NULL: chamado sem técnico conta em
+-- tecnico_responsavel_id = 0, e status ou prioridade nulos em ''.
+--
+-- --------------------------------------------
+-- DEPOIS DO DEPLOY
+-- --------------------------------------------
+--
+-- O INSERT do fim semeia a tabela com a contagem atual. O que a imagem
+-- antiga gravar entre esta migration e a troca não entra nos totais; logo
+-- que a imagem nova subir, rode dentro do container:
+--
+--   python -m app.comandos.reconciliar_resumo
+--
+-- O mesmo comando vale depois de qualquer mudança em `chamados` por SQL
+-- direto. Com `--verificar` ele só relata (código de saída 1 se houver
+-- divergência), para um cron de alarme.
+
+CREATE TABLE IF NOT EXISTS resumo_chamados (
+    cancelado              BOOLEAN NOT NULL,
+    arquivado              BOOLEAN NOT NULL,
+    status                 VARCHAR(50) NOT NULL,
+    prioridade             VARCHAR(20) NOT NULL,
+    tecnico_responsavel_id INTEGER NOT NULL,
+    total                  INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (cancelado, arquivado, status, prioridade, tecnico_responsavel_id)
+);
+
+COMMENT ON TABLE resumo_chamados IS 'Total de chamados por cancelado, arquivado, status, prioridade e técnico (painel)';
+
+INSERT INTO resumo_chamados (cancelado, arquivado, status, prioridade, tecnico_responsavel_id, total)
+SELECT
+    cancelado,
+    arquivado,
+    COALESCE(status, ''),
+    COALESCE(prioridade, ''),
+    COALESCE(tecnico_responsavel_id, 0),
+    COUNT(*)
+FROM chamados
+GROUP BY 1, 2, 3, 4, 5
+ON CONFLICT (cancelado, arquivado, status, prioridade, tecnico_responsavel_id)
+DO UPDATE SET total = EXCLUDED.total;
@@ -0,0 +1,57 @@
+-- ============================================
+-- MIGRATION: fila de chamados por situação de SLA
+-- ============================================
+--
+-- Depende de 2026-10-18-add-sla-snapshot.sql (mesmas colunas `sla_*`). Aplicar
+-- as duas, nesta ordem, ANTES de subir a imagem: o model declara as colunas
+-- novas e a listagem de chamados cai sem elas.
+--
+-- `ADD COLUMN` nullable, sem default: só catálogo, sem reescrever a tabela.
+--
+-- --------------------------------------------
+-- O QUE É
+-- --------------------------------------------
+--
+-- `GET /chamados?sla_situacao=Estourado` e `?ordenar=prazo_resolucao`. Até
+-- aqui a situação só existia depois de calculada em Python, na página já
+-- carregada: pedir "todos os estourados" exigia baixar a tabela inteira.
+--
+-- O snapshot passa a guardar os dois instantes em que o relógio corrente cruza
+-- as fronteiras — `sla_atencao_em` ("Atenção") e `sla_estouro_em`
+-- ("Estourado") —, e a situação vira comparação de datas com o relógio
+-- efetivo: o instante em que o relógio parou (pausa, resolução) ou agora.
+--
+-- Os índices parciais seguem os dois ramos da consulta. Relógio correndo:
+-- índice pela fronteira. Relógio parado: a situação não muda mais com o tempo,
+-- e o predicado do próprio índice é a comparação entre colunas — o índice só
+-- contém os chamados que satisfazem o filtro.
+--
+-- CONCURRENTLY não vai aqui porque não roda dentro de transação e o DBeaver
+-- abre uma por padrão. Com as colunas recém-criadas e ainda NULL, o CREATE
+-- INDEX comum é instantâneo; o lock é irrelevante.
+--
+-- --------------------------------------------
+-- DEPOIS DE APLICAR
+-- --------------------------------------------
+--
+-- Os dois instantes são preenchidos pelo recálculo do snapshot. Se o
+-- recálculo da migration anterior já tiver rodado, rode de novo com --todos:
+--
+--   python -m app.comandos.recalcular_sla --todos
+--
+-- Chamado sem os instantes não aparece no filtro por situação e vai para o fim
+-- na ordenação por prazo.
+
+ALTER TABLE chamados ADD COLUMN IF NOT EXISTS sla_atencao_em TIMESTAMP;
+ALTER TABLE chamados ADD COLUMN IF NOT EXISTS sla_estouro_em TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS idx_chamados_sla_estouro ON chamados(sla_estouro_em)
+    WHERE sla_relogio_parado_em IS NULL AND cancelado = FALSE;
+CREATE INDEX IF NOT EXISTS idx_chamados_sla_atencao ON chamados(sla_atencao_em)
+    WHERE sla_relogio_parado_em IS NULL AND cancelado = FALSE;
+CREATE INDEX IF NOT EXISTS idx_chamados_sla_estourado_parado ON chamados(id)
+    WHERE sla_relogio_parado_em >= sla_estouro_em AND cancelado = FALSE;
+CREATE INDEX IF NOT EXISTS idx_chamados_sla_atencao_parado ON chamados(id)
+    WHERE sla_relogio_parado_em >= sla_atencao_em AND sla_relogio_parado_em < sla_estouro_em
+      AND cancelado = FALSE;
+CREATE INDEX IF NOT EXISTS idx_chamados_sla_prazo_resolucao ON chamados(sla_prazo_resolucao, id);
@@ -0,0 +1,55 @@
+-- ============================================
+-- MIGRATION: snapshot de SLA em `chamados`
+-- ============================================
+--
+-- Aplicar ANTES de subir o código desta entrega. O model passa a declarar as
+-- seis colunas abaixo, e todo SELECT de chamado as lista — com o banco antigo,
+-- a listagem inteira cai com "column does not exist".
+--
+-- É `ADD COLUMN` nullable, sem default: no PostgreSQL isso só mexe no
+-- catálogo, não reescreve a tabela e não segura lock além do instante do
+-- ALTER. Rodar com o deploy atrasado é seguro: colunas que ninguém lê não
+-- mudam a API no ar. Rollback da imagem depois, idem — a versão anterior
+-- simplesmente ignora as colunas.
+--
+-- --------------------------------------------
+-- O QUE É
+-- --------------------------------------------
+--
+-- A listagem de chamados calculava o SLA de cada chamado a partir do
+-- histórico, a cada requisição: até 500 chamados e todos os históricos deles
+-- por página. A parte estável desse cálculo (prazos, tempo já pausado, estado
+-- do relógio) passa a ficar gravada no próprio chamado, atualizada quando o
+-- status muda ou quando a config da prioridade muda. A leitura só aplica o
+-- relógio.
+--
+--   sla_calculado_em       quando o snapshot foi gravado; NULL = nunca
+--   sla_prazo_resposta     prazo de resposta
+--   sla_prazo_resolucao    prazo de resolução, com as pausas já encerradas
+--   sla_minutos_pausados   minutos úteis em "Aguardando", pausas encerradas
+--   sla_relogio_parado_em  início da pausa em curso, ou fim do relógio num
+--                          chamado Resolvido/Fechado; NULL = correndo
+--   sla_respondido_em      primeira saída de "Aberto"
+--
+-- --------------------------------------------
+-- DEPOIS DE APLICAR
+-- --------------------------------------------
+--
+-- Chamados existentes ficam com sla_calculado_em NULL e continuam sendo
+-- calculados pelo histórico — o mesmo resultado de antes, com o custo de
+-- antes. Para passá-los ao snapshot, depois do deploy, dentro do container:
+--
+--   python -m app.comandos.recalcular_sla
+--
+-- Idempotente, em lotes com commit por lote, seguro com a API no ar.
+--
+-- Conferência (deve tender a zero depois do comando):
+--
+--   SELECT count(*) FROM chamados WHERE sla_calculado_em IS NULL;
+
+ALTER TABLE chamados ADD COLUMN IF NOT EXISTS sla_calculado_em TIMESTAMP;
+ALTER TABLE chamados ADD COLUMN IF NOT EXISTS sla_prazo_resposta TIMESTAMP;
+ALTER TABLE chamados ADD COLUMN IF NOT EXISTS sla_prazo_resolucao TIMESTAMP;
+ALTER TABLE chamados ADD COLUMN IF NOT EXISTS sla_minutos_pausados INTEGER;
+ALTER TABLE chamados ADD COLUMN IF NOT EXISTS sla_relogio_parado_em TIMESTAMP;
+ALTER TABLE chamados ADD COLUMN IF NOT EXISTS sla_respondido_em TIMESTAMP;
@@ -0,0 +1,37 @@
+-- ============================================
+-- MIGRATION: versão das tabelas de referência
+-- ============================================
+--
+-- Aplicar ANTES de subir a imagem: a API lê esta tabela para decidir se o
+-- cache de prazos de SLA, categorias, setores e perfis ainda vale. Sem ela,
+-- listagem de chamados, login e os formulários caem.
+--
+-- --------------------------------------------
+-- O QUE É
+-- --------------------------------------------
+--
+-- Cada processo da API guarda essas quatro tabelas em memória. Toda escrita
+-- numa delas pela API sobe o número da tabela aqui, na mesma transação; os
+-- processos conferem os números a cada CACHE_REFERENCIA_VERIFICACAO_SEGUNDOS
+-- e releem só a tabela que mudou.
+--
+-- Tabela sem linha aqui conta como versão 0. A primeira escrita cria a linha.
+--
+-- --------------------------------------------
+-- MUDANÇA POR SQL DIRETO
+-- --------------------------------------------
+--
+-- A API não vê UPDATE feito fora dela. Junto com ele, suba a versão — é o
+-- único caminho para `roles`, que não tem rota de escrita:
+--
+--   INSERT INTO versoes_de_referencia (tabela, versao) VALUES ('roles', 1)
+--   ON CONFLICT (tabela) DO UPDATE SET versao = versoes_de_referencia.versao + 1;
+--
+-- (ou reinicie o container).
+
+CREATE TABLE IF NOT EXISTS versoes_de_referencia (
+    tabela VARCHAR(40) PRIMARY KEY,
+    versao INTEGER NOT NULL
+);
+
+COMMENT ON TABLE versoes_de_referencia IS 'Versão de cada tabela de referência, para invalidar o cache dos processos da API';
@@ -0,0 +1,51 @@
+-- ============================================
+-- MIGRATION: saída de webhooks (outbox)
+-- ============================================
+--
+-- Aplicar ANTES de subir a imagem: abrir chamado e atribuir técnico passam a
+-- gravar nesta tabela, e sem ela as duas rotas caem.
+--
+-- --------------------------------------------
+-- O QUE É
+-- --------------------------------------------
+--
+-- O aviso ao n8n ("chamado criado", "técnico atribuído") era um POST síncrono
+-- dentro da requisição. Com o n8n lento, a abertura do chamado esperava até
+-- WEBHOOK_TIMEOUT_SEGUNDOS segurando uma conexão do pool; com o n8n fora, o
+-- aviso se perdia.
+--
+-- Agora a rota grava a notificação aqui, na mesma transação do chamado, e um
+-- despachante em segundo plano, dentro do próprio container da API, faz o POST.
+-- Falhou, tenta de novo com espera crescente; esgotadas as tentativas
+-- (WEBHOOK_MAX_TENTATIVAS), a linha fica com situacao = 'morto'.
+--
+-- --------------------------------------------
+-- OPERAÇÃO
+-- --------------------------------------------
+--
+-- Fila parada ou crescendo:
+--
+--   SELECT situacao, count(*), min(created_at) FROM webhooks_pendentes GROUP BY 1;
+--
+-- Reenviar as mortas depois de corrigir o n8n (URL, token):
+--
+--   UPDATE webhooks_pendentes
+--      SET situacao = 'pendente', tentativas = 0, proxima_tentativa_em = now()
+--    WHERE situacao = 'morto';
+
+CREATE TABLE IF NOT EXISTS webhooks_pendentes (
+    id                   SERIAL PRIMARY KEY,
+    payload              TEXT NOT NULL,
+    situacao             VARCHAR(10) NOT NULL DEFAULT 'pendente',
+    tentativas           INTEGER NOT NULL DEFAULT 0,
+    proxima_tentativa_em TIMESTAMP NOT NULL,
+    ultimo_erro          VARCHAR(255),
+    created_at           TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT chk_webhook_situacao CHECK (situacao IN ('pendente', 'morto'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_webhooks_pendentes_fila ON webhooks_pendentes(proxima_tentativa_em)
+    WHERE situacao = 'pendente';
+
+COMMENT ON TABLE webhooks_pendentes IS 'Notificações ao n8n a entregar (outbox); entregues são apagadas';
@@ -30,6 +30,23 @@
 --
 -- Tudo aqui é idempotente: rodar duas vezes não estraga nada.
 
+-- Extensões da busca textual (ver `chamados_busca`): unaccent para a busca
+-- ignorar acento, pg_trgm para os índices de prefixo de protocolo e título.
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Português sem acento: "manutencao" acha "manutenção". A API consulta por
+-- este nome (app/services/busca_service.py).
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'pt_sem_acento') THEN
+        CREATE TEXT SEARCH CONFIGURATION pt_sem_acento (COPY = portuguese);
+        ALTER TEXT SEARCH CONFIGURATION pt_sem_acento
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+    END IF;
+END
+$$;
+
 -- Tabela de Setores
 CREATE TABLE IF NOT EXISTS setores (
     id SERIAL PRIMARY KEY,
@@ -112,6 +129,17 @@ CREATE TABLE IF NOT EXISTS chamados (
     cancelado BOOLEAN NOT NULL DEFAULT FALSE,
     arquivado BOOLEAN NOT NULL DEFAULT FALSE,
 
+    -- Snapshot do SLA (ver app/services/sla_service.py). NULL em
+    -- sla_calculado_em = ainda não calculado; a API cai no cálculo pelo histórico.
+    sla_calculado_em TIMESTAMP,
+    sla_prazo_resposta TIMESTAMP,
+    sla_prazo_resolucao TIMESTAMP,
+    sla_minutos_pausados INTEGER,
+    sla_relogio_parado_em TIMESTAMP, -- início da pausa ou fim do relógio; NULL = correndo
+    sla_respondido_em TIMESTAMP,
+    sla_atencao_em TIMESTAMP,  -- quando o relógio corrente chega a "Atenção"
+    sla_estouro_em TIMESTAMP,  -- quando passa do prazo de resolução
+
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 
@@ -219,6 +247,96 @@ CREATE TABLE IF NOT EXISTS sla_configs (
     minutos_resolucao INTEGER NOT NULL
 );
 
+-- Último número de protocolo (CHAM-AAAA-NNNN) entregue em cada ano.
+--
+-- Incrementado por upsert com RETURNING em gerar_protocolo; a linha do ano fica
+-- travada até o commit da abertura, e duas aberturas simultâneas não repetem o
+-- número.
+CREATE TABLE IF NOT EXISTS protocolo_contadores (
+    ano    INTEGER PRIMARY KEY,
+    ultimo INTEGER NOT NULL
+);
+
+-- Versão das tabelas de referência (sla_configs, categorias, setores, roles).
+--
+-- Toda escrita numa delas sobe a versão na mesma transação; cada processo da
+-- API guarda a tabela em memória e só a relê quando a versão muda. Mudou uma
+-- dessas tabelas por SQL direto? Suba a versão também:
+--   INSERT INTO versoes_de_referencia (tabela, versao) VALUES ('roles', 1)
+--   ON CONFLICT (tabela) DO UPDATE SET versao = versoes_de_referencia.versao + 1;
+CREATE TABLE IF NOT EXISTS versoes_de_referencia (
+    tabela VARCHAR(40) PRIMARY KEY,
+    versao INTEGER NOT NULL
+);
+
+-- Documento de busca textual de cada chamado: título (peso A), descrição e
+-- solução (B) e comentários (C) num tsvector. Mantido pela API a cada escrita
+-- que muda esses textos, e não por trigger, porque junta duas tabelas.
+CREATE TABLE IF NOT EXISTS chamados_busca (
+    chamado_id    INTEGER PRIMARY KEY REFERENCES chamados(id) ON DELETE CASCADE,
+    vetor         TSVECTOR,
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Contadores do painel: quantos chamados há em cada combinação de situação.
+-- Mantidos pela API na mesma transação de cada escrita de chamado; conferir
+-- e corrigir com `python -m app.comandos.reconciliar_resumo`. Chave primária
+-- não aceita NULL: sem técnico é 0, status/prioridade nulos são ''.
+CREATE TABLE IF NOT EXISTS resumo_chamados (
+    cancelado              BOOLEAN NOT NULL,
+    arquivado              BOOLEAN NOT NULL,
+    status                 VARCHAR(50) NOT NULL,
+    prioridade             VARCHAR(20) NOT NULL,
+    tecnico_responsavel_id INTEGER NOT NULL,
+    total                  INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (cancelado, arquivado, status, prioridade, tecnico_responsavel_id)
+);
+
+-- Saída de webhooks (outbox) para o n8n.
+--
+-- A rota grava a notificação na mesma transação do chamado; um despachante em
+-- segundo plano faz o POST, com novas tentativas e espera crescente. Entregue,
+-- a linha é apagada; esgotadas as tentativas, fica como 'morto'.
+CREATE TABLE IF NOT EXISTS webhooks_pendentes (
+    id                   SERIAL PRIMARY KEY,
+    payload              TEXT NOT NULL,
+    situacao             VARCHAR(10) NOT NULL DEFAULT 'pendente',
+    tentativas           INTEGER NOT NULL DEFAULT 0,
+    proxima_tentativa_em TIMESTAMP NOT NULL,
+    ultimo_erro          VARCHAR(255),
+    created_at           TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT chk_webhook_situacao CHECK (situacao IN ('pendente', 'morto'))
+);
+
+-- Avisos de prazo de SLA já enviados ao n8n (ver app/services/agendador_de_prazos.py).
+--
+-- Um por chamado e tipo (resposta, atencao, estouro). A chave é o que impede
+-- dois processos da API — ou o mesmo, depois de reiniciar — de avisar duas
+-- vezes o mesmo prazo.
+CREATE TABLE IF NOT EXISTS avisos_de_sla (
+    chamado_id INTEGER REFERENCES chamados(id) ON DELETE CASCADE,
+    tipo       VARCHAR(20),
+    prazo      TIMESTAMP NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (chamado_id, tipo)
+);
+
+-- Tentativas de login falhas, quando LOGIN_LIMITE_ARMAZENAMENTO=banco (ver
+-- app/core/rate_limit.py). Uma linha por tentativa, apagada quando sai da
+-- janela; a chave é o SHA-256 do nome de usuário ou do IP.
+--
+-- UNLOGGED: fora do WAL e esvaziada se o banco cair sem desligar direito. O
+-- pior caso é o orçamento de tentativas voltar ao início, o que não justifica
+-- gravar em log cada senha errada. Também não vai para as réplicas.
+CREATE UNLOGGED TABLE IF NOT EXISTS marcas_de_tentativa (
+    id       BIGSERIAL PRIMARY KEY,
+    escopo   VARCHAR(40) NOT NULL,              -- login_usuario | login_ip
+    chave    VARCHAR(64) NOT NULL,
+    instante DOUBLE PRECISION NOT NULL          -- segundos desde a época (UTC)
+);
+
 -- Tarefas recorrentes (rotinas). NÃO são chamados.
 --
 -- Cada tarefa tem um padrão de recorrência (diária/semanal/mensal) e a data da
@@ -268,10 +386,27 @@ CREATE INDEX IF NOT EXISTS idx_chamados_tecnico ON chamados(tecnico_responsavel_
 CREATE INDEX IF NOT EXISTS idx_chamados_status ON chamados(status);
 CREATE INDEX IF NOT EXISTS idx_chamados_prioridade ON chamados(prioridade);
 CREATE INDEX IF NOT EXISTS idx_chamados_data_abertura ON chamados(data_abertura);
+-- Relatório de SLA do mês (GET /relatorios/sla): chamados encerrados no mês.
+CREATE INDEX IF NOT EXISTS idx_chamados_data_resolucao ON chamados(data_resolucao);
 CREATE INDEX IF NOT EXISTS idx_chamados_categoria ON chamados(categoria_id);
 CREATE INDEX IF NOT EXISTS idx_chamados_cancelado ON chamados(cancelado);
 CREATE INDEX IF NOT EXISTS idx_chamados_arquivado ON chamados(arquivado);
+-- Fila por situação de SLA (ver filtro_de_situacao em app/services/sla_service.py).
+-- Os dois primeiros atendem o relógio correndo; o terceiro e o quarto, o relógio
+-- parado (pausa ou resolução), onde a situação é comparação entre colunas.
+CREATE INDEX IF NOT EXISTS idx_chamados_sla_estouro ON chamados(sla_estouro_em)
+    WHERE sla_relogio_parado_em IS NULL AND cancelado = FALSE;
+CREATE INDEX IF NOT EXISTS idx_chamados_sla_atencao ON chamados(sla_atencao_em)
+    WHERE sla_relogio_parado_em IS NULL AND cancelado = FALSE;
+CREATE INDEX IF NOT EXISTS idx_chamados_sla_estourado_parado ON chamados(id)
+    WHERE sla_relogio_parado_em >= sla_estouro_em AND cancelado = FALSE;
+CREATE INDEX IF NOT EXISTS idx_chamados_sla_atencao_parado ON chamados(id)
+    WHERE sla_relogio_parado_em >= sla_atencao_em AND sla_relogio_parado_em < sla_estouro_em
+      AND cancelado = FALSE;
+CREATE INDEX IF NOT EXISTS idx_chamados_sla_prazo_resolucao ON chamados(sla_prazo_resolucao, id);
 CREATE INDEX IF NOT EXISTS idx_historico_chamado ON historico_chamados(chamado_id);
+-- Chave do cursor da listagem (ver app/api/cursor.py).
+CREATE INDEX IF NOT EXISTS idx_historico_chamado_cursor ON historico_chamados(chamado_id, created_at, id);
 CREATE INDEX IF NOT EXISTS idx_eventos_conta_usuario ON eventos_de_conta(usuario_id);
 CREATE INDEX IF NOT EXISTS idx_eventos_conta_ator ON eventos_de_conta(ator_id);
 CREATE INDEX IF NOT EXISTS idx_eventos_conta_data ON eventos_de_conta(created_at);
@@ -279,12 +414,21 @@ CREATE INDEX IF NOT EXISTS idx_eventos_setor_setor ON eventos_de_setor(setor_id)
 CREATE INDEX IF NOT EXISTS idx_eventos_setor_ator ON eventos_de_setor(ator_id);
 CREATE INDEX IF NOT EXISTS idx_eventos_setor_data ON eventos_de_setor(created_at);
 CREATE INDEX IF NOT EXISTS idx_comentarios_chamado ON comentarios_chamados(chamado_id);
+CREATE INDEX IF NOT EXISTS idx_comentarios_chamado_cursor ON comentarios_chamados(chamado_id, id);
 CREATE INDEX IF NOT EXISTS idx_anexos_chamado ON anexos(chamado_id);
 CREATE INDEX IF NOT EXISTS idx_usuarios_setor ON usuarios(setor_id);
 CREATE INDEX IF NOT EXISTS idx_usuarios_role ON usuarios(role_id);
 CREATE INDEX IF NOT EXISTS idx_usuarios_nome_login ON usuarios(nome) WHERE ativo = true;
 CREATE INDEX IF NOT EXISTS idx_tr_execucoes_tarefa ON tarefas_recorrentes_execucoes(tarefa_id);
 CREATE INDEX IF NOT EXISTS idx_tr_proxima_data ON tarefas_recorrentes(proxima_data);
+CREATE INDEX IF NOT EXISTS idx_webhooks_pendentes_fila ON webhooks_pendentes(proxima_tentativa_em)
+    WHERE situacao = 'pendente';
+-- Contagem de uma chave na janela; e a limpeza das vencidas do escopo.
+CREATE INDEX IF NOT EXISTS idx_marcas_de_tentativa_chave ON marcas_de_tentativa(escopo, chave, instante);
+CREATE INDEX IF NOT EXISTS idx_marcas_de_tentativa_instante ON marcas_de_tentativa(escopo, instante);
+CREATE INDEX IF NOT EXISTS idx_chamados_busca_vetor ON chamados_busca USING gin (vetor);
+CREATE INDEX IF NOT EXISTS idx_chamados_protocolo_trgm ON chamados USING gin (protocolo gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_chamados_titulo_trgm ON chamados USING gin (titulo gin_trgm_ops);
 
 -- ============================================
 -- FUNÇÃO PARA ATUALIZAR updated_at
@@ -391,6 +535,13 @@ COMMENT ON TABLE eventos_de_conta IS 'Trilha de auditoria do cadastro de usuári
 COMMENT ON TABLE eventos_de_setor IS 'Trilha de auditoria do cadastro de setores: quem fez o quê com qual setor';
 COMMENT ON TABLE anexos IS 'Arquivos anexados aos chamados';
 COMMENT ON TABLE sla_configs IS 'Prazos de SLA por prioridade, em minutos úteis';
+COMMENT ON TABLE protocolo_contadores IS 'Último número de protocolo entregue em cada ano';
+COMMENT ON TABLE versoes_de_referencia IS 'Versão de cada tabela de referência, para invalidar o cache dos processos da API';
+COMMENT ON TABLE chamados_busca IS 'Documento de busca textual (tsvector) de cada chamado, com comentários';
+COMMENT ON TABLE resumo_chamados IS 'Total de chamados por cancelado, arquivado, status, prioridade e técnico (painel)';
+COMMENT ON TABLE webhooks_pendentes IS 'Notificações ao n8n a entregar (outbox); entregues são apagadas';
+COMMENT ON TABLE avisos_de_sla IS 'Avisos de prazo de SLA (resposta, atenção, estouro) já enviados ao n8n, um por chamado e tipo';
+COMMENT ON TABLE marcas_de_tentativa IS 'Tentativas de login falhas na janela do limitador, compartilhadas entre os processos da API';
 COMMENT ON TABLE tarefas_recorrentes IS 'Rotinas periódicas da equipe; não são chamados';
 COMMENT ON TABLE tarefas_recorrentes_execucoes IS 'Registro de cada vez que uma tarefa recorrente foi realizada';
 
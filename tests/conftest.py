@@ -25,6 +25,11 @@ from sqlalchemy.pool import StaticPool
 
 import main
 from app.api.deps import get_db
+from app.core.cache_de_tokens import cache_de_tokens
+from app.core.cache_de_usuarios import cache_de_usuarios
+from app.core.limite_de_requisicoes import baldes_por_ip, baldes_por_usuario
+from app.services.cache_de_referencia import cache_de_referencia
+from app.services.relatorio_sla_service import cache_de_relatorios
 from app.core.database import Base
 from app.core.security import criar_token_acesso
 from app.models import (
@@ -46,6 +51,39 @@ ROLES = [
 ]
 
 
+@pytest.fixture(autouse=True)
+def caches_limpos():
+    """
+    Os caches do usuário autenticado, dos tokens, das tabelas de referência e
+    dos relatórios são do processo, e os ids dos fixtures se repetem em todo
+    teste: sem isto, o que um teste guardou atravessaria para o banco novo do
+    seguinte.
+    """
+    cache_de_usuarios.reset()
+    cache_de_tokens.reset()
+    cache_de_referencia.reset()
+    cache_de_relatorios.reset()
+    yield
+    cache_de_usuarios.reset()
+    cache_de_tokens.reset()
+    cache_de_referencia.reset()
+    cache_de_relatorios.reset()
+
+
+@pytest.fixture(autouse=True)
+def limites_zerados():
+    """
+    Os baldes do limite de requisições são do processo, e todo teste chega
+    do mesmo IP ("testclient") com os mesmos ids de usuário: sem isto, a
+    suíte inteira gastaria um balde só e os últimos testes levariam 429.
+    """
+    baldes_por_usuario.reset()
+    baldes_por_ip.reset()
+    yield
+    baldes_por_usuario.reset()
+    baldes_por_ip.reset()
+
+
 @pytest.fixture
 def sessao():
     """
@@ -0,0 +1,134 @@
+"""
+Abertura automática de chamados das tarefas recorrentes vencidas.
+
+A tarefa do fixture `dados` (200, semanal às segundas) venceu em 10/08/2026;
+os testes fixam "hoje" para as contas de data serem fechadas. A trava de
+linha (`SKIP LOCKED`) é do Postgres e não se exercita no SQLite; o que se
+cobre aqui é o que vale nos dois: um chamado por tarefa vencida, a data
+avançada na mesma transação, e nada em dobro numa segunda passada.
+"""
+
+import time
+from datetime import date
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Chamado, TarefaRecorrente
+from app.services import abertura_de_rotinas, resumo_service
+from app.services.abertura_de_rotinas import AbridorDeRotinas, abrir_lote, abrir_vencidas
+
+HOJE = date(2026, 8, 12)  # quarta-feira
+
+
+@pytest.fixture
+def fabrica(sessao):
+    """Sessões novas sobre o mesmo banco do teste, como a thread abre as suas."""
+    return sessionmaker(bind=sessao.bind, autoflush=False)
+
+
+def _tarefa(sessao, tarefa_id, **campos):
+    valores = dict(
+        titulo=f"Rotina {tarefa_id}",
+        tipo_recorrencia="diaria",
+        intervalo=1,
+        proxima_data=HOJE,
+        prioridade="Baixa",
+        ativo=True,
+    )
+    valores.update(campos)
+    sessao.add(TarefaRecorrente(id=tarefa_id, **valores))
+    sessao.commit()
+
+
+def _abertos(sessao):
+    sessao.expire_all()
+    return sessao.query(Chamado).filter(Chamado.id != 100).order_by(Chamado.id).all()
+
+
+def test_tarefa_vencida_abre_chamado_e_avanca(sessao, dados, fabrica):
+    sessao.get(TarefaRecorrente, dados["tarefa_id"]).responsavel_id = dados["tecnico_id"]
+    sessao.get(TarefaRecorrente, dados["tarefa_id"]).categoria_id = 1
+    sessao.commit()
+
+    protocolos = abrir_vencidas(fabrica, dados["admin_id"], hoje=HOJE)
+
+    (chamado,) = _abertos(sessao)
+    assert protocolos == [chamado.protocolo]
+    assert chamado.titulo == "Backup semanal"
+    assert (chamado.solicitante_id, chamado.tecnico_responsavel_id) == (dados["admin_id"], dados["tecnico_id"])
+    assert (chamado.prioridade, chamado.categoria_id, chamado.status) == ("Média", 1, "Aberto")
+    assert "10/08/2026" in chamado.descricao
+    assert sessao.get(TarefaRecorrente, dados["tarefa_id"]).proxima_data == date(2026, 8, 17)
+
+
+def test_segunda_passada_nao_abre_de_novo(sessao, dados, fabrica):
+    assert len(abrir_vencidas(fabrica, dados["admin_id"], hoje=HOJE)) == 1
+    assert abrir_vencidas(fabrica, dados["admin_id"], hoje=HOJE) == []
+    assert len(_abertos(sessao)) == 1
+
+
+def test_inativa_e_futura_ficam_de_fora(sessao, dados, fabrica):
+    _tarefa(sessao, 201, ativo=False)
+    _tarefa(sessao, 202, proxima_data=date(2026, 8, 13))
+
+    abrir_vencidas(fabrica, dados["admin_id"], hoje=HOJE)
+
+    assert [c.titulo for c in _abertos(sessao)] == ["Backup semanal"]
+
+
+def test_lotes_pequenos_cobrem_todas(sessao, dados, fabrica):
+    for tarefa_id in range(201, 208):
+        _tarefa(sessao, tarefa_id)
+
+    protocolos = abrir_vencidas(fabrica, dados["admin_id"], hoje=HOJE, lote=3)
+
+    assert len(protocolos) == len(set(protocolos)) == 8
+    vencidas = sessao.query(TarefaRecorrente).filter(TarefaRecorrente.proxima_data <= HOJE).count()
+    assert vencidas == 0
+
+
+def test_padrao_invalido_e_pulado_sem_travar_a_passada(sessao, dados, fabrica):
+    _tarefa(sessao, 201, tipo_recorrencia="semanal", dia_semana=None)
+    _tarefa(sessao, 202)
+
+    protocolos = abrir_vencidas(fabrica, dados["admin_id"], hoje=HOJE, lote=1)
+
+    assert len(protocolos) == 2
+    assert sessao.get(TarefaRecorrente, 201).proxima_data == HOJE
+
+
+def test_falha_no_lote_desfaz_chamado_e_data(sessao, dados, monkeypatch):
+    def _quebrar(*args, **kwargs):
+        raise RuntimeError("banco caiu")
+
+    monkeypatch.setattr(abertura_de_rotinas.resumo_service, "aplicar", _quebrar)
+    with pytest.raises(RuntimeError):
+        abrir_lote(sessao, dados["admin_id"], hoje=HOJE)
+    sessao.rollback()
+
+    assert _abertos(sessao) == []
+    assert sessao.get(TarefaRecorrente, dados["tarefa_id"]).proxima_data == date(2026, 8, 10)
+
+
+def test_chamados_entram_nos_contadores(sessao, dados, fabrica):
+    resumo_service.reconciliar(sessao)
+    sessao.commit()
+
+    abrir_vencidas(fabrica, dados["admin_id"], hoje=HOJE)
+
+    sessao.expire_all()
+    assert resumo_service.reconciliar(sessao, corrigir=False) == []
+
+
+def test_thread_abre_as_vencidas(sessao, dados, fabrica):
+    abridor = AbridorDeRotinas(fabrica, dados["admin_id"], intervalo_segundos=0.05)
+    abridor.iniciar()
+    try:
+        limite = time.monotonic() + 5
+        while not _abertos(sessao) and time.monotonic() < limite:
+            time.sleep(0.02)
+    finally:
+        abridor.parar(timeout=5)
+
+    assert len(_abertos(sessao)) == 1
@@ -0,0 +1,84 @@
+"""
+Agenda das tarefas recorrentes: `GET /tarefas-recorrentes/agenda`.
+
+"Hoje" é fixado em 05/08/2026 (quarta) para as datas serem contas fechadas.
+A tarefa do fixture `dados` (200, semanal às segundas, próxima em 10/08) é
+inativada onde atrapalharia a contagem.
+"""
+
+from datetime import date
+
+import pytest
+
+from app.api.endpoints import tarefas_recorrentes
+from app.models import TarefaRecorrente
+
+URL = "/api/v1/tarefas-recorrentes/agenda"
+HOJE = date(2026, 8, 5)
+
+
+@pytest.fixture(autouse=True)
+def hoje_fixo(monkeypatch):
+    monkeypatch.setattr(tarefas_recorrentes, "_hoje", lambda: HOJE)
+
+
+@pytest.fixture
+def tecnico(autenticar, dados):
+    return autenticar(dados["tecnico_id"], "tecnico.teste", "Tecnico")
+
+
+def _tarefa(sessao, tarefa_id, **campos):
+    valores = dict(titulo=f"Rotina {tarefa_id}", prioridade="Baixa", intervalo=1, ativo=True)
+    valores.update(campos)
+    sessao.add(TarefaRecorrente(id=tarefa_id, **valores))
+    sessao.commit()
+
+
+def _agenda(cliente, headers, de, ate):
+    resposta = cliente.get(URL, params={"de": de.isoformat(), "ate": ate.isoformat()}, headers=headers)
+    assert resposta.status_code == 200, resposta.text
+    return [(o["data"], o["tarefa_id"]) for o in resposta.json()]
+
+
+def test_intercala_as_tarefas_por_data(cliente, sessao, dados, tecnico):
+    _tarefa(sessao, 201, tipo_recorrencia="mensal", dia_mes=15, proxima_data=date(2026, 8, 15))
+
+    assert _agenda(cliente, tecnico, date(2026, 8, 1), date(2026, 8, 31)) == [
+        ("2026-08-10", 200),
+        ("2026-08-15", 201),
+        ("2026-08-17", 200),
+        ("2026-08-24", 200),
+        ("2026-08-31", 200),
+    ]
+
+
+def test_vencida_aparece_atrasada_e_segue_de_hoje(cliente, sessao, dados, tecnico):
+    sessao.get(TarefaRecorrente, dados["tarefa_id"]).ativo = False
+    _tarefa(sessao, 201, tipo_recorrencia="diaria", intervalo=3, proxima_data=date(2026, 8, 1))
+
+    resposta = cliente.get(URL, params={"de": "2026-07-30", "ate": "2026-08-12"}, headers=tecnico)
+    corpo = resposta.json()
+
+    # Realizada hoje, a próxima seria 08/08; a cadeia de 01/08 (04/08, 07/08) não vale mais.
+    assert [(o["data"], o["atrasada"]) for o in corpo] == [
+        ("2026-08-01", True),
+        ("2026-08-08", False),
+        ("2026-08-11", False),
+    ]
+
+
+def test_inativa_e_padrao_invalido_ficam_de_fora(cliente, sessao, dados, tecnico):
+    _tarefa(sessao, 201, tipo_recorrencia="diaria", proxima_data=HOJE, ativo=False)
+    _tarefa(sessao, 202, tipo_recorrencia="semanal", dia_semana=None, proxima_data=HOJE)
+
+    assert {t for _, t in _agenda(cliente, tecnico, HOJE, date(2026, 8, 20))} == {200}
+
+
+def test_intervalo_invalido_e_400(cliente, dados, tecnico):
+    assert cliente.get(URL, params={"de": "2026-08-10", "ate": "2026-08-01"}, headers=tecnico).status_code == 400
+    assert cliente.get(URL, params={"de": "2026-01-01", "ate": "2027-01-02"}, headers=tecnico).status_code == 400
+
+
+def test_usuario_comum_nao_ve(cliente, dados, autenticar):
+    comum = autenticar(dados["comum_id"], "usuario.teste", "Usuario")
+    assert cliente.get(URL, params={"de": "2026-08-01", "ate": "2026-08-31"}, headers=comum).status_code == 403
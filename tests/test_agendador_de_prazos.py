@@ -0,0 +1,245 @@
+"""
+Avisos de prazo de SLA: `app/services/agendador_de_prazos.py`.
+
+Os prazos dos chamados são gravados direto nas colunas do snapshot, relativos
+ao relógio de agora, para não depender de expediente. O que se cobre: quais
+prazos entram na fila, que o aviso só sai se o prazo VIGENTE venceu e uma
+vez só, que a thread parada não consulta o banco, e que prazo agendado no
+meio de uma remontagem não se perde.
+"""
+
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models import AvisoDeSLA, Chamado, WebhookPendente
+from app.services.agendador_de_prazos import (
+    ATENCAO,
+    ESTOURO,
+    RESPOSTA,
+    AgendadorDePrazos,
+    Prazo,
+    carregar_prazos_abertos,
+    disparar,
+    prazos_do_chamado,
+)
+from app.utils.timezone import agora_brasilia
+
+
+def _agora():
+    return agora_brasilia().replace(tzinfo=None)
+
+
+@pytest.fixture
+def webhook_ligado(monkeypatch):
+    monkeypatch.setattr(settings, "WEBHOOK_TECNICO_URL", "https://exemplo.invalido/webhook/abc")
+
+
+@pytest.fixture
+def fabrica(sessao):
+    """Sessões novas sobre o mesmo banco do teste, como a thread abre as suas."""
+    return sessionmaker(bind=sessao.bind, autoflush=False)
+
+
+@pytest.fixture
+def espiao(sessao):
+    """Comandos SQL disparados durante o teste."""
+    comandos = []
+
+    def _comando(conn, cursor, statement, *args):
+        comandos.append(statement)
+
+    event.listen(sessao.bind, "before_cursor_execute", _comando)
+    yield comandos
+    event.remove(sessao.bind, "before_cursor_execute", _comando)
+
+
+def _com_prazos(sessao, chamado_id, resposta=-60, atencao=-30, estouro=30, **campos):
+    """Grava no chamado prazos a tantos minutos de agora (negativo: já venceu)."""
+    agora = _agora()
+    chamado = sessao.get(Chamado, chamado_id)
+    chamado.sla_prazo_resposta = agora + timedelta(minutes=resposta)
+    chamado.sla_atencao_em = agora + timedelta(minutes=atencao)
+    chamado.sla_estouro_em = agora + timedelta(minutes=estouro)
+    for campo, valor in campos.items():
+        setattr(chamado, campo, valor)
+    sessao.commit()
+    return chamado
+
+
+def _avisos(sessao):
+    sessao.expire_all()
+    return sorted(a.tipo for a in sessao.query(AvisoDeSLA))
+
+
+class TestPrazosDoChamado:
+    def test_relogio_correndo_tem_os_tres(self, sessao, dados):
+        chamado = _com_prazos(sessao, dados["chamado_id"])
+        assert [p.tipo for p in prazos_do_chamado(chamado)] == [RESPOSTA, ATENCAO, ESTOURO]
+
+    def test_respondido_nao_tem_aviso_de_resposta(self, sessao, dados):
+        chamado = _com_prazos(sessao, dados["chamado_id"], sla_respondido_em=_agora())
+        assert [p.tipo for p in prazos_do_chamado(chamado)] == [ATENCAO, ESTOURO]
+
+    @pytest.mark.parametrize("campos", [
+        {"sla_relogio_parado_em": "agora"},
+        {"cancelado": True},
+        {"status": "Resolvido"},
+    ])
+    def test_relogio_parado_nao_tem_nenhum(self, sessao, dados, campos):
+        campos = {k: (_agora() if v == "agora" else v) for k, v in campos.items()}
+        chamado = _com_prazos(sessao, dados["chamado_id"], **campos)
+        assert prazos_do_chamado(chamado) == []
+
+
+class TestCarga:
+    def test_so_abertos_e_nao_avisados(self, sessao, dados):
+        _com_prazos(sessao, dados["chamado_id"])
+        sessao.add(AvisoDeSLA(chamado_id=dados["chamado_id"], tipo=RESPOSTA, prazo=_agora()))
+        sessao.commit()
+
+        assert [p.tipo for p in carregar_prazos_abertos(sessao)] == [ATENCAO, ESTOURO]
+
+        _com_prazos(sessao, dados["chamado_id"], sla_relogio_parado_em=_agora())
+        assert carregar_prazos_abertos(sessao) == []
+
+
+class TestDisparo:
+    def test_prazo_vencido_grava_aviso_e_webhook_uma_vez(self, sessao, dados, webhook_ligado):
+        chamado = _com_prazos(sessao, dados["chamado_id"])
+        prazo = Prazo(chamado.sla_prazo_resposta, chamado.id, RESPOSTA)
+
+        assert disparar(sessao, prazo) is True
+        assert disparar(sessao, prazo) is False
+
+        assert _avisos(sessao) == [RESPOSTA]
+        pendentes = sessao.query(WebhookPendente).all()
+        assert len(pendentes) == 1
+        assert '"acao": "sla_resposta_vencida"' in pendentes[0].payload
+        assert '"prazo": ' in pendentes[0].payload
+
+    def test_prazo_que_mudou_nao_avisa(self, sessao, dados, webhook_ligado):
+        chamado = _com_prazos(sessao, dados["chamado_id"])
+        prazo = Prazo(chamado.sla_atencao_em, chamado.id, ATENCAO)
+
+        _com_prazos(sessao, dados["chamado_id"], sla_relogio_parado_em=_agora())  # pausado
+        assert disparar(sessao, prazo) is False
+
+        _com_prazos(sessao, dados["chamado_id"], atencao=20, sla_relogio_parado_em=None)  # empurrado
+        assert disparar(sessao, prazo) is False
+        assert _avisos(sessao) == []
+
+    def test_atencao_de_chamado_ja_estourado_nao_avisa(self, sessao, dados, webhook_ligado):
+        chamado = _com_prazos(sessao, dados["chamado_id"], estouro=-5)
+
+        assert disparar(sessao, Prazo(chamado.sla_atencao_em, chamado.id, ATENCAO)) is False
+        assert disparar(sessao, Prazo(chamado.sla_estouro_em, chamado.id, ESTOURO)) is True
+        assert _avisos(sessao) == [ESTOURO]
+
+
+class TestThread:
+    def test_parado_nao_agenda(self, sessao, dados):
+        chamado = _com_prazos(sessao, dados["chamado_id"])
+        agendador = AgendadorDePrazos()
+        agendador.agendar(prazos_do_chamado(chamado))
+        assert agendador._heap == []
+
+    def test_subida_avisa_o_que_venceu_e_espera_o_resto(self, sessao, dados, fabrica, webhook_ligado):
+        _com_prazos(sessao, dados["chamado_id"], estouro=1)
+        agendador = AgendadorDePrazos(espera_maxima_segundos=0.05)
+        agendador.iniciar(fabrica)
+        try:
+            limite = time.monotonic() + 5
+            while len(_avisos(sessao)) < 2 and time.monotonic() < limite:
+                time.sleep(0.02)
+        finally:
+            agendador.parar(timeout=5)
+
+        assert _avisos(sessao) == [ATENCAO, RESPOSTA]
+        assert sessao.query(WebhookPendente).count() == 2
+
+    def test_ocioso_nao_consulta_o_banco(self, sessao, dados, fabrica, espiao):
+        _com_prazos(sessao, dados["chamado_id"], resposta=60, atencao=90, estouro=120)
+        agendador = AgendadorDePrazos(espera_maxima_segundos=0.02)
+        agendador.iniciar(fabrica)
+        try:
+            limite = time.monotonic() + 5
+            while len(agendador._agendados) < 3 and time.monotonic() < limite:
+                time.sleep(0.02)
+            espiao.clear()
+            time.sleep(0.3)
+        finally:
+            agendador.parar(timeout=5)
+
+        assert len(agendador._agendados) == 0  # parar esvazia
+        assert espiao == []
+
+    def test_prazo_agendado_durante_a_remontagem_nao_se_perde(self, sessao, dados, fabrica, monkeypatch):
+        chamado_id = dados["chamado_id"]
+        _com_prazos(sessao, chamado_id, resposta=60, atencao=90, estouro=120)
+        lendo, liberar = threading.Event(), threading.Event()
+        original = carregar_prazos_abertos
+        carregados = []
+
+        def _carga_lenta(db):
+            # A leitura vê os prazos de antes da escrita abaixo.
+            prazos = original(db)
+            carregados.extend(prazos)
+            lendo.set()
+            liberar.wait(5)
+            return prazos
+
+        monkeypatch.setattr("app.services.agendador_de_prazos.carregar_prazos_abertos", _carga_lenta)
+        agendador = AgendadorDePrazos(espera_maxima_segundos=0.05)
+        agendador.iniciar(fabrica)
+        try:
+            assert lendo.wait(5)
+            # Pausa e retomada no meio da leitura: o estouro foi para depois.
+            chamado = _com_prazos(sessao, chamado_id, resposta=60, atencao=90, estouro=180)
+            novos = prazos_do_chamado(chamado)
+            agendador.agendar(novos)
+            liberar.set()
+
+            # Remontagem concluída: os prazos lidos já estão no heap.
+            limite = time.monotonic() + 5
+            while not set(carregados) <= agendador._agendados and time.monotonic() < limite:
+                time.sleep(0.02)
+            with agendador._condicao:
+                agendados = set(agendador._agendados)
+        finally:
+            liberar.set()
+            agendador.parar(timeout=5)
+
+        assert set(novos) <= agendados
+
+    def test_escrita_pela_rota_agenda_o_prazo(self, cliente, sessao, dados, fabrica, autenticar, monkeypatch):
+        agendador = AgendadorDePrazos(espera_maxima_segundos=0.05)
+        monkeypatch.setattr("app.api.endpoints.chamados.agendador_de_prazos", agendador)
+        _com_prazos(sessao, dados["chamado_id"], resposta=60, atencao=90, estouro=120)
+        agendador.iniciar(fabrica)
+        try:
+            limite = time.monotonic() + 5
+            while len(agendador._agendados) < 3 and time.monotonic() < limite:
+                time.sleep(0.02)
+            with agendador._condicao:
+                agendador._heap.clear()
+                agendador._agendados.clear()
+
+            tecnico = autenticar(dados["tecnico_id"], "tecnico.teste", "Tecnico")
+            resposta = cliente.put(
+                f"/api/v1/chamados/{dados['chamado_id']}",
+                json={"observacoes": "Aguardando peça"},
+                headers=tecnico,
+            )
+            assert resposta.status_code == 200, resposta.text
+            with agendador._condicao:
+                agendados = {(p.chamado_id, p.tipo) for p in agendador._agendados}
+        finally:
+            agendador.parar(timeout=5)
+
+        assert (dados["chamado_id"], ESTOURO) in agendados
@@ -0,0 +1,183 @@
+"""
+Busca textual de chamados: `GET /chamados/busca`.
+
+Roda sobre o FTS5 do SQLite, que é o substituto do tsvector fora do Postgres
+(ver app/services/busca_service.py). O que se cobre aqui vale para os dois:
+título pesa mais que comentário, acento não importa, prefixo de protocolo vem
+primeiro, e o documento acompanha as escritas de chamado e de comentário.
+"""
+
+import pytest
+from sqlalchemy import event
+
+URL = "/api/v1/chamados/busca"
+
+
+@pytest.fixture
+def tecnico(autenticar, dados):
+    return autenticar(dados["tecnico_id"], "tecnico.teste", "Tecnico")
+
+
+@pytest.fixture
+def admin(autenticar, dados):
+    return autenticar(dados["admin_id"], "admin.teste", "Administrador")
+
+
+@pytest.fixture
+def espiao(sessao):
+    """Comandos SQL disparados durante o teste."""
+    comandos = []
+
+    def _comando(conn, cursor, statement, *args):
+        comandos.append(statement)
+
+    event.listen(sessao.bind, "before_cursor_execute", _comando)
+    yield comandos
+    event.remove(sessao.bind, "before_cursor_execute", _comando)
+
+
+def _abrir(cliente, headers, dados, titulo, descricao):
+    resposta = cliente.post(
+        "/api/v1/chamados/",
+        json={"titulo": titulo, "descricao": descricao, "solicitante_id": dados["comum_id"]},
+        headers=headers,
+    )
+    assert resposta.status_code == 201, resposta.text
+    return resposta.json()
+
+
+def _comentar(cliente, headers, chamado_id, texto):
+    resposta = cliente.post(
+        "/api/v1/comentarios/",
+        json={"chamado_id": chamado_id, "comentario": texto},
+        headers=headers,
+    )
+    assert resposta.status_code == 201, resposta.text
+    return resposta.json()
+
+
+def _ids(cliente, headers, q, **params):
+    resposta = cliente.get(URL, params={"q": q, **params}, headers=headers)
+    assert resposta.status_code == 200, resposta.text
+    return [c["id"] for c in resposta.json()]
+
+
+class TestOrdenacao:
+    def test_titulo_vem_antes_de_comentario(self, cliente, dados, tecnico):
+        no_comentario = _abrir(cliente, tecnico, dados, "Computador não liga", "Tela preta desde a manhã de hoje")
+        _comentar(cliente, tecnico, no_comentario["id"], "Talvez seja o scanner puxando energia")
+        no_titulo = _abrir(cliente, tecnico, dados, "Scanner do 3º andar", "Digitalização sai toda riscada")
+
+        assert _ids(cliente, tecnico, "scanner") == [no_titulo["id"], no_comentario["id"]]
+
+    def test_acento_nao_importa(self, cliente, dados, tecnico):
+        chamado = _abrir(cliente, tecnico, dados, "Manutenção preventiva", "Limpeza dos coolers do servidor")
+
+        assert _ids(cliente, tecnico, "manutencao") == [chamado["id"]]
+        assert _ids(cliente, tecnico, "MANUTENÇÃO") == [chamado["id"]]
+
+    def test_prefixo_de_protocolo_vem_primeiro(self, cliente, dados, tecnico):
+        citado = _abrir(cliente, tecnico, dados, "Rede caindo de novo", "Igual ao chamado anterior, mesma sala")
+        alvo = _abrir(cliente, tecnico, dados, "Rede lenta na sala 12", "Downloads não passam de 1 MB/s")
+
+        resultado = _ids(cliente, tecnico, alvo["protocolo"])
+        assert resultado[0] == alvo["id"]
+        assert citado["id"] not in resultado[:1]
+
+    def test_todos_os_termos_precisam_casar(self, cliente, dados, tecnico):
+        _abrir(cliente, tecnico, dados, "Impressora sem toner", "Acabou o toner da impressora do RH")
+        ambos = _abrir(cliente, tecnico, dados, "Impressora atolando papel", "Papel preso na bandeja dois")
+
+        assert _ids(cliente, tecnico, "impressora papel") == [ambos["id"]]
+
+    def test_sintaxe_do_fts_nao_passa_do_cliente(self, cliente, dados, tecnico):
+        resposta = cliente.get(URL, params={"q": 'NEAR("a" OR *'}, headers=tecnico)
+        assert resposta.status_code == 200, resposta.text
+
+    def test_cancelados_ficam_fora_por_padrao(self, cliente, dados, tecnico):
+        chamado = _abrir(cliente, tecnico, dados, "Monitor piscando", "O monitor pisca ao abrir planilhas")
+        cliente.put(f"/api/v1/chamados/{chamado['id']}", json={"solucao": "Duplicado de outro chamado"}, headers=tecnico)
+        assert cliente.patch(f"/api/v1/chamados/{chamado['id']}/cancelar", headers=tecnico).status_code == 200
+
+        assert _ids(cliente, tecnico, "monitor") == []
+        assert _ids(cliente, tecnico, "monitor", incluir_cancelados=True) == [chamado["id"]]
+
+
+class TestManutencaoDoIndice:
+    def test_edicao_de_titulo_e_solucao_regrava(self, cliente, dados, tecnico):
+        chamado = _abrir(cliente, tecnico, dados, "Teclado com defeito", "Algumas teclas não respondem")
+        url = f"/api/v1/chamados/{chamado['id']}"
+
+        cliente.put(url, json={"titulo": "Mouse com defeito"}, headers=tecnico)
+        assert _ids(cliente, tecnico, "teclado") == []
+        assert _ids(cliente, tecnico, "mouse") == [chamado["id"]]
+
+        cliente.put(url, json={"solucao": "Trocado o receptor sem fio"}, headers=tecnico)
+        assert _ids(cliente, tecnico, "receptor") == [chamado["id"]]
+
+    def test_comentario_entra_muda_e_sai(self, cliente, dados, tecnico):
+        chamado = _abrir(cliente, tecnico, dados, "Sistema lento", "O ERP demora para abrir as telas")
+        comentario = _comentar(cliente, tecnico, chamado["id"], "Cache do navegador cheio")
+        assert _ids(cliente, tecnico, "navegador") == [chamado["id"]]
+
+        url = f"/api/v1/comentarios/{comentario['id']}"
+        cliente.put(url, json={"comentario": "Antivírus varrendo a pasta do ERP"}, headers=tecnico)
+        assert _ids(cliente, tecnico, "navegador") == []
+        assert _ids(cliente, tecnico, "antivirus") == [chamado["id"]]
+
+        assert cliente.delete(url, headers=tecnico).status_code == 204
+        assert _ids(cliente, tecnico, "antivirus") == []
+        assert _ids(cliente, tecnico, "sistema") == [chamado["id"]]
+
+    def test_chamado_excluido_sai_do_indice(self, cliente, dados, tecnico, admin):
+        chamado = _abrir(cliente, tecnico, dados, "Projetor sem imagem", "Cabo HDMI conectado e nada")
+        assert cliente.delete(f"/api/v1/chamados/{chamado['id']}", headers=admin).status_code == 204
+
+        assert _ids(cliente, tecnico, "projetor") == []
+
+    def test_mudanca_so_de_status_nao_regrava(self, cliente, dados, tecnico, espiao):
+        chamado = _abrir(cliente, tecnico, dados, "Acesso à VPN negado", "Usuário novo sem permissão na VPN")
+
+        espiao.clear()
+        resposta = cliente.put(f"/api/v1/chamados/{chamado['id']}", json={"status": "Em Andamento"}, headers=tecnico)
+        assert resposta.status_code == 200, resposta.text
+        assert not any("chamados_busca" in comando for comando in espiao)
+
+
+class TestAcesso:
+    def test_usuario_comum_nao_busca(self, cliente, dados, autenticar):
+        comum = autenticar(dados["comum_id"], "usuario.teste", "Usuario")
+        assert cliente.get(URL, params={"q": "impressora"}, headers=comum).status_code == 403
+
+    def test_busca_curta_demais_e_422(self, cliente, dados, tecnico):
+        assert cliente.get(URL, params={"q": "a"}, headers=tecnico).status_code == 422
+
+
+class TestConsultaNoPostgres:
+    """
+    A consulta que a busca monta para o Postgres, só compilada: a suíte não
+    tem um Postgres, e o que importa aqui é a forma do SQL. O filtro precisa
+    ser por ids vindos de consultas de uma tabela só; um OR entre o tsvector
+    e o ILIKE por cima do LEFT JOIN não usaria índice nenhum.
+    """
+
+    @pytest.fixture
+    def sql(self):
+        from sqlalchemy import create_engine, select
+        from sqlalchemy.orm import Session
+
+        from app.models import Chamado
+        from app.services import busca_service
+
+        engine = create_engine("postgresql+psycopg2://")
+        consulta = busca_service.aplicar(Session(bind=engine), select(Chamado), "impressora")
+        return str(consulta.compile(dialect=engine.dialect))
+
+    def test_filtro_e_a_uniao_dos_dois_indices(self, sql):
+        filtro = sql.split("WHERE", 1)[1]
+        assert filtro.lstrip().startswith("chamados.id IN (SELECT chamados_busca_1.chamado_id")
+        assert "UNION SELECT chamados_1.id" in filtro
+
+    def test_juncao_com_o_documento_fica_so_para_o_rank(self, sql):
+        assert "chamados_busca.vetor @@" not in sql
+        assert "ts_rank_cd(chamados_busca.vetor" in sql
@@ -0,0 +1,132 @@
+"""
+Cache das tabelas de referência (SLA, categorias, setores, perfis).
+
+Em regime, as rotas quentes não consultam nenhuma dessas tabelas. Escrita pela
+API vale na requisição seguinte; escrita de outro processo, na verificação
+seguinte das versões.
+"""
+
+import re
+import time
+
+import pytest
+from sqlalchemy import event
+
+from app.models import Categoria, SLAConfig, VersaoDeReferencia
+from app.services.cache_de_referencia import SLA_CONFIGS, cache_de_referencia
+
+TABELAS_DE_REFERENCIA = ("sla_configs", "categorias", "setores", "roles", "versoes_de_referencia")
+
+
+@pytest.fixture
+def config(sessao, dados):
+    sessao.add(SLAConfig(prioridade="Média", minutos_resposta=60, minutos_resolucao=480))
+    sessao.commit()
+
+
+@pytest.fixture
+def tecnico(autenticar, dados):
+    return autenticar(dados["tecnico_id"], "tecnico.teste", "Tecnico")
+
+
+@pytest.fixture
+def consultas(sessao):
+    """Tabela de cada SELECT em tabela de referência disparado durante o teste."""
+    registro = []
+
+    def _comando(conn, cursor, statement, *args):
+        if not statement.lstrip().upper().startswith("SELECT"):
+            return
+        origem = re.search(r"\bFROM\s+(\w+)", statement, re.IGNORECASE)
+        if origem and origem.group(1).lower() in TABELAS_DE_REFERENCIA:
+            registro.append(origem.group(1).lower())
+
+    event.listen(sessao.bind, "before_cursor_execute", _comando)
+    yield registro
+    event.remove(sessao.bind, "before_cursor_execute", _comando)
+
+
+def test_rotas_quentes_nao_leem_referencia_em_regime(cliente, dados, config, tecnico, consultas):
+    rotas = [
+        "/api/v1/chamados/",
+        f"/api/v1/chamados/{dados['chamado_id']}",
+        "/api/v1/categorias/",
+        "/api/v1/categorias/1",
+        "/api/v1/setores/",
+        "/api/v1/setores/1",
+        "/api/v1/sla-configs/",
+    ]
+    for rota in rotas:
+        assert cliente.get(rota, headers=tecnico).status_code == 200, rota
+    assert cliente.post("/api/v1/auth/refresh", headers=tecnico).status_code == 200
+    assert consultas  # o aquecimento leu as tabelas
+
+    consultas.clear()
+    for _ in range(3):
+        for rota in rotas:
+            assert cliente.get(rota, headers=tecnico).status_code == 200, rota
+        assert cliente.post("/api/v1/auth/refresh", headers=tecnico).json()["role"] == "Tecnico"
+        # Escrita de chamado também: a config de SLA vem do cache.
+        cliente.put(f"/api/v1/chamados/{dados['chamado_id']}", json={"status": "Em Andamento"}, headers=tecnico)
+        cliente.put(f"/api/v1/chamados/{dados['chamado_id']}", json={"status": "Aberto"}, headers=tecnico)
+    assert consultas == []
+
+
+def test_escrita_pela_api_vale_na_requisicao_seguinte(cliente, dados, config, tecnico):
+    url = f"/api/v1/chamados/{dados['chamado_id']}"
+    cliente.put(url, json={"status": "Em Andamento"}, headers=tecnico)
+    antes = cliente.get(url, headers=tecnico).json()["sla"]["prazo_resolucao"]
+
+    resposta = cliente.put(
+        "/api/v1/sla-configs/Média", json={"minutos_resposta": 60, "minutos_resolucao": 960}, headers=tecnico
+    )
+    assert resposta.status_code == 200
+
+    assert cliente.get("/api/v1/sla-configs/", headers=tecnico).json()[0]["minutos_resolucao"] == 960
+    assert cliente.get(url, headers=tecnico).json()["sla"]["prazo_resolucao"] != antes
+
+
+def test_categoria_e_setor_novos_aparecem_na_hora(cliente, dados, tecnico):
+    assert len(cliente.get("/api/v1/categorias/", headers=tecnico).json()) == 1
+    criada = cliente.post("/api/v1/categorias/", json={"nome": "Rede"}, headers=tecnico).json()
+    assert [c["id"] for c in cliente.get("/api/v1/categorias/", headers=tecnico).json()] == [1, criada["id"]]
+
+    setor = cliente.post("/api/v1/setores/", json={"nome": "Financeiro"}, headers=tecnico).json()
+    assert len(cliente.get("/api/v1/setores/", params={"ativo": True}, headers=tecnico).json()) == 2
+    cliente.patch(f"/api/v1/setores/{setor['id']}/desativar", headers=tecnico)
+    setores = cliente.get("/api/v1/setores/", params={"ativo": True}, headers=tecnico).json()
+    assert [s["nome"] for s in setores] == ["TI"]
+
+
+def test_escrita_desfeita_nao_sobe_a_versao(cliente, sessao, dados, tecnico):
+    resposta = cliente.delete("/api/v1/categorias/1", headers=tecnico)
+    assert resposta.status_code == 400  # tem chamado vinculado
+    assert sessao.query(VersaoDeReferencia).count() == 0
+
+
+def test_outro_processo_e_visto_na_verificacao_seguinte(cliente, sessao, dados, tecnico, monkeypatch):
+    monkeypatch.setattr(cache_de_referencia, "intervalo_segundos", 0.2)
+    assert len(cliente.get("/api/v1/categorias/", headers=tecnico).json()) == 1
+
+    # O que outro worker faria: grava e sobe a versão, sem passar por este cache.
+    sessao.add(Categoria(nome="Telefonia"))
+    sessao.add(VersaoDeReferencia(tabela="categorias", versao=1))
+    sessao.commit()
+    assert len(cliente.get("/api/v1/categorias/", headers=tecnico).json()) == 1
+
+    time.sleep(0.25)
+    assert len(cliente.get("/api/v1/categorias/", headers=tecnico).json()) == 2
+
+
+def test_versao_so_rele_a_tabela_que_mudou(cliente, sessao, dados, config, tecnico, consultas, monkeypatch):
+    monkeypatch.setattr(cache_de_referencia, "intervalo_segundos", 0)
+    cliente.get("/api/v1/categorias/", headers=tecnico)
+    cliente.get("/api/v1/sla-configs/", headers=tecnico)
+
+    sessao.add(VersaoDeReferencia(tabela=SLA_CONFIGS, versao=1))
+    sessao.commit()
+    consultas.clear()
+    cliente.get("/api/v1/categorias/", headers=tecnico)
+    cliente.get("/api/v1/sla-configs/", headers=tecnico)
+
+    assert sorted(set(consultas)) == ["sla_configs", "versoes_de_referencia"]
@@ -0,0 +1,120 @@
+"""
+Cache dos tokens já verificados: `app/core/cache_de_tokens.py`.
+
+O que precisa continuar verdade com o cache: só token que passou pela
+verificação é servido sem ela, e nenhum é servido depois do próprio `exp`.
+"""
+
+from datetime import timedelta
+
+import pytest
+
+from app.core import security
+from app.core.cache_de_tokens import CacheDeTokens
+from app.core.security import criar_token_acesso, decodificar_token
+
+EXP = 1_000
+
+
+def _payload(sub="1", exp=EXP):
+    return {"sub": sub, "exp": exp}
+
+
+# ---------------------------------------------------------------------------
+# CacheDeTokens isolado
+# ---------------------------------------------------------------------------
+
+def test_entrada_vale_ate_o_exp():
+    cache = CacheDeTokens(max_entradas=10)
+    cache.guardar("a.b.c", _payload(), agora=0)
+
+    assert cache.buscar("a.b.c", agora=EXP - 0.1) == _payload()
+    assert cache.buscar("a.b.c", agora=EXP) is None
+
+
+def test_sem_exp_ou_ja_expirado_nao_e_guardado():
+    cache = CacheDeTokens(max_entradas=10)
+    cache.guardar("sem-exp", {"sub": "1"}, agora=0)
+    cache.guardar("expirado", _payload(exp=5), agora=5)
+
+    assert cache.buscar("sem-exp", agora=0) is None
+    assert cache.buscar("expirado", agora=0) is None
+
+
+def test_teto_descarta_o_usado_ha_mais_tempo():
+    cache = CacheDeTokens(max_entradas=2)
+    cache.guardar("t1", _payload("1"), agora=0)
+    cache.guardar("t2", _payload("2"), agora=0)
+    cache.buscar("t1", agora=1)  # t1 passa a ser o mais recente
+    cache.guardar("t3", _payload("3"), agora=1)
+
+    assert cache.buscar("t1", agora=2) is not None
+    assert cache.buscar("t2", agora=2) is None
+    assert cache.buscar("t3", agora=2) is not None
+
+
+def test_teto_zero_desliga_e_negativo_e_recusado():
+    cache = CacheDeTokens(max_entradas=0)
+    cache.guardar("t1", _payload(), agora=0)
+    assert cache.buscar("t1", agora=0) is None
+
+    with pytest.raises(ValueError):
+        CacheDeTokens(max_entradas=-1)
+
+
+def test_quem_recebe_nao_altera_o_guardado():
+    cache = CacheDeTokens(max_entradas=10)
+    cache.guardar("t1", _payload(), agora=0)
+
+    cache.buscar("t1", agora=0)["sub"] = "99"
+
+    assert cache.buscar("t1", agora=0)["sub"] == "1"
+
+
+# ---------------------------------------------------------------------------
+# decodificar_token com o cache
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def verificacoes(monkeypatch):
+    """Quantas vezes a biblioteca de JWT foi chamada durante o teste."""
+    contagem = [0]
+    original = security._verificar_token
+
+    def _contando(token):
+        contagem[0] += 1
+        return original(token)
+
+    monkeypatch.setattr(security, "_verificar_token", _contando)
+    return contagem
+
+
+def test_segunda_leitura_nao_verifica_de_novo(verificacoes):
+    token = criar_token_acesso(data={"sub": "10"})
+
+    assert decodificar_token(token)["sub"] == "10"
+    assert decodificar_token(token)["sub"] == "10"
+    assert verificacoes[0] == 1
+
+
+def test_token_invalido_verifica_sempre(verificacoes):
+    token = criar_token_acesso(data={"sub": "10"})
+    adulterado = token[:-2] + ("AA" if token[-2:] != "AA" else "BB")
+
+    assert decodificar_token(adulterado) is None
+    assert decodificar_token(adulterado) is None
+    assert verificacoes[0] == 2
+
+
+def test_token_expirado_nao_sai_do_cache(verificacoes):
+    token = criar_token_acesso(data={"sub": "10"}, expires_delta=timedelta(seconds=-1))
+
+    assert decodificar_token(token) is None
+    assert decodificar_token(token) is None
+    assert verificacoes[0] == 2
+
+
+def test_backend_desconhecido_e_recusado():
+    with pytest.raises(ValueError, match="jose"):
+        security._escolher_backend("outro")
+    assert security._escolher_backend(" JOSE ") is not None
@@ -0,0 +1,160 @@
+"""
+Cache do usuário autenticado.
+
+O que precisa continuar verdade com o cache: desativar, trocar o perfil ou a
+senha pela API vale na requisição seguinte, e não no fim do prazo. O prazo só
+cobre o que muda por fora da API.
+"""
+
+import time
+
+import pytest
+from sqlalchemy import event
+
+from app.core.cache_de_usuarios import CacheDeUsuarios, UsuarioAutenticado, cache_de_usuarios
+from app.core.security import gerar_hash_senha
+from app.models import Usuario
+
+
+def _usuario(id_=1, ativo=True):
+    return UsuarioAutenticado(id=id_, nome=f"u{id_}", setor_id=None, role_id=3, ativo=ativo, role=None)
+
+
+# ---------------------------------------------------------------------------
+# CacheDeUsuarios isolado
+# ---------------------------------------------------------------------------
+
+def test_entrada_vale_ate_o_prazo():
+    cache = CacheDeUsuarios(ttl_segundos=30)
+    _, geracao = cache.buscar(1, agora=0)
+    cache.guardar(_usuario(), geracao, agora=0)
+
+    assert cache.buscar(1, agora=29.9)[0] == _usuario()
+    assert cache.buscar(1, agora=30)[0] is None
+
+
+def test_prazo_zero_desliga_o_cache():
+    cache = CacheDeUsuarios(ttl_segundos=0)
+    _, geracao = cache.buscar(1, agora=0)
+    cache.guardar(_usuario(), geracao, agora=0)
+    assert cache.buscar(1, agora=0)[0] is None
+
+
+def test_teto_descarta_o_usado_ha_mais_tempo():
+    cache = CacheDeUsuarios(ttl_segundos=30, max_entradas=2)
+    for id_ in (1, 2):
+        cache.guardar(_usuario(id_), cache.buscar(id_, agora=0)[1], agora=0)
+    cache.buscar(1, agora=1)  # 1 passa a ser o mais recente
+    cache.guardar(_usuario(3), cache.buscar(3, agora=1)[1], agora=1)
+
+    assert cache.buscar(1, agora=2)[0] is not None
+    assert cache.buscar(2, agora=2)[0] is None
+    assert cache.buscar(3, agora=2)[0] is not None
+
+
+def test_leitura_de_antes_da_invalidacao_nao_e_guardada():
+    """
+    A corrida que a geração fecha: a requisição leu a conta ativa do banco, a
+    desativação comitou e invalidou, e só então a primeira tenta guardar.
+    """
+    cache = CacheDeUsuarios(ttl_segundos=30)
+    _, geracao = cache.buscar(1, agora=0)
+    cache.invalidar(1)
+    cache.guardar(_usuario(), geracao, agora=0)
+    assert cache.buscar(1, agora=0)[0] is None
+
+
+def test_prazo_negativo_e_recusado():
+    with pytest.raises(ValueError):
+        CacheDeUsuarios(ttl_segundos=-1)
+
+
+# ---------------------------------------------------------------------------
+# get_current_user com o cache
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def consultas_de_usuario(sessao):
+    """Quantos SELECT em `usuarios` saíram durante o teste."""
+    contagem = [0]
+
+    def _contar(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM usuarios" in statement:
+            contagem[0] += 1
+
+    event.listen(sessao.bind, "before_cursor_execute", _contar)
+    yield contagem
+    event.remove(sessao.bind, "before_cursor_execute", _contar)
+
+
+@pytest.fixture
+def admin(autenticar, dados):
+    return autenticar(dados["admin_id"], "admin.teste", "Administrador")
+
+
+def test_segunda_requisicao_nao_le_o_usuario(cliente, dados, admin, consultas_de_usuario):
+    assert cliente.get("/api/v1/auth/me", headers=admin).status_code == 200
+    assert consultas_de_usuario[0] == 1
+
+    for _ in range(5):
+        assert cliente.get("/api/v1/auth/me", headers=admin).json()["nome"] == "admin.teste"
+    assert consultas_de_usuario[0] == 1
+
+
+def test_desativacao_vale_na_requisicao_seguinte(cliente, dados, admin, autenticar):
+    comum = autenticar(dados["comum_id"], "usuario.teste", "Usuario")
+    assert cliente.get("/api/v1/auth/me", headers=comum).status_code == 200
+
+    cliente.patch(f"/api/v1/usuarios/{dados['comum_id']}/desativar", headers=admin)
+
+    assert cliente.get("/api/v1/auth/me", headers=comum).status_code == 403
+
+
+def test_rebaixamento_vale_na_requisicao_seguinte(cliente, dados, admin, autenticar):
+    tecnico = autenticar(dados["tecnico_id"], "tecnico.teste", "Tecnico")
+    assert cliente.get("/api/v1/sla-configs/", headers=tecnico).status_code == 200
+    assert cliente.put("/api/v1/setores/1", json={"nome": "TI"}, headers=tecnico).status_code == 200
+
+    resposta = cliente.put(f"/api/v1/usuarios/{dados['tecnico_id']}", json={"role_id": 3}, headers=admin)
+    assert resposta.status_code == 200
+
+    assert cliente.put("/api/v1/setores/1", json={"nome": "TI"}, headers=tecnico).status_code == 403
+
+
+def test_alterar_senha_usa_a_linha_e_invalida(cliente, sessao, dados, autenticar):
+    usuario = sessao.get(Usuario, dados["comum_id"])
+    usuario.senha_hash = gerar_hash_senha("senha-atual-123")
+    sessao.commit()
+    comum = autenticar(dados["comum_id"], "usuario.teste", "Usuario")
+    assert cliente.get("/api/v1/auth/me", headers=comum).status_code == 200
+
+    resposta = cliente.post(
+        "/api/v1/auth/alterar-senha",
+        json={"senha_atual": "senha-atual-123", "senha_nova": "senha-nova-456"},
+        headers=comum,
+    )
+    assert resposta.status_code == 200
+    assert cache_de_usuarios.buscar(dados["comum_id"])[0] is None
+
+
+def test_mudanca_por_fora_da_api_vale_no_fim_do_prazo(cliente, sessao, dados, autenticar, monkeypatch):
+    monkeypatch.setattr(cache_de_usuarios, "ttl_segundos", 0.2)
+    comum = autenticar(dados["comum_id"], "usuario.teste", "Usuario")
+    cliente.get("/api/v1/auth/me", headers=comum)
+
+    # SQL direto: a API não fica sabendo, e o cache responde até o prazo.
+    sessao.get(Usuario, dados["comum_id"]).ativo = False
+    sessao.commit()
+    assert cliente.get("/api/v1/auth/me", headers=comum).status_code == 200
+
+    time.sleep(0.25)
+    assert cliente.get("/api/v1/auth/me", headers=comum).status_code == 403
+
+
+def test_inativo_nao_e_guardado(cliente, sessao, dados, autenticar):
+    sessao.get(Usuario, dados["comum_id"]).ativo = False
+    sessao.commit()
+    comum = autenticar(dados["comum_id"], "usuario.teste", "Usuario")
+
+    assert cliente.get("/api/v1/auth/me", headers=comum).status_code == 403
+    assert cache_de_usuarios.buscar(dados["comum_id"])[0] is None
@@ -0,0 +1,246 @@
+"""
+Calendário configurável do motor de horas úteis: feriados e janelas por dia da
+semana.
+
+O motor padrão (sem arquivo) é coberto por test_horario_util e pela
+equivalência com a implementação iterativa. Aqui o que se verifica é o que o
+calendário acrescenta, sempre com um `Calendario` construído no próprio teste
+— nenhum teste depende do calendário ativo do processo, exceto o que troca o
+ativo de propósito e o restaura no fim.
+
+Datas de referência:
+    2026-08-03 é uma SEGUNDA
+    2026-08-07 é uma SEXTA
+    2026-12-25 é uma SEXTA (Natal)
+"""
+
+import json
+import random
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from app.services import horario_util
+from app.services.horario_util import (
+    EXPEDIENTE_PADRAO,
+    JANELAS,
+    Calendario,
+    carregar_calendario,
+    contar_minutos_uteis,
+    definir_calendario,
+    somar_minutos_uteis,
+)
+
+SEG = datetime(2026, 8, 3)
+QUA = datetime(2026, 8, 5)
+SEX = datetime(2026, 8, 7)
+SAB = datetime(2026, 8, 8)
+SEG_SEGUINTE = datetime(2026, 8, 10)
+
+
+def em(dia: datetime, hora: int, minuto: int = 0) -> datetime:
+    return dia.replace(hour=hora, minute=minuto)
+
+
+def _com_feriado(*dias: date) -> Calendario:
+    return Calendario(EXPEDIENTE_PADRAO, feriados=dias)
+
+
+# ---------------------------------------------------------------------------
+# Feriados
+# ---------------------------------------------------------------------------
+
+def test_feriado_nao_conta():
+    cal = _com_feriado(QUA.date())
+    assert cal.contar(em(QUA, 8), em(QUA, 17)) == 0
+    assert cal.contar(em(SEG, 8), em(SEX, 17)) == 4 * 480
+
+
+def test_soma_pula_o_feriado():
+    """Terça 16h + 120 min, com quarta feriado: 60 na terça, 60 na quinta."""
+    cal = _com_feriado(QUA.date())
+    assert cal.somar(em(QUA - timedelta(days=1), 16), 120) == em(QUA + timedelta(days=1), 9)
+
+
+def test_inicio_no_feriado_avanca_para_o_proximo_dia_util():
+    cal = _com_feriado(QUA.date())
+    assert cal.somar(em(QUA, 10), 0) == em(QUA + timedelta(days=1), 8)
+
+
+def test_feriado_na_sexta_emenda_com_o_fim_de_semana():
+    """Natal de 2026 numa sexta: quinta 17h + 1 min cai na segunda 08:01."""
+    cal = Calendario(EXPEDIENTE_PADRAO, feriados_anuais=[(12, 25)])
+    assert cal.somar(datetime(2026, 12, 24, 16, 59), 2) == datetime(2026, 12, 28, 8, 1)
+
+
+def test_feriado_anual_repete_todo_ano():
+    cal = Calendario(EXPEDIENTE_PADRAO, feriados_anuais=[(12, 25)])
+    for ano in (2026, 2030, 2031):  # sexta, quarta, quinta
+        natal = datetime(ano, 12, 25)
+        assert cal.contar(em(natal, 0), em(natal, 23)) == 0
+
+
+def test_multiplo_exato_do_dia_para_no_fechamento_antes_do_feriado():
+    """O orçamento que acaba na sexta às 17h não salta o feriado de segunda."""
+    cal = _com_feriado(SEG_SEGUINTE.date())
+    assert cal.somar(em(SEG, 8), 5 * 480) == em(SEX, 17)
+    assert cal.somar(em(SEG, 8), 5 * 480 + 1) == em(SEG_SEGUINTE + timedelta(days=1), 8, 1)
+
+
+# ---------------------------------------------------------------------------
+# Janelas por dia da semana
+# ---------------------------------------------------------------------------
+
+def test_sabado_de_meio_periodo():
+    janelas = dict(EXPEDIENTE_PADRAO)
+    janelas[5] = [(time(8, 0), time(12, 0))]
+    cal = Calendario(janelas)
+
+    assert cal.contar(em(SAB, 0), em(SAB, 23)) == 240
+    # Sexta 16h + 120 min: 60 na sexta, 60 no sábado de manhã.
+    assert cal.somar(em(SEX, 16), 120) == em(SAB, 9)
+    # Sábado depois do meio-dia já é fora do expediente.
+    assert cal.somar(em(SAB, 13), 0) == em(SEG_SEGUINTE, 8)
+
+
+def test_janelas_diferentes_por_dia():
+    janelas = dict(EXPEDIENTE_PADRAO)
+    janelas[4] = [(time(8, 0), time(12, 0)), (time(13, 0), time(16, 0))]  # sexta curta
+    cal = Calendario(janelas)
+    assert cal.minutos_uteis_do_dia(SEX.date()) == 420
+    assert cal.contar(em(SEG, 8), em(SEX, 17)) == 4 * 480 + 420
+    assert cal.somar(em(SEX, 15), 120) == em(SEG_SEGUINTE, 9)
+
+
+def test_janelas_fora_de_ordem_sao_ordenadas():
+    cal = Calendario({0: [(time(13, 0), time(17, 0)), (time(8, 0), time(12, 0))]})
+    assert cal.janelas_do_dia(SEG.date()) == tuple(JANELAS)
+
+
+@pytest.mark.parametrize(
+    "janelas",
+    [
+        [(time(12, 0), time(8, 0))],
+        [(time(8, 0), time(12, 0)), (time(11, 0), time(14, 0))],
+        [(time(8, 0, 30), time(12, 0))],
+    ],
+    ids=["invertida", "sobreposta", "com-segundos"],
+)
+def test_janela_invalida_e_recusada(janelas):
+    with pytest.raises(ValueError):
+        Calendario({0: janelas})
+
+
+# ---------------------------------------------------------------------------
+# Faixa compilada
+# ---------------------------------------------------------------------------
+
+def test_instante_fora_da_faixa_e_erro_e_nao_zero():
+    cal = Calendario(EXPEDIENTE_PADRAO, primeiro_dia=date(2026, 1, 1), ultimo_dia=date(2026, 12, 31))
+    with pytest.raises(ValueError):
+        cal.contar(datetime(2025, 12, 30, 9), datetime(2026, 1, 5, 9))
+    with pytest.raises(ValueError):
+        cal.somar(datetime(2026, 12, 30, 9), 10 * 480)
+
+
+# ---------------------------------------------------------------------------
+# Propriedades com feriados sorteados
+# ---------------------------------------------------------------------------
+
+def _contar_dia_a_dia(cal: Calendario, inicio: datetime, fim: datetime) -> int:
+    """Oráculo: a soma dia a dia, usando só as janelas do calendário."""
+    if fim <= inicio:
+        return 0
+    total, dia = 0, inicio.date()
+    while dia <= fim.date():
+        for a, b in cal.janelas_do_dia(dia):
+            ini = max(datetime.combine(dia, a), inicio)
+            f = min(datetime.combine(dia, b), fim)
+            if f > ini:
+                total += int((f - ini).total_seconds() // 60)
+        dia += timedelta(days=1)
+    return total
+
+
+def test_contar_com_feriados_bate_com_a_soma_dia_a_dia():
+    rnd = random.Random(20261018)
+    base = date(2026, 1, 1)
+    cal = _com_feriado(*(base + timedelta(days=rnd.randrange(365)) for _ in range(40)))
+    for _ in range(1000):
+        inicio = datetime(2026, 1, 1) + timedelta(seconds=rnd.randrange(300 * 86_400))
+        fim = inicio + timedelta(seconds=rnd.randrange(60 * 86_400))
+        assert cal.contar(inicio, fim) == _contar_dia_a_dia(cal, inicio, fim), (inicio, fim)
+
+
+def test_ida_e_volta_com_feriados():
+    rnd = random.Random(20261019)
+    base = date(2026, 1, 1)
+    cal = _com_feriado(*(base + timedelta(days=rnd.randrange(365)) for _ in range(40)))
+    for _ in range(1000):
+        inicio = datetime(2026, 1, 1) + timedelta(minutes=rnd.randrange(300 * 1440))
+        minutos = rnd.randrange(0, 20_000)
+        assert cal.contar(inicio, cal.somar(inicio, minutos)) == minutos, (inicio, minutos)
+
+
+# ---------------------------------------------------------------------------
+# Arquivo de configuração e calendário ativo
+# ---------------------------------------------------------------------------
+
+def test_sem_arquivo_vale_o_expediente_padrao():
+    cal = carregar_calendario("")
+    assert cal.janelas_do_dia(SEG.date()) == tuple(JANELAS)
+    assert cal.janelas_do_dia(SAB.date()) == ()
+
+
+def test_arquivo_de_exemplo_carrega():
+    from pathlib import Path
+
+    raiz = Path(__file__).resolve().parent.parent
+    cal = carregar_calendario(str(raiz / "calendario.example.json"))
+    assert cal.minutos_uteis_do_dia(date(2026, 11, 20)) == 0  # Consciência Negra
+    assert cal.minutos_uteis_do_dia(date(2026, 2, 17)) == 0   # Carnaval
+    assert cal.minutos_uteis_do_dia(date(2026, 8, 3)) == 480
+
+
+def test_arquivo_com_janelas_e_feriados(tmp_path):
+    arquivo = tmp_path / "calendario.json"
+    arquivo.write_text(json.dumps({
+        "janelas": {"seg": [["09:00", "18:00"]], "sab": [["08:00", "12:00"]]},
+        "feriados": ["2026-08-10"],
+        "feriados_anuais": ["08-03"],
+    }), encoding="utf-8")
+
+    cal = carregar_calendario(str(arquivo))
+    assert cal.minutos_uteis_do_dia(date(2026, 8, 3)) == 0      # feriado anual
+    assert cal.minutos_uteis_do_dia(date(2026, 8, 4)) == 0      # terça ausente
+    assert cal.minutos_uteis_do_dia(date(2026, 8, 8)) == 240    # sábado
+    assert cal.minutos_uteis_do_dia(date(2026, 8, 10)) == 0     # feriado com ano
+    assert cal.minutos_uteis_do_dia(date(2026, 8, 17)) == 540   # segunda comum
+
+
+@pytest.mark.parametrize(
+    "conteudo",
+    [
+        {"janelas": {"segunda": [["08:00", "12:00"]]}},
+        {"feriado": ["2026-01-01"]},
+        {"feriados_anuais": ["02-30"]},
+        {"feriados": ["2026-13-01"]},
+    ],
+    ids=["dia-invalido", "chave-desconhecida", "feriado-anual-invalido", "data-invalida"],
+)
+def test_arquivo_invalido_derruba_a_carga(tmp_path, conteudo):
+    arquivo = tmp_path / "calendario.json"
+    arquivo.write_text(json.dumps(conteudo), encoding="utf-8")
+    with pytest.raises(ValueError):
+        carregar_calendario(str(arquivo))
+
+
+def test_funcoes_do_modulo_usam_o_calendario_ativo():
+    anterior = definir_calendario(_com_feriado(QUA.date()))
+    try:
+        assert horario_util.calendario_ativo().feriados == {QUA.date()}
+        assert contar_minutos_uteis(em(QUA, 8), em(QUA, 17)) == 0
+        assert somar_minutos_uteis(em(QUA, 9), 0) == em(QUA + timedelta(days=1), 8)
+    finally:
+        definir_calendario(anterior)
+    assert contar_minutos_uteis(em(QUA, 8), em(QUA, 17)) == 480
@@ -0,0 +1,178 @@
+"""
+Nomes de usuário resolvidos em lote.
+
+Duas partes: o `CarregadorDeNomes` sozinho (uma consulta por lote, nada de
+segunda ida ao banco para o mesmo id) e as rotas que o usam — comentários,
+histórico, chamados e execuções de tarefa recorrente —, onde o que se mede é
+que o número de comandos da resposta não cresce com o número de autores
+diferentes na página.
+"""
+
+import pytest
+from sqlalchemy import event
+
+from app.models import Chamado, ComentarioChamado, HistoricoChamado, TarefaRecorrenteExecucao, Usuario
+from app.services import carregador_de_nomes
+from app.services.carregador_de_nomes import CarregadorDeNomes
+
+
+@pytest.fixture
+def tecnico(autenticar, dados):
+    return autenticar(dados["tecnico_id"], "tecnico.teste", "Tecnico")
+
+
+@pytest.fixture
+def espiao(sessao):
+    """Comandos SQL disparados durante o teste."""
+    comandos = []
+
+    def _comando(conn, cursor, statement, *args):
+        comandos.append(statement)
+
+    event.listen(sessao.bind, "before_cursor_execute", _comando)
+    yield comandos
+    event.remove(sessao.bind, "before_cursor_execute", _comando)
+
+
+def _autores(sessao, quantos):
+    """Contas novas, uma por autor; devolve os ids."""
+    usuarios = [
+        Usuario(id=1000 + n, nome=f"autor.{n}", role_id=3, setor_id=1, ativo=True)
+        for n in range(quantos)
+    ]
+    sessao.add_all(usuarios)
+    sessao.commit()
+    return [u.id for u in usuarios]
+
+
+def _contar(cliente, url, headers, espiao):
+    """Comandos de um GET já com os caches do usuário aquecidos pelo anterior."""
+    cliente.get(url, headers=headers)
+    espiao.clear()
+    resposta = cliente.get(url, headers=headers)
+    assert resposta.status_code == 200, resposta.text
+    return len(espiao), resposta.json()
+
+
+class TestCarregador:
+    def test_ids_pedidos_saem_numa_consulta(self, sessao, dados, espiao):
+        nomes = CarregadorDeNomes(sessao)
+        nomes.pedir([dados["admin_id"], dados["tecnico_id"], None, dados["tecnico_id"]])
+
+        assert nomes.nome(dados["tecnico_id"]) == "tecnico.teste"
+        assert nomes.nome(dados["admin_id"]) == "admin.teste"
+        assert nomes.nome(None) is None
+        assert len(espiao) == 1
+
+    def test_id_ja_resolvido_nao_volta_ao_banco(self, sessao, dados, espiao):
+        nomes = CarregadorDeNomes(sessao)
+        nomes.nome(dados["comum_id"])
+        nomes.pedir([dados["comum_id"]])
+        assert nomes.nome(dados["comum_id"]) == "usuario.teste"
+        assert len(espiao) == 1
+
+    def test_id_inexistente_vira_none_uma_vez(self, sessao, dados, espiao):
+        nomes = CarregadorDeNomes(sessao)
+        assert nomes.nome(999) is None
+        assert nomes.nome(999) is None
+        assert len(espiao) == 1
+
+    def test_muitos_ids_vao_em_lotes(self, sessao, dados, espiao, monkeypatch):
+        monkeypatch.setattr(carregador_de_nomes, "TAMANHO_DO_LOTE", 4)
+        ids = _autores(sessao, 10)
+        espiao.clear()
+
+        nomes = CarregadorDeNomes(sessao)
+        nomes.pedir(ids)
+        assert [nomes.nome(i) for i in ids] == [f"autor.{n}" for n in range(10)]
+        assert len(espiao) == 3
+
+    def test_anexar_preenche_varios_campos(self, sessao, dados):
+        chamado = sessao.get(Chamado, dados["chamado_id"])
+        chamado.tecnico_responsavel_id = dados["tecnico_id"]
+
+        CarregadorDeNomes(sessao).anexar(
+            [chamado], solicitante_nome="solicitante_id", tecnico_responsavel_nome="tecnico_responsavel_id"
+        )
+        assert chamado.solicitante_nome == "usuario.teste"
+        assert chamado.tecnico_responsavel_nome == "tecnico.teste"
+
+
+class TestRotas:
+    def test_comentarios_trazem_o_autor_sem_consulta_por_linha(self, cliente, sessao, dados, tecnico, espiao):
+        url = f"/api/v1/comentarios/chamado/{dados['chamado_id']}"
+        sessao.add(ComentarioChamado(chamado_id=dados["chamado_id"], usuario_id=dados["tecnico_id"], comentario="um"))
+        sessao.commit()
+        um, corpo = _contar(cliente, url, tecnico, espiao)
+        assert corpo[0]["usuario_nome"] == "tecnico.teste"
+
+        for autor in _autores(sessao, 15):
+            sessao.add(ComentarioChamado(chamado_id=dados["chamado_id"], usuario_id=autor, comentario="outro"))
+        sessao.commit()
+        muitos, corpo = _contar(cliente, url, tecnico, espiao)
+        assert len(corpo) == 16
+        assert corpo[-1]["usuario_nome"] == "autor.14"
+        assert muitos == um
+
+    def test_historico_traz_quem_fez(self, cliente, sessao, dados, tecnico, espiao):
+        url = f"/api/v1/historico/chamado/{dados['chamado_id']}"
+        sessao.add(HistoricoChamado(chamado_id=dados["chamado_id"], usuario_id=dados["admin_id"], acao="Criado"))
+        sessao.commit()
+        um, corpo = _contar(cliente, url, tecnico, espiao)
+        assert corpo[0]["usuario_nome"] == "admin.teste"
+
+        for autor in _autores(sessao, 15):
+            sessao.add(HistoricoChamado(chamado_id=dados["chamado_id"], usuario_id=autor, acao="Comentado"))
+        sessao.commit()
+        muitos, corpo = _contar(cliente, url, tecnico, espiao)
+        assert len(corpo) == 16
+        assert {h["usuario_nome"] for h in corpo} >= {"admin.teste", "autor.0", "autor.14"}
+        assert muitos == um
+
+    def test_listagem_de_chamados_traz_solicitante_e_tecnico(self, cliente, sessao, dados, tecnico, espiao):
+        url = "/api/v1/chamados/"
+        um, corpo = _contar(cliente, url, tecnico, espiao)
+        assert corpo[0]["solicitante_nome"] == "usuario.teste"
+        assert corpo[0]["tecnico_responsavel_nome"] is None
+
+        for n, autor in enumerate(_autores(sessao, 15)):
+            sessao.add(Chamado(
+                protocolo=f"CH-NOMES-{n}",
+                solicitante_id=autor,
+                tecnico_responsavel_id=dados["tecnico_id"],
+                titulo="Sem acesso à pasta",
+                descricao="Pasta do setor sumiu",
+                status="Aberto",
+                prioridade="Média",
+            ))
+        sessao.commit()
+        muitos, corpo = _contar(cliente, url, tecnico, espiao)
+        assert len(corpo) == 16
+        assert corpo[0]["solicitante_nome"] == "autor.14"
+        assert corpo[0]["tecnico_responsavel_nome"] == "tecnico.teste"
+        assert muitos == um
+
+    def test_resposta_da_escrita_traz_os_nomes(self, cliente, dados, tecnico):
+        resposta = cliente.put(
+            f"/api/v1/chamados/{dados['chamado_id']}",
+            json={"tecnico_responsavel_id": dados["tecnico_id"]},
+            headers=tecnico,
+        )
+        assert resposta.status_code == 200, resposta.text
+        assert resposta.json()["solicitante_nome"] == "usuario.teste"
+        assert resposta.json()["tecnico_responsavel_nome"] == "tecnico.teste"
+
+    def test_execucoes_de_tarefa_trazem_quem_realizou(self, cliente, sessao, dados, tecnico, espiao):
+        url = f"/api/v1/tarefas-recorrentes/{dados['tarefa_id']}/execucoes"
+        sessao.add(TarefaRecorrenteExecucao(tarefa_id=dados["tarefa_id"], usuario_id=dados["tecnico_id"]))
+        sessao.commit()
+        um, corpo = _contar(cliente, url, tecnico, espiao)
+        assert corpo[0]["usuario_nome"] == "tecnico.teste"
+
+        for autor in _autores(sessao, 15):
+            sessao.add(TarefaRecorrenteExecucao(tarefa_id=dados["tarefa_id"], usuario_id=autor))
+        sessao.commit()
+        muitos, corpo = _contar(cliente, url, tecnico, espiao)
+        assert len(corpo) == 16
+        assert {e["usuario_nome"] for e in corpo} >= {"tecnico.teste", "autor.0", "autor.14"}
+        assert muitos == um
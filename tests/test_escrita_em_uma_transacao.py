@@ -0,0 +1,128 @@
+"""
+Escrita de chamado numa transação só.
+
+A mudança e o histórico entram juntos ou não entram, com um commit por
+requisição, e a resposta sai da memória — sem reler o chamado, as configs nem
+o histórico depois do commit. A resposta precisa ser igual à leitura seguinte:
+montada antes do commit, ela não passa pelo banco, e uma data aware ali
+apareceria com fuso que o GET não tem.
+"""
+
+import pytest
+from sqlalchemy import event
+
+from app.api.endpoints import chamados as rota_de_chamados
+from app.models import Chamado, HistoricoChamado, SLAConfig
+
+
+@pytest.fixture
+def config(sessao, dados):
+    sessao.add(SLAConfig(prioridade="Média", minutos_resposta=60, minutos_resolucao=480))
+    sessao.commit()
+
+
+@pytest.fixture
+def tecnico(autenticar, dados):
+    return autenticar(dados["tecnico_id"], "tecnico.teste", "Tecnico")
+
+
+@pytest.fixture
+def espiao(sessao):
+    """Comandos SQL e commits disparados durante o teste."""
+    registro = {"comandos": [], "commits": 0}
+
+    def _comando(conn, cursor, statement, *args):
+        registro["comandos"].append(statement)
+
+    def _commit(conn):
+        registro["commits"] += 1
+
+    event.listen(sessao.bind, "before_cursor_execute", _comando)
+    event.listen(sessao.bind, "commit", _commit)
+    yield registro
+    event.remove(sessao.bind, "before_cursor_execute", _comando)
+    event.remove(sessao.bind, "commit", _commit)
+
+
+def _limpar(registro):
+    registro["comandos"].clear()
+    registro["commits"] = 0
+
+
+def test_put_de_status_e_um_commit_sem_releitura(cliente, dados, config, tecnico, espiao):
+    url = f"/api/v1/chamados/{dados['chamado_id']}"
+    cliente.put(url, json={"status": "Em Andamento"}, headers=tecnico)  # o legado ganha o snapshot
+    _limpar(espiao)
+
+    resposta = cliente.put(url, json={"status": "Aguardando"}, headers=tecnico)
+    assert resposta.status_code == 200, resposta.text
+    assert resposta.json()["sla"]["situacao"] is not None
+
+    assert espiao["commits"] == 1
+    comandos = espiao["comandos"]
+    assert not any(c.lstrip().upper().startswith("SELECT") and "historico_chamados" in c for c in comandos)
+    # Nada é lido depois que a escrita começa.
+    primeira_escrita = next(i for i, c in enumerate(comandos) if c.lstrip().upper().startswith(("UPDATE", "INSERT")))
+    assert not any(c.lstrip().upper().startswith("SELECT") for c in comandos[primeira_escrita:])
+
+
+def test_criar_e_um_commit(cliente, dados, config, tecnico, espiao, sessao):
+    resposta = cliente.post(
+        "/api/v1/chamados/",
+        json={
+            "titulo": "Teclado sem a tecla Enter",
+            "descricao": "Caiu e sumiu debaixo da mesa",
+            "solicitante_id": dados["comum_id"],
+        },
+        headers=tecnico,
+    )
+    assert resposta.status_code == 201, resposta.text
+    assert espiao["commits"] == 1
+    assert resposta.json()["sla"]["situacao"] == "No prazo"
+
+    sessao.expire_all()
+    chamado = sessao.get(Chamado, resposta.json()["id"])
+    (abertura,) = sessao.query(HistoricoChamado).filter_by(chamado_id=chamado.id).all()
+    # Abertura, histórico e relógio de SLA no mesmo instante.
+    assert abertura.created_at == chamado.data_abertura
+    assert chamado.sla_calculado_em is not None
+
+
+@pytest.mark.parametrize(
+    "metodo, caminho, corpo",
+    [
+        ("put", "", {"status": "Resolvido", "prioridade": "Média"}),
+        ("patch", "/arquivar", None),
+        ("patch", "/cancelar", None),
+    ],
+)
+def test_resposta_da_escrita_e_igual_a_leitura_seguinte(cliente, dados, config, tecnico, metodo, caminho, corpo):
+    url = f"/api/v1/chamados/{dados['chamado_id']}"
+    escrita = getattr(cliente, metodo)(url + caminho, json=corpo, headers=tecnico)
+    assert escrita.status_code == 200, escrita.text
+
+    leitura = cliente.get(url, headers=tecnico).json()
+    escrita = escrita.json()
+    for campo in ("data_atualizacao", "updated_at", "data_abertura", "data_resolucao", "status", "prioridade"):
+        assert escrita[campo] == leitura[campo], campo
+    if caminho == "/cancelar":
+        assert escrita["sla"] is leitura["sla"] is None
+        return
+    # O relógio da resposta e o da leitura diferem por milissegundos; o que
+    # não pode mudar entre as duas é a situação nem os prazos.
+    for campo in ("situacao", "prazo_resposta", "prazo_resolucao"):
+        assert escrita["sla"][campo] == leitura["sla"][campo], campo
+
+
+def test_falha_no_historico_desfaz_a_mudanca(cliente, sessao, dados, config, tecnico, monkeypatch):
+    def _quebrar(*args, **kwargs):
+        raise RuntimeError("queda entre a mudança e o histórico")
+
+    monkeypatch.setattr(rota_de_chamados, "registrar_historico", _quebrar)
+    with pytest.raises(RuntimeError):
+        cliente.put(f"/api/v1/chamados/{dados['chamado_id']}", json={"status": "Resolvido"}, headers=tecnico)
+
+    sessao.rollback()
+    chamado = sessao.get(Chamado, dados["chamado_id"])
+    assert chamado.status == "Aberto"
+    assert chamado.data_resolucao is None
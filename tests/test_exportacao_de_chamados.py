@@ -0,0 +1,155 @@
+"""
+Exportação de chamados em streaming: `GET /chamados/exportar`.
+
+O que importa além do conteúdo: o corpo sai lote a lote, sem nunca segurar
+mais que um lote em memória, e o CSV manda o cabeçalho antes de a consulta
+rodar. As duas coisas são medidas no gerador do corpo, porque o TestClient
+junta a resposta inteira antes de devolvê-la.
+"""
+
+import csv
+import io
+import json
+
+import pytest
+from sqlalchemy import event, select
+
+from app.api.endpoints import chamados as rota_de_chamados
+from app.models import Chamado, SLAConfig
+from app.services import exportacao_service
+
+URL = "/api/v1/chamados/exportar"
+
+
+@pytest.fixture
+def tecnico(autenticar, dados):
+    return autenticar(dados["tecnico_id"], "tecnico.teste", "Tecnico")
+
+
+@pytest.fixture
+def lote_pequeno(monkeypatch):
+    monkeypatch.setattr(rota_de_chamados, "LOTE_DA_EXPORTACAO", 3)
+    return 3
+
+
+@pytest.fixture
+def espiao(sessao):
+    """Comandos SQL disparados durante o teste."""
+    comandos = []
+
+    def _comando(conn, cursor, statement, *args):
+        comandos.append(statement)
+
+    event.listen(sessao.bind, "before_cursor_execute", _comando)
+    yield comandos
+    event.remove(sessao.bind, "before_cursor_execute", _comando)
+
+
+def _chamados(sessao, dados, quantidade, **campos):
+    sessao.add(SLAConfig(prioridade="Média", minutos_resposta=60, minutos_resolucao=480))
+    for i in range(quantidade):
+        sessao.add(Chamado(
+            id=1000 + i,
+            protocolo=f"CH-EXPORT-{i}",
+            solicitante_id=dados["comum_id"],
+            titulo="Chamado exportado",
+            descricao="Gerado pelo teste de exportação",
+            prioridade="Média",
+            status="Aberto",
+            **campos,
+        ))
+    sessao.commit()
+
+
+def test_ndjson_traz_todos_com_o_formato_da_leitura(cliente, sessao, dados, tecnico, lote_pequeno):
+    _chamados(sessao, dados, 10)
+
+    resposta = cliente.get(URL, headers=tecnico)
+    assert resposta.status_code == 200, resposta.text
+    assert resposta.headers["content-type"].startswith("application/x-ndjson")
+
+    linhas = [json.loads(linha) for linha in resposta.text.splitlines()]
+    assert [c["id"] for c in linhas] == [dados["chamado_id"]] + list(range(1000, 1010))
+
+    leitura = cliente.get(f"/api/v1/chamados/{linhas[-1]['id']}", headers=tecnico).json()
+    for campo in ("protocolo", "status", "solicitante_nome", "data_abertura"):
+        assert linhas[-1][campo] == leitura[campo], campo
+    assert linhas[-1]["sla"]["situacao"] == leitura["sla"]["situacao"]
+
+
+def test_csv_tem_bom_cabecalho_e_sla_achatado(cliente, sessao, dados, tecnico, lote_pequeno):
+    _chamados(sessao, dados, 4)
+
+    resposta = cliente.get(URL, params={"formato": "csv"}, headers=tecnico)
+    assert resposta.status_code == 200, resposta.text
+    assert resposta.headers["content-type"].startswith("text/csv")
+    assert 'filename="chamados.csv"' in resposta.headers["content-disposition"]
+    assert resposta.text.startswith("\ufeff")
+
+    linhas = list(csv.DictReader(io.StringIO(resposta.text.lstrip("\ufeff"))))
+    assert len(linhas) == 5
+    assert list(linhas[0]) == exportacao_service.COLUNAS_CSV
+    assert linhas[-1]["protocolo"] == "CH-EXPORT-3"
+    assert linhas[-1]["sla_situacao"] == "No prazo"
+    assert linhas[-1]["solicitante_nome"] == "usuario.teste"
+
+
+def test_filtros_sao_os_da_listagem(cliente, sessao, dados, tecnico):
+    _chamados(sessao, dados, 3, cancelado=True)
+
+    padrao = cliente.get(URL, headers=tecnico).text.splitlines()
+    assert len(padrao) == 1  # cancelados ficam fora, como na listagem
+
+    todos = cliente.get(URL, params={"incluir_cancelados": True}, headers=tecnico).text.splitlines()
+    assert len(todos) == 4
+
+    nenhum = cliente.get(URL, params={"status": "Fechado"}, headers=tecnico)
+    assert nenhum.status_code == 200
+    assert nenhum.text == ""
+
+
+def test_usuario_comum_nao_exporta(cliente, dados, autenticar):
+    comum = autenticar(dados["comum_id"], "usuario.teste", "Usuario")
+    assert cliente.get(URL, headers=comum).status_code == 403
+
+
+def test_formato_desconhecido_e_422(cliente, dados, tecnico):
+    assert cliente.get(URL, params={"formato": "xlsx"}, headers=tecnico).status_code == 422
+
+
+def test_memoria_nao_passa_de_um_lote(sessao, dados, lote_pequeno, monkeypatch):
+    """
+    O identity map é onde os chamados lidos ficariam acumulados. Medido no
+    momento em que cada lote ganha SLA, ele nunca tem mais que um lote.
+    """
+    _chamados(sessao, dados, 10)
+    original = rota_de_chamados._anexar_sla
+    ocupacao = []
+
+    def _medir(chamados, db):
+        ocupacao.append(len(db.identity_map))
+        return original(chamados, db)
+
+    monkeypatch.setattr(rota_de_chamados, "_anexar_sla", _medir)
+    consulta = select(Chamado).order_by(Chamado.id)
+    pedacos = list(rota_de_chamados._lotes_exportados(sessao, consulta, "ndjson"))
+
+    assert len(pedacos) == 4  # 11 chamados em lotes de 3
+    assert max(ocupacao) <= lote_pequeno
+
+
+def test_corpo_sai_antes_de_a_consulta_terminar(sessao, dados, lote_pequeno, espiao):
+    _chamados(sessao, dados, 10)
+    consulta = select(Chamado).order_by(Chamado.id)
+
+    # CSV: o cabeçalho sai sem nenhum comando no banco.
+    csv_ = rota_de_chamados._lotes_exportados(sessao, consulta, "csv")
+    espiao.clear()
+    assert next(csv_).startswith("\ufeff")
+    assert espiao == []
+    csv_.close()
+
+    # NDJSON: o primeiro pedaço é o primeiro lote, não o resultado inteiro.
+    ndjson = rota_de_chamados._lotes_exportados(sessao, consulta, "ndjson")
+    assert len(next(ndjson).splitlines()) == lote_pequeno
+    ndjson.close()
@@ -0,0 +1,187 @@
+"""
+Filtro e ordenação da listagem de chamados pela situação de SLA, no banco.
+
+A situação devolvida em cada chamado é calculada em Python (`sla_do_snapshot`);
+o filtro `sla_situacao` é uma condição SQL sobre as colunas do snapshot. Os dois
+precisam concordar — um chamado que aparece em `?sla_situacao=Estourado` e
+responde "No prazo" é o tipo de defeito que tira a confiança na fila. Aqui os
+dois são comparados em chamados sorteados, gravados num SQLite de verdade.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import Chamado, SLAConfig
+from app.services.sla_service import (
+    PERCENTUAL_ATENCAO,
+    avancar_snapshot,
+    filtro_de_situacao,
+    limiar_de_atencao,
+    sla_do_snapshot,
+)
+
+STATUS = ["Aberto", "Em Andamento", "Aguardando", "Resolvido", "Fechado"]
+SITUACOES = ["No prazo", "Atenção", "Estourado"]
+
+
+def test_limiar_de_atencao_bate_com_o_percentual_da_resposta():
+    for prazo in range(1, 5000):
+        limiar = limiar_de_atencao(prazo)
+        assert round(limiar / prazo * 100) >= PERCENTUAL_ATENCAO, prazo
+        assert limiar == 0 or round((limiar - 1) / prazo * 100) < PERCENTUAL_ATENCAO, prazo
+
+
+def _popular(sessao, rnd, quantidade, com_segundos):
+    config = SLAConfig(prioridade="Média", minutos_resposta=60, minutos_resolucao=960)
+    sessao.add(config)
+
+    def _instante(base, ate_segundos):
+        delta = timedelta(seconds=rnd.randrange(ate_segundos))
+        instante = base + delta
+        return instante if com_segundos else instante.replace(second=0)
+
+    ultimo = datetime(2026, 8, 3)
+    for i in range(quantidade):
+        abertura = _instante(datetime(2026, 8, 3), 20 * 86_400)
+        chamado = Chamado(
+            id=1000 + i,
+            protocolo=f"CH-SLA-{i}",
+            solicitante_id=30,
+            titulo="Chamado sorteado",
+            descricao="Gerado pelo teste de fila de SLA",
+            prioridade="Média",
+            status="Aberto",
+            data_abertura=abertura,
+        )
+        avancar_snapshot(chamado, config, None, "Aberto", abertura)
+        instante = abertura
+        for _ in range(rnd.randrange(0, 5)):
+            novo = rnd.choice([s for s in STATUS if s != chamado.status])
+            instante = _instante(instante + timedelta(minutes=1), 3 * 86_400)
+            avancar_snapshot(chamado, config, chamado.status, novo, instante)
+            chamado.status = novo
+        ultimo = max(ultimo, instante)
+        sessao.add(chamado)
+    sessao.commit()
+    return config, ultimo
+
+
+def _comparar(sessao, config, agora):
+    chamados = sessao.query(Chamado).filter(Chamado.id >= 1000).all()
+    for situacao in SITUACOES:
+        no_banco = {
+            c.id
+            for c in sessao.query(Chamado.id).filter(
+                Chamado.id >= 1000, filtro_de_situacao(situacao, agora)
+            )
+        }
+        calculado = {
+            c.id for c in chamados if sla_do_snapshot(c, config, agora)["situacao"] == situacao
+        }
+        assert no_banco == calculado, (situacao, agora, no_banco ^ calculado)
+
+
+def test_filtro_coincide_com_a_situacao_calculada(sessao, dados):
+    """Instantes em minuto cheio: todos os estados, inclusive pausa em curso."""
+    rnd = random.Random(20261020)
+    config, ultimo = _popular(sessao, rnd, 400, com_segundos=False)
+    for _ in range(30):
+        # "Agora" nunca é anterior à última transição gravada.
+        agora = ultimo + timedelta(minutes=rnd.randrange(10 * 1440))
+        _comparar(sessao, config, agora)
+
+
+def test_filtro_coincide_com_segundos_fora_da_pausa(sessao, dados):
+    """
+    Com segundos, a pausa em curso tem a oscilação de um minuto descrita em
+    `filtro_de_situacao`; os demais estados têm de bater exatamente.
+    """
+    rnd = random.Random(20261021)
+    config, ultimo = _popular(sessao, rnd, 400, com_segundos=True)
+    sessao.query(Chamado).filter(Chamado.status == "Aguardando").delete()
+    sessao.commit()
+    for _ in range(30):
+        agora = ultimo + timedelta(seconds=rnd.randrange(10 * 86_400))
+        _comparar(sessao, config, agora)
+
+
+def test_cancelado_nao_entra_em_situacao_nenhuma(sessao, dados):
+    config, _ = _popular(sessao, random.Random(1), 5, com_segundos=False)
+    sessao.query(Chamado).filter(Chamado.id >= 1000).update({"cancelado": True})
+    sessao.commit()
+    for situacao in SITUACOES:
+        assert not sessao.query(Chamado).filter(filtro_de_situacao(situacao, datetime(2027, 1, 1))).count()
+
+
+# ---------------------------------------------------------------------------
+# Pela rota
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def tecnico(autenticar, dados):
+    return autenticar(dados["tecnico_id"], "tecnico.teste", "Tecnico")
+
+
+def _chamado_com_estouro_em(sessao, config, id, dias):
+    """
+    Chamado cujo relógio estoura daqui a `dias` dias (negativo = já estourou).
+
+    As fronteiras são gravadas direto, a dias de distância do relógio da
+    máquina: o que se testa aqui é a rota, não a aritmética — e uma fronteira
+    tão longe de "agora" não depende de fuso nem do instante da execução.
+    """
+    agora = datetime.now().replace(second=0, microsecond=0)
+    chamado = Chamado(
+        id=id,
+        protocolo=f"CH-ROTA-{id}",
+        solicitante_id=30,
+        titulo="Chamado da rota",
+        descricao="Gerado pelo teste de rota",
+        prioridade="Média",
+        status="Aberto",
+        data_abertura=agora - timedelta(days=60),
+    )
+    avancar_snapshot(chamado, config, None, "Aberto", chamado.data_abertura)
+    chamado.sla_atencao_em = agora + timedelta(days=dias - 1)
+    chamado.sla_estouro_em = agora + timedelta(days=dias)
+    chamado.sla_prazo_resolucao = chamado.sla_estouro_em
+    sessao.add(chamado)
+    return chamado
+
+
+def test_rota_filtra_e_ordena_por_prazo(cliente, sessao, dados, tecnico):
+    config = SLAConfig(prioridade="Média", minutos_resposta=60, minutos_resolucao=480)
+    sessao.add(config)
+    _chamado_com_estouro_em(sessao, config, 501, -4)
+    _chamado_com_estouro_em(sessao, config, 502, -9)
+    _chamado_com_estouro_em(sessao, config, 503, 3)  # no prazo
+    sessao.commit()
+
+    resposta = cliente.get(
+        "/api/v1/chamados/",
+        params={"sla_situacao": "Estourado", "ordenar": "prazo_resolucao"},
+        headers=tecnico,
+    )
+    assert resposta.status_code == 200, resposta.text
+    assert [c["id"] for c in resposta.json()] == [502, 501]
+
+    resposta = cliente.get("/api/v1/chamados/", params={"sla_situacao": "No prazo"}, headers=tecnico)
+    assert [c["id"] for c in resposta.json()] == [503]
+
+
+def test_ordenar_por_prazo_deixa_sem_sla_no_fim(cliente, sessao, dados, tecnico):
+    config = SLAConfig(prioridade="Média", minutos_resposta=60, minutos_resolucao=480)
+    sessao.add(config)
+    _chamado_com_estouro_em(sessao, config, 501, 3)
+    sessao.commit()
+
+    resposta = cliente.get("/api/v1/chamados/", params={"ordenar": "prazo_resolucao"}, headers=tecnico)
+    # O chamado do fixture não tem snapshot.
+    assert [c["id"] for c in resposta.json()] == [501, dados["chamado_id"]]
+
+
+@pytest.mark.parametrize("parametro", [{"sla_situacao": "Atrasado"}, {"ordenar": "titulo"}])
+def test_valor_desconhecido_e_422(cliente, dados, tecnico, parametro):
+    assert cliente.get("/api/v1/chamados/", params=parametro, headers=tecnico).status_code == 422
@@ -0,0 +1,187 @@
+"""
+Equivalência do motor de horas úteis com a implementação iterativa anterior.
+
+O motor passou a calcular os dias inteiros por aritmética em vez de andar dia a
+dia (ver a docstring de `horario_util`). A troca só é segura se o resultado
+for o MESMO, minuto a minuto — inclusive nos casos feios: instantes com
+segundos, início fora do expediente, fim de semana nas duas pontas. Um minuto
+de diferença muda o prazo de todo chamado aberto.
+
+A referência abaixo é a implementação anterior, copiada sem alteração. Ela
+mora aqui, e não no app, porque o único uso dela é servir de oráculo.
+
+As propriedades são verificadas contra alguns milhares de casos sorteados com
+semente fixa: a cobertura de um teste baseado em propriedades, sem dependência
+nova e com a mesma sequência a cada execução — falha que aparece uma vez
+aparece sempre.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.horario_util import (
+    JANELAS,
+    contar_minutos_uteis,
+    somar_minutos_uteis,
+)
+
+# ---------------------------------------------------------------------------
+# Referência: a implementação iterativa, como estava antes da troca
+# ---------------------------------------------------------------------------
+
+_MAX_ITERACOES = 10_000
+
+
+def _e_dia_util(d):
+    return d.weekday() < 5
+
+
+def _ref_minutos_no_dia(dia, inicio, fim):
+    if not _e_dia_util(dia):
+        return 0
+    total = 0
+    for janela_inicio, janela_fim in JANELAS:
+        abertura = datetime.combine(dia, janela_inicio)
+        fechamento = datetime.combine(dia, janela_fim)
+        ini = max(abertura, inicio)
+        f = min(fechamento, fim)
+        if f > ini:
+            total += int((f - ini).total_seconds() // 60)
+    return total
+
+
+def referencia_contar(inicio, fim):
+    if fim <= inicio:
+        return 0
+    total = 0
+    dia = inicio.date()
+    while dia <= fim.date():
+        total += _ref_minutos_no_dia(dia, inicio, fim)
+        dia += timedelta(days=1)
+    return total
+
+
+def _ref_proximo_instante_util(dt):
+    while True:
+        if not _e_dia_util(dt.date()):
+            dt = datetime.combine(dt.date() + timedelta(days=1), JANELAS[0][0])
+            continue
+        for janela_inicio, janela_fim in JANELAS:
+            abertura = datetime.combine(dt.date(), janela_inicio)
+            fechamento = datetime.combine(dt.date(), janela_fim)
+            if dt < abertura:
+                return abertura
+            if dt < fechamento:
+                return dt
+        dt = datetime.combine(dt.date() + timedelta(days=1), JANELAS[0][0])
+
+
+def _ref_fim_da_janela(dt):
+    for janela_inicio, janela_fim in JANELAS:
+        abertura = datetime.combine(dt.date(), janela_inicio)
+        fechamento = datetime.combine(dt.date(), janela_fim)
+        if abertura <= dt < fechamento:
+            return fechamento
+    raise ValueError(f"{dt} não está dentro do expediente")
+
+
+def referencia_somar(inicio, minutos):
+    atual = _ref_proximo_instante_util(inicio)
+    if minutos <= 0:
+        return atual
+    restante = minutos
+    for _ in range(_MAX_ITERACOES):
+        atual = _ref_proximo_instante_util(atual)
+        fim_janela = _ref_fim_da_janela(atual)
+        disponivel = int((fim_janela - atual).total_seconds() // 60)
+        if restante <= disponivel:
+            return atual + timedelta(minutes=restante)
+        restante -= disponivel
+        atual = fim_janela
+    raise RuntimeError(f"somar_minutos_uteis não convergiu para {minutos} minutos")
+
+
+# ---------------------------------------------------------------------------
+# Geradores de casos
+# ---------------------------------------------------------------------------
+
+SEMENTE = 20260803
+CASOS = 3000
+
+_BASE = datetime(2025, 12, 29)  # uma segunda-feira
+
+
+def _instante(rnd: random.Random, dias: int = 120) -> datetime:
+    """
+    Instante qualquer, com viés para as fronteiras: metade dos sorteios cai em
+    hora cheia ou em abertura/fechamento de janela, onde os erros de um motor
+    de expediente costumam morar.
+    """
+    dia = _BASE + timedelta(days=rnd.randrange(dias))
+    if rnd.random() < 0.5:
+        hora = rnd.choice([0, 7, 8, 11, 12, 13, 16, 17, 18, 23])
+        return dia.replace(hour=hora, minute=rnd.choice([0, 0, 1, 59]))
+    return dia + timedelta(seconds=rnd.randrange(86_400), microseconds=rnd.randrange(1_000_000))
+
+
+def _pares(semente: int, dias_de_alcance: int):
+    rnd = random.Random(semente)
+    for _ in range(CASOS):
+        inicio = _instante(rnd)
+        fim = inicio + timedelta(
+            days=rnd.randrange(dias_de_alcance),
+            seconds=rnd.randrange(86_400),
+            microseconds=rnd.randrange(1_000_000),
+        )
+        if rnd.random() < 0.1:
+            inicio, fim = fim, inicio  # intervalos invertidos também
+        yield inicio, fim
+
+
+# ---------------------------------------------------------------------------
+# Propriedades
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("alcance", [1, 10, 60, 800])
+def test_contar_coincide_com_a_referencia(alcance):
+    for inicio, fim in _pares(SEMENTE + alcance, alcance):
+        assert contar_minutos_uteis(inicio, fim) == referencia_contar(inicio, fim), (inicio, fim)
+
+
+@pytest.mark.parametrize("teto", [600, 10_000, 250_000])
+def test_somar_coincide_com_a_referencia(teto):
+    rnd = random.Random(SEMENTE + teto)
+    for _ in range(CASOS):
+        inicio = _instante(rnd)
+        # Múltiplos exatos de dia e de janela são os casos de fronteira do
+        # `divmod` — sorteados de propósito, não deixados ao acaso.
+        minutos = rnd.choice([
+            rnd.randrange(-5, teto),
+            rnd.randrange(1, teto // 240 + 2) * 240,
+            rnd.randrange(1, teto // 480 + 2) * 480,
+        ])
+        assert somar_minutos_uteis(inicio, minutos) == referencia_somar(inicio, minutos), (
+            inicio,
+            minutos,
+        )
+
+
+def test_ida_e_volta_em_casos_sorteados():
+    """Contar o intervalo devolvido por somar tem de dar o que foi somado."""
+    rnd = random.Random(SEMENTE)
+    for _ in range(CASOS):
+        inicio = _instante(rnd).replace(second=0, microsecond=0)
+        minutos = rnd.randrange(0, 50_000)
+        assert contar_minutos_uteis(inicio, somar_minutos_uteis(inicio, minutos)) == minutos
+
+
+def test_contar_e_aditivo():
+    """Partir o intervalo em qualquer ponto não muda o total (sem segundos)."""
+    rnd = random.Random(SEMENTE + 1)
+    for _ in range(CASOS):
+        a, b, c = sorted(
+            _instante(rnd, dias=400).replace(second=0, microsecond=0) for _ in range(3)
+        )
+        assert contar_minutos_uteis(a, c) == contar_minutos_uteis(a, b) + contar_minutos_uteis(b, c)
@@ -0,0 +1,132 @@
+"""
+Limite de requisições da `/api/v1`: `app/core/limite_de_requisicoes.py`.
+
+O que se cobre: o balde isolado (rajada, reposição, custo, devolução, teto
+de chaves); e, pelo TestClient, que o 429 sai antes da rota, com Retry-After
+e com os headers de CORS, que um usuário no limite não atinge outro nem
+gasta o balde do IP que eles dividem, e que a saúde fica de fora. As capacidades são encolhidas por teste para as contas serem
+pequenas; o fixture `limites_zerados` do conftest esvazia os baldes.
+"""
+
+import pytest
+
+from app.core.limite_de_requisicoes import (
+    BaldesDeFichas,
+    baldes_por_ip,
+    baldes_por_usuario,
+    custo_da_rota,
+)
+
+T0 = 1000.0
+
+
+# ---------------------------------------------------------------------------
+# BaldesDeFichas isolado
+# ---------------------------------------------------------------------------
+
+def test_rajada_ate_a_capacidade_e_depois_espera():
+    baldes = BaldesDeFichas(capacidade=3, por_segundo=0.5)
+    assert [baldes.consumir("a", agora=T0) for _ in range(3)] == [0, 0, 0]
+
+    # Sem ficha: uma ficha a 0,5 por segundo são 2 s.
+    assert baldes.consumir("a", agora=T0) == pytest.approx(2)
+    assert baldes.consumir("a", agora=T0 + 2) == 0
+    assert baldes.estatisticas()["recusadas"] == 1
+
+
+def test_reposicao_nao_passa_da_capacidade():
+    baldes = BaldesDeFichas(capacidade=3, por_segundo=1)
+    baldes.consumir("a", agora=T0)
+    assert [baldes.consumir("a", agora=T0 + 1000) for _ in range(4)][-1] > 0
+
+
+def test_custo_acima_da_capacidade_vale_o_balde_cheio():
+    baldes = BaldesDeFichas(capacidade=3, por_segundo=1)
+    assert baldes.consumir("a", custo=30, agora=T0) == 0
+    assert baldes.consumir("a", custo=1, agora=T0) == pytest.approx(1)
+
+
+def test_capacidade_zero_desliga():
+    baldes = BaldesDeFichas(capacidade=0, por_segundo=0)
+    assert all(baldes.consumir("a", agora=T0) == 0 for _ in range(100))
+    assert baldes.estatisticas()["chaves"] == 0
+
+
+def test_teto_de_chaves():
+    baldes = BaldesDeFichas(capacidade=5, por_segundo=1, max_chaves=10, fatias=2)
+    for i in range(500):
+        baldes.consumir(f"ip{i}", agora=T0)
+    assert baldes.estatisticas()["chaves"] <= 10
+
+
+def test_listagem_custa_mais_que_leitura():
+    assert custo_da_rota("GET", "/api/v1/chamados/") == custo_da_rota("GET", "/api/v1/chamados") > 1
+    assert custo_da_rota("GET", "/api/v1/chamados/100") == 1
+    assert custo_da_rota("GET", "/api/v1/comentarios/chamado/100") > 1
+    assert custo_da_rota("POST", "/api/v1/chamados/") == 1
+
+
+# ---------------------------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def capacidades(monkeypatch):
+    def definir(usuario, ip, por_segundo=0.001):
+        for baldes, capacidade in ((baldes_por_usuario, usuario), (baldes_por_ip, ip)):
+            monkeypatch.setattr(baldes, "capacidade", capacidade)
+            monkeypatch.setattr(baldes, "por_segundo", por_segundo)
+
+    return definir
+
+
+def test_usuario_no_limite_leva_429_e_outro_nao(cliente, dados, autenticar, capacidades):
+    capacidades(usuario=3, ip=100)
+    comum = autenticar(dados["comum_id"], "usuario.teste", "Usuario")
+    tecnico = autenticar(dados["tecnico_id"], "tecnico.teste", "Tecnico")
+
+    codigos = [cliente.get("/api/v1/chamados/100", headers=comum).status_code for _ in range(4)]
+    assert codigos == [200, 200, 200, 429]
+
+    assert cliente.get("/api/v1/chamados/100", headers=tecnico).status_code == 200
+
+
+def test_usuario_no_limite_nao_gasta_o_balde_do_ip(cliente, dados, autenticar, capacidades):
+    # Os dois atrás do mesmo IP, como num escritório com NAT.
+    capacidades(usuario=3, ip=6)
+    comum = autenticar(dados["comum_id"], "usuario.teste", "Usuario")
+    tecnico = autenticar(dados["tecnico_id"], "tecnico.teste", "Tecnico")
+
+    codigos = [cliente.get("/api/v1/chamados/100", headers=comum).status_code for _ in range(20)]
+    assert codigos.count(200) == 3 and codigos.count(429) == 17
+
+    assert cliente.get("/api/v1/chamados/100", headers=tecnico).status_code == 200
+
+
+def test_devolver_nao_passa_da_capacidade():
+    baldes = BaldesDeFichas(capacidade=3, por_segundo=0.5)
+    baldes.consumir("a", agora=T0)
+    baldes.devolver("a", 5)
+    assert [baldes.consumir("a", agora=T0) for _ in range(4)] == [0, 0, 0, pytest.approx(2)]
+
+
+def test_429_traz_retry_after_e_cors(cliente, dados, autenticar, capacidades):
+    capacidades(usuario=5, ip=100)
+    comum = dict(autenticar(dados["comum_id"], "usuario.teste", "Usuario"), Origin="http://localhost:5173")
+
+    assert cliente.get("/api/v1/chamados/", headers=comum).status_code == 200
+    resposta = cliente.get("/api/v1/chamados/", headers=comum)
+
+    assert resposta.status_code == 429
+    assert int(resposta.headers["retry-after"]) > 0
+    assert resposta.headers["access-control-allow-origin"] == "http://localhost:5173"
+
+
+def test_sem_token_conta_no_ip(cliente, capacidades):
+    capacidades(usuario=100, ip=2)
+    assert [cliente.get("/api/v1/chamados/100").status_code for _ in range(3)] == [401, 401, 429]
+
+
+def test_saude_fica_de_fora(cliente, sessao, capacidades):
+    capacidades(usuario=1, ip=1)
+    assert {cliente.get("/api/v1/health").status_code for _ in range(5)} == {200}
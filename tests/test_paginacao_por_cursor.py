@@ -0,0 +1,301 @@
+"""
+Paginação por cursor das listagens de chamados, comentários, histórico,
+usuários e da trilha de auditoria.
+
+A propriedade central: percorrer pelo cursor entrega exatamente as mesmas
+linhas, na mesma ordem, que a listagem inteira de uma vez — sem repetir e sem
+pular, inclusive nos empates da chave e quando entra registro novo no meio do
+caminho (que é onde o offset falha).
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.api.cursor import CABECALHO_PROXIMO_CURSOR, codificar_cursor
+from app.models import Chamado, ComentarioChamado, EventoDeConta, EventoDeSetor, HistoricoChamado, Usuario
+from app.services import trilha_service
+
+
+@pytest.fixture
+def tecnico(autenticar, dados):
+    return autenticar(dados["tecnico_id"], "tecnico.teste", "Tecnico")
+
+
+def _percorrer(cliente, url, headers, limit, **params):
+    """Todas as páginas pelo cursor; devolve os ids e o número de requisições."""
+    ids, requisicoes, cursor = [], 0, None
+    while True:
+        consulta = dict(params, limit=limit)
+        if cursor:
+            consulta["cursor"] = cursor
+        resposta = cliente.get(url, params=consulta, headers=headers)
+        assert resposta.status_code == 200, resposta.text
+        requisicoes += 1
+        ids.extend(item["id"] for item in resposta.json())
+        cursor = resposta.headers.get(CABECALHO_PROXIMO_CURSOR)
+        if not cursor:
+            return ids, requisicoes
+
+
+def _chamados(sessao, quantidade, prazo=lambda i: None):
+    for i in range(quantidade):
+        sessao.add(Chamado(
+            id=1000 + i,
+            protocolo=f"CH-CURSOR-{i}",
+            solicitante_id=30,
+            titulo="Chamado paginado",
+            descricao="Gerado pelo teste de cursor",
+            prioridade="Média",
+            status="Aberto",
+            sla_prazo_resolucao=prazo(i),
+        ))
+    sessao.commit()
+
+
+# ---------------------------------------------------------------------------
+# Chamados
+# ---------------------------------------------------------------------------
+
+def test_cursor_percorre_os_chamados_como_a_listagem_inteira(cliente, sessao, dados, tecnico):
+    _chamados(sessao, 10)
+    inteira = [c["id"] for c in cliente.get("/api/v1/chamados/", headers=tecnico).json()]
+
+    ids, requisicoes = _percorrer(cliente, "/api/v1/chamados/", tecnico, limit=4)
+    assert ids == inteira
+    assert requisicoes == 3  # 4 + 4 + 3 (11 chamados, com o do fixture)
+
+    # Última página cheia: uma requisição a mais, que volta vazia e sem cursor.
+    ids, requisicoes = _percorrer(cliente, "/api/v1/chamados/", tecnico, limit=11)
+    assert ids == inteira
+    assert requisicoes == 2
+
+
+def test_pagina_incompleta_nao_traz_cursor(cliente, dados, tecnico):
+    resposta = cliente.get("/api/v1/chamados/", params={"limit": 50}, headers=tecnico)
+    assert len(resposta.json()) == 1
+    assert CABECALHO_PROXIMO_CURSOR not in resposta.headers
+
+
+def test_chamado_novo_no_topo_nao_desloca_a_pagina_seguinte(cliente, sessao, dados, tecnico):
+    _chamados(sessao, 6)
+    primeira = cliente.get("/api/v1/chamados/", params={"limit": 3}, headers=tecnico)
+    cursor = primeira.headers[CABECALHO_PROXIMO_CURSOR]
+
+    # Entra um chamado entre uma página e outra. Com skip=3, o último da
+    # primeira página apareceria de novo.
+    sessao.add(Chamado(
+        id=2000, protocolo="CH-CURSOR-NOVO", solicitante_id=30, titulo="Novo",
+        descricao="Entrou no meio", prioridade="Média", status="Aberto",
+    ))
+    sessao.commit()
+
+    segunda = cliente.get("/api/v1/chamados/", params={"limit": 3, "cursor": cursor}, headers=tecnico)
+    assert [c["id"] for c in primeira.json()] == [1005, 1004, 1003]
+    assert [c["id"] for c in segunda.json()] == [1002, 1001, 1000]
+
+
+def test_cursor_na_ordenacao_por_prazo_com_empates_e_sem_prazo(cliente, sessao, dados, tecnico):
+    base = datetime(2026, 8, 3, 8)
+    # Prazos repetidos de três em três, e um terço dos chamados sem prazo.
+    _chamados(sessao, 12, prazo=lambda i: None if i % 3 == 0 else base + timedelta(hours=i // 3))
+    params = {"ordenar": "prazo_resolucao"}
+    inteira = [c["id"] for c in cliente.get("/api/v1/chamados/", params=params, headers=tecnico).json()]
+
+    for limit in (1, 2, 5):
+        ids, _ = _percorrer(cliente, "/api/v1/chamados/", tecnico, limit=limit, **params)
+        assert ids == inteira, limit
+
+
+def test_cursor_de_uma_ordenacao_nao_vale_na_outra(cliente, sessao, dados, tecnico):
+    _chamados(sessao, 4)
+    cursor = cliente.get("/api/v1/chamados/", params={"limit": 2}, headers=tecnico).headers[CABECALHO_PROXIMO_CURSOR]
+    resposta = cliente.get(
+        "/api/v1/chamados/",
+        params={"limit": 2, "cursor": cursor, "ordenar": "prazo_resolucao"},
+        headers=tecnico,
+    )
+    assert resposta.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "isto-nao-e-base64!",
+        codificar_cursor("id", ["1000"]),
+        codificar_cursor("id", [True]),
+        codificar_cursor("id", [None]),
+        codificar_cursor("id", [1, 2]),
+        "W10",  # base64 de "[]"
+    ],
+    ids=["lixo", "id-texto", "id-booleano", "id-nulo", "chave-longa", "json-sem-objeto"],
+)
+def test_cursor_invalido_e_400(cliente, dados, tecnico, cursor):
+    resposta = cliente.get("/api/v1/chamados/", params={"cursor": cursor}, headers=tecnico)
+    assert resposta.status_code == 400
+
+
+def test_cursor_com_skip_e_400(cliente, dados, tecnico):
+    cursor = codificar_cursor("id", [1000])
+    resposta = cliente.get("/api/v1/chamados/", params={"cursor": cursor, "skip": 10}, headers=tecnico)
+    assert resposta.status_code == 400
+
+
+def test_skip_continua_funcionando_e_tambem_devolve_cursor(cliente, sessao, dados, tecnico):
+    _chamados(sessao, 5)
+    resposta = cliente.get("/api/v1/chamados/", params={"skip": 2, "limit": 2}, headers=tecnico)
+    assert [c["id"] for c in resposta.json()] == [1002, 1001]
+
+    cursor = resposta.headers[CABECALHO_PROXIMO_CURSOR]
+    seguinte = cliente.get("/api/v1/chamados/", params={"cursor": cursor, "limit": 2}, headers=tecnico)
+    assert [c["id"] for c in seguinte.json()] == [1000, dados["chamado_id"]]
+
+
+def test_header_do_cursor_e_exposto_ao_navegador(cliente, dados, tecnico):
+    resposta = cliente.get(
+        "/api/v1/chamados/",
+        params={"limit": 1},
+        headers={**tecnico, "Origin": "http://localhost:5173"},
+    )
+    assert CABECALHO_PROXIMO_CURSOR in resposta.headers["access-control-expose-headers"]
+
+
+# ---------------------------------------------------------------------------
+# Comentários, histórico e usuários
+# ---------------------------------------------------------------------------
+
+def test_cursor_nos_comentarios_respeita_os_internos(cliente, sessao, dados, autenticar, tecnico):
+    chamado_id = dados["chamado_id"]
+    for i in range(7):
+        sessao.add(ComentarioChamado(
+            chamado_id=chamado_id, usuario_id=20, comentario=f"comentário {i}", is_interno=(i % 2 == 1),
+        ))
+    sessao.commit()
+    url = f"/api/v1/comentarios/chamado/{chamado_id}"
+
+    todos, _ = _percorrer(cliente, url, tecnico, limit=2)
+    assert todos == sorted(todos) and len(todos) == 7
+
+    comum = autenticar(dados["comum_id"], "comum.teste", "Usuario")
+    publicos, _ = _percorrer(cliente, url, comum, limit=2)
+    assert len(publicos) == 4
+    assert set(publicos) < set(todos)
+
+
+def test_cursor_no_historico_desempata_pelo_id(cliente, sessao, dados, tecnico):
+    chamado_id = dados["chamado_id"]
+    instante = datetime(2026, 8, 3, 9)
+    # Pares de registros no mesmo instante: só o id separa um do outro.
+    for i in range(9):
+        sessao.add(HistoricoChamado(
+            chamado_id=chamado_id, usuario_id=20, acao="Teste",
+            created_at=instante + timedelta(minutes=i // 2),
+        ))
+    sessao.commit()
+    url = f"/api/v1/historico/chamado/{chamado_id}"
+    inteira = [h["id"] for h in cliente.get(url, headers=tecnico).json()]
+
+    for limit in (1, 2, 3):
+        ids, _ = _percorrer(cliente, url, tecnico, limit=limit)
+        assert ids == inteira, limit
+
+
+def test_cursor_nos_usuarios_respeita_os_filtros(cliente, sessao, dados, tecnico):
+    for i in range(7):
+        sessao.add(Usuario(id=100 + i, nome=f"usuario.{i}", role_id=3, setor_id=1, ativo=(i % 2 == 0)))
+    sessao.commit()
+    url = "/api/v1/usuarios/"
+    inteira = [u["id"] for u in cliente.get(url, headers=tecnico).json()]
+    assert inteira == sorted(inteira) and len(inteira) == 10
+
+    for limit in (1, 2, 3):
+        ids, _ = _percorrer(cliente, url, tecnico, limit=limit)
+        assert ids == inteira, limit
+
+    ativos, _ = _percorrer(cliente, url, tecnico, limit=2, ativo=True)
+    assert ativos == [10, 20, 30, 100, 102, 104, 106]
+
+
+# ---------------------------------------------------------------------------
+# Trilha de auditoria
+# ---------------------------------------------------------------------------
+
+def _trilha(sessao, dados, pares):
+    """
+    `pares` eventos de conta e de setor com os MESMOS ids e instantes: o empate
+    de `created_at` e de id entre as tabelas só se desfaz pelo `alvo_tipo`. Os
+    ids 1 e 2 de cada lado ficam sem data, e vão para o fim.
+    """
+    instante = datetime(2026, 8, 3, 9)
+    for i in range(1, pares + 1):
+        criado = instante + timedelta(minutes=i // 3)
+        sessao.add(EventoDeConta(
+            id=i, usuario_id=dados["comum_id"], ator_id=dados["admin_id"],
+            acao="alteracao_de_nome", created_at=criado,
+        ))
+        sessao.add(EventoDeSetor(
+            id=i, setor_id=1, setor_nome="TI", ator_id=dados["admin_id"],
+            acao="alteracao_de_nome", created_at=criado,
+        ))
+    sessao.flush()
+    # None no construtor dispararia o default da coluna; nulo só por UPDATE,
+    # como a linha inserida por SQL direto que isto imita.
+    for modelo in (EventoDeConta, EventoDeSetor):
+        sessao.query(modelo).filter(modelo.id <= 2).update({"created_at": None})
+    sessao.commit()
+
+
+def _percorrer_trilha(cliente, headers, limit):
+    chaves, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        resposta = cliente.get("/api/v1/eventos/", params=params, headers=headers)
+        assert resposta.status_code == 200, resposta.text
+        chaves.extend(e["chave"] for e in resposta.json())
+        cursor = resposta.headers.get(CABECALHO_PROXIMO_CURSOR)
+        if not cursor:
+            return chaves
+
+
+def test_cursor_percorre_a_trilha_como_a_listagem_inteira(cliente, sessao, dados, autenticar):
+    _trilha(sessao, dados, 8)
+    admin = autenticar(dados["admin_id"], "admin.teste", "Administrador")
+    inteira = [e["chave"] for e in cliente.get("/api/v1/eventos/", headers=admin).json()]
+    assert len(inteira) == 16
+    assert inteira[-4:] == ["usuario:2", "setor:2", "usuario:1", "setor:1"]  # os sem data, no fim
+
+    for limit in (1, 2, 3, 5):
+        assert _percorrer_trilha(cliente, admin, limit) == inteira, limit
+
+
+def test_pagina_da_trilha_por_cursor_le_no_maximo_limit_de_cada_tabela(cliente, sessao, dados, autenticar, monkeypatch):
+    _trilha(sessao, dados, 8)
+    admin = autenticar(dados["admin_id"], "admin.teste", "Administrador")
+    limites = []
+    for nome in ("eventos_de_conta", "eventos_de_setor"):
+        original = getattr(trilha_service, nome)
+
+        def _espiao(*args, _original=original, **kwargs):
+            linhas = _original(*args, **kwargs)
+            limites.append((kwargs["limite"], len(linhas)))
+            return linhas
+
+        monkeypatch.setattr(trilha_service, nome, _espiao)
+
+    _percorrer_trilha(cliente, admin, limit=3)
+    # Até a última página, nenhuma tabela entrega mais que `limit` linhas —
+    # por skip, a sexta página pediria 18 de cada lado.
+    assert limites and all(limite == 3 and lidas <= 3 for limite, lidas in limites)
+
+
+def test_cursor_da_trilha_com_alvo_desconhecido_e_400(cliente, dados, autenticar):
+    admin = autenticar(dados["admin_id"], "admin.teste", "Administrador")
+    cursor = codificar_cursor("trilha", [datetime(2026, 8, 3), 1, "chamado"])
+    resposta = cliente.get("/api/v1/eventos/", params={"cursor": cursor}, headers=admin)
+    assert resposta.status_code == 400
+
+
+def test_cursor_de_outra_listagem_nao_vale_na_trilha(cliente, dados, autenticar):
+    admin = autenticar(dados["admin_id"], "admin.teste", "Administrador")
+    resposta = cliente.get("/api/v1/eventos/", params={"cursor": codificar_cursor("id", [5])}, headers=admin)
+    assert resposta.status_code == 400
@@ -0,0 +1,105 @@
+"""
+bcrypt fora das threads de requisição: `app/core/pool_de_senhas.py`.
+
+O que se cobre: o hash sai de um processo do pool e confere na volta; o teto
+de operações em curso recusa na hora, sem esperar, e vira 503 no login sem
+contar como falha; e o login regrava o hash feito com outro custo.
+"""
+
+import threading
+
+import pytest
+from passlib.context import CryptContext
+
+from app.api.endpoints import auth as auth_ep
+from app.core import security
+from app.core.config import settings
+from app.core.pool_de_senhas import FilaDeSenhasCheia, PoolDeSenhas
+from app.models import Usuario
+
+SENHA = "senha-do-teste-123"
+
+
+def _login(cliente, nome="usuario.teste", senha=SENHA):
+    return cliente.post("/api/v1/auth/login", json={"nome": nome, "senha": senha})
+
+
+@pytest.fixture
+def contadores_zerados():
+    auth_ep._falhas_por_usuario.reset()
+    auth_ep._falhas_por_ip.reset()
+    yield
+    auth_ep._falhas_por_usuario.reset()
+    auth_ep._falhas_por_ip.reset()
+
+
+def test_hash_feito_no_processo_confere(monkeypatch):
+    pool = PoolDeSenhas(processos=1, max_pendentes=2)
+    monkeypatch.setattr(security, "pool_de_senhas", pool)
+    try:
+        senha_hash = security.gerar_hash_senha(SENHA)
+        assert pool._executor is not None
+        assert security.verificar_senha(SENHA, senha_hash)
+        assert not security.verificar_senha("outra", senha_hash)
+    finally:
+        pool.encerrar()
+    assert pool.estatisticas()["pendentes"] == 0
+
+
+def test_teto_recusa_sem_esperar():
+    pool = PoolDeSenhas(processos=0, max_pendentes=1)
+    dentro, liberar = threading.Event(), threading.Event()
+
+    def _ocupar():
+        dentro.set()
+        liberar.wait(5)
+
+    ocupante = threading.Thread(target=pool.executar, args=(_ocupar,))
+    ocupante.start()
+    try:
+        assert dentro.wait(5)
+        with pytest.raises(FilaDeSenhasCheia):
+            pool.executar(str, 1)
+        assert pool.estatisticas() == {"processos": 0, "max_pendentes": 1, "pendentes": 1, "recusadas": 1}
+    finally:
+        liberar.set()
+        ocupante.join(5)
+
+    assert pool.executar(str, 1) == "1"
+
+
+def test_login_com_fila_cheia_e_503_e_nao_conta_falha(cliente, sessao, dados, monkeypatch, contadores_zerados):
+    sessao.get(Usuario, dados["comum_id"]).senha_hash = security.gerar_hash_senha(SENHA)
+    sessao.commit()
+    monkeypatch.setattr(security, "pool_de_senhas", PoolDeSenhas(processos=0, max_pendentes=0))
+
+    resposta = _login(cliente)
+
+    assert resposta.status_code == 503
+    assert resposta.headers["retry-after"] == "1"
+    assert auth_ep._falhas_por_usuario.segundos_ate_liberar("usuario.teste") == 0
+
+
+def test_login_regrava_hash_de_outro_custo(cliente, sessao, dados, contadores_zerados):
+    custo_antigo = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+    sessao.get(Usuario, dados["comum_id"]).senha_hash = custo_antigo.hash(SENHA)
+    sessao.commit()
+
+    assert _login(cliente).status_code == 200
+    sessao.expire_all()
+    regravado = sessao.get(Usuario, dados["comum_id"]).senha_hash
+    assert regravado.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+
+    assert _login(cliente).status_code == 200
+    sessao.expire_all()
+    assert sessao.get(Usuario, dados["comum_id"]).senha_hash == regravado
+
+
+def test_senha_errada_nao_regrava(cliente, sessao, dados, contadores_zerados):
+    antigo = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash(SENHA)
+    sessao.get(Usuario, dados["comum_id"]).senha_hash = antigo
+    sessao.commit()
+
+    assert _login(cliente, senha="errada").status_code == 401
+    sessao.expire_all()
+    assert sessao.get(Usuario, dados["comum_id"]).senha_hash == antigo
@@ -0,0 +1,101 @@
+"""
+Número de protocolo sob concorrência.
+
+O gerador antigo lia "o maior protocolo do ano" e somava um; duas aberturas ao
+mesmo tempo saíam com o mesmo número. Aqui várias threads abrem chamados ao
+mesmo tempo, cada uma com a própria sessão, num SQLite em ARQUIVO — o banco em
+memória dos outros testes tem uma conexão só, e nele não existe concorrência
+para provar nada.
+"""
+
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models import Chamado, ProtocoloContador, Role, Usuario
+from app.services.chamado_service import gerar_protocolo
+from app.utils.timezone import agora_brasilia
+
+THREADS = 16
+POR_THREAD = 5
+
+
+@pytest.fixture
+def fabrica(tmp_path):
+    # timeout: quanto a conexão espera pela trava de escrita de outra antes de
+    # desistir. O padrão de 5 s basta; o valor alto só evita flutuação em CI.
+    engine = create_engine(f"sqlite:///{tmp_path}/protocolo.db", connect_args={"timeout": 60})
+    Base.metadata.create_all(engine)
+    Sessao = sessionmaker(bind=engine)
+    with Sessao() as db:
+        db.add(Role(id=1, nome="Usuario"))
+        db.add(Usuario(id=1, nome="solicitante", role_id=1, ativo=True))
+        db.commit()
+    yield Sessao
+    engine.dispose()
+
+
+def _abrir(db) -> str:
+    protocolo = gerar_protocolo(db)
+    db.add(Chamado(
+        protocolo=protocolo,
+        solicitante_id=1,
+        titulo="Chamado concorrente",
+        descricao="Aberto por uma das threads do teste",
+        prioridade="Média",
+        status="Aberto",
+    ))
+    db.commit()
+    return protocolo
+
+
+def test_aberturas_simultaneas_nao_repetem_numero(fabrica):
+    largada = threading.Barrier(THREADS)
+    protocolos, erros = [], []
+
+    def trabalhar():
+        largada.wait()
+        try:
+            with fabrica() as db:
+                for _ in range(POR_THREAD):
+                    protocolos.append(_abrir(db))
+        except Exception as erro:  # noqa: BLE001 — o teste quer ver qualquer falha
+            erros.append(erro)
+
+    threads = [threading.Thread(target=trabalhar) for _ in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not erros, erros
+    ano = agora_brasilia().year
+    total = THREADS * POR_THREAD
+    # Únicos, e sem buraco: 1..total, cada um exatamente uma vez.
+    assert sorted(protocolos) == [f"CHAM-{ano}-{n:04d}" for n in range(1, total + 1)]
+    with fabrica() as db:
+        assert db.get(ProtocoloContador, ano).ultimo == total
+
+
+def test_abertura_desfeita_devolve_o_numero(fabrica):
+    with fabrica() as db:
+        primeiro = _abrir(db)
+        gerar_protocolo(db)
+        db.rollback()
+        segundo = _abrir(db)
+    assert int(segundo.split("-")[-1]) == int(primeiro.split("-")[-1]) + 1
+
+
+def test_contador_semeado_continua_de_onde_parou(fabrica):
+    """O que a migration faz com os protocolos que já existiam."""
+    ano = agora_brasilia().year
+    with fabrica() as db:
+        db.add(ProtocoloContador(ano=ano, ultimo=837))
+        db.add(ProtocoloContador(ano=ano - 1, ultimo=5000))
+        db.commit()
+        assert _abrir(db) == f"CHAM-{ano}-0838"
+        # O contador de outro ano não é tocado.
+        assert db.get(ProtocoloContador, ano - 1).ultimo == 5000
@@ -1,8 +1,9 @@
 """
 Testes do limitador de tentativas de login.
 
-Cobrem a JanelaDeslizante isolada, a leitura do IP real por trás do proxy, e o
-ciclo 401 -> 429 no endpoint. São a evidência de que a proteção contra força
+Cobrem a JanelaDeslizante isolada, o modo aproximado, o armazenamento
+compartilhado no banco, a leitura do IP real por trás do proxy, e o ciclo
+401 -> 429 no endpoint. São a evidência de que a proteção contra força
 bruta funciona: sem eles, qualquer mexida no /auth/login passa a ser um salto
 no escuro.
 
@@ -14,11 +15,21 @@ import threading
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.pool import StaticPool
 
 import main
 from app.api.deps import get_db
 from app.api.endpoints import auth as auth_ep
-from app.core.rate_limit import JanelaDeslizante
+from app.core.database import Base
+from app.core.rede import ip_do_cliente
+from app.core.rate_limit import (
+    ContadoresAproximados,
+    JanelaDeslizante,
+    MarcasNoBanco,
+    criar_armazenamento,
+)
+from app.models import MarcaDeTentativa
 
 T0 = 1000.0  # instante arbitrário; monotonic não tem época definida
 
@@ -90,7 +101,7 @@ def test_teto_de_chaves_impede_crescimento_sem_limite():
     for i in range(500):
         j.registrar(f"user{i}", T0)
 
-    assert len(j._eventos) <= 10
+    assert len(j._armazenamento._eventos) <= 10
 
 
 def test_sem_perda_de_contagem_sob_concorrencia():
@@ -110,7 +121,7 @@ def test_sem_perda_de_contagem_sob_concorrencia():
     for t in threads:
         t.join()
 
-    assert len(j._eventos["concorrente"]) == 8 * 500
+    assert len(j._armazenamento._eventos["concorrente"]) == 8 * 500
 
 
 @pytest.mark.parametrize("max_eventos,janela", [(0, 100), (-1, 100), (5, 0), (5, -1)])
@@ -119,6 +130,161 @@ def test_configuracao_invalida_falha_na_construcao(max_eventos, janela):
         JanelaDeslizante(max_eventos=max_eventos, janela_segundos=janela)
 
 
+# ---------------------------------------------------------------------------
+# Modo aproximado (LOGIN_LIMITE_ARMAZENAMENTO=aproximado)
+# ---------------------------------------------------------------------------
+#
+# Com janela de 100 s, os baldes começam nos múltiplos de 100: T0 = 1000 é o
+# início de um, e as contas abaixo saem fechadas.
+
+def _aproximada(max_eventos=3, **kwargs):
+    return JanelaDeslizante(
+        max_eventos=max_eventos, janela_segundos=100, armazenamento=ContadoresAproximados(**kwargs)
+    )
+
+
+def test_aproximado_bloqueia_no_limite_ate_o_balde_seguinte():
+    j = _aproximada()
+    for i in range(3):
+        j.registrar("a", T0 + i)
+
+    # O balde atual sozinho está no limite: só libera quando, já como
+    # anterior, o peso dele cair abaixo de 3 — logo depois de T0 + 100.
+    assert j.segundos_ate_liberar("a", T0 + 3) == 98
+    assert j.segundos_ate_liberar("a", T0 + 100.5) == 0
+
+
+def test_aproximado_pesa_o_balde_anterior_pelo_que_resta_dele():
+    j = _aproximada()
+    for i in range(4):
+        j.registrar("a", T0 + 90 + i)
+
+    # Em T0 + 110, 90% do balde anterior ainda está na janela: 4 * 0,9 = 3,6.
+    # Cai abaixo de 3 quando restarem 75%, em T0 + 125.
+    assert j.segundos_ate_liberar("a", T0 + 110) == 16
+    assert j.segundos_ate_liberar("a", T0 + 126) == 0
+    # Dois baldes depois, nada sobra.
+    j.registrar("a", T0 + 200)
+    assert j.segundos_ate_liberar("a", T0 + 200) == 0
+
+
+def test_aproximado_limpar_e_chaves_independentes():
+    j = _aproximada(max_eventos=1)
+    j.registrar("a", T0)
+    assert j.segundos_ate_liberar("a", T0) > 0
+    assert j.segundos_ate_liberar("b", T0) == 0
+
+    j.limpar("a")
+    assert j.segundos_ate_liberar("a", T0) == 0
+
+
+def test_aproximado_tem_memoria_fixa():
+    contadores = ContadoresAproximados(max_chaves=10, fatias=2)
+    j = JanelaDeslizante(max_eventos=5, janela_segundos=100, armazenamento=contadores)
+    for i in range(500):
+        j.registrar(f"user{i}", T0)
+
+    assert sum(len(f.vagas) for f in contadores._fatias) <= 10
+    assert all(len(f.atual) == 5 for f in contadores._fatias)
+    # A última a registrar nunca é a despejada.
+    assert "user499" in contadores._fatia("user499").vagas
+
+
+def test_aproximado_sem_perda_de_contagem_sob_concorrencia():
+    contadores = ContadoresAproximados()
+    j = JanelaDeslizante(max_eventos=8 * 500, janela_segundos=100, armazenamento=contadores)
+
+    def martelar():
+        for _ in range(500):
+            j.registrar("concorrente", T0)
+
+    threads = [threading.Thread(target=martelar) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # Exatamente 8 x 500: no limite de 4000, e abaixo do de 4001.
+    assert j.segundos_ate_liberar("concorrente", T0) > 0
+    acima = JanelaDeslizante(max_eventos=8 * 500 + 1, janela_segundos=100, armazenamento=contadores)
+    assert acima.segundos_ate_liberar("concorrente", T0) == 0
+
+
+# ---------------------------------------------------------------------------
+# Armazenamento no banco (LOGIN_LIMITE_ARMAZENAMENTO=banco)
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def banco():
+    """Banco próprio: o armazenamento usa o Engine direto, sem sessão."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine, tables=[MarcaDeTentativa.__table__])
+    yield engine
+    engine.dispose()
+
+
+def _no_banco(engine, escopo="login_usuario", max_eventos=3):
+    return JanelaDeslizante(
+        max_eventos=max_eventos, janela_segundos=100, armazenamento=MarcasNoBanco(engine, escopo)
+    )
+
+
+def test_dois_processos_somam_a_mesma_contagem(banco):
+    """
+    O motivo do armazenamento no banco: com dois workers, cada um com a sua
+    JanelaDeslizante, a contagem ainda é uma só.
+    """
+    worker_a, worker_b = _no_banco(banco), _no_banco(banco)
+    worker_a.registrar("a", T0)
+    worker_b.registrar("a", T0 + 1)
+    worker_a.registrar("a", T0 + 2)
+
+    assert worker_b.segundos_ate_liberar("a", T0 + 3) == 98
+    worker_b.limpar("a")
+    assert worker_a.segundos_ate_liberar("a", T0 + 3) == 0
+
+
+def test_no_banco_a_janela_desliza_e_apaga_as_vencidas(banco):
+    j = _no_banco(banco)
+    for i in range(3):
+        j.registrar("a", T0 + i)
+    assert j.segundos_ate_liberar("a", T0 + 99) > 0
+    assert j.segundos_ate_liberar("a", T0 + 101) == 0
+
+    # A falha seguinte leva as marcas vencidas do escopo, de qualquer chave.
+    j.registrar("b", T0 + 200)
+    with banco.connect() as conexao:
+        assert conexao.execute(select(MarcaDeTentativa.instante)).scalars().all() == [T0 + 200]
+
+
+def test_escopos_no_mesmo_banco_nao_se_somam(banco):
+    por_usuario, por_ip = _no_banco(banco, "login_usuario", 1), _no_banco(banco, "login_ip", 1)
+    por_usuario.registrar("a", T0)
+
+    assert por_usuario.segundos_ate_liberar("a", T0) > 0
+    assert por_ip.segundos_ate_liberar("a", T0) == 0
+    por_ip.reset()
+    assert por_usuario.segundos_ate_liberar("a", T0) > 0
+
+
+def test_no_banco_a_chave_nao_fica_em_texto_claro(banco):
+    _no_banco(banco).registrar("fulano.silva", T0)
+
+    with banco.connect() as conexao:
+        (chave,) = conexao.execute(select(MarcaDeTentativa.chave)).scalars().all()
+    assert "fulano" not in chave and len(chave) == 64
+
+
+def test_armazenamento_desconhecido_e_recusado():
+    with pytest.raises(ValueError, match="banco"):
+        criar_armazenamento("redis", "login_ip")
+    assert criar_armazenamento(" Memoria ", "login_ip").espera("x", T0, 100, 1) is None
+
+
 # ---------------------------------------------------------------------------
 # Identificação do IP por trás do proxy
 # ---------------------------------------------------------------------------
@@ -145,25 +311,25 @@ def test_ip_com_um_proxy_usa_o_ultimo_elemento(hops):
     """
     hops(1)
     req = _RequisicaoFalsa({"x-forwarded-for": "1.1.1.1 , 203.0.113.9"})
-    assert auth_ep._ip_do_cliente(req) == "203.0.113.9"
+    assert ip_do_cliente(req) == "203.0.113.9"
 
 
 def test_ip_sem_proxy_ignora_o_header(hops):
     hops(0)
     req = _RequisicaoFalsa({"x-forwarded-for": "1.1.1.1"})
-    assert auth_ep._ip_do_cliente(req) == "10.0.0.1"
+    assert ip_do_cliente(req) == "10.0.0.1"
 
 
 def test_ip_sem_header_usa_o_da_conexao(hops):
     hops(1)
     req = _RequisicaoFalsa({})
-    assert auth_ep._ip_do_cliente(req) == "10.0.0.1"
+    assert ip_do_cliente(req) == "10.0.0.1"
 
 
 def test_ip_com_dois_proxies_pula_os_dois_ultimos(hops):
     hops(2)
     req = _RequisicaoFalsa({"x-forwarded-for": "1.1.1.1, 203.0.113.9, 10.1.0.5"})
-    assert auth_ep._ip_do_cliente(req) == "203.0.113.9"
+    assert ip_do_cliente(req) == "203.0.113.9"
 
 
 # ---------------------------------------------------------------------------
@@ -249,3 +415,16 @@ def test_bloqueio_de_um_usuario_nao_atinge_outro(cliente):
         _tentar(cliente, nome="admin")
 
     assert _tentar(cliente, nome="outro.usuario").status_code == 401
+
+
+def test_login_com_a_contagem_no_banco(cliente, banco, monkeypatch):
+    """O endpoint não muda com o armazenamento: 401 até o limite, depois 429."""
+    limite = main.settings.LOGIN_MAX_FALHAS_POR_USUARIO
+    monkeypatch.setattr(auth_ep, "_falhas_por_usuario", JanelaDeslizante(
+        max_eventos=limite,
+        janela_segundos=main.settings.LOGIN_JANELA_SEGUNDOS,
+        armazenamento=MarcasNoBanco(banco, "login_usuario"),
+    ))
+
+    assert [_tentar(cliente).status_code for _ in range(limite)] == [401] * limite
+    assert _tentar(cliente).status_code == 429
@@ -13,11 +13,12 @@ Datas de referência:
     2026-08-03 segunda ... 2026-08-09 domingo
 """
 
-from datetime import date
+import random
+from datetime import date, timedelta
 
 import pytest
 
-from app.services.recorrencia_service import calcular_proxima_data
+from app.services.recorrencia_service import calcular_proxima_data, expandir_ocorrencias
 
 SEGUNDA = date(2026, 8, 3)
 QUARTA = date(2026, 8, 5)
@@ -197,3 +198,49 @@ def test_resultado_e_sempre_depois_da_base(tipo, intervalo, dia_semana, dia_mes)
     """
     for base in (SEGUNDA, QUARTA, DOMINGO, date(2026, 1, 31), date(2026, 12, 31)):
         assert calcular_proxima_data(tipo, intervalo, dia_semana, dia_mes, base) > base
+
+
+# ---------------------------------------------------------------------------
+# Expansão em intervalo (agenda)
+# ---------------------------------------------------------------------------
+
+def _em_cadeia(tipo, intervalo, dia_semana, dia_mes, primeira, de, ate):
+    """Referência: `calcular_proxima_data` chamada ocorrência a ocorrência."""
+    datas, atual = [], primeira
+    while atual <= ate:
+        if atual >= de:
+            datas.append(atual)
+        atual = calcular_proxima_data(tipo, intervalo, dia_semana, dia_mes, atual)
+    return datas
+
+
+def test_expansao_bate_com_as_chamadas_em_cadeia():
+    """
+    O passo aritmético e o salto até `de` precisam dar exatamente as datas
+    que a função de sempre daria uma a uma — padrões e intervalos sorteados,
+    semente fixa.
+    """
+    rnd = random.Random(20260810)
+    for _ in range(3000):
+        tipo = rnd.choice(["diaria", "semanal", "mensal"])
+        padrao = (tipo, rnd.randint(1, 4), rnd.randint(0, 6), rnd.randint(1, 31))
+        primeira = date(2026, 1, 1) + timedelta(days=rnd.randrange(400))
+        de = date(2026, 1, 1) + timedelta(days=rnd.randrange(500))
+        ate = de + timedelta(days=rnd.randrange(400))
+        assert list(expandir_ocorrencias(*padrao, primeira, de, ate)) == _em_cadeia(*padrao, primeira, de, ate), padrao
+
+
+def test_expansao_mensal_no_dia_31_respeita_meses_curtos():
+    datas = expandir_ocorrencias("mensal", 1, None, 31, date(2026, 1, 31), date(2026, 1, 1), date(2026, 4, 30))
+    assert list(datas) == [date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31), date(2026, 4, 30)]
+
+
+def test_expansao_comeca_na_primeira_mesmo_fora_do_padrao():
+    # Próxima data numa quarta, padrão das segundas: a quarta sai, depois as segundas.
+    datas = expandir_ocorrencias("semanal", 1, 1, None, QUARTA, QUARTA, date(2026, 8, 20))
+    assert list(datas) == [QUARTA, date(2026, 8, 10), date(2026, 8, 17)]
+
+
+def test_expansao_valida_o_padrao_mesmo_sem_data_no_intervalo():
+    with pytest.raises(ValueError, match="dia_semana"):
+        next(expandir_ocorrencias("semanal", 1, None, None, SEGUNDA, date(2025, 1, 1), date(2025, 1, 2)))
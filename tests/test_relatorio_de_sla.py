@@ -0,0 +1,229 @@
+"""
+Relatório mensal de SLA: `GET /relatorios/sla`.
+
+Os chamados são montados direto na sessão, com histórico e datas num mês
+passado (março de 2026), para os minutos úteis serem contas fechadas. O
+expediente é o padrão: seg-sex, 08-12 e 13-17.
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from app.models import Chamado, HistoricoChamado, SLAConfig
+from app.services import relatorio_sla_service
+from app.utils.timezone import agora_brasilia
+
+URL = "/api/v1/relatorios/sla"
+MARCO = {"ano": 2026, "mes": 3}
+
+
+@pytest.fixture
+def admin(autenticar, dados):
+    return autenticar(dados["admin_id"], "admin.teste", "Administrador")
+
+
+@pytest.fixture
+def configs(sessao, dados):
+    sessao.add(SLAConfig(prioridade="Média", minutos_resposta=60, minutos_resolucao=480))
+    sessao.add(SLAConfig(prioridade="Alta", minutos_resposta=30, minutos_resolucao=240))
+    sessao.commit()
+
+
+@pytest.fixture
+def espiao(sessao):
+    """Comandos SQL disparados durante o teste."""
+    comandos = []
+
+    def _comando(conn, cursor, statement, *args):
+        comandos.append(statement)
+
+    event.listen(sessao.bind, "before_cursor_execute", _comando)
+    yield comandos
+    event.remove(sessao.bind, "before_cursor_execute", _comando)
+
+
+def _encerrado(sessao, dados, chamado_id, transicoes, prioridade="Média", categoria_id=1, cancelado=False):
+    """
+    Chamado aberto no primeiro instante de `transicoes` e encerrado no último.
+    Cada transição é (instante, status_anterior, status_novo).
+    """
+    abertura = transicoes[0][0]
+    resolucao = transicoes[-1][0]
+    sessao.add(Chamado(
+        id=chamado_id,
+        protocolo=f"CH-REL-{chamado_id}",
+        solicitante_id=dados["comum_id"],
+        categoria_id=categoria_id,
+        titulo="Chamado do relatório",
+        descricao="Montado pelo teste",
+        prioridade=prioridade,
+        status=transicoes[-1][2],
+        cancelado=cancelado,
+        data_abertura=abertura,
+        data_resolucao=resolucao,
+    ))
+    for instante, anterior, novo in transicoes:
+        sessao.add(HistoricoChamado(
+            chamado_id=chamado_id,
+            usuario_id=dados["tecnico_id"],
+            acao="Alteração de status",
+            status_anterior=anterior,
+            status_novo=novo,
+            created_at=instante,
+        ))
+    sessao.commit()
+
+
+def _no_prazo(sessao, dados, chamado_id, **campos):
+    # Respondido em 30 min, resolvido em 60.
+    _encerrado(sessao, dados, chamado_id, [
+        (datetime(2026, 3, 2, 9, 0), None, "Aberto"),
+        (datetime(2026, 3, 2, 9, 30), "Aberto", "Em Andamento"),
+        (datetime(2026, 3, 2, 10, 0), "Em Andamento", "Resolvido"),
+    ], **campos)
+
+
+def _estourado(sessao, dados, chamado_id, **campos):
+    # Respondido em 120 min; 60 min em Aguardando; 960 úteis - 60 = 900 > 480.
+    _encerrado(sessao, dados, chamado_id, [
+        (datetime(2026, 3, 2, 9, 0), None, "Aberto"),
+        (datetime(2026, 3, 2, 11, 0), "Aberto", "Em Andamento"),
+        (datetime(2026, 3, 2, 13, 0), "Em Andamento", "Aguardando"),
+        (datetime(2026, 3, 2, 14, 0), "Aguardando", "Em Andamento"),
+        (datetime(2026, 3, 4, 9, 0), "Em Andamento", "Fechado"),
+    ], **campos)
+
+
+def _relatorio(cliente, headers, **params):
+    resposta = cliente.get(URL, params=params or MARCO, headers=headers)
+    assert resposta.status_code == 200, resposta.text
+    return resposta.json()
+
+
+class TestCalculo:
+    def test_percentuais_e_pausa_media(self, cliente, sessao, dados, configs, admin):
+        _no_prazo(sessao, dados, 1001)
+        _estourado(sessao, dados, 1002)
+
+        geral = _relatorio(cliente, admin)["geral"]
+        assert geral == {
+            "chamados": 2,
+            "resposta_cumprida_percentual": 50.0,
+            "resolucao_cumprida_percentual": 50.0,
+            "media_minutos_pausados": 30.0,
+        }
+
+    def test_por_prioridade_e_por_categoria(self, cliente, sessao, dados, configs, admin):
+        _no_prazo(sessao, dados, 1001)
+        _estourado(sessao, dados, 1002, prioridade="Alta", categoria_id=None)
+        _no_prazo(sessao, dados, 1003, prioridade="Alta")
+
+        corpo = _relatorio(cliente, admin)
+        por_prioridade = {p["prioridade"]: p for p in corpo["por_prioridade"]}
+        assert por_prioridade["Média"]["resolucao_cumprida_percentual"] == 100.0
+        assert por_prioridade["Alta"]["chamados"] == 2
+        assert por_prioridade["Alta"]["resolucao_cumprida_percentual"] == 50.0
+
+        assert [(c["categoria_id"], c["categoria_nome"], c["chamados"]) for c in corpo["por_categoria"]] == [
+            (None, None, 1),
+            (1, "Hardware", 2),
+        ]
+
+    def test_so_entram_os_encerrados_no_mes(self, cliente, sessao, dados, configs, admin):
+        _no_prazo(sessao, dados, 1001)
+        _no_prazo(sessao, dados, 1002, cancelado=True)
+        _encerrado(sessao, dados, 1003, [
+            (datetime(2026, 3, 31, 16, 0), None, "Aberto"),
+            (datetime(2026, 4, 1, 9, 0), "Aberto", "Resolvido"),
+        ])
+
+        assert _relatorio(cliente, admin)["geral"]["chamados"] == 1
+        assert _relatorio(cliente, admin, ano=2026, mes=4)["geral"]["chamados"] == 1
+
+    def test_prioridade_sem_prazo_conta_a_parte(self, cliente, sessao, dados, configs, admin):
+        _no_prazo(sessao, dados, 1001, prioridade="Baixa")
+
+        corpo = _relatorio(cliente, admin)
+        assert corpo["sem_sla"] == 1
+        assert corpo["geral"] == {
+            "chamados": 0,
+            "resposta_cumprida_percentual": None,
+            "resolucao_cumprida_percentual": None,
+            "media_minutos_pausados": None,
+        }
+
+    def test_lotes_pequenos_dao_o_mesmo_resultado(self, sessao, dados, configs):
+        for chamado_id in range(1001, 1008):
+            (_no_prazo if chamado_id % 2 else _estourado)(sessao, dados, chamado_id)
+
+        inteiro = relatorio_sla_service.calcular(sessao, 2026, 3)
+        em_lotes = relatorio_sla_service.calcular(sessao, 2026, 3, lote=2)
+        assert em_lotes.model_dump(exclude={"gerado_em"}) == inteiro.model_dump(exclude={"gerado_em"})
+
+    def test_lote_sai_da_sessao_depois_de_somado(self, sessao, dados, configs):
+        for chamado_id in range(1001, 1008):
+            _no_prazo(sessao, dados, chamado_id)
+        sessao.expunge_all()
+
+        lotes = relatorio_sla_service._lotes(sessao, *relatorio_sla_service.intervalo_do_mes(2026, 3), 3)
+        ocupacao = [len(sessao.identity_map) for _ in lotes]
+        assert ocupacao == [12, 12, 4]  # 3 chamados + 9 históricos; o último lote tem 1 + 3
+
+
+class TestCache:
+    def test_mes_fechado_e_calculado_uma_vez(self, cliente, sessao, dados, configs, admin, espiao):
+        _no_prazo(sessao, dados, 1001)
+        primeiro = _relatorio(cliente, admin)
+
+        _estourado(sessao, dados, 1002)  # gravado por fora: o cache não vê
+        espiao.clear()
+        segundo = _relatorio(cliente, admin)
+
+        assert segundo == primeiro
+        assert not any("FROM chamados" in comando for comando in espiao)
+
+    def test_renomear_categoria_aparece_no_mes_fechado(self, cliente, sessao, dados, configs, admin, espiao):
+        _no_prazo(sessao, dados, 1001)
+        assert _relatorio(cliente, admin)["por_categoria"][0]["categoria_nome"] == "Hardware"
+
+        resposta = cliente.put("/api/v1/categorias/1", json={"nome": "Equipamentos"}, headers=admin)
+        assert resposta.status_code == 200, resposta.text
+        espiao.clear()
+        grupo = _relatorio(cliente, admin)["por_categoria"][0]
+
+        assert grupo["categoria_nome"] == "Equipamentos"
+        assert grupo["chamados"] == 1
+        assert not any("FROM chamados" in comando for comando in espiao)  # os números vieram do cache
+
+    def test_mudar_o_prazo_recalcula(self, cliente, sessao, dados, configs, admin):
+        _estourado(sessao, dados, 1001)
+        assert _relatorio(cliente, admin)["geral"]["resolucao_cumprida_percentual"] == 0.0
+
+        resposta = cliente.put(
+            "/api/v1/sla-configs/Média",
+            json={"minutos_resposta": 180, "minutos_resolucao": 960},
+            headers=admin,
+        )
+        assert resposta.status_code == 200, resposta.text
+        assert _relatorio(cliente, admin)["geral"]["resolucao_cumprida_percentual"] == 100.0
+
+    def test_mes_corrente_nao_fica_no_cache(self, cliente, sessao, dados, configs, admin):
+        hoje = agora_brasilia()
+        corrente = {"ano": hoje.year, "mes": hoje.month}
+
+        corpo = _relatorio(cliente, admin, **corrente)
+        assert corpo["mes_fechado"] is False
+        assert relatorio_sla_service.cache_de_relatorios.buscar(
+            (hoje.year, hoje.month, relatorio_sla_service._assinatura_dos_prazos(sessao))
+        ) is None
+
+
+class TestAcesso:
+    def test_tecnico_nao_ve(self, cliente, dados, autenticar):
+        tecnico = autenticar(dados["tecnico_id"], "tecnico.teste", "Tecnico")
+        assert cliente.get(URL, params=MARCO, headers=tecnico).status_code == 403
+
+    def test_mes_invalido_e_422(self, cliente, admin):
+        assert cliente.get(URL, params={"ano": 2026, "mes": 13}, headers=admin).status_code == 422
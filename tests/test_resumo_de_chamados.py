@@ -0,0 +1,200 @@
+"""
+Contadores do painel: `GET /chamados/resumo` e `resumo_chamados`.
+
+O que se cobre: cada escrita de chamado move o total da combinação de antes
+para a de depois, na mesma transação; a leitura custa o mesmo com um chamado
+ou com muitos; e a reconciliação acha e corrige o que foi gravado por fora
+da API. O chamado do fixture `dados` é um desses — entra direto pela sessão —,
+então quase todo teste começa reconciliando.
+"""
+
+import random
+
+import pytest
+from sqlalchemy import event
+
+from app.comandos import reconciliar_resumo
+from app.models import Chamado, ResumoDeChamados
+from app.services import resumo_service
+
+URL = "/api/v1/chamados/resumo"
+
+
+@pytest.fixture
+def tecnico(autenticar, dados):
+    return autenticar(dados["tecnico_id"], "tecnico.teste", "Tecnico")
+
+
+@pytest.fixture
+def admin(autenticar, dados):
+    return autenticar(dados["admin_id"], "admin.teste", "Administrador")
+
+
+@pytest.fixture
+def reconciliado(sessao, dados):
+    """Totais batendo com `chamados`, incluindo o chamado do fixture."""
+    resumo_service.reconciliar(sessao)
+    sessao.commit()
+
+
+@pytest.fixture
+def espiao(sessao):
+    """Comandos SQL disparados durante o teste."""
+    comandos = []
+
+    def _comando(conn, cursor, statement, *args):
+        comandos.append(statement)
+
+    event.listen(sessao.bind, "before_cursor_execute", _comando)
+    yield comandos
+    event.remove(sessao.bind, "before_cursor_execute", _comando)
+
+
+def _abrir(cliente, headers, dados, titulo="Monitor sem sinal de vídeo"):
+    resposta = cliente.post(
+        "/api/v1/chamados/",
+        json={"titulo": titulo, "descricao": "Cabo trocado e continua sem imagem", "solicitante_id": dados["comum_id"]},
+        headers=headers,
+    )
+    assert resposta.status_code == 201, resposta.text
+    return resposta.json()
+
+
+def _resumo(cliente, headers, **params):
+    resposta = cliente.get(URL, params=params, headers=headers)
+    assert resposta.status_code == 200, resposta.text
+    return resposta.json()
+
+
+def _sem_divergencia(sessao):
+    sessao.expire_all()
+    assert resumo_service.reconciliar(sessao, corrigir=False) == []
+
+
+class TestEscritasMovemOsTotais:
+    def test_abertura_soma_um(self, cliente, dados, tecnico, reconciliado, sessao):
+        antes = _resumo(cliente, tecnico)
+        _abrir(cliente, tecnico, dados)
+        depois = _resumo(cliente, tecnico)
+
+        assert depois["total"] == antes["total"] + 1
+        assert depois["por_status"]["Aberto"] == antes["por_status"]["Aberto"] + 1
+        _sem_divergencia(sessao)
+
+    def test_status_e_tecnico_mudam_de_combinacao(self, cliente, dados, tecnico, reconciliado, sessao):
+        url = f"/api/v1/chamados/{dados['chamado_id']}"
+        cliente.put(url, json={"status": "Em Andamento", "tecnico_responsavel_id": dados["tecnico_id"]}, headers=tecnico)
+
+        resumo = _resumo(cliente, tecnico)
+        assert resumo["por_status"] == {"Em Andamento": 1}
+        assert resumo["por_tecnico"] == [
+            {"tecnico_responsavel_id": dados["tecnico_id"], "tecnico_responsavel_nome": "tecnico.teste", "total": 1}
+        ]
+        _sem_divergencia(sessao)
+
+    def test_cancelado_e_arquivado_saem_do_padrao(self, cliente, dados, tecnico, reconciliado, sessao):
+        outro = _abrir(cliente, tecnico, dados)
+        cliente.patch(f"/api/v1/chamados/{dados['chamado_id']}/cancelar", headers=tecnico)
+        cliente.patch(f"/api/v1/chamados/{outro['id']}/arquivar", headers=tecnico)
+
+        assert _resumo(cliente, tecnico)["total"] == 0
+        assert _resumo(cliente, tecnico, incluir_cancelados=True)["total"] == 1
+        assert _resumo(cliente, tecnico, incluir_cancelados=True, incluir_arquivados=True)["total"] == 2
+
+        cliente.patch(f"/api/v1/chamados/{outro['id']}/desarquivar", headers=tecnico)
+        assert _resumo(cliente, tecnico)["total"] == 1
+        _sem_divergencia(sessao)
+
+    def test_exclusao_subtrai(self, cliente, dados, tecnico, admin, reconciliado, sessao):
+        assert cliente.delete(f"/api/v1/chamados/{dados['chamado_id']}", headers=admin).status_code == 204
+        assert _resumo(cliente, tecnico)["total"] == 0
+        _sem_divergencia(sessao)
+
+    def test_edicao_fora_da_chave_nao_escreve_no_resumo(self, cliente, dados, tecnico, reconciliado, espiao):
+        espiao.clear()
+        resposta = cliente.put(
+            f"/api/v1/chamados/{dados['chamado_id']}",
+            json={"observacoes": "Usuário vai trazer o equipamento"},
+            headers=tecnico,
+        )
+        assert resposta.status_code == 200, resposta.text
+        assert not any("resumo_chamados" in comando for comando in espiao)
+
+    def test_sequencia_qualquer_de_escritas_bate_com_a_contagem(
+        self, cliente, dados, tecnico, admin, reconciliado, sessao
+    ):
+        sorteio = random.Random(16)
+        ids = [dados["chamado_id"]] + [_abrir(cliente, tecnico, dados)["id"] for _ in range(5)]
+        for _ in range(30):
+            chamado_id = sorteio.choice(ids)
+            url = f"/api/v1/chamados/{chamado_id}"
+            operacao = sorteio.choice(["status", "prioridade", "tecnico", "cancelar", "arquivar", "desarquivar"])
+            if operacao == "status":
+                cliente.put(url, json={"status": sorteio.choice(["Aberto", "Em Andamento", "Aguardando", "Resolvido"])}, headers=tecnico)
+            elif operacao == "prioridade":
+                cliente.put(url, json={"prioridade": sorteio.choice(["Baixa", "Média", "Alta", "Crítica"])}, headers=tecnico)
+            elif operacao == "tecnico":
+                cliente.put(url, json={"tecnico_responsavel_id": sorteio.choice([dados["tecnico_id"], dados["admin_id"]])}, headers=tecnico)
+            else:
+                cliente.patch(f"{url}/{operacao}", headers=tecnico)  # 400 quando não se aplica, e tudo bem
+        cliente.delete(f"/api/v1/chamados/{ids[-1]}", headers=admin)
+
+        _sem_divergencia(sessao)
+
+
+class TestLeitura:
+    def test_custo_nao_cresce_com_os_chamados(self, cliente, sessao, dados, tecnico, reconciliado, espiao):
+        cliente.put(f"/api/v1/chamados/{dados['chamado_id']}", json={"tecnico_responsavel_id": dados["tecnico_id"]}, headers=tecnico)
+        _resumo(cliente, tecnico)
+        espiao.clear()
+        _resumo(cliente, tecnico)
+        um = len(espiao)
+
+        for _ in range(20):
+            _abrir(cliente, tecnico, dados)
+        _resumo(cliente, tecnico)
+        espiao.clear()
+        corpo = _resumo(cliente, tecnico)
+
+        assert corpo["total"] == 21
+        assert len(espiao) == um
+
+    def test_somas_batem_com_as_celulas(self, cliente, dados, tecnico, reconciliado):
+        _abrir(cliente, tecnico, dados)
+        corpo = _resumo(cliente, tecnico)
+
+        assert sum(c["total"] for c in corpo["celulas"]) == corpo["total"] == 2
+        assert sum(corpo["por_prioridade"].values()) == corpo["total"]
+        assert corpo["por_tecnico"] == [
+            {"tecnico_responsavel_id": None, "tecnico_responsavel_nome": None, "total": 2}
+        ]
+
+
+class TestReconciliacao:
+    def test_chamado_gravado_por_fora_aparece_como_divergencia(self, sessao, dados):
+        divergencias = resumo_service.reconciliar(sessao)
+        sessao.commit()
+
+        assert divergencias == [resumo_service.Divergencia(
+            chave=(False, False, "Aberto", "Média", resumo_service.SEM_TECNICO), gravado=0, contado=1
+        )]
+        assert resumo_service.reconciliar(sessao, corrigir=False) == []
+
+    def test_total_errado_e_corrigido(self, sessao, dados, reconciliado):
+        linha = sessao.query(ResumoDeChamados).one()
+        linha.total = 7
+        sessao.commit()
+
+        assert [d.gravado for d in reconciliar_resumo.reconciliar(sessao)] == [7]
+        assert sessao.query(ResumoDeChamados).one().total == 1
+
+    def test_verificar_nao_grava(self, sessao, dados):
+        assert len(reconciliar_resumo.reconciliar(sessao, corrigir=False)) == 1
+        assert sessao.query(ResumoDeChamados).count() == 0
+
+    def test_combinacao_que_sumiu_vai_a_zero(self, sessao, dados, reconciliado):
+        sessao.query(Chamado).delete()
+        sessao.commit()
+
+        assert [(d.gravado, d.contado) for d in resumo_service.reconciliar(sessao)] == [(1, 0)]
+        assert resumo_service.ler(sessao) == []
@@ -38,7 +38,7 @@ RAIZ = Path(__file__).resolve().parent.parent
 SCHEMA_SQL = RAIZ / "schema_chamados.sql"
 
 _CREATE_TABLE = re.compile(
-    r"CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?([A-Za-z_][A-Za-z0-9_]*)\s*\(",
+    r"CREATE\s+(?:UNLOGGED\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?([A-Za-z_][A-Za-z0-9_]*)\s*\(",
     re.IGNORECASE,
 )
 _ADD_COLUMN = re.compile(
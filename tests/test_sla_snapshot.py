@@ -0,0 +1,256 @@
+"""
+Snapshot de SLA gravado no chamado.
+
+O snapshot só vale se der o MESMO bloco que `calcular_sla` daria a partir do
+histórico, em qualquer sequência de transições e em qualquer "agora". A
+primeira parte verifica isso com sequências sorteadas (semente fixa, como em
+test_horario_util_equivalencia); a segunda, que as rotas mantêm o snapshot em
+dia e que a listagem deixou de ler `historico_chamados`.
+"""
+
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from app.comandos.recalcular_sla import recalcular
+from app.models import Chamado, HistoricoChamado, SLAConfig
+from app.services.sla_service import (
+    avancar_snapshot,
+    calcular_sla,
+    reconstruir_snapshot,
+    sla_do_snapshot,
+)
+
+STATUS = ["Aberto", "Em Andamento", "Aguardando", "Resolvido", "Fechado"]
+SEMENTE = 20261018
+
+
+def _config(resolucao=960, resposta=120):
+    return SimpleNamespace(minutos_resolucao=resolucao, minutos_resposta=resposta)
+
+
+def _chamado(abertura):
+    return SimpleNamespace(
+        data_abertura=abertura,
+        status="Aberto",
+        cancelado=False,
+        data_resolucao=None,
+        data_atualizacao=None,
+        sla_calculado_em=None,
+        sla_prazo_resposta=None,
+        sla_prazo_resolucao=None,
+        sla_minutos_pausados=None,
+        sla_relogio_parado_em=None,
+        sla_respondido_em=None,
+    )
+
+
+def _sequencia(rnd: random.Random):
+    """Chamado, config e histórico de uma sequência sorteada de transições."""
+    abertura = datetime(2026, 8, 3) + timedelta(seconds=rnd.randrange(20 * 86_400))
+    config = _config(rnd.choice([240, 480, 960, 2400]), rnd.choice([30, 60, 120]))
+    chamado = _chamado(abertura)
+    historicos = [SimpleNamespace(created_at=abertura, status_anterior=None, status_novo="Aberto")]
+    avancar_snapshot(chamado, config, None, "Aberto", abertura)
+
+    instante = abertura
+    for _ in range(rnd.randrange(0, 8)):
+        novo = rnd.choice([s for s in STATUS if s != chamado.status])
+        instante += timedelta(seconds=rnd.randrange(60, 3 * 86_400))
+        historicos.append(
+            SimpleNamespace(created_at=instante, status_anterior=chamado.status, status_novo=novo)
+        )
+        avancar_snapshot(chamado, config, chamado.status, novo, instante)
+        chamado.status = novo
+    return chamado, config, historicos, instante
+
+
+def test_snapshot_coincide_com_o_calculo_pelo_historico():
+    rnd = random.Random(SEMENTE)
+    for _ in range(2000):
+        chamado, config, historicos, ultimo = _sequencia(rnd)
+        agora = ultimo + timedelta(seconds=rnd.randrange(0, 10 * 86_400))
+        assert sla_do_snapshot(chamado, config, agora) == calcular_sla(
+            chamado, historicos, config, agora
+        ), (historicos, agora)
+
+
+def test_reconstrucao_coincide_com_o_caminho_incremental():
+    rnd = random.Random(SEMENTE + 1)
+    for _ in range(1000):
+        incremental, config, historicos, ultimo = _sequencia(rnd)
+        reconstruido = _chamado(incremental.data_abertura)
+        reconstruido.status = incremental.status
+        reconstruir_snapshot(reconstruido, list(reversed(historicos)), config, agora=ultimo)
+        for campo in (
+            "sla_prazo_resposta",
+            "sla_prazo_resolucao",
+            "sla_minutos_pausados",
+            "sla_relogio_parado_em",
+            "sla_respondido_em",
+        ):
+            assert getattr(reconstruido, campo) == getattr(incremental, campo), (campo, historicos)
+
+
+def test_pausa_em_curso_empurra_o_prazo_com_o_relogio():
+    abertura = datetime(2026, 8, 3, 8)
+    chamado = _chamado(abertura)
+    config = _config(resolucao=480)
+    avancar_snapshot(chamado, config, None, "Aberto", abertura)
+    avancar_snapshot(chamado, config, "Aberto", "Aguardando", datetime(2026, 8, 3, 10))
+    chamado.status = "Aguardando"
+
+    sla = sla_do_snapshot(chamado, config, agora=datetime(2026, 8, 3, 15))
+    assert sla["minutos_pausados"] == 240
+    assert sla["minutos_resolucao_consumidos"] == 120
+    # 480 de prazo + 240 pausados: a segunda inteira e a manhã de terça.
+    assert sla["prazo_resolucao"] == datetime(2026, 8, 4, 12)
+
+
+def test_cancelado_continua_sem_sla():
+    chamado = _chamado(datetime(2026, 8, 3, 8))
+    avancar_snapshot(chamado, _config(), None, "Aberto", chamado.data_abertura)
+    chamado.cancelado = True
+    assert sla_do_snapshot(chamado, _config(), agora=datetime(2026, 8, 3, 9)) is None
+
+
+# ---------------------------------------------------------------------------
+# Pelas rotas
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def configs(sessao, dados):
+    sessao.add_all([
+        SLAConfig(prioridade="Média", minutos_resposta=60, minutos_resolucao=480),
+        SLAConfig(prioridade="Alta", minutos_resposta=30, minutos_resolucao=240),
+    ])
+    sessao.commit()
+
+
+@pytest.fixture
+def admin(autenticar, dados):
+    return autenticar(dados["admin_id"], "admin.teste", "Administrador")
+
+
+def _abrir(cliente, admin):
+    resposta = cliente.post(
+        "/api/v1/chamados/",
+        json={
+            "titulo": "Monitor piscando sem parar",
+            "descricao": "O monitor da recepção pisca a cada minuto",
+            "prioridade": "Média",
+            "solicitante_id": 30,
+        },
+        headers=admin,
+    )
+    assert resposta.status_code == 201, resposta.text
+    return resposta.json()["id"]
+
+
+def _mudar(cliente, admin, chamado_id, **campos):
+    resposta = cliente.put(f"/api/v1/chamados/{chamado_id}", json=campos, headers=admin)
+    assert resposta.status_code == 200, resposta.text
+    return resposta.json()
+
+
+def _consultas_em(sessao, funcao):
+    consultas = []
+
+    def _anotar(conn, cursor, statement, *args):
+        consultas.append(statement)
+
+    event.listen(sessao.bind, "before_cursor_execute", _anotar)
+    try:
+        resultado = funcao()
+    finally:
+        event.remove(sessao.bind, "before_cursor_execute", _anotar)
+    return resultado, consultas
+
+
+def test_rotas_mantem_o_snapshot_e_a_listagem_nao_le_o_historico(cliente, sessao, configs, admin):
+    chamado_id = _abrir(cliente, admin)
+    for novo in ("Em Andamento", "Aguardando", "Em Andamento", "Resolvido"):
+        _mudar(cliente, admin, chamado_id, status=novo)
+    recalcular(sessao)  # o chamado legado do fixture também entra na listagem
+
+    resposta, consultas = _consultas_em(
+        sessao, lambda: cliente.get("/api/v1/chamados/", headers=admin)
+    )
+    assert resposta.status_code == 200
+    assert not any("historico_chamados" in c for c in consultas)
+
+    sessao.expire_all()
+    chamado = sessao.get(Chamado, chamado_id)
+    assert chamado.sla_calculado_em is not None
+    historicos = sessao.query(HistoricoChamado).filter_by(chamado_id=chamado_id).all()
+    config = sessao.get(SLAConfig, "Média")
+
+    # Resolvido: o bloco congelou, então comparar com o histórico independe do
+    # instante exato da requisição.
+    esperado = calcular_sla(chamado, historicos, config)
+    sla = next(c for c in resposta.json() if c["id"] == chamado_id)["sla"]
+    assert sla["minutos_resolucao_consumidos"] == esperado["minutos_resolucao_consumidos"]
+    assert sla["minutos_pausados"] == esperado["minutos_pausados"]
+    assert sla["situacao"] == esperado["situacao"]
+    assert chamado.sla_prazo_resolucao == esperado["prazo_resolucao"]
+
+
+def test_mudar_a_prioridade_recalcula_os_prazos(cliente, sessao, configs, admin):
+    chamado_id = _abrir(cliente, admin)
+    _mudar(cliente, admin, chamado_id, prioridade="Alta")
+
+    sessao.expire_all()
+    chamado = sessao.get(Chamado, chamado_id)
+    config = sessao.get(SLAConfig, "Alta")
+    esperado = calcular_sla(chamado, chamado.historicos, config)
+    assert chamado.sla_prazo_resposta == esperado["prazo_resposta"]
+    assert chamado.sla_prazo_resolucao == esperado["prazo_resolucao"]
+
+
+def test_mudar_a_config_recalcula_os_prazos_da_prioridade(cliente, sessao, configs, admin):
+    chamado_id = _abrir(cliente, admin)
+    sessao.expire_all()
+    antes = sessao.get(Chamado, chamado_id).sla_prazo_resolucao
+
+    resposta = cliente.put(
+        "/api/v1/sla-configs/Média",
+        json={"minutos_resposta": 60, "minutos_resolucao": 4800},
+        headers=admin,
+    )
+    assert resposta.status_code == 200
+
+    sessao.expire_all()
+    chamado = sessao.get(Chamado, chamado_id)
+    assert chamado.sla_prazo_resolucao > antes
+    esperado = calcular_sla(chamado, chamado.historicos, sessao.get(SLAConfig, "Média"))
+    assert chamado.sla_prazo_resolucao == esperado["prazo_resolucao"]
+
+
+def test_chamado_legado_usa_o_historico_ate_ser_recalculado(cliente, sessao, configs, admin, dados):
+    """O chamado do fixture nasceu sem snapshot, como os de antes da migration."""
+    legado = sessao.get(Chamado, dados["chamado_id"])
+    assert legado.sla_calculado_em is None
+
+    resposta = cliente.get(f"/api/v1/chamados/{legado.id}", headers=admin)
+    assert resposta.json()["sla"] is not None
+
+    assert recalcular(sessao) == 1
+    assert recalcular(sessao) == 0  # idempotente: nada mais a fazer
+
+    sessao.expire_all()
+    legado = sessao.get(Chamado, dados["chamado_id"])
+    assert legado.sla_calculado_em is not None
+    assert legado.sla_prazo_resolucao is not None
+
+
+def test_primeira_transicao_de_um_legado_remonta_o_snapshot(cliente, sessao, configs, admin, dados):
+    _mudar(cliente, admin, dados["chamado_id"], status="Aguardando")
+
+    sessao.expire_all()
+    legado = sessao.get(Chamado, dados["chamado_id"])
+    assert legado.sla_calculado_em is not None
+    assert legado.sla_relogio_parado_em is not None
+    assert legado.sla_respondido_em == legado.sla_relogio_parado_em
@@ -0,0 +1,106 @@
+"""
+Listagem de tarefas recorrentes sem uma consulta por tarefa.
+
+A página sai de um SELECT só, com total de execuções, última execução e os
+nomes de categoria e responsável. O que se mede é o número de comandos: ele
+não pode crescer com o tamanho da página.
+"""
+
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import event
+
+from app.models import TarefaRecorrente, TarefaRecorrenteExecucao
+
+LISTAGEM = "/api/v1/tarefas-recorrentes/"
+
+
+@pytest.fixture
+def tecnico(autenticar, dados):
+    return autenticar(dados["tecnico_id"], "tecnico.teste", "Tecnico")
+
+
+@pytest.fixture
+def espiao(sessao):
+    """Comandos SQL disparados durante o teste."""
+    comandos = []
+
+    def _comando(conn, cursor, statement, *args):
+        comandos.append(statement)
+
+    event.listen(sessao.bind, "before_cursor_execute", _comando)
+    yield comandos
+    event.remove(sessao.bind, "before_cursor_execute", _comando)
+
+
+def _criar_tarefas(sessao, dados, quantas, execucoes_por_tarefa=3):
+    for n in range(quantas):
+        tarefa = TarefaRecorrente(
+            titulo=f"Verificar backup {n}",
+            categoria_id=1,
+            responsavel_id=dados["tecnico_id"],
+            tipo_recorrencia="diaria",
+            intervalo=1,
+            proxima_data=date(2026, 1, 1),
+            prioridade="Média",
+            ativo=True,
+        )
+        sessao.add(tarefa)
+        sessao.flush()
+        for dia in range(1, execucoes_por_tarefa + 1):
+            sessao.add(TarefaRecorrenteExecucao(
+                tarefa_id=tarefa.id,
+                usuario_id=dados["tecnico_id"],
+                realizada_em=datetime(2025, 12, dia, 9, 0),
+            ))
+    sessao.commit()
+
+
+def _contar(cliente, url, tecnico, espiao):
+    """Comandos de um GET já com os caches do usuário aquecidos pelo anterior."""
+    cliente.get(url, headers=tecnico)
+    espiao.clear()
+    resposta = cliente.get(url, headers=tecnico)
+    assert resposta.status_code == 200, resposta.text
+    return len(espiao), resposta.json()
+
+
+def test_numero_de_comandos_nao_cresce_com_a_pagina(cliente, sessao, dados, tecnico, espiao):
+    _criar_tarefas(sessao, dados, 1)
+    poucas, corpo = _contar(cliente, LISTAGEM, tecnico, espiao)
+    assert len(corpo) == 2  # a do conftest e a nova
+
+    _criar_tarefas(sessao, dados, 25)
+    muitas, corpo = _contar(cliente, LISTAGEM, tecnico, espiao)
+    assert len(corpo) == 27
+    assert muitas == poucas
+
+
+def test_agregados_e_nomes_vem_na_mesma_linha(cliente, sessao, dados, tecnico):
+    _criar_tarefas(sessao, dados, 2, execucoes_por_tarefa=4)
+
+    corpo = cliente.get(LISTAGEM, headers=tecnico).json()
+    por_titulo = {t["titulo"]: t for t in corpo}
+
+    nova = por_titulo["Verificar backup 0"]
+    assert nova["total_execucoes"] == 4
+    assert nova["ultima_execucao"].startswith("2025-12-04T09:00")
+    assert nova["responsavel_nome"] == "tecnico.teste"
+    assert nova["categoria_nome"] is not None
+
+    # Tarefa sem execuções nem responsável: zero e nulos, não some da lista.
+    antiga = next(t for t in corpo if t["id"] == dados["tarefa_id"])
+    assert antiga["total_execucoes"] == 0
+    assert antiga["ultima_execucao"] is None
+
+
+def test_busca_por_id_usa_a_mesma_consulta(cliente, sessao, dados, tecnico):
+    _criar_tarefas(sessao, dados, 1, execucoes_por_tarefa=2)
+    listada = cliente.get(LISTAGEM, headers=tecnico).json()
+    nova = next(t for t in listada if t["id"] != dados["tarefa_id"])
+
+    buscada = cliente.get(f"/api/v1/tarefas-recorrentes/{nova['id']}", headers=tecnico).json()
+    assert buscada == nova
+    assert cliente.get("/api/v1/tarefas-recorrentes/999999", headers=tecnico).status_code == 404
+
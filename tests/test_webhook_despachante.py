@@ -0,0 +1,227 @@
+"""
+Saída de webhooks (outbox) e despachante.
+
+Aqui o n8n é um servidor HTTP de verdade, local, que responde com o status e
+o atraso que o teste escolher. É o que permite medir o que interessa: com o
+n8n demorando, a abertura do chamado não demora junto, e o que ele recebe é o
+que a rota enfileirou.
+"""
+
+import json
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from sqlalchemy.orm import sessionmaker
+
+from app.api.endpoints import chamados as rota_de_chamados
+from app.core.config import settings
+from app.models import WebhookPendente
+from app.services.webhook_service import DespachanteDeWebhooks, despachar_pendentes
+
+
+class _N8nLocal:
+    """Servidor de mentira: guarda o que recebe e responde `status` após `atraso` segundos."""
+
+    def __init__(self):
+        self.recebidos = []
+        self.status = 200
+        self.atraso = 0.0
+        n8n = self
+
+        class _Tratador(BaseHTTPRequestHandler):
+            def do_POST(self):
+                corpo = self.rfile.read(int(self.headers["Content-Length"]))
+                n8n.recebidos.append({"corpo": json.loads(corpo), "headers": dict(self.headers)})
+                time.sleep(n8n.atraso)
+                self.send_response(n8n.status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", 0), _Tratador)
+        self.url = f"http://127.0.0.1:{self._servidor.server_address[1]}/webhook/teste"
+        self._thread = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._thread.start()
+
+    def fechar(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+
+@pytest.fixture
+def n8n(monkeypatch):
+    servidor = _N8nLocal()
+    monkeypatch.setattr(settings, "WEBHOOK_TECNICO_URL", servidor.url)
+    monkeypatch.setattr(settings, "WEBHOOK_TIMEOUT_SEGUNDOS", 5)
+    yield servidor
+    servidor.fechar()
+
+
+@pytest.fixture
+def fabrica(sessao):
+    """Sessões novas sobre o mesmo banco do teste, como o despachante abre as suas."""
+    return sessionmaker(bind=sessao.bind, autoflush=False)
+
+
+@pytest.fixture
+def http():
+    with requests.Session() as sessao_http:
+        yield sessao_http
+
+
+@pytest.fixture
+def tecnico(autenticar, dados):
+    return autenticar(dados["tecnico_id"], "tecnico.teste", "Tecnico")
+
+
+def _abrir(cliente, dados, headers):
+    return cliente.post(
+        "/api/v1/chamados/",
+        json={"titulo": "Monitor piscando", "descricao": "Desde ontem, mesmo com outro cabo", "solicitante_id": dados["comum_id"]},
+        headers=headers,
+    )
+
+
+def _pendentes(sessao):
+    sessao.expire_all()
+    return sessao.query(WebhookPendente).order_by(WebhookPendente.id).all()
+
+
+def _vencer_todas(sessao):
+    for linha in _pendentes(sessao):
+        linha.proxima_tentativa_em -= timedelta(days=1)
+    sessao.commit()
+
+
+def test_abertura_nao_espera_o_n8n(cliente, sessao, dados, tecnico, n8n, fabrica, http):
+    n8n.atraso = 1.5
+
+    inicio = time.perf_counter()
+    resposta = _abrir(cliente, dados, tecnico)
+    duracao = time.perf_counter() - inicio
+
+    assert resposta.status_code == 201, resposta.text
+    # Com o POST dentro da requisição, seriam no mínimo 1,5 s.
+    assert duracao < 0.75
+    assert n8n.recebidos == []
+    (pendente,) = _pendentes(sessao)
+    assert json.loads(pendente.payload)["protocolo"] == resposta.json()["protocolo"]
+
+    # A demora agora é do despachante.
+    inicio = time.perf_counter()
+    assert despachar_pendentes(fabrica, http) == 1
+    assert time.perf_counter() - inicio >= 1.5
+
+
+def test_despachante_entrega_e_apaga(cliente, sessao, dados, tecnico, n8n, fabrica, http, monkeypatch):
+    monkeypatch.setattr(settings, "WEBHOOK_TECNICO_TOKEN", "segredo-do-fluxo")
+    protocolo = _abrir(cliente, dados, tecnico).json()["protocolo"]
+
+    assert despachar_pendentes(fabrica, http) == 1
+
+    (recebido,) = n8n.recebidos
+    assert recebido["corpo"] == {
+        "protocolo": protocolo,
+        "titulo": "Monitor piscando",
+        "tecnico": "Sem atribuição",
+        "acao": "criado",
+    }
+    assert recebido["headers"]["X-Webhook-Token"] == "segredo-do-fluxo"
+    assert _pendentes(sessao) == []
+    # Fila vazia: a passada seguinte não faz nada.
+    assert despachar_pendentes(fabrica, http) == 0
+
+
+def test_atribuicao_de_tecnico_enfileira_com_o_nome(cliente, sessao, dados, tecnico, n8n, fabrica, http):
+    url = f"/api/v1/chamados/{dados['chamado_id']}"
+    resposta = cliente.put(url, json={"tecnico_responsavel_id": dados["tecnico_id"]}, headers=tecnico)
+    assert resposta.status_code == 200, resposta.text
+
+    # Mesmo técnico de novo não é atribuição nova.
+    cliente.put(url, json={"tecnico_responsavel_id": dados["tecnico_id"]}, headers=tecnico)
+
+    (pendente,) = _pendentes(sessao)
+    assert json.loads(pendente.payload)["acao"] == "atribuido"
+    assert json.loads(pendente.payload)["tecnico"] == "tecnico.teste"
+
+
+def test_escrita_desfeita_nao_deixa_notificacao(cliente, sessao, dados, tecnico, n8n, monkeypatch):
+    def _quebrar(*args, **kwargs):
+        raise RuntimeError("queda depois de enfileirar")
+
+    monkeypatch.setattr(rota_de_chamados, "registrar_historico", _quebrar)
+    with pytest.raises(RuntimeError):
+        cliente.put(
+            f"/api/v1/chamados/{dados['chamado_id']}",
+            json={"tecnico_responsavel_id": dados["tecnico_id"], "status": "Em Andamento"},
+            headers=tecnico,
+        )
+
+    sessao.rollback()
+    assert _pendentes(sessao) == []
+
+
+def test_falha_reagenda_com_espera_crescente_e_depois_desiste(
+    cliente, sessao, dados, tecnico, n8n, fabrica, http, monkeypatch
+):
+    monkeypatch.setattr(settings, "WEBHOOK_MAX_TENTATIVAS", 3)
+    n8n.status = 500
+    _abrir(cliente, dados, tecnico)
+
+    esperas = []
+    for tentativa in (1, 2):
+        assert despachar_pendentes(fabrica, http) == 1
+        (pendente,) = _pendentes(sessao)
+        assert pendente.situacao == "pendente"
+        assert pendente.tentativas == tentativa
+        assert pendente.ultimo_erro == "status 500"
+        esperas.append(pendente.proxima_tentativa_em)
+        # Ainda não venceu: a passada seguinte não tenta de novo.
+        assert despachar_pendentes(fabrica, http) == 0
+        _vencer_todas(sessao)
+
+    # Segunda espera é o dobro da primeira (30 s, 60 s), descontado o dia vencido.
+    assert esperas[1] + timedelta(days=1) - esperas[0] > timedelta(seconds=25)
+
+    assert despachar_pendentes(fabrica, http) == 1
+    (morto,) = _pendentes(sessao)
+    assert morto.situacao == "morto"
+    assert morto.tentativas == 3
+    assert len(n8n.recebidos) == 3
+
+    # Morto não volta para a fila sozinho.
+    _vencer_todas(sessao)
+    assert despachar_pendentes(fabrica, http) == 0
+
+
+def test_n8n_fora_do_ar_vira_nova_tentativa(cliente, sessao, dados, tecnico, n8n, fabrica, http):
+    _abrir(cliente, dados, tecnico)
+    n8n.fechar()
+
+    assert despachar_pendentes(fabrica, http) == 1
+    (pendente,) = _pendentes(sessao)
+    assert pendente.tentativas == 1
+    assert pendente.ultimo_erro == "ConnectionError"
+
+
+def test_thread_do_despachante_drena_a_fila(cliente, sessao, dados, tecnico, n8n, fabrica):
+    for _ in range(3):
+        _abrir(cliente, dados, tecnico)
+
+    despachante = DespachanteDeWebhooks(fabrica, intervalo_segundos=0.05)
+    despachante.iniciar()
+    try:
+        limite = time.monotonic() + 5
+        while len(n8n.recebidos) < 3 and time.monotonic() < limite:
+            time.sleep(0.02)
+    finally:
+        despachante.parar(timeout=5)
+
+    assert len(n8n.recebidos) == 3
+    assert _pendentes(sessao) == []
@@ -1,9 +1,9 @@
 """
 Testes do envio de webhook para o n8n.
 
-Nenhuma requisição real sai daqui: `requests.post` é substituído. O ponto
+Nenhuma requisição real sai daqui: quem faz o POST é substituído. O ponto
 central é que o webhook é acessório — se ele falhar, a criação do chamado não
-pode falhar junto.
+pode falhar junto. A fila e o despachante estão em test_webhook_despachante.py.
 """
 
 from types import SimpleNamespace
@@ -29,22 +29,39 @@ class _ConsultaFalsa:
 class _BancoFalso:
     def __init__(self, usuario=None):
         self._usuario = usuario
+        self.adicionados = []
 
     def query(self, *args, **kwargs):
         return _ConsultaFalsa(self._usuario)
 
+    def add(self, objeto):
+        self.adicionados.append(objeto)
 
-@pytest.fixture
-def capturar_post(monkeypatch):
-    """Substitui requests.post e devolve a lista de chamadas registradas."""
-    chamadas = []
 
-    def falso_post(url, json=None, timeout=None, headers=None):
-        chamadas.append({"url": url, "json": json, "timeout": timeout, "headers": headers})
-        return SimpleNamespace(status_code=200)
+class _HttpFalso:
+    """Faz as vezes da `requests.Session` do despachante."""
+
+    def __init__(self, status_code=200, excecao=None):
+        self.chamadas = []
+        self._status_code = status_code
+        self._excecao = excecao
+
+    def post(self, url, json=None, timeout=None, headers=None):
+        self.chamadas.append({"url": url, "json": json, "timeout": timeout, "headers": headers})
+        if self._excecao is not None:
+            raise self._excecao
+        return SimpleNamespace(status_code=self._status_code)
+
 
-    monkeypatch.setattr(webhook_service.requests, "post", falso_post)
-    return chamadas
+def _payload(protocolo="CH-1"):
+    return {"protocolo": protocolo, "titulo": "Título", "tecnico": "Sem atribuição", "acao": "criado"}
+
+
+def _entregar(http=None):
+    """Entrega um payload qualquer; devolve as chamadas registradas."""
+    http = http or _HttpFalso()
+    webhook_service.entregar_webhook(_payload(), http)
+    return http.chamadas
 
 
 @pytest.fixture
@@ -52,79 +69,88 @@ def url_configurada(monkeypatch):
     monkeypatch.setattr(settings, "WEBHOOK_TECNICO_URL", "https://exemplo.invalido/webhook/abc")
 
 
-def test_sem_url_configurada_nao_envia(monkeypatch, capturar_post):
+def test_sem_url_configurada_nao_enfileira(monkeypatch):
     """
     Padrão desligado: desenvolvimento e testes não podem disparar notificação
     no fluxo de produção por descuido.
     """
     monkeypatch.setattr(settings, "WEBHOOK_TECNICO_URL", "")
-    webhook_service.enviar_webhook_tecnico(_BancoFalso(), "CH-1", "Título")
-    assert capturar_post == []
+    banco = _BancoFalso()
+    webhook_service.enfileirar_webhook_tecnico(banco, "CH-1", "Título")
+    assert banco.adicionados == []
+
+
+def test_com_url_enfileira_sem_enviar(url_configurada):
+    banco = _BancoFalso()
+    webhook_service.enfileirar_webhook_tecnico(banco, "CH-1", "Título")
 
+    (pendente,) = banco.adicionados
+    assert pendente.situacao == "pendente"
+    assert pendente.tentativas == 0
 
-def test_usa_a_url_e_o_timeout_da_configuracao(capturar_post, url_configurada, monkeypatch):
+
+def test_usa_a_url_e_o_timeout_da_configuracao(url_configurada, monkeypatch):
     monkeypatch.setattr(settings, "WEBHOOK_TIMEOUT_SEGUNDOS", 9)
-    webhook_service.enviar_webhook_tecnico(_BancoFalso(), "CH-1", "Título")
+    chamadas = _entregar()
 
-    assert len(capturar_post) == 1
-    assert capturar_post[0]["url"] == "https://exemplo.invalido/webhook/abc"
-    assert capturar_post[0]["timeout"] == 9
+    assert len(chamadas) == 1
+    assert chamadas[0]["url"] == "https://exemplo.invalido/webhook/abc"
+    assert chamadas[0]["timeout"] == 9
 
 
-def test_sem_tecnico_envia_sem_atribuicao(capturar_post, url_configurada):
-    webhook_service.enviar_webhook_tecnico(_BancoFalso(), "CH-1", "Título", tecnico_id=None)
-    assert capturar_post[0]["json"]["tecnico"] == "Sem atribuição"
+def test_sem_tecnico_envia_sem_atribuicao():
+    payload = webhook_service.montar_payload(_BancoFalso(), "CH-1", "Título", tecnico_id=None)
+    assert payload["tecnico"] == "Sem atribuição"
 
 
-def test_com_tecnico_envia_o_nome(capturar_post, url_configurada):
+def test_com_tecnico_envia_o_nome():
     banco = _BancoFalso(usuario=SimpleNamespace(nome="joao.silva"))
-    webhook_service.enviar_webhook_tecnico(banco, "CH-1", "Título", tecnico_id=7)
-    assert capturar_post[0]["json"]["tecnico"] == "joao.silva"
+    payload = webhook_service.montar_payload(banco, "CH-1", "Título", tecnico_id=7)
+    assert payload["tecnico"] == "joao.silva"
 
 
-def test_tecnico_inexistente_cai_no_padrao(capturar_post, url_configurada):
-    webhook_service.enviar_webhook_tecnico(_BancoFalso(usuario=None), "CH-1", "Título", tecnico_id=99)
-    assert capturar_post[0]["json"]["tecnico"] == "Sem atribuição"
+def test_tecnico_inexistente_cai_no_padrao():
+    payload = webhook_service.montar_payload(_BancoFalso(usuario=None), "CH-1", "Título", tecnico_id=99)
+    assert payload["tecnico"] == "Sem atribuição"
 
 
-def test_payload_tem_o_formato_esperado(capturar_post, url_configurada):
-    webhook_service.enviar_webhook_tecnico(_BancoFalso(), "CH-42", "Impressora", acao="atribuido")
-    assert capturar_post[0]["json"] == {
+def test_payload_tem_o_formato_esperado(url_configurada):
+    payload = webhook_service.montar_payload(_BancoFalso(), "CH-42", "Impressora", acao="atribuido")
+    assert payload == {
         "protocolo": "CH-42",
         "titulo": "Impressora",
         "tecnico": "Sem atribuição",
         "acao": "atribuido",
     }
 
+    # E é exatamente isso que vai no corpo do POST.
+    http = _HttpFalso()
+    webhook_service.entregar_webhook(payload, http)
+    assert http.chamadas[0]["json"] == payload
+
 
-def test_sem_token_nao_envia_header(capturar_post, url_configurada, monkeypatch):
+def test_sem_token_nao_envia_header(url_configurada, monkeypatch):
     """
     Padrão sem header: é o que permite subir o backend antes de ligar o
     Header Auth no n8n, sem janela de falha.
     """
     monkeypatch.setattr(settings, "WEBHOOK_TECNICO_TOKEN", "")
-    webhook_service.enviar_webhook_tecnico(_BancoFalso(), "CH-1", "Título")
+    assert _entregar()[0]["headers"] == {}
 
-    assert capturar_post[0]["headers"] == {}
 
-
-def test_com_token_envia_o_header(capturar_post, url_configurada, monkeypatch):
+def test_com_token_envia_o_header(url_configurada, monkeypatch):
     monkeypatch.setattr(settings, "WEBHOOK_TECNICO_TOKEN", "segredo-do-fluxo")
-    webhook_service.enviar_webhook_tecnico(_BancoFalso(), "CH-1", "Título")
-
-    assert capturar_post[0]["headers"] == {"X-Webhook-Token": "segredo-do-fluxo"}
+    assert _entregar()[0]["headers"] == {"X-Webhook-Token": "segredo-do-fluxo"}
 
 
-def test_nome_do_header_e_configuravel(capturar_post, url_configurada, monkeypatch):
+def test_nome_do_header_e_configuravel(url_configurada, monkeypatch):
     """O nome do header precisa bater com o que for cadastrado no n8n."""
     monkeypatch.setattr(settings, "WEBHOOK_TECNICO_TOKEN", "segredo-do-fluxo")
     monkeypatch.setattr(settings, "WEBHOOK_TECNICO_HEADER", "X-Outro-Nome")
-    webhook_service.enviar_webhook_tecnico(_BancoFalso(), "CH-1", "Título")
+    assert _entregar()[0]["headers"] == {"X-Outro-Nome": "segredo-do-fluxo"}
 
-    assert capturar_post[0]["headers"] == {"X-Outro-Nome": "segredo-do-fluxo"}
 
-
-def test_token_nunca_aparece_no_log(caplog, capturar_post, url_configurada, monkeypatch):
+def test_token_nunca_aparece_no_log(caplog, url_configurada, monkeypatch):
     """
     O token vale como credencial, tanto quanto a URL: não pode acabar no log
     do container.
@@ -132,7 +158,7 @@ def test_token_nunca_aparece_no_log(caplog, capturar_post, url_configurada, monk
     monkeypatch.setattr(settings, "WEBHOOK_TECNICO_TOKEN", "segredo-do-fluxo")
 
     with caplog.at_level("DEBUG"):
-        webhook_service.enviar_webhook_tecnico(_BancoFalso(), "CH-1", "Título")
+        _entregar()
 
     assert "segredo-do-fluxo" not in caplog.text
 
@@ -143,15 +169,12 @@ def test_recusa_por_autenticacao_e_registrada(monkeypatch, url_configurada, capl
     n8n exigindo Header Auth com o backend sem o segredo: o chamado é criado e
     ninguém é notificado. O log é o único lugar onde isso aparece.
     """
-    def falso_post(*args, **kwargs):
-        return SimpleNamespace(status_code=status_recusado)
-
-    monkeypatch.setattr(webhook_service.requests, "post", falso_post)
     monkeypatch.setattr(settings, "WEBHOOK_TECNICO_TOKEN", "segredo-do-fluxo")
 
     with caplog.at_level("ERROR"):
-        webhook_service.enviar_webhook_tecnico(_BancoFalso(), "CH-1", "Título")
+        erro = webhook_service.entregar_webhook(_payload(), _HttpFalso(status_code=status_recusado))
 
+    assert erro == f"status {status_recusado}"
     assert "WEBHOOK_TECNICO_TOKEN" in caplog.text
     assert "segredo-do-fluxo" not in caplog.text
 
@@ -160,36 +183,41 @@ def test_recusa_por_autenticacao_e_registrada(monkeypatch, url_configurada, capl
     "excecao",
     [
         requests.exceptions.Timeout("estourou"),
-        requests.exceptions.ConnectionError("sem rota"),
+        requests.exceptions.ConnectionError("sem rota para https://exemplo.invalido/webhook/abc"),
         ValueError("qualquer outra coisa"),
     ],
 )
-def test_falha_no_envio_nao_propaga(monkeypatch, url_configurada, excecao):
+def test_falha_no_envio_nao_propaga(url_configurada, excecao):
     """
-    O webhook é acessório: se o n8n estiver fora do ar, a abertura do chamado
-    tem de continuar funcionando.
+    O webhook é acessório: se o n8n estiver fora do ar, a entrega vira nova
+    tentativa, e o motivo gravado não carrega a URL.
     """
-    def falso_post(*args, **kwargs):
-        raise excecao
+    erro = webhook_service.entregar_webhook(_payload(), _HttpFalso(excecao=excecao))
+    assert erro
+    assert "exemplo.invalido" not in erro
 
-    monkeypatch.setattr(webhook_service.requests, "post", falso_post)
-    webhook_service.enviar_webhook_tecnico(_BancoFalso(), "CH-1", "Título")
 
+def test_status_de_erro_nao_propaga(url_configurada):
+    assert webhook_service.entregar_webhook(_payload(), _HttpFalso(status_code=500)) == "status 500"
 
-def test_status_de_erro_nao_propaga(monkeypatch, url_configurada):
-    def falso_post(*args, **kwargs):
-        return SimpleNamespace(status_code=500)
 
-    monkeypatch.setattr(webhook_service.requests, "post", falso_post)
-    webhook_service.enviar_webhook_tecnico(_BancoFalso(), "CH-1", "Título")
+def test_2xx_conta_como_entregue(url_configurada):
+    assert webhook_service.entregar_webhook(_payload(), _HttpFalso(status_code=204)) is None
 
 
-def test_url_nunca_aparece_no_log(caplog, capturar_post, url_configurada):
+def test_url_nunca_aparece_no_log(caplog, url_configurada):
     """
     A URL contém o identificador do fluxo no n8n e vale como credencial —
     não pode acabar no log do container.
     """
     with caplog.at_level("DEBUG"):
-        webhook_service.enviar_webhook_tecnico(_BancoFalso(), "CH-1", "Título")
+        _entregar()
+        _entregar(_HttpFalso(excecao=requests.exceptions.ConnectionError("https://exemplo.invalido/webhook/abc")))
 
     assert "exemplo.invalido" not in caplog.text
+
+
+def test_espera_dobra_ate_o_teto():
+    esperas = [webhook_service.espera_ate_a_proxima(n).total_seconds() for n in range(1, 10)]
+    assert esperas[:4] == [30, 60, 120, 240]
+    assert esperas[-1] == webhook_service.ESPERA_MAXIMA_SEGUNDOS